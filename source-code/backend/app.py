@@ -1,66 +1,99 @@
-from typing import Dict, List, Literal, Optional
+import hmac
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Dict, List, Literal, Optional, Union
 
-import joblib
 import numpy as np
-import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
 from pydantic import BaseModel, Field
-from services.model_service import ModelService
 
-# ==================== CONFIGURATION ====================
-MODEL_SVM_PATH = "../model_v2/svm.pkl"
-MODEL_RF_PATH = "../model_v2/best_model_random_forest.pkl"
-MODEL_DT_PATH = "../model_v2/decision_tree_best.pkl"
-
-# Encoding maps
-ENCODING_MAPS = {
-    "type_of_breast_surgery": {"BREAST CONSERVING": 0, "MASTECTOMY": 1},
-    "cancer_type": {"Breast Cancer": 0, "Breast Sarcoma": 1},
-    "cellularity": {"High": 0, "Low": 1, "Moderate": 2},
-    "pam50_+_claudin-low_subtype": {
-        "Basal": 0,
-        "Her2": 1,
-        "LumA": 2,
-        "LumB": 3,
-        "NC": 4,
-        "Normal": 5,
-        "claudin-low": 6,
-    },
-    "her2_status": {"Negative": 0, "Positive": 1},
-    "pr_status": {"Negative": 0, "Positive": 1},
-}
-
-# Output decoding
-CANCER_TYPE_DETAILED = {
-    0: "Breast",
-    1: "Breast Invasive Ductal Carcinoma",
-    2: "Breast Invasive Lobular Carcinoma",
-    3: "Breast Invasive Mixed Mucinous Carcinoma",
-    4: "Breast Mixed Ductal and Lobular Carcinoma",
-}
-
-# Feature order (exclude cancer_type_detailed as it's the target)
-FEATURE_ORDER = [
-    "type_of_breast_surgery",
-    "cancer_type",
-    "cellularity",
-    "chemotherapy",
-    "pam50_+_claudin-low_subtype",
-    "neoplasm_histologic_grade",
-    "her2_status",
-    "hormone_therapy",
-    "lymph_nodes_examined_positive",
-    "nottingham_prognostic_index",
-    "pr_status",
-    "radio_therapy",
-]
+from config import (
+    MODEL_PATHS,
+    MODEL_MMAP_MODE,
+    LAZY_MODEL_LOADING,
+    MODEL_REGISTRY_DIR,
+    MODEL_VERSION,
+    MODEL_ROLLBACK_VERSIONS,
+    ADMIN_API_TOKEN,
+    MAX_BATCH_SIZE,
+    INFERENCE_EXECUTOR,
+    INFERENCE_WORKERS,
+    INFERENCE_QUEUE_SIZE,
+    INFERENCE_RETRY_AFTER,
+    PARALLEL_MODELS,
+    MODEL_TIMEOUT,
+    MODEL_TIMEOUT_PER_ROW_MS,
+    MODEL_SCHEDULER,
+    CIRCUIT_BREAKER_WINDOW,
+    CIRCUIT_BREAKER_MIN_CALLS,
+    CIRCUIT_BREAKER_ERROR_RATE,
+    CIRCUIT_BREAKER_COOLDOWN,
+    OVERLOAD_PENDING_JOBS,
+    OVERLOAD_FALLBACK_MODELS,
+    OVERLOAD_LATENCY_BUDGET_MS,
+    DERIVE_LABEL_FROM_PROBA,
+    MICRO_BATCHING,
+    MICRO_BATCH_WINDOW_MS,
+    MICRO_BATCH_MAX_SIZE,
+    REQUEST_DEDUP,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL,
+    PREDICTION_CACHE_MAX_ROWS,
+    COMPILED_MODELS,
+    ATTRIBUTION_BACKGROUND_SIZE,
+    TREE_LOOKUP_TABLES,
+    TREE_LOOKUP_TABLE_MAX_MB,
+    FAST_RESPONSES,
+    ENCODING_MAPS,
+    CANCER_TYPE_DETAILED,
+    FEATURE_ORDER,
+)
+from schemas import PatientInput, feature_constraints
+from services.arrow_batch import ARROW_STREAM_MEDIA_TYPE, ArrowBatchCodec, pa
+from services.batching import MicroBatcher
+from services.encoding import FeatureEncoder
+from services.inference_executor import InferenceExecutor, InferenceQueueFullError
+from services.metrics import MetricsMiddleware, MetricsRegistry, mark_stage
+from services.model_loader import load_model_files, process_rss_bytes
+from services.model_registry import (
+    ModelRegistry,
+    ModelRegistryError,
+    UnknownModelVersionError,
+)
+from services.model_service import ModelService
+from services.prediction_cache import PredictionCache
+from services.scheduler import ModelScheduler, ModelsUnavailableError
+from services.shared_models import worker_service
+from services.serialization import (
+    JSON_MEDIA_TYPE,
+    PROBABILITIES_DICT,
+    ResponseSerializer,
+    dumps,
+)
+from services.single_flight import SingleFlight
+from services.tree_table import TreeTableBuilder, feature_domains
 
 # ==================== FASTAPI APP ====================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    inference_executor.shutdown(wait=False)
+    if model_fanout_executor is not None:
+        model_fanout_executor.shutdown(wait=False)
+
+
 app = FastAPI(
     title="Breast Cancer Type Prediction API",
     description="API dự đoán loại ung thư vú dựa trên thông tin lâm sàng",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -75,109 +108,128 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics cho /metrics: latency theo route/stage, lỗi của từng model, cache
+metrics_registry = MetricsRegistry()
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
 # Load models at startup
-models = {}
 model_service = None
+# Thời gian load và bộ nhớ của từng model (hiển thị ở /model-info)
+model_loading = {"startup_seconds": None, "models": {}}
+
+# Executor dùng chung cho fan-out models (tách biệt với inference executor để
+# job inference không phải chờ chính pool của nó). Model quá MODEL_TIMEOUT vẫn
+# giữ thread của pool này tới khi chạy xong, dù slot của inference executor đã
+# được trả
+model_fanout_executor = (
+    ThreadPoolExecutor(
+        max_workers=3 * INFERENCE_WORKERS, thread_name_prefix="model-fanout"
+    )
+    if PARALLEL_MODELS
+    else None
+)
 
+# Registry các phiên bản models; ModelService được gắn vào sau khi khởi tạo
+model_registry = ModelRegistry(
+    MODEL_REGISTRY_DIR,
+    {name: os.path.basename(path) for name, path in MODEL_PATHS.items()},
+    model_service=None,
+    mmap_mode=MODEL_MMAP_MODE,
+    keep_previous=MODEL_ROLLBACK_VERSIONS,
+)
+# Phiên bản khi không dùng registry: tên thư mục chứa MODEL_PATHS
+LEGACY_MODEL_VERSION = os.path.basename(os.path.dirname(MODEL_PATHS["SVM"]))
 
-def load_models():
-    """Load tất cả models và khởi tạo ModelService"""
-    global models, model_service
 
-    # Load SVM model
-    try:
-        svm_model = joblib.load(MODEL_SVM_PATH)
-        models["SVM"] = svm_model
-        print(f"✅ SVM Model loaded successfully from {MODEL_SVM_PATH}")
-    except Exception as e:
-        print(f"❌ Error loading SVM model: {e}")
+def resolve_model_paths(version: Optional[str] = None):
+    """
+    Xác định artifacts cần load
 
-    # Load Random Forest model
-    try:
-        rf_model = joblib.load(MODEL_RF_PATH)
-        models["Random Forest"] = rf_model
-        print(f"✅ Random Forest Model loaded successfully from {MODEL_RF_PATH}")
-    except Exception as e:
-        print(f"❌ Error loading Random Forest model: {e}")
+    Returns:
+        Tuple (paths, version): phiên bản được chọn (hoặc mới nhất) trong
+        registry, hoặc MODEL_PATHS nếu registry không có phiên bản nào
+    """
+    version = version or model_registry.latest_version()
+    if version is None:
+        return MODEL_PATHS, LEGACY_MODEL_VERSION
+    return model_registry.version_paths(version), version
 
-    # Load Decision Tree model
-    try:
-        dt_model = joblib.load(MODEL_DT_PATH)
-        models["Decision Tree"] = dt_model
-        print(f"✅ Decision Tree Model loaded successfully from {MODEL_DT_PATH}")
-    except Exception as e:
-        print(f"❌ Error loading Decision Tree model: {e}")
+
+def load_models(version: Optional[str] = None):
+    """
+    Load tất cả models và khởi tạo ModelService
+
+    Gọi lại hàm này sẽ load lại artifacts từ disk và thay models trong
+    ModelService hiện có (prediction cache được xoá tự động).
+    """
+    global model_service
+
+    paths, version = resolve_model_paths(version)
+
+    started = time.perf_counter()
+    loaded, load_infos = load_model_files(
+        paths, mmap_mode=MODEL_MMAP_MODE, lazy=LAZY_MODEL_LOADING
+    )
+    model_loading["startup_seconds"] = time.perf_counter() - started
+    model_loading["models"] = load_infos
+
+    for name, info in load_infos.items():
+        if info.error is not None:
+            print(f"❌ Error loading {name} model: {info.error}")
+            metrics_registry.counter(
+                "model_load_errors", "Số lần load model lỗi", model=name
+            ).inc()
+        elif info.loaded:
+            print(
+                f"✅ {name} Model loaded successfully from {info.path} "
+                f"({info.load_seconds:.3f}s)"
+            )
+        else:
+            print(f"✅ {name} Model registered for lazy loading from {info.path}")
 
     # Initialize ModelService nếu có ít nhất 1 model
-    if models:
+    if not loaded:
+        print("❌ No models loaded. ModelService not initialized.")
+        return
+
+    if model_service is None:
         model_service = ModelService(
-            models=models, cancer_type_mapping=CANCER_TYPE_DETAILED
+            models=loaded,
+            cancer_type_mapping=CANCER_TYPE_DETAILED,
+            executor=model_fanout_executor,
+            model_timeout=MODEL_TIMEOUT,
+            model_timeout_per_row=MODEL_TIMEOUT_PER_ROW_MS / 1e3,
+            derive_label_from_proba=DERIVE_LABEL_FROM_PROBA,
+            feature_order=FEATURE_ORDER,
+            cache=(
+                PredictionCache(
+                    max_size=PREDICTION_CACHE_SIZE,
+                    ttl_seconds=PREDICTION_CACHE_TTL,
+                )
+                if PREDICTION_CACHE_SIZE > 0
+                else None
+            ),
+            cache_max_rows=PREDICTION_CACHE_MAX_ROWS,
+            version=version,
+            compiled_models=COMPILED_MODELS,
+            metrics=metrics_registry,
+            table_builder=tree_table_builder,
+            attribution_background=ATTRIBUTION_BACKGROUND_SIZE,
+            scheduler=model_scheduler,
         )
-        print(f"✅ ModelService initialized with {len(models)} model(s)")
+        model_registry.model_service = model_service
+        print(f"✅ ModelService initialized with {len(loaded)} model(s) ({version})")
     else:
-        print("❌ No models loaded. ModelService not initialized.")
+        model_service.reload_models(loaded, version)
+        print(f"✅ ModelService reloaded with {len(loaded)} model(s) ({version})")
 
 
-# Load models at startup
-load_models()
-
-# Backward compatibility: giữ model variable cho endpoint /predict cũ
-model = models.get("SVM", None)
+def active_models() -> Dict[str, object]:
+    """Models của phiên bản đang active (rỗng nếu chưa load được)"""
+    return model_service.models if model_service is not None else {}
 
 
 # ==================== PYDANTIC MODELS ====================
-class PatientInput(BaseModel):
-    type_of_breast_surgery: Literal["BREAST CONSERVING", "MASTECTOMY"] = Field(
-        ..., description="Loại phẫu thuật vú"
-    )
-    cancer_type: Literal["Breast Cancer", "Breast Sarcoma"] = Field(
-        ..., description="Loại ung thư"
-    )
-    cellularity: Literal["High", "Low", "Moderate"] = Field(
-        ..., description="Mật độ tế bào"
-    )
-    chemotherapy: Literal[0, 1] = Field(..., description="Hóa trị (0: No, 1: Yes)")
-    pam50_claudin_low_subtype: Literal[
-        "Basal", "Her2", "LumA", "LumB", "NC", "Normal", "claudin-low"
-    ] = Field(..., alias="pam50_+_claudin-low_subtype", description="PAM50 subtype")
-
-    neoplasm_histologic_grade: Literal[1, 2, 3] = Field(
-        ..., description="Độ mô học (1-3)"
-    )
-    her2_status: Literal["Negative", "Positive"] = Field(
-        ..., description="Trạng thái HER2"
-    )
-    hormone_therapy: Literal[0, 1] = Field(
-        ..., description="Liệu pháp hormone (0: No, 1: Yes)"
-    )
-    lymph_nodes_examined_positive: int = Field(
-        ..., ge=0, description="Số hạch bạch huyết dương tính"
-    )
-    nottingham_prognostic_index: float = Field(
-        ..., ge=0, description="Chỉ số tiên lượng Nottingham"
-    )
-    pr_status: Literal["Negative", "Positive"] = Field(..., description="Trạng thái PR")
-    radio_therapy: Literal[0, 1] = Field(..., description="Xạ trị (0: No, 1: Yes)")
-
-    class Config:
-        schema_extra = {
-            "example": {
-                "type_of_breast_surgery": "MASTECTOMY",
-                "cancer_type": "Breast Cancer",
-                "cellularity": "High",
-                "chemotherapy": 1,
-                "pam50_+_claudin-low_subtype": "LumA",
-                "neoplasm_histologic_grade": 3,
-                "her2_status": "Positive",
-                "hormone_therapy": 1,
-                "lymph_nodes_examined_positive": 5,
-                "nottingham_prognostic_index": 5.4,
-                "pr_status": "Positive",
-                "radio_therapy": 1,
-            }
-        }
-
-
 class PredictionOutput(BaseModel):
     cancer_type_detailed: str = Field(..., description="Loại ung thư chi tiết")
     cancer_type_code: int = Field(..., description="Mã số loại ung thư")
@@ -201,23 +253,447 @@ class MultiModelPredictionOutput(BaseModel):
     predictions: List[ModelPredictionResponse] = Field(
         ..., description="Kết quả từ từng model"
     )
+    failed_models: Optional[Dict[str, str]] = Field(
+        None, description="Models bị lỗi hoặc timeout và lý do"
+    )
+
+
+class ModelPredictionArrayResponse(ModelPredictionResponse):
+    """Response cho 1 model prediction với ?probabilities=array"""
+
+    probabilities: Optional[List[float]] = Field(
+        None, description="Xác suất theo thứ tự class trong probability_classes"
+    )
+
+
+class MultiModelPredictionArrayOutput(MultiModelPredictionOutput):
+    """Response cho multi-model prediction với ?probabilities=array"""
+
+    predictions: List[ModelPredictionArrayResponse] = Field(
+        ..., description="Kết quả từ từng model"
+    )
+    probability_classes: Optional[Dict[str, List[str]]] = Field(
+        None,
+        description="Model -> tên class theo thứ tự của probabilities (không có "
+        "trong từng kết quả của batch)",
+    )
+
+
+class PatientBatchInput(BaseModel):
+    """Request cho batch prediction"""
+
+    patients: List[PatientInput] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description="Danh sách thông tin lâm sàng bệnh nhân",
+    )
+
+
+class BatchPredictionOutput(BaseModel):
+    """Response cho batch prediction với SVM model"""
+
+    predictions: List[PredictionOutput] = Field(
+        ..., description="Kết quả theo thứ tự bệnh nhân trong request"
+    )
+
+
+class BatchMultiModelPredictionOutput(BaseModel):
+    """Response cho batch multi-model prediction"""
+
+    results: List[MultiModelPredictionOutput] = Field(
+        ..., description="Kết quả theo thứ tự bệnh nhân trong request"
+    )
+    failed_models: Optional[Dict[str, str]] = Field(
+        None, description="Models bị lỗi hoặc timeout và lý do"
+    )
+
+
+class BatchMultiModelPredictionArrayOutput(BatchMultiModelPredictionOutput):
+    """Response cho batch multi-model prediction với ?probabilities=array"""
+
+    results: List[MultiModelPredictionArrayOutput] = Field(
+        ..., description="Kết quả theo thứ tự bệnh nhân trong request"
+    )
+    probability_classes: Dict[str, List[str]] = Field(
+        ..., description="Model -> tên class theo thứ tự của probabilities"
+    )
+
+
+class AttributionOutput(BaseModel):
+    """Đóng góp của từng feature vào probability của class được predict"""
+
+    method: str = Field(
+        ..., description="tree_path (Decision Tree / Random Forest) hoặc kernel (SVM)"
+    )
+    base_value: float = Field(
+        ..., description="Probability nền của class; base_value + tổng contributions = probability"
+    )
+    contributions: Dict[str, float] = Field(
+        ..., description="Feature -> đóng góp (dương = tăng probability)"
+    )
+
+
+class ModelExplanationResponse(ModelPredictionResponse):
+    """Prediction của 1 model kèm attributions"""
+
+    attributions: Optional[AttributionOutput] = Field(
+        None, description="None nếu model không tính được attributions (xem attribution_errors)"
+    )
+
+
+class ExplanationOutput(BaseModel):
+    """Response cho /explain"""
+
+    predictions: List[ModelExplanationResponse] = Field(
+        ..., description="Kết quả và attributions từ từng model"
+    )
+    failed_models: Optional[Dict[str, str]] = Field(
+        None, description="Models bị lỗi hoặc timeout"
+    )
+    attribution_errors: Optional[Dict[str, str]] = Field(
+        None,
+        description="Models vẫn có prediction nhưng không tính được attributions -> lý do",
+    )
+
+
+class BatchExplanationOutput(BaseModel):
+    """Response cho /explain-batch"""
+
+    results: List[ExplanationOutput] = Field(
+        ..., description="Kết quả theo thứ tự bệnh nhân trong request"
+    )
+    failed_models: Optional[Dict[str, str]] = Field(
+        None, description="Models bị lỗi hoặc timeout"
+    )
+    attribution_errors: Optional[Dict[str, str]] = Field(
+        None,
+        description="Models vẫn có prediction nhưng không tính được attributions -> lý do",
+    )
+
+
+class ConsensusOutput(BaseModel):
+    """Response cho consensus prediction của 1 bệnh nhân"""
+
+    cancer_type_detailed: str = Field(..., description="Loại ung thư theo consensus")
+    cancer_type_code: int = Field(..., description="Mã số loại ung thư")
+    confidence: Optional[float] = Field(
+        None,
+        description="hard: confidence trung bình của các vote cho kết quả; "
+        "soft: probability trung bình của kết quả",
+    )
+    vote_count: int = Field(..., description="Số models vote cho kết quả")
+    total_models: int = Field(..., description="Số models predict thành công")
+    agreement: bool = Field(..., description="True nếu tất cả models đồng ý")
+    votes: Dict[str, int] = Field(..., description="Mã loại ung thư của từng model")
+    probabilities: Optional[Dict[str, float]] = Field(
+        None, description="Xác suất trung bình cho từng class (chỉ có với soft vote)"
+    )
+
+
+class ConsensusPredictionOutput(ConsensusOutput):
+    mode: Literal["hard", "soft"] = Field(..., description="Cách tính consensus")
+    failed_models: Optional[Dict[str, str]] = Field(
+        None, description="Models bị lỗi hoặc timeout và lý do"
+    )
+
+
+class BatchConsensusOutput(BaseModel):
+    """Response cho batch consensus prediction"""
+
+    mode: Literal["hard", "soft"] = Field(..., description="Cách tính consensus")
+    results: List[ConsensusOutput] = Field(
+        ..., description="Kết quả theo thứ tự bệnh nhân trong request"
+    )
+    failed_models: Optional[Dict[str, str]] = Field(
+        None, description="Models bị lỗi hoặc timeout và lý do"
+    )
 
 
 # ==================== HELPER FUNCTIONS ====================
-def encode_input(patient_data: PatientInput) -> pd.DataFrame:
-    """Chuyển đổi input sang format model cần"""
-    data_dict = patient_data.dict(by_alias=True)
+# Encoder compile 1 lần từ ENCODING_MAPS + FEATURE_ORDER, ghi thẳng vào ndarray
+feature_encoder = FeatureEncoder(
+    ENCODING_MAPS,
+    FEATURE_ORDER,
+    attribute_names={
+        field.alias or name: name for name, field in PatientInput.model_fields.items()
+    },
+)
+
+
+# Input/output Arrow của /predict-all-arrow, cùng ràng buộc như PatientInput
+_allowed_values, _minimums, _integer_features = feature_constraints()
+arrow_codec = ArrowBatchCodec(
+    ENCODING_MAPS,
+    FEATURE_ORDER,
+    allowed_values=_allowed_values,
+    minimums=_minimums,
+    integer_features=_integer_features,
+    max_rows=MAX_BATCH_SIZE,
+)
+
+# Bảng tra cứu của TREE_LOOKUP_TABLES, dựng trên miền giá trị của PatientInput
+tree_table_builder = (
+    TreeTableBuilder(
+        feature_domains(
+            FEATURE_ORDER, ENCODING_MAPS, _allowed_values, _minimums, _integer_features
+        ),
+        TREE_LOOKUP_TABLES,
+        max_bytes=int(TREE_LOOKUP_TABLE_MAX_MB * 2**20),
+    )
+    if TREE_LOOKUP_TABLES
+    else None
+)
+
+# Circuit breaker cho từng model và fallback sang OVERLOAD_FALLBACK_MODELS khi
+# queue inference gần đầy, nếu OVERLOAD_PENDING_JOBS > 0 (inference_executor
+# được tạo sau load_models, chỉ được đọc lúc có request). Với executor "process"/"shared", models chạy trong
+# worker process nên không đi qua scheduler này
+model_scheduler = (
+    ModelScheduler(
+        window=CIRCUIT_BREAKER_WINDOW,
+        min_calls=CIRCUIT_BREAKER_MIN_CALLS,
+        error_rate=CIRCUIT_BREAKER_ERROR_RATE,
+        cooldown=CIRCUIT_BREAKER_COOLDOWN,
+        overload=(
+            (lambda: inference_executor.pending >= OVERLOAD_PENDING_JOBS)
+            if OVERLOAD_PENDING_JOBS > 0
+            else None
+        ),
+        fallback_models=OVERLOAD_FALLBACK_MODELS,
+        latency_budget=(
+            OVERLOAD_LATENCY_BUDGET_MS / 1e3 if OVERLOAD_LATENCY_BUDGET_MS > 0 else None
+        ),
+        metrics=metrics_registry,
+    )
+    if MODEL_SCHEDULER
+    else None
+)
+
+# Load models at startup (sau khi có tree_table_builder và model_scheduler)
+load_models(MODEL_VERSION)
+
+# Inference chạy trên executor riêng để không block event loop
+inference_executor = InferenceExecutor(
+    kind=INFERENCE_EXECUTOR,
+    max_workers=INFERENCE_WORKERS,
+    max_queue_size=INFERENCE_QUEUE_SIZE,
+    retry_after=INFERENCE_RETRY_AFTER,
+    model_source=lambda: model_service,
+)
+metrics_registry.gauge(
+    "inference_pending_jobs",
+    "Số job inference đang chạy hoặc đang chờ",
+    lambda: inference_executor.pending,
+)
+metrics_registry.gauge(
+    "inference_rejected_jobs",
+    "Số job bị từ chối vì queue đầy (cộng dồn)",
+    lambda: inference_executor.stats()["rejected"],
+)
+
+# Registry warm up models mới với bệnh nhân mẫu trước khi swap
+model_registry.warmup_X = feature_encoder.encode_records(
+    [PatientInput.Config.schema_extra["example"]]
+)
+
+# Layout JSON của từng model được encode sẵn (xem services/serialization.py)
+response_serializer = ResponseSerializer(CANCER_TYPE_DETAILED)
+
+
+def json_response(body: bytes) -> Response:
+    """Response từ JSON bytes đã ghi sẵn (FastAPI không validate lại)"""
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+
+def encode_input(patient_data: PatientInput) -> np.ndarray:
+    """Chuyển đổi input sang format model cần, shape (1, n_features)"""
+    return feature_encoder.encode(patient_data)
+
+
+def encode_batch(patients: List[PatientInput]) -> np.ndarray:
+    """Encode cả batch thành 1 ma trận NumPy theo FEATURE_ORDER"""
+    return feature_encoder.encode_many(patients)
+
+
+# ==================== INFERENCE JOBS ====================
+# Các job là function cấp module để dùng được với cả process executor
+
+
+def _job_service() -> ModelService:
+    """ModelService cho job: của worker nếu INFERENCE_EXECUTOR=shared"""
+    return worker_service() or model_service
+
+
+def _predict_svm_job(X: np.ndarray) -> int:
+    """Predict với SVM model (endpoint /predict)"""
+    # ModelService dùng fast path 1 lần predict_proba khi SVC có probability=True
+    return _job_service().predict_with_model("SVM", X).cancer_type_code
+
+
+def _predict_all_job(X: np.ndarray):
+    return _job_service().predict_all_with_status(X)
+
+
+def _predict_batch_job(X: np.ndarray):
+    """Kết quả dạng cột của SVM cho cả batch (không qua cache)"""
+    return _job_service().predict_batch_columnar("SVM", X)
+
 
-    # Encode categorical features
-    for feature, mapping in ENCODING_MAPS.items():
-        if feature in data_dict:
-            data_dict[feature] = mapping[data_dict[feature]]
+def _predict_all_batch_job(X: np.ndarray):
+    """Kết quả dạng cột của tất cả models cho cả batch (không qua cache)"""
+    return _job_service().predict_all_batch_columnar(X)
 
-    # Create DataFrame with correct feature order
-    df = pd.DataFrame([data_dict])
-    df = df[FEATURE_ORDER]
 
-    return df
+def _predict_all_columnar_job(X: np.ndarray):
+    """Kết quả dạng cột của tất cả models (cho /predict-all-arrow)"""
+    service = _job_service()
+    batches, failures = service.predict_all_batch_columnar(X)
+    return batches, failures, service.version
+
+
+def _explain_all_job(X: np.ndarray):
+    """Prediction và attributions của tất cả models (cho /explain, /explain-batch)"""
+    return _job_service().explain_batch(X)
+
+
+def _attribution_errors(explanations) -> Optional[Dict[str, str]]:
+    """Models có prediction nhưng không có attributions -> lý do"""
+    errors = {
+        model_name: explanation.error
+        for model_name, explanation in explanations.items()
+        if explanation.error is not None
+    }
+    return errors or None
+
+
+def _predict_svm_rows_job(X: np.ndarray) -> List[int]:
+    """Như _predict_svm_job nhưng cho nhiều dòng (cho micro-batcher)"""
+    return [
+        pred.cancer_type_code
+        for pred in _job_service().predict_batch_with_model("SVM", X)
+    ]
+
+
+def _predict_all_rows_job(X: np.ndarray):
+    """Như _predict_all_job nhưng trả kết quả theo từng dòng (cho micro-batcher)"""
+    rows, failures = _job_service().predict_all_batch_with_status(X)
+    return [(row, failures) for row in rows]
+
+
+def _predict_consensus_job(X: np.ndarray, mode: str = "hard"):
+    """Consensus của tất cả models cho cả batch (vectorize theo dòng)"""
+    service = _job_service()
+    consensus, failures = service.predict_consensus_batch(X, mode)
+    if consensus is None:
+        return None, failures
+    return consensus.to_dicts(service.cancer_type_mapping), failures
+
+
+def _queue_full_error(e: InferenceQueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server đang quá tải, vui lòng thử lại sau",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _no_model_error(
+    failures: Optional[Dict[str, str]], retry_after: Optional[float] = None
+) -> HTTPException:
+    """
+    Không model nào trả kết quả: 503 + Retry-After (giây tới khi hết cooldown)
+    nếu tất cả models bị ngắt (circuit breaker), ngược lại 500; detail kèm lý
+    do của từng model
+    """
+    detail = "Không có model nào predict thành công"
+    if failures:
+        detail += ": " + "; ".join(f"{name}: {reason}" for name, reason in failures.items())
+    if retry_after is not None:
+        return HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    return HTTPException(status_code=500, detail=detail)
+
+
+async def run_inference(job, X: np.ndarray):
+    """
+    Chạy job trên inference executor, trả 503 + Retry-After nếu queue đầy hoặc
+    tất cả models đều bị ngắt
+    """
+    try:
+        return await inference_executor.run(job, X)
+    except InferenceQueueFullError as e:
+        raise _queue_full_error(e)
+    except ModelsUnavailableError as e:
+        raise _no_model_error(e.skipped, e.retry_after)
+
+
+async def run_batched(batcher: Optional[MicroBatcher], job, X: np.ndarray):
+    """
+    Chạy inference cho 1 dòng, qua micro-batcher nếu được bật
+
+    Nếu không bật micro-batching thì chạy job(X) trực tiếp trên executor.
+    """
+    if batcher is None:
+        return await run_inference(job, X)
+    try:
+        return await batcher.submit(X)
+    except InferenceQueueFullError as e:
+        raise _queue_full_error(e)
+    except ModelsUnavailableError as e:
+        raise _no_model_error(e.skipped, e.retry_after)
+
+
+async def run_deduplicated(flight: Optional[SingleFlight], X: np.ndarray, fn, *key):
+    """
+    Await fn(), dùng chung kết quả với request giống hệt đang chạy nếu có
+
+    Key = phiên bản models + vector feature đã encode (+ key, ví dụ mode),
+    nên request đến sau khi swap models không nhận kết quả của models cũ.
+    """
+    if flight is None:
+        return await fn()
+    generation = model_service.model_set.generation
+    return await flight.run((generation, X.dtype.str, X.tobytes(), *key), fn)
+
+
+# Single-flight cho các endpoint 1 bệnh nhân
+predict_flight = None
+predict_all_flight = None
+predict_consensus_flight = None
+if REQUEST_DEDUP:
+    predict_flight = SingleFlight(labels={"endpoint": "/predict"})
+    predict_all_flight = SingleFlight(labels={"endpoint": "/predict-all"})
+    predict_consensus_flight = SingleFlight(labels={"endpoint": "/predict-consensus"})
+    for flight in (predict_flight, predict_all_flight, predict_consensus_flight):
+        metrics_registry.register(flight.executions)
+        metrics_registry.register(flight.collapsed)
+
+
+# Micro-batchers cho /predict và /predict-all
+predict_batcher = None
+predict_all_batcher = None
+if MICRO_BATCHING:
+    predict_batcher = MicroBatcher(
+        _predict_svm_rows_job,
+        runner=inference_executor.run,
+        max_batch_size=MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=MICRO_BATCH_WINDOW_MS,
+        name="predict_batch",
+    )
+    predict_all_batcher = MicroBatcher(
+        _predict_all_rows_job,
+        runner=inference_executor.run,
+        max_batch_size=MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=MICRO_BATCH_WINDOW_MS,
+        name="predict_all_batch",
+    )
+    for batcher in (predict_batcher, predict_all_batcher):
+        metrics_registry.register(batcher.batch_size)
+        metrics_registry.register(batcher.queue_wait)
 
 
 # ==================== API ENDPOINTS ====================
@@ -227,8 +703,10 @@ def read_root():
     return {
         "message": "Breast Cancer Prediction API",
         "status": "running",
-        "models_loaded": list(models.keys()) if models else [],
-        "model_count": len(models),
+        "models_loaded": list(active_models()),
+        "model_count": len(active_models()),
+        "model_version": model_service.version if model_service else None,
+        "inference": inference_executor.stats(),
     }
 
 
@@ -240,67 +718,79 @@ async def predict(patient: PatientInput):
     - **Input**: Thông tin lâm sàng bệnh nhân
     - **Output**: Loại ung thư chi tiết và độ tin cậy
     """
-    if model is None:
+    if "SVM" not in active_models():
         raise HTTPException(status_code=500, detail="Model chưa được load")
 
+    mark_stage("validation")
     try:
         # Encode input
         X = encode_input(patient)
+        mark_stage("encode")
 
-        # Predict
-        prediction = model.predict(X)[0]
-
-        # Get prediction probabilities if available
-        confidence = None
-        if hasattr(model, "predict_proba"):
-            try:
-                # Lấy pipeline's final estimator (SVC)
-                final_model = model.named_steps.get("svc", model)
-
-                # Kiểm tra xem SVC có được train với probability=True
-                if hasattr(final_model, "predict_proba"):
-                    proba = model.predict_proba(X)[0]
-                    confidence = float(np.max(proba))
-                else:
-                    # SVC không có probability=True
-                    confidence = None
-            except Exception as e:
-                print(f"Warning: Could not get probability: {e}")
-                confidence = None
+        # Predict (chạy trên inference executor, qua micro-batcher nếu bật)
+        prediction = await run_deduplicated(
+            predict_flight, X, lambda: run_batched(predict_batcher, _predict_svm_job, X)
+        )
+        mark_stage("inference")
 
         # Decode prediction
         cancer_type = CANCER_TYPE_DETAILED.get(prediction, "Unknown")
 
+        if FAST_RESPONSES:
+            return json_response(
+                dumps(
+                    {"cancer_type_detailed": cancer_type, "cancer_type_code": prediction}
+                )
+            )
         return PredictionOutput(
             cancer_type_detailed=cancer_type,
-            cancer_type_code=int(prediction),  # -1 nghĩa là không có confidence
+            cancer_type_code=prediction,  # -1 nghĩa là không có confidence
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
 
 
-@app.post("/predict-all", response_model=MultiModelPredictionOutput)
-async def predict_all(patient: PatientInput):
+@app.post(
+    "/predict-all",
+    response_model=Union[MultiModelPredictionOutput, MultiModelPredictionArrayOutput],
+)
+async def predict_all(
+    patient: PatientInput, probabilities: Literal["dict", "array"] = "dict"
+):
     """
     Dự đoán với tất cả models
 
     - **Input**: Thông tin lâm sàng bệnh nhân
+    - **probabilities**: "dict" = {tên class: probability}, "array" = list
+      theo thứ tự class, tên class ghi 1 lần trong "probability_classes"
     - **Output**: Kết quả từ từng model
     """
-    if model_service is None or not models:
+    if not active_models():
         raise HTTPException(status_code=500, detail="Models chưa được load")
 
+    mark_stage("validation")
     try:
         # Encode input
         X = encode_input(patient)
+        mark_stage("encode")
 
         # Predict với tất cả models
-        predictions = model_service.predict_all(X)
+        predictions, failures = await run_deduplicated(
+            predict_all_flight,
+            X,
+            lambda: run_batched(predict_all_batcher, _predict_all_job, X),
+        )
+        mark_stage("inference")
 
         if not predictions:
-            raise HTTPException(
-                status_code=500, detail="Không có model nào predict thành công"
+            raise _no_model_error(failures)
+
+        if FAST_RESPONSES or probabilities != PROBABILITIES_DICT:
+            return json_response(
+                response_serializer.multi_model(predictions, failures, probabilities)
             )
 
         # Convert to response format
@@ -308,7 +798,284 @@ async def predict_all(patient: PatientInput):
             ModelPredictionResponse(**pred.to_dict()) for pred in predictions
         ]
 
-        return MultiModelPredictionOutput(predictions=prediction_responses)
+        return MultiModelPredictionOutput(
+            predictions=prediction_responses, failed_models=failures or None
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
+
+
+@app.post("/predict-batch", response_model=BatchPredictionOutput)
+async def predict_batch(batch: PatientBatchInput):
+    """
+    Dự đoán cho nhiều bệnh nhân với SVM model
+
+    - **Input**: Danh sách thông tin lâm sàng bệnh nhân
+    - **Output**: Loại ung thư chi tiết cho từng bệnh nhân (cùng thứ tự)
+    """
+    if "SVM" not in active_models():
+        raise HTTPException(status_code=500, detail="Model chưa được load")
+
+    mark_stage("validation")
+    try:
+        X = encode_batch(batch.patients)
+        mark_stage("encode")
+
+        # 1 lần gọi predict cho cả batch
+        batch_result = await run_inference(_predict_batch_job, X)
+        mark_stage("inference")
+
+        predictions = [
+            {
+                "cancer_type_detailed": CANCER_TYPE_DETAILED.get(code, "Unknown"),
+                "cancer_type_code": code,
+            }
+            for code in batch_result.codes.tolist()
+        ]
+        if FAST_RESPONSES:
+            return json_response(dumps({"predictions": predictions}))
+        return BatchPredictionOutput(
+            predictions=[PredictionOutput(**pred) for pred in predictions]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
+
+
+@app.post(
+    "/predict-all-batch",
+    response_model=Union[
+        BatchMultiModelPredictionOutput, BatchMultiModelPredictionArrayOutput
+    ],
+)
+async def predict_all_batch(
+    batch: PatientBatchInput, probabilities: Literal["dict", "array"] = "dict"
+):
+    """
+    Dự đoán cho nhiều bệnh nhân với tất cả models
+
+    - **Input**: Danh sách thông tin lâm sàng bệnh nhân
+    - **probabilities**: "dict" hoặc "array" (xem /predict-all)
+    - **Output**: Kết quả từ từng model cho từng bệnh nhân (cùng thứ tự)
+    """
+    if not active_models():
+        raise HTTPException(status_code=500, detail="Models chưa được load")
+
+    mark_stage("validation")
+    try:
+        X = encode_batch(batch.patients)
+        mark_stage("encode")
+
+        # Mỗi model chỉ predict 1 lần cho cả batch, kết quả giữ dạng cột
+        batches, failures = await run_inference(_predict_all_batch_job, X)
+        mark_stage("inference")
+
+        if not batches:
+            raise _no_model_error(failures)
+
+        if FAST_RESPONSES or probabilities != PROBABILITIES_DICT:
+            return json_response(
+                response_serializer.batch_multi_model_columnar(
+                    batches, failures, probabilities
+                )
+            )
+        return BatchMultiModelPredictionOutput(
+            results=[
+                MultiModelPredictionOutput(
+                    predictions=[ModelPredictionResponse(**pred) for pred in row]
+                )
+                for row in zip(*(batch.to_dicts() for batch in batches.values()))
+            ],
+            failed_models=failures or None,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
+
+
+@app.post(
+    "/predict-all-arrow",
+    response_class=Response,
+    responses={200: {"content": {ARROW_STREAM_MEDIA_TYPE: {}}}},
+)
+async def predict_all_arrow(request: Request):
+    """
+    Dự đoán cho cả batch dạng Apache Arrow IPC stream với tất cả models
+
+    - **Input**: Body là Arrow IPC stream, mỗi feature của FEATURE_ORDER là
+      1 cột: giá trị gốc (string, như PatientInput) hoặc giá trị đã encode (số)
+    - **Output**: Arrow IPC stream, mỗi dòng input 1 dòng với các cột
+      {model}_code, {model}_confidence, {model}_proba_{class}; failed_models,
+      model_version và cancer_type_mapping nằm trong metadata của schema
+    """
+    if pa is None:
+        raise HTTPException(
+            status_code=501, detail="pyarrow chưa được cài (pip install pyarrow)"
+        )
+    if not active_models():
+        raise HTTPException(status_code=500, detail="Models chưa được load")
+
+    body = await request.body()
+    try:
+        X = arrow_codec.decode(body)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # Kiểm tra và encode theo cột diễn ra cùng lúc trong decode()
+    mark_stage("encode")
+
+    try:
+        batches, failures, version = await run_inference(_predict_all_columnar_job, X)
+        mark_stage("inference")
+
+        if not batches:
+            raise _no_model_error(failures)
+
+        return Response(
+            content=arrow_codec.encode_results(
+                batches, failures, version, CANCER_TYPE_DETAILED
+            ),
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
+
+
+@app.post("/explain", response_model=ExplanationOutput)
+async def explain(patient: PatientInput):
+    """
+    Dự đoán với tất cả models kèm đóng góp của từng feature
+
+    - **Input**: Thông tin lâm sàng bệnh nhân
+    - **Output**: Như /predict-all, mỗi model thêm "attributions": đóng góp
+      của từng feature vào probability của class được predict (base_value +
+      tổng contributions = probability đó). Model không tính được
+      attributions vẫn trả prediction với "attributions": null, lý do nằm
+      trong "attribution_errors"
+    """
+    if not active_models():
+        raise HTTPException(status_code=500, detail="Models chưa được load")
+
+    mark_stage("validation")
+    try:
+        X = encode_input(patient)
+        mark_stage("encode")
+
+        explanations, failures = await run_inference(_explain_all_job, X)
+        mark_stage("inference")
+
+        if not explanations:
+            raise _no_model_error(failures)
+
+        response = {
+            "predictions": [
+                explanation.to_dicts()[0] for explanation in explanations.values()
+            ],
+            "failed_models": failures or None,
+            "attribution_errors": _attribution_errors(explanations),
+        }
+        if FAST_RESPONSES:
+            return json_response(dumps(response))
+        return ExplanationOutput(**response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
+
+
+@app.post("/explain-batch", response_model=BatchExplanationOutput)
+async def explain_batch(batch: PatientBatchInput):
+    """
+    Như /explain cho nhiều bệnh nhân
+
+    - **Input**: Danh sách thông tin lâm sàng bệnh nhân
+    - **Output**: Kết quả và attributions từ từng model cho từng bệnh nhân
+      (cùng thứ tự)
+    """
+    if not active_models():
+        raise HTTPException(status_code=500, detail="Models chưa được load")
+
+    mark_stage("validation")
+    try:
+        X = encode_batch(batch.patients)
+        mark_stage("encode")
+
+        # Mỗi model predict và tính attributions 1 lần cho cả batch
+        explanations, failures = await run_inference(_explain_all_job, X)
+        mark_stage("inference")
+
+        if not explanations:
+            raise _no_model_error(failures)
+
+        per_model = [explanation.to_dicts() for explanation in explanations.values()]
+        response = {
+            "results": [
+                {
+                    "predictions": list(row),
+                    "failed_models": None,
+                    "attribution_errors": None,
+                }
+                for row in zip(*per_model)
+            ],
+            "failed_models": failures or None,
+            "attribution_errors": _attribution_errors(explanations),
+        }
+        if FAST_RESPONSES:
+            return json_response(dumps(response))
+        return BatchExplanationOutput(**response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
+
+
+@app.post("/predict-consensus", response_model=ConsensusPredictionOutput)
+async def predict_consensus(patient: PatientInput, mode: Literal["hard", "soft"] = "hard"):
+    """
+    Dự đoán consensus của tất cả models
+
+    - **Input**: Thông tin lâm sàng bệnh nhân
+    - **mode**: "hard" = majority vote (tie -> confidence cao hơn),
+      "soft" = trung bình probabilities của các models
+    - **Output**: Loại ung thư theo consensus, số vote và agreement
+    """
+    if not active_models():
+        raise HTTPException(status_code=500, detail="Models chưa được load")
+
+    mark_stage("validation")
+    try:
+        X = encode_input(patient)
+        mark_stage("encode")
+
+        rows, failures = await run_deduplicated(
+            predict_consensus_flight,
+            X,
+            lambda: run_inference(partial(_predict_consensus_job, mode=mode), X),
+            mode,
+        )
+        mark_stage("inference")
+
+        if rows is None:
+            raise _no_model_error(failures)
+
+        if FAST_RESPONSES:
+            return json_response(
+                dumps({**rows[0], "mode": mode, "failed_models": failures or None})
+            )
+        return ConsensusPredictionOutput(
+            **rows[0], mode=mode, failed_models=failures or None
+        )
 
     except HTTPException:
         raise
@@ -316,27 +1083,247 @@ async def predict_all(patient: PatientInput):
         raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
 
 
+@app.post("/predict-consensus-batch", response_model=BatchConsensusOutput)
+async def predict_consensus_batch(
+    batch: PatientBatchInput, mode: Literal["hard", "soft"] = "hard"
+):
+    """
+    Dự đoán consensus cho nhiều bệnh nhân
+
+    Mỗi model predict 1 lần cho cả batch, consensus được tính trên các mảng
+    kết quả của cả batch (không lặp theo từng bệnh nhân).
+
+    - **Input**: Danh sách thông tin lâm sàng bệnh nhân
+    - **mode**: "hard" hoặc "soft" (xem /predict-consensus)
+    - **Output**: Consensus cho từng bệnh nhân (cùng thứ tự)
+    """
+    if not active_models():
+        raise HTTPException(status_code=500, detail="Models chưa được load")
+
+    mark_stage("validation")
+    try:
+        X = encode_batch(batch.patients)
+        mark_stage("encode")
+
+        rows, failures = await run_inference(partial(_predict_consensus_job, mode=mode), X)
+        mark_stage("inference")
+
+        if rows is None:
+            raise _no_model_error(failures)
+
+        if FAST_RESPONSES:
+            return json_response(
+                dumps({"mode": mode, "results": rows, "failed_models": failures or None})
+            )
+        return BatchConsensusOutput(
+            mode=mode,
+            results=[ConsensusOutput(**row) for row in rows],
+            failed_models=failures or None,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Lỗi dự đoán: {str(e)}")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Metrics theo Prometheus text format (latency theo stage, lỗi, cache, batch)"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/batching-stats")
+def batching_stats():
+    """
+    Thống kê micro-batching (kích thước batch, thời gian chờ trong queue) và
+    số request giống hệt được gộp bởi single-flight
+    """
+    return {
+        "enabled": MICRO_BATCHING,
+        "predict": predict_batcher.stats() if predict_batcher else None,
+        "predict_all": predict_all_batcher.stats() if predict_all_batcher else None,
+        "deduplication": {
+            "enabled": REQUEST_DEDUP,
+            "predict": predict_flight.stats() if predict_flight else None,
+            "predict_all": predict_all_flight.stats() if predict_all_flight else None,
+            "predict_consensus": (
+                predict_consensus_flight.stats() if predict_consensus_flight else None
+            ),
+        },
+    }
+
+
 @app.get("/model-info")
 def model_info():
     """Thông tin về models và features"""
-    if not models:
+    if not active_models():
         raise HTTPException(status_code=500, detail="Models chưa được load")
 
     model_info_dict = {}
-    for name, model_obj in models.items():
+    for name in active_models():
+        loaded = model_service.is_loaded(name)
+        model_obj = model_service.get_model(name) if loaded else None
         model_info_dict[name] = {
-            "model_type": str(type(model_obj)),
-            "has_predict_proba": hasattr(model_obj, "predict_proba"),
+            "model_type": str(type(model_obj)) if loaded else None,
+            "has_predict_proba": (
+                model_service.get_capabilities(name).has_proba if loaded else None
+            ),
+            "engine": (
+                model_obj.info() if hasattr(model_obj, "info") else "sklearn"
+            ),
         }
 
     return {
         "models": model_info_dict,
+        "model_version": model_service.version,
+        "prediction_cache": model_service.cache_stats(),
+        "scheduler": model_service.scheduler_stats(),
+        "loading": {
+            "startup_seconds": model_loading["startup_seconds"],
+            "process_rss_bytes": process_rss_bytes(),
+            "models": {
+                name: info.to_dict() for name, info in model_loading["models"].items()
+            },
+        },
         "features": FEATURE_ORDER,
         "output_classes": CANCER_TYPE_DETAILED,
         "encoding_maps": ENCODING_MAPS,
     }
 
 
+# ==================== ADMIN ====================
+def require_admin(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Dependency của các endpoint /admin/*: cần "Authorization: Bearer <token>"
+    khớp ADMIN_API_TOKEN; nếu ADMIN_API_TOKEN không được đặt thì tắt hẳn
+    """
+    if ADMIN_API_TOKEN is None:
+        raise HTTPException(
+            status_code=403, detail="Admin endpoints bị tắt (đặt ADMIN_API_TOKEN)"
+        )
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), ADMIN_API_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Admin token không hợp lệ",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def _require_swappable_executor() -> None:
+    """
+    Worker của INFERENCE_EXECUTOR=process giữ models đã fork lúc khởi động:
+    swap ở process chính không đổi kết quả predict nên bị từ chối
+    """
+    if INFERENCE_EXECUTOR == "process":
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                "Không đổi được models khi INFERENCE_EXECUTOR=process "
+                "(worker giữ models lúc khởi động), hãy restart server"
+            ),
+        )
+
+
+@app.post("/admin/reload-models", dependencies=[Depends(require_admin)])
+async def reload_models():
+    """
+    Load lại artifacts của phiên bản đang active từ disk (prediction cache được xoá)
+
+    Đi qua model_registry.activate như /admin/models/activate: load, warm up
+    rồi swap; nếu lỗi thì models đang chạy được giữ nguyên.
+    """
+    if model_service is None:
+        raise HTTPException(status_code=500, detail="Models chưa được load")
+    _require_swappable_executor()
+
+    version = model_service.version
+    if version not in model_registry.list_versions():
+        version = None
+    # Đường dẫn do server xác định (phiên bản trong registry hoặc MODEL_PATHS,
+    # bỏ các artifact không có như lúc startup)
+    paths, version = resolve_model_paths(version)
+    paths = {name: path for name, path in paths.items() if os.path.exists(path)}
+    try:
+        await run_in_threadpool(model_registry.activate, version, paths)
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {
+        "models_loaded": list(active_models()),
+        "model_version": model_service.version,
+        "prediction_cache": model_service.cache_stats(),
+    }
+
+
+class ModelActivationInput(BaseModel):
+    version: str = Field(..., description="Tên phiên bản (thư mục trong registry)")
+    wait: bool = Field(
+        False, description="True = chờ load, warm up và swap xong mới trả về"
+    )
+
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+def list_model_versions():
+    """Phiên bản đang active, các phiên bản có sẵn và thời gian swap gần nhất"""
+    return model_registry.status()
+
+
+@app.post(
+    "/admin/models/activate", status_code=202, dependencies=[Depends(require_admin)]
+)
+async def activate_model_version(activation: ModelActivationInput):
+    """
+    Kích hoạt 1 phiên bản models không downtime
+
+    Models mới được load và warm up ở background; request đang chạy tiếp tục
+    với models cũ cho đến khi swap xong. version phải là 1 phiên bản có trong
+    registry (404 nếu không).
+    """
+    if model_service is None:
+        raise HTTPException(status_code=500, detail="Models chưa được load")
+    _require_swappable_executor()
+    if activation.version not in model_registry.list_versions():
+        raise HTTPException(
+            status_code=404, detail=f"Unknown model version '{activation.version}'"
+        )
+
+    try:
+        if activation.wait:
+            await run_in_threadpool(model_registry.activate, activation.version)
+        else:
+            model_registry.activate_in_background(activation.version)
+    except UnknownModelVersionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return model_registry.status()
+
+
+@app.post("/admin/models/rollback", dependencies=[Depends(require_admin)])
+async def rollback_model_version():
+    """Quay lại phiên bản active trước đó (vẫn nằm trong bộ nhớ, swap tức thì)"""
+    _require_swappable_executor()
+    try:
+        model_registry.rollback()
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return model_registry.status()
+
+
+# Worker process (INFERENCE_EXECUTOR=shared) được fork sau khi mọi job và
+# endpoint đã được định nghĩa
+inference_executor.start()
+
+
 # ==================== RUN SERVER ====================
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1 @@
+"""Benchmarks cho backend (chạy từ thư mục backend/: python -m benchmarks.<tên>)"""
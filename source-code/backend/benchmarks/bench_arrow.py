@@ -0,0 +1,168 @@
+"""
+Benchmark arrow
+===============
+
+So sánh throughput end-to-end (HTTP qua ASGI, trong cùng process) giữa
+/predict-all-batch?probabilities=array (JSON, qua PatientInput) và
+/predict-all-arrow theo kích thước batch, với 2 dạng input Arrow:
+
+- arrow strings: giá trị gốc dạng string như JSON (map theo ENCODING_MAPS)
+- arrow encoded: các cột đã encode sẵn dạng số theo FEATURE_ORDER
+
+Thời gian gồm cả tạo body của request (JSON / Arrow IPC) và đọc response,
+như 1 client thật. Như bench_inference, app.model_service được thay bằng
+ModelService không có prediction cache và không fan-out để cả 2 đường đo
+chi phí thật của models.
+
+Cần pyarrow (extra "arrow"). Chạy từ thư mục backend/:
+    python -m benchmarks.bench_arrow -o results/arrow.json
+    python -m benchmarks.bench_arrow --batch-sizes 100,10000 --baseline results/arrow.json
+"""
+
+import argparse
+import asyncio
+import json
+import warnings
+from typing import Callable, Dict
+
+import httpx
+import numpy as np
+
+import app
+from app import PatientInput, encode_batch
+from config import (
+    CANCER_TYPE_DETAILED,
+    COMPILED_MODELS,
+    DERIVE_LABEL_FROM_PROBA,
+    FEATURE_ORDER,
+)
+from services.arrow_batch import ARROW_STREAM_MEDIA_TYPE, pa
+from services.model_service import ModelService
+
+from .bench_inference import measure
+from .report import BenchmarkReport, add_output_arguments, finish
+from .workload import DEFAULT_SEED, random_patients
+
+DEFAULT_BATCH_SIZES = "10,100,1000,10000"
+
+
+def arrow_stream(table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    app.model_service = ModelService(
+        models=app.active_models(),
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        derive_label_from_proba=DERIVE_LABEL_FROM_PROBA,
+        feature_order=FEATURE_ORDER,
+        compiled_models=COMPILED_MODELS,
+    )
+    report = BenchmarkReport(
+        "arrow",
+        params={
+            "batch_sizes": batch_sizes,
+            "seed": args.seed,
+            "min_time": args.min_time,
+            "models": list(app.model_service.models),
+            "pyarrow": pa.__version__,
+        },
+    )
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app.app), base_url="http://bench"
+    )
+
+    def post(path: str, body: Callable[[], bytes], content_type: str) -> Callable[[], None]:
+        def call():
+            response = loop.run_until_complete(
+                client.post(path, content=body(), headers={"content-type": content_type})
+            )
+            response.raise_for_status()
+            if content_type == ARROW_STREAM_MEDIA_TYPE:
+                pa.ipc.open_stream(response.content).read_all()
+            else:
+                json.loads(response.content)
+
+        return call
+
+    all_patients = random_patients(max(batch_sizes), args.seed)
+    try:
+        for batch_size in batch_sizes:
+            patients = all_patients[:batch_size]
+            X = encode_batch([PatientInput(**p) for p in patients])
+            strings = pa.table({f: [p[f] for p in patients] for f in FEATURE_ORDER})
+            encoded = pa.table(
+                {f: np.ascontiguousarray(X[:, col]) for col, f in enumerate(FEATURE_ORDER)}
+            )
+
+            paths: Dict[str, Callable[[], None]] = {
+                "json": post(
+                    "/predict-all-batch?probabilities=array",
+                    lambda: json.dumps({"patients": patients}).encode(),
+                    "application/json",
+                ),
+                "arrow strings": post(
+                    "/predict-all-arrow", lambda: arrow_stream(strings), ARROW_STREAM_MEDIA_TYPE
+                ),
+                "arrow encoded": post(
+                    "/predict-all-arrow", lambda: arrow_stream(encoded), ARROW_STREAM_MEDIA_TYPE
+                ),
+            }
+            for name, call in paths.items():
+                timing = measure(call, args.min_time)
+                rows_per_second = batch_size / timing["median"]
+                key = f"{name}[batch={batch_size}]"
+                report.add(
+                    f"{key} throughput",
+                    rows_per_second,
+                    unit="rows/s",
+                    higher_is_better=True,
+                    median=timing["median"],
+                    runs=timing["runs"],
+                )
+                print(
+                    f"{key:28s} {timing['median'] * 1e3:10.2f} ms"
+                    f"  {rows_per_second:12,.0f} rows/s"
+                )
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--batch-sizes",
+        default=DEFAULT_BATCH_SIZES,
+        help=f"Các kích thước batch, phân cách bởi dấu phẩy (mặc định {DEFAULT_BATCH_SIZES})",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1.0,
+        help="Thời gian đo tối thiểu (giây) cho mỗi phép đo",
+    )
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+
+    if pa is None:
+        raise SystemExit("❌ pyarrow chưa được cài (pip install pyarrow)")
+    if app.model_service is None:
+        raise SystemExit("❌ No models loaded")
+
+    finish(run(args), args)
+
+
+if __name__ == "__main__":
+    main()
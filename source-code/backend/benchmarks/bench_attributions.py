@@ -0,0 +1,145 @@
+"""
+Benchmark attributions
+======================
+
+Chi phí thêm của attributions (/explain) so với chỉ predict_proba, theo
+model và kích thước batch:
+
+- predict: predict_proba của engine mà app dùng
+- explain: ModelService._explain_batch (predict + attributions của class được
+  predict), attributor đã dựng sẵn
+
+và ms/dòng thêm vào, bộ nhớ đỉnh (tracemalloc) của 1 lần explain để kiểm tra
+bộ nhớ không tăng theo kích thước batch ngoài kết quả (tính theo chunk).
+Thời gian dựng attributor (lần /explain đầu tiên của mỗi model) được báo
+riêng. Input là bệnh nhân ngẫu nhiên với seed cố định.
+
+Chạy từ thư mục backend/:
+    python -m benchmarks.bench_attributions -o results/attributions.json
+    python -m benchmarks.bench_attributions --background 16 --baseline results/attributions.json
+"""
+
+import argparse
+import time
+import tracemalloc
+import warnings
+
+import app
+from app import PatientInput, encode_batch
+from config import (
+    ATTRIBUTION_BACKGROUND_SIZE,
+    CANCER_TYPE_DETAILED,
+    COMPILED_MODELS,
+    DERIVE_LABEL_FROM_PROBA,
+    FEATURE_ORDER,
+)
+from services.model_service import ModelService
+
+from .bench_inference import measure
+from .report import BenchmarkReport, add_output_arguments, finish
+from .workload import DEFAULT_SEED, random_patients
+
+DEFAULT_BATCH_SIZES = "1,10,100,1000"
+
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    # Không prediction cache để predict và explain đo chi phí thật của models
+    service = ModelService(
+        models=app.active_models(),
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        derive_label_from_proba=DERIVE_LABEL_FROM_PROBA,
+        feature_order=FEATURE_ORDER,
+        compiled_models=COMPILED_MODELS,
+        attribution_background=args.background,
+    )
+    model_set = service.model_set
+
+    report = BenchmarkReport(
+        "attributions",
+        params={
+            "batch_sizes": batch_sizes,
+            "seed": args.seed,
+            "min_time": args.min_time,
+            "background": args.background,
+            "models": list(service.models),
+        },
+    )
+
+    model_names = []
+    for model_name in service.models:
+        started = time.perf_counter()
+        try:
+            attributor = service.get_attributor(model_name, model_set)
+        except Exception as e:
+            print(f"❌ {model_name}: {e}")
+            continue
+        elapsed = time.perf_counter() - started
+        model_names.append(model_name)
+        report.add(f"build_seconds[{model_name}]", elapsed, unit="s", method=attributor.method)
+        print(f"{model_name}: {attributor.method} attributor built in {elapsed * 1e3:.1f} ms")
+
+    all_patients = random_patients(max(batch_sizes), args.seed)
+    X_all = encode_batch([PatientInput(**record) for record in all_patients])
+    for batch_size in batch_sizes:
+        X = X_all[:batch_size]
+        for model_name in model_names:
+            model = service.models[model_name]
+            predict = measure(lambda: model.predict_proba(X), args.min_time)
+            explain = measure(
+                lambda: service._explain_batch(model_set, model_name, X), args.min_time
+            )
+            added_ms = (explain["median"] - predict["median"]) / batch_size * 1e3
+
+            tracemalloc.start()
+            service._explain_batch(model_set, model_name, X)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            key = f"[{model_name},batch={batch_size}]"
+            report.add(f"predict{key}", predict["median"], unit="s", runs=predict["runs"])
+            report.add(f"explain{key}", explain["median"], unit="s", runs=explain["runs"])
+            report.add(f"added_per_row{key}", added_ms, unit="ms")
+            report.add(f"explain_peak_memory{key}", peak / 2**20, unit="MiB")
+            print(
+                f"{key:35s} predict {predict['median'] * 1e3:10.3f} ms"
+                f"  explain {explain['median'] * 1e3:10.3f} ms"
+                f"  +{added_ms:8.3f} ms/row  peak {peak / 2**20:8.2f} MiB"
+            )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--batch-sizes",
+        default=DEFAULT_BATCH_SIZES,
+        help=f"Các kích thước batch, phân cách bởi dấu phẩy (mặc định {DEFAULT_BATCH_SIZES})",
+    )
+    parser.add_argument(
+        "--background",
+        type=int,
+        default=ATTRIBUTION_BACKGROUND_SIZE,
+        help=f"Số support vectors làm background của SVM (mặc định ATTRIBUTION_BACKGROUND_SIZE = {ATTRIBUTION_BACKGROUND_SIZE})",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="Thời gian đo tối thiểu (giây) cho mỗi phép đo",
+    )
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+
+    if app.model_service is None:
+        raise SystemExit("❌ No models loaded")
+
+    finish(run(args), args)
+
+
+if __name__ == "__main__":
+    main()
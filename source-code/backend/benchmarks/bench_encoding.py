@@ -0,0 +1,98 @@
+"""
+Benchmark encode input
+======================
+
+So sánh encode_input() cũ (dict + pandas.DataFrame) với FeatureEncoder.
+
+Chạy từ thư mục backend/:
+    python -m benchmarks.bench_encoding
+"""
+
+import argparse
+import timeit
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import app
+from app import ENCODING_MAPS, FEATURE_ORDER, PatientInput, feature_encoder
+
+
+def legacy_encode_input(patient_data: PatientInput) -> pd.DataFrame:
+    """encode_input() trước khi có FeatureEncoder"""
+    data_dict = patient_data.dict(by_alias=True)
+
+    # Encode categorical features
+    for feature, mapping in ENCODING_MAPS.items():
+        if feature in data_dict:
+            data_dict[feature] = mapping[data_dict[feature]]
+
+    # Create DataFrame with correct feature order
+    df = pd.DataFrame([data_dict])
+    df = df[FEATURE_ORDER]
+
+    return df
+
+
+def _best_per_call(fn, number: int, repeat: int) -> float:
+    """Thời gian tốt nhất cho 1 lần gọi (giây)"""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # Deprecation warning của .dict() không phải chi phí thật của encode
+    warnings.simplefilter("ignore")
+
+    patient = PatientInput(**PatientInput.Config.schema_extra["example"])
+    patients = [patient] * args.batch_size
+
+    # Kết quả phải giống hệt nhau
+    legacy = legacy_encode_input(patient).to_numpy(dtype=np.float64)
+    assert np.array_equal(legacy, feature_encoder.encode(patient))
+    assert np.array_equal(
+        np.repeat(legacy, 3, axis=0), feature_encoder.encode_many(patients[:3])
+    )
+
+    print("== Encode 1 bệnh nhân ==")
+    t_legacy = _best_per_call(lambda: legacy_encode_input(patient), args.number, args.repeat)
+    t_fast = _best_per_call(lambda: feature_encoder.encode(patient), args.number, args.repeat)
+    print(f"legacy encode_input : {t_legacy * 1e6:9.2f} us")
+    print(f"FeatureEncoder      : {t_fast * 1e6:9.2f} us  (x{t_legacy / t_fast:.1f})")
+
+    print(f"\n== Encode batch {args.batch_size} bệnh nhân ==")
+    t_legacy = _best_per_call(
+        lambda: pd.concat([legacy_encode_input(p) for p in patients]), 1, 1
+    )
+    t_fast = _best_per_call(lambda: feature_encoder.encode_many(patients), 1, args.repeat)
+    print(f"legacy (từng dòng)  : {t_legacy * 1e3:9.2f} ms")
+    print(f"FeatureEncoder      : {t_fast * 1e3:9.2f} ms  (x{t_legacy / t_fast:.1f})")
+
+    if app.model_service is not None:
+        print("\n== Encode + predict 1 bệnh nhân ==")
+        X_df = legacy_encode_input(patient)
+        X_fast = feature_encoder.encode(patient)
+        for name in app.active_models():
+            model = app.model_service.get_model(name)
+            t_legacy = _best_per_call(
+                lambda: model.predict_proba(legacy_encode_input(patient)),
+                args.number // 10,
+                args.repeat,
+            )
+            t_fast = _best_per_call(
+                lambda: model.predict_proba(feature_encoder.encode(patient)),
+                args.number // 10,
+                args.repeat,
+            )
+            assert np.array_equal(model.predict_proba(X_df), model.predict_proba(X_fast))
+            print(f"{name:15s} legacy: {t_legacy * 1e6:9.2f} us  fast: {t_fast * 1e6:9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark inference
+===================
+
+Micro-benchmarks cho từng bước của inference theo kích thước batch:
+encode_input, predict_with_model (từng model), predict_all và consensus.
+
+ModelService được tạo riêng, không có prediction cache và không fan-out, để
+đo chi phí thật của models; input là bệnh nhân ngẫu nhiên với seed cố định.
+
+Chạy từ thư mục backend/:
+    python -m benchmarks.bench_inference -o results/inference.json
+    python -m benchmarks.bench_inference --baseline results/inference.json
+"""
+
+import argparse
+import statistics
+import time
+import warnings
+from typing import Callable, Dict
+
+import app
+from app import PatientInput, encode_batch, encode_input
+from config import (
+    CANCER_TYPE_DETAILED,
+    COMPILED_MODELS,
+    DERIVE_LABEL_FROM_PROBA,
+    FEATURE_ORDER,
+)
+from services.model_service import ModelService
+
+from .report import BenchmarkReport, add_output_arguments, finish
+from .workload import DEFAULT_SEED, random_patients
+
+DEFAULT_BATCH_SIZES = "1,10,100,1000,10000,100000"
+
+
+def measure(fn: Callable[[], object], min_time: float, max_runs: int = 1000) -> Dict:
+    """
+    Gọi fn nhiều lần đến khi đủ min_time giây (ít nhất 3 lần nếu đủ nhanh)
+
+    Returns:
+        Dict median / min (giây mỗi lần gọi) và số lần chạy
+    """
+    fn()  # warm up
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_runs:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if time.perf_counter() - started >= min_time and len(times) >= 3:
+            break
+        if times[0] >= min_time:
+            # 1 lần gọi đã đủ lâu (batch lớn)
+            break
+    return {"median": statistics.median(times), "min": min(times), "runs": len(times)}
+
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    service = ModelService(
+        models=app.active_models(),
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        derive_label_from_proba=DERIVE_LABEL_FROM_PROBA,
+        feature_order=FEATURE_ORDER,
+        compiled_models=COMPILED_MODELS,
+    )
+    report = BenchmarkReport(
+        "inference",
+        params={
+            "batch_sizes": batch_sizes,
+            "seed": args.seed,
+            "min_time": args.min_time,
+            "models": list(service.models),
+            "compiled_models": COMPILED_MODELS,
+        },
+    )
+
+    def record(name: str, fn: Callable[[], object], n_rows: int) -> None:
+        timing = measure(fn, args.min_time)
+        report.add(
+            name,
+            timing["median"],
+            min=timing["min"],
+            runs=timing["runs"],
+            rows_per_second=n_rows / timing["median"],
+        )
+        print(
+            f"{name:55s} {timing['median'] * 1e3:10.3f} ms"
+            f"  ({n_rows / timing['median']:12,.0f} rows/s, {timing['runs']} runs)"
+        )
+
+    all_patients = random_patients(max(batch_sizes), args.seed)
+    for batch_size in batch_sizes:
+        records = all_patients[:batch_size]
+        patients = [PatientInput(**record) for record in records]
+
+        if batch_size == 1:
+            record("encode_input", lambda: encode_input(patients[0]), 1)
+        else:
+            record(
+                f"encode_batch[batch={batch_size}]",
+                lambda: encode_batch(patients),
+                batch_size,
+            )
+        X = encode_batch(patients)
+
+        for model_name in service.models:
+            record(
+                f"predict_with_model[{model_name},batch={batch_size}]",
+                lambda: service.predict_batch_with_model(model_name, X),
+                batch_size,
+            )
+        record(
+            f"predict_all[batch={batch_size}]",
+            lambda: service.predict_all_batch_with_status(X),
+            batch_size,
+        )
+
+        rows, _ = service.predict_all_batch_with_status(X)
+        if batch_size == 1:
+            record("calculate_consensus", lambda: service.calculate_consensus(rows[0]), 1)
+
+        # Consensus trên mảng kết quả của cả batch (như /predict-consensus-batch)
+        outputs = {
+            name: service.predict_arrays(name, X) for name in service.models
+        }
+        names = list(outputs)
+        codes = [outputs[name][0] for name in names]
+        probas = [outputs[name][1] for name in names]
+        confidences = [p.max(axis=1) if p is not None else None for p in probas]
+        class_codes = [
+            service.get_capabilities(name).class_codes if p is not None else None
+            for name, p in zip(names, probas)
+        ]
+        for mode in ("hard", "soft"):
+            record(
+                f"consensus_arrays[{mode},batch={batch_size}]",
+                lambda: service.calculate_consensus_arrays(
+                    names, codes, confidences, probas, class_codes, mode
+                ),
+                batch_size,
+            )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--batch-sizes",
+        default=DEFAULT_BATCH_SIZES,
+        help=f"Các kích thước batch, phân cách bởi dấu phẩy (mặc định {DEFAULT_BATCH_SIZES})",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="Thời gian đo tối thiểu (giây) cho mỗi benchmark",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    # Deprecation warning của sklearn/pydantic không phải chi phí của inference
+    warnings.simplefilter("ignore")
+
+    if app.model_service is None:
+        raise SystemExit("❌ No models loaded")
+
+    finish(run(args), args)
+
+
+if __name__ == "__main__":
+    main()
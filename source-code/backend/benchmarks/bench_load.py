@@ -0,0 +1,173 @@
+"""
+Benchmark load
+==============
+
+Load generator chạy trong cùng process với FastAPI app (httpx + ASGI
+transport, không qua network): với mỗi endpoint và mỗi mức concurrency, N
+client gửi request liên tục trong 1 khoảng thời gian, đo throughput và
+latency p50/p95/p99.
+
+Vì không có network và uvicorn, kết quả phản ánh chi phí của app (validation,
+inference executor, models, serialization) chứ không phải của server.
+
+Chạy từ thư mục backend/:
+    python -m benchmarks.bench_load -o results/load.json
+    python -m benchmarks.bench_load --concurrency 1,8,32 --baseline results/load.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+import warnings
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+import app
+
+from .report import BenchmarkReport, add_output_arguments, finish
+from .workload import DEFAULT_SEED, random_patients
+
+DEFAULT_ENDPOINTS = "/predict,/predict-all,/predict-consensus"
+DEFAULT_CONCURRENCY = "1,4,16,64"
+# Số bệnh nhân khác nhau được gửi xoay vòng (ảnh hưởng tỉ lệ cache hit)
+DEFAULT_DISTINCT_PATIENTS = 1000
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    payloads: List[Dict],
+    concurrency: int,
+    duration: float,
+) -> Dict:
+    """
+    concurrency client gửi request liên tục trong duration giây
+
+    Returns:
+        Dict throughput, latency percentiles (giây) và số request lỗi
+    """
+    latencies: List[float] = []
+    errors = 0
+    payload_iter = itertools.cycle(payloads)
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            payload = next(payload_iter)
+            t0 = time.perf_counter()
+            response = await client.post(endpoint, json=payload)
+            latencies.append(time.perf_counter() - t0)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+    }
+
+
+async def run(args: argparse.Namespace) -> BenchmarkReport:
+    endpoints = args.endpoints.split(",")
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    payloads = random_patients(args.distinct_patients, args.seed)
+
+    report = BenchmarkReport(
+        "load",
+        params={
+            "endpoints": endpoints,
+            "concurrency": concurrency_levels,
+            "duration": args.duration,
+            "distinct_patients": args.distinct_patients,
+            "seed": args.seed,
+            "micro_batching": app.MICRO_BATCHING,
+            "request_dedup": app.REQUEST_DEDUP,
+            "prediction_cache_size": app.PREDICTION_CACHE_SIZE,
+            "inference_workers": app.INFERENCE_WORKERS,
+        },
+    )
+
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for endpoint in endpoints:
+            # Warm up: models, executor threads, cache của pydantic
+            await run_level(client, endpoint, payloads, 1, min(args.duration, 0.5))
+
+            for concurrency in concurrency_levels:
+                result = await run_level(
+                    client, endpoint, payloads, concurrency, args.duration
+                )
+                key = f"{endpoint}[c={concurrency}]"
+                report.add(
+                    f"{key} throughput",
+                    result["throughput"],
+                    unit="req/s",
+                    higher_is_better=True,
+                    requests=result["requests"],
+                    errors=result["errors"],
+                )
+                for percentile in ("p50", "p95", "p99"):
+                    report.add(f"{key} {percentile}", result[percentile])
+
+                print(
+                    f"{key:30s} {result['throughput']:9.1f} req/s"
+                    f"  p50 {result['p50'] * 1e3:8.2f} ms"
+                    f"  p95 {result['p95'] * 1e3:8.2f} ms"
+                    f"  p99 {result['p99'] * 1e3:8.2f} ms"
+                    f"  ({result['requests']} requests, {result['errors']} errors)"
+                )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--endpoints",
+        default=DEFAULT_ENDPOINTS,
+        help=f"Các endpoint POST, phân cách bởi dấu phẩy (mặc định {DEFAULT_ENDPOINTS})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help=f"Các mức concurrency (mặc định {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=5.0, help="Số giây đo cho mỗi mức concurrency"
+    )
+    parser.add_argument(
+        "--distinct-patients",
+        type=int,
+        default=DEFAULT_DISTINCT_PATIENTS,
+        help="Số bệnh nhân khác nhau được gửi xoay vòng",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+
+    if app.model_service is None:
+        raise SystemExit("❌ No models loaded")
+
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        app.inference_executor.shutdown(wait=False)
+    finish(report, args)
+
+
+if __name__ == "__main__":
+    main()
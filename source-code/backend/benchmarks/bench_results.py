@@ -0,0 +1,167 @@
+"""
+Benchmark results
+=================
+
+So sánh bộ nhớ và thời gian giữa 2 cách giữ kết quả của 1 model cho batch
+lớn (mặc định 1M dòng):
+
+- objects: list ModelPredictionResult, mỗi dòng 1 object và 1 dict
+  probabilities (như predict_batch_with_model() có cache)
+- columnar: BatchPredictionResult, codes / confidences / probabilities là
+  mảng NumPy, object của 1 dòng chỉ tạo khi truy cập
+
+Output của models được tính 1 lần trên 1 mẫu rồi lặp lại đến đủ số dòng, để
+chỉ đo chi phí của cách giữ kết quả chứ không phải của models. Bộ nhớ đo bằng
+tracemalloc (các mảng NumPy cũng được tính).
+
+Chạy từ thư mục backend/:
+    python -m benchmarks.bench_results -o results/results.json
+    python -m benchmarks.bench_results --rows 100000 --baseline results/results.json
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+import warnings
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+import app
+from app import PatientInput, encode_batch
+from services.model_service import BatchPredictionResult, ModelPredictionResult
+
+from .report import BenchmarkReport, add_output_arguments, finish
+from .workload import DEFAULT_SEED, random_patients
+
+DEFAULT_ROWS = 1_000_000
+# Số bệnh nhân thật được predict, kết quả được lặp lại đến đủ --rows
+SAMPLE_ROWS = 10_000
+
+
+def measure_memory(build: Callable[[], object]) -> Tuple[object, float, int]:
+    """
+    Gọi build() 2 lần: 1 lần đo thời gian, 1 lần đo bộ nhớ với tracemalloc
+    (tracemalloc làm chậm việc tạo nhiều object nhỏ nên không đo cùng lúc)
+
+    Returns:
+        Tuple (object, giây, bytes còn được giữ sau khi build xong)
+    """
+    gc.collect()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained
+
+
+def build_objects(batch: BatchPredictionResult):
+    """List ModelPredictionResult như trước khi có BatchPredictionResult"""
+    return list(batch)
+
+
+def build_columnar(
+    model_name: str,
+    codes: np.ndarray,
+    proba: np.ndarray,
+    class_names,
+    cancer_type_mapping: Dict[int, str],
+) -> BatchPredictionResult:
+    return BatchPredictionResult(
+        model_name, codes.copy(), proba.copy(), class_names, cancer_type_mapping
+    )
+
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    service = app.model_service
+    report = BenchmarkReport(
+        "results",
+        params={"rows": args.rows, "sample_rows": SAMPLE_ROWS, "seed": args.seed},
+    )
+
+    X = encode_batch(
+        [PatientInput(**p) for p in random_patients(SAMPLE_ROWS, args.seed)]
+    )
+    repeats = -(-args.rows // SAMPLE_ROWS)
+
+    for model_name in service.models:
+        codes, proba, class_names = service.predict_arrays(model_name, X)
+        if proba is None:
+            continue
+        codes = np.tile(codes, repeats)[: args.rows]
+        proba = np.tile(proba, (repeats, 1))[: args.rows]
+
+        columnar, columnar_seconds, columnar_bytes = measure_memory(
+            lambda: build_columnar(
+                model_name, codes, proba, class_names, service.cancer_type_mapping
+            )
+        )
+        objects, objects_seconds, objects_bytes = measure_memory(
+            lambda: build_objects(columnar)
+        )
+        assert isinstance(objects[0], ModelPredictionResult)
+        del objects
+        gc.collect()
+
+        started = time.perf_counter()
+        columnar.to_dicts()
+        to_dicts_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        [result.to_dict() for result in columnar]
+        objects_to_dict_seconds = time.perf_counter() - started
+
+        key = f"{model_name}[rows={args.rows}]"
+        report.add(f"{key} objects build", objects_seconds)
+        report.add(f"{key} objects memory", objects_bytes / 2**20, unit="MiB")
+        report.add(f"{key} columnar build", columnar_seconds)
+        report.add(f"{key} columnar memory", columnar_bytes / 2**20, unit="MiB")
+        report.add(f"{key} objects to_dict", objects_to_dict_seconds)
+        report.add(f"{key} columnar to_dicts", to_dicts_seconds)
+        report.add(
+            f"{key} columnar throughput",
+            args.rows / columnar_seconds,
+            unit="rows/s",
+            higher_is_better=True,
+        )
+
+        print(
+            f"{key}\n"
+            f"  objects : {objects_bytes / 2**20:9.1f} MiB  build {objects_seconds:7.3f} s"
+            f"  to_dict  {objects_to_dict_seconds:7.3f} s\n"
+            f"  columnar: {columnar_bytes / 2**20:9.1f} MiB  build {columnar_seconds:7.3f} s"
+            f"  to_dicts {to_dicts_seconds:7.3f} s"
+        )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=DEFAULT_ROWS,
+        help=f"Số dòng kết quả (mặc định {DEFAULT_ROWS:,})",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+
+    if app.model_service is None:
+        raise SystemExit("❌ No models loaded")
+
+    finish(run(args), args)
+
+
+if __name__ == "__main__":
+    main()
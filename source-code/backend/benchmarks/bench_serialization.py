@@ -0,0 +1,209 @@
+"""
+Benchmark serialization
+=======================
+
+So sánh chi phí tạo response JSON của các endpoint predict giữa đường
+Pydantic (dựng ModelPredictionResponse / MultiModelPredictionOutput rồi để
+FastAPI validate và serialize theo response_model) và ResponseSerializer
+(ghi thẳng JSON bytes, xem services/serialization.py), cho 1 bệnh nhân và
+cho batch (từ kết quả dạng cột mà /predict-all-batch dùng).
+
+Chạy từ thư mục backend/:
+    python -m benchmarks.bench_serialization -o results/serialization.json
+"""
+
+import argparse
+import warnings
+from typing import Callable, Dict
+
+from fastapi.routing import serialize_response
+
+import app
+from app import (
+    BatchConsensusOutput,
+    BatchMultiModelPredictionOutput,
+    ConsensusOutput,
+    ModelPredictionResponse,
+    MultiModelPredictionOutput,
+    encode_batch,
+)
+from config import CANCER_TYPE_DETAILED
+from services.serialization import (
+    PROBABILITIES_ARRAY,
+    PROBABILITIES_DICT,
+    ResponseSerializer,
+    dumps,
+    orjson,
+)
+
+from .bench_inference import measure
+from .report import BenchmarkReport, add_output_arguments, finish
+from .workload import DEFAULT_SEED, random_patients
+
+DEFAULT_BATCH_SIZES = "1,10,100,1000"
+
+
+def _response_field(path: str):
+    for route in app.app.routes:
+        if getattr(route, "path", None) == path:
+            return route.response_field
+    raise ValueError(f"Route {path} not found")
+
+
+def _run_sync(coro):
+    # serialize_response với is_coroutine=True không await gì, nên chạy thẳng
+    # coroutine thay vì qua event loop (không tính chi phí của event loop)
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("serialize_response suspended")
+
+
+def pydantic_body(field, content) -> bytes:
+    """Như FastAPI với response_model: validate rồi dump JSON bằng Pydantic"""
+    return _run_sync(
+        serialize_response(field=field, response_content=content, dump_json=True)
+    )
+
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    service = app.model_service
+    serializer = ResponseSerializer(CANCER_TYPE_DETAILED)
+    report = BenchmarkReport(
+        "serialization",
+        params={
+            "batch_sizes": batch_sizes,
+            "seed": args.seed,
+            "min_time": args.min_time,
+            "models": list(service.models),
+            "orjson": orjson is not None,
+        },
+    )
+
+    def record(name: str, fn: Callable[[], bytes], n_rows: int) -> Dict:
+        timing = measure(fn, args.min_time)
+        size = len(fn())
+        report.add(
+            name,
+            timing["median"],
+            min=timing["min"],
+            runs=timing["runs"],
+            response_bytes=size,
+        )
+        print(
+            f"{name:50s} {timing['median'] * 1e6:10.1f} µs"
+            f"  ({timing['median'] * 1e6 / n_rows:7.2f} µs/row, {size:,} bytes)"
+        )
+        return timing
+
+    all_patients = random_patients(max(batch_sizes), args.seed)
+    for batch_size in batch_sizes:
+        X = encode_batch([app.PatientInput(**p) for p in all_patients[:batch_size]])
+        rows, failures = service.predict_all_batch_with_status(X)
+        batches, _ = service.predict_all_batch_columnar(X)
+
+        if batch_size == 1:
+            field = _response_field("/predict-all")
+            predictions = rows[0]
+            record(
+                "predict-all pydantic",
+                lambda: pydantic_body(
+                    field,
+                    MultiModelPredictionOutput(
+                        predictions=[
+                            ModelPredictionResponse(**pred.to_dict())
+                            for pred in predictions
+                        ],
+                        failed_models=failures or None,
+                    ),
+                ),
+                1,
+            )
+            for fmt in (PROBABILITIES_DICT, PROBABILITIES_ARRAY):
+                record(
+                    f"predict-all fast[{fmt}]",
+                    lambda: serializer.multi_model(predictions, failures, fmt),
+                    1,
+                )
+            continue
+
+        field = _response_field("/predict-all-batch")
+        record(
+            f"predict-all-batch pydantic[batch={batch_size}]",
+            lambda: pydantic_body(
+                field,
+                BatchMultiModelPredictionOutput(
+                    results=[
+                        MultiModelPredictionOutput(
+                            predictions=[
+                                ModelPredictionResponse(**pred.to_dict()) for pred in row
+                            ]
+                        )
+                        for row in rows
+                    ],
+                    failed_models=failures or None,
+                ),
+            ),
+            batch_size,
+        )
+        for fmt in (PROBABILITIES_DICT, PROBABILITIES_ARRAY):
+            record(
+                f"predict-all-batch columnar[{fmt},batch={batch_size}]",
+                lambda: serializer.batch_multi_model_columnar(batches, failures, fmt),
+                batch_size,
+            )
+
+        consensus, _ = service.predict_consensus_batch(X, "soft")
+        consensus_rows = consensus.to_dicts(CANCER_TYPE_DETAILED)
+        field = _response_field("/predict-consensus-batch")
+        record(
+            f"predict-consensus-batch pydantic[batch={batch_size}]",
+            lambda: pydantic_body(
+                field,
+                BatchConsensusOutput(
+                    mode="soft",
+                    results=[ConsensusOutput(**row) for row in consensus_rows],
+                ),
+            ),
+            batch_size,
+        )
+        record(
+            f"predict-consensus-batch fast[batch={batch_size}]",
+            lambda: dumps(
+                {"mode": "soft", "results": consensus_rows, "failed_models": None}
+            ),
+            batch_size,
+        )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--batch-sizes",
+        default=DEFAULT_BATCH_SIZES,
+        help=f"Các kích thước batch, phân cách bởi dấu phẩy (mặc định {DEFAULT_BATCH_SIZES})",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="Thời gian đo tối thiểu (giây) cho mỗi benchmark",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+
+    if app.model_service is None:
+        raise SystemExit("❌ No models loaded")
+
+    finish(run(args), args)
+
+
+if __name__ == "__main__":
+    main()
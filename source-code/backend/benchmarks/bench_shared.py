@@ -0,0 +1,175 @@
+"""
+Benchmark shared
+================
+
+So sánh throughput và bộ nhớ worker giữa các loại inference executor
+(thread, process, shared) theo số worker: mỗi cấu hình chạy
+_predict_all_batch_job với 2 job/worker đang chạy liên tục trong 1 khoảng
+thời gian, đo số dòng/giây và bộ nhớ (uss / pss, /proc/<pid>/smaps_rollup) của
+các worker process sau khi đo.
+
+Như bench_inference, app.model_service được thay bằng ModelService không có
+prediction cache và không fan-out (worker của "shared" cũng vậy), để cả 3
+loại executor đo chi phí thật của models.
+
+uss là phần riêng của từng worker; với "shared", các mảng của models nằm
+trong shared memory nên được tính vào pss (chia đều giữa các worker) chứ
+không vào uss.
+
+Chạy từ thư mục backend/ (Linux):
+    python -m benchmarks.bench_shared -o results/shared.json
+    python -m benchmarks.bench_shared --workers 1,2,4,8 --kinds process,shared
+"""
+
+import argparse
+import asyncio
+import time
+import warnings
+from typing import Dict
+
+import numpy as np
+
+import app
+from app import PatientInput, encode_batch
+from config import (
+    CANCER_TYPE_DETAILED,
+    COMPILED_MODELS,
+    DERIVE_LABEL_FROM_PROBA,
+    FEATURE_ORDER,
+)
+from services.inference_executor import InferenceExecutor
+from services.model_service import ModelService
+
+from .report import BenchmarkReport, add_output_arguments, finish
+from .workload import DEFAULT_SEED, random_patients
+
+DEFAULT_KINDS = "thread,process,shared"
+DEFAULT_WORKERS = "1,2,4"
+# Số job đang chạy cùng lúc cho mỗi worker (để worker không chờ job kế tiếp)
+JOBS_PER_WORKER = 2
+
+
+async def run_level(executor: InferenceExecutor, X: np.ndarray, duration: float) -> Dict:
+    """
+    Gửi _predict_all_batch_job liên tục trong duration giây
+
+    Returns:
+        Dict số job, số dòng/giây
+    """
+    jobs = 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        nonlocal jobs
+        while time.perf_counter() < deadline:
+            await executor.run(app._predict_all_batch_job, X)
+            jobs += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(client_loop() for _ in range(executor.max_workers * JOBS_PER_WORKER))
+    )
+    elapsed = time.perf_counter() - started
+    return {"jobs": jobs, "rows_per_second": jobs * len(X) / elapsed}
+
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    kinds = args.kinds.split(",")
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    report = BenchmarkReport(
+        "shared",
+        params={
+            "kinds": kinds,
+            "workers": worker_counts,
+            "batch_size": args.batch_size,
+            "duration": args.duration,
+            "seed": args.seed,
+            "models": list(app.model_service.models),
+            "compiled_models": COMPILED_MODELS,
+        },
+    )
+
+    X = encode_batch(
+        [PatientInput(**p) for p in random_patients(args.batch_size, args.seed)]
+    )
+    # Các worker "process" được fork từ trạng thái này nên kế thừa service này
+    app.model_service = ModelService(
+        models=app.active_models(),
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        derive_label_from_proba=DERIVE_LABEL_FROM_PROBA,
+        feature_order=FEATURE_ORDER,
+        compiled_models=COMPILED_MODELS,
+    )
+
+    for kind in kinds:
+        for workers in worker_counts:
+            executor = InferenceExecutor(
+                kind=kind,
+                max_workers=workers,
+                max_queue_size=workers * JOBS_PER_WORKER,
+                model_source=lambda: app.model_service,
+            )
+            executor.start()
+            try:
+                # Warm up: tạo worker, gắn shared memory, cache của models
+                asyncio.run(run_level(executor, X, min(args.duration, 0.5)))
+                result = asyncio.run(run_level(executor, X, args.duration))
+                memory = [m for m in executor.worker_memory().values() if m]
+            finally:
+                executor.shutdown()
+
+            key = f"{kind}[workers={workers}]"
+            report.add(
+                f"{key} throughput",
+                result["rows_per_second"],
+                unit="rows/s",
+                higher_is_better=True,
+                jobs=result["jobs"],
+            )
+            line = f"{key:22s} {result['rows_per_second']:12,.0f} rows/s"
+            if memory:
+                uss = sum(m["uss"] for m in memory) / 2**20
+                pss = sum(m["pss"] for m in memory) / 2**20
+                report.add(f"{key} worker uss", uss, unit="MiB")
+                report.add(f"{key} worker pss", pss, unit="MiB")
+                line += f"  workers uss {uss:8.1f} MiB  pss {pss:8.1f} MiB"
+            print(line)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--kinds",
+        default=DEFAULT_KINDS,
+        help=f"Các loại executor, phân cách bởi dấu phẩy (mặc định {DEFAULT_KINDS})",
+    )
+    parser.add_argument(
+        "--workers",
+        default=DEFAULT_WORKERS,
+        help=f"Các số worker, phân cách bởi dấu phẩy (mặc định {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=256, help="Số dòng mỗi job"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=3.0,
+        help="Thời gian đo (giây) cho mỗi cấu hình",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+
+    if app.model_service is None:
+        raise SystemExit("❌ No models loaded")
+
+    finish(run(args), args)
+
+
+if __name__ == "__main__":
+    main()
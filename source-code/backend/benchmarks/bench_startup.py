@@ -0,0 +1,131 @@
+"""
+Benchmark startup
+=================
+
+So sánh chi phí khởi động giữa artifacts joblib (.pkl, cần scikit-learn) và
+định dạng portable (.npz, chỉ cần NumPy, xem export_models.py): mỗi lần đo
+chạy 1 process Python mới, import model loader và load các models, ghi lại
+thời gian, số modules đã import, bộ nhớ (max RSS) và các package nặng có bị
+import hay không.
+
+Chạy từ thư mục backend/ (cần export trước):
+    python export_models.py -o ../model_portable
+    python -m benchmarks.bench_startup --portable-dir ../model_portable -o results/startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Mapping
+
+from config import MODEL_PATHS
+from services.portable import portable_model_paths
+
+from .report import BenchmarkReport, add_output_arguments, finish
+
+HEAVY_PACKAGES = ("sklearn", "scipy", "pandas", "joblib")
+
+# Code chạy trong process con: đo từ trước khi import model loader
+CHILD_CODE = """
+import json, resource, sys, time
+started = time.perf_counter()
+from services.model_loader import load_model_files
+imported = time.perf_counter()
+models, infos = load_model_files(json.loads(sys.argv[1]))
+loaded = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "total_seconds": loaded - started,
+    "models": len(models),
+    "errors": {name: str(info.error) for name, info in infos.items() if info.error},
+    "modules": len(sys.modules),
+    "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "heavy_packages": sorted(
+        {name.split(".")[0] for name in sys.modules} & set(json.loads(sys.argv[2]))
+    ),
+}))
+"""
+
+
+def run_child(model_paths: Mapping[str, str]) -> Dict:
+    """Load model_paths trong 1 process Python mới, trả về số đo của process đó"""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            CHILD_CODE,
+            json.dumps(dict(model_paths)),
+            json.dumps(HEAVY_PACKAGES),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    variants = {"joblib": MODEL_PATHS}
+    if args.portable_dir:
+        variants["portable"] = portable_model_paths(args.portable_dir)
+
+    report = BenchmarkReport(
+        "startup",
+        params={
+            "runs": args.runs,
+            "portable_dir": args.portable_dir,
+            "models": {name: dict(paths) for name, paths in variants.items()},
+        },
+    )
+
+    for variant, model_paths in variants.items():
+        samples: List[Dict] = [run_child(model_paths) for _ in range(args.runs)]
+        first = samples[0]
+        if first["errors"]:
+            print(f"❌ {variant}: {first['errors']}")
+
+        total = statistics.median(sample["total_seconds"] for sample in samples)
+        imports = statistics.median(sample["import_seconds"] for sample in samples)
+        rss_mib = statistics.median(sample["max_rss_kib"] for sample in samples) / 1024
+
+        report.add(
+            f"{variant} startup",
+            total,
+            models=first["models"],
+            heavy_packages=first["heavy_packages"],
+        )
+        report.add(f"{variant} import", imports)
+        report.add(f"{variant} modules", first["modules"], unit="modules")
+        report.add(f"{variant} max_rss", rss_mib, unit="MiB")
+
+        print(
+            f"{variant:10s} startup {total * 1e3:8.1f} ms"
+            f"  (import {imports * 1e3:7.1f} ms)"
+            f"  {first['modules']:5d} modules  {rss_mib:7.1f} MiB"
+            f"  heavy: {', '.join(first['heavy_packages']) or '-'}"
+        )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--portable-dir",
+        default=os.getenv("PORTABLE_MODEL_DIR"),
+        help="Thư mục đã export bằng export_models.py (mặc định $PORTABLE_MODEL_DIR)",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Số process đo cho mỗi định dạng"
+    )
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    finish(run(args), args)
+
+
+if __name__ == "__main__":
+    main()
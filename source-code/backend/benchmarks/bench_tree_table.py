@@ -0,0 +1,156 @@
+"""
+Benchmark tree table
+====================
+
+So sánh throughput predict_proba của các models cây (Decision Tree, Random
+Forest) theo kích thước batch giữa:
+
+- sklearn: model gốc
+- compiled: CompiledTreeModel (COMPILED_MODELS)
+- table: TreeLookupTable (TREE_LOOKUP_TABLES)
+
+và báo thời gian dựng, số ô, dung lượng của bảng. Bảng được dựng với cùng
+miền giá trị như app (PatientInput), giới hạn --max-mb. Input là bệnh nhân
+ngẫu nhiên với seed cố định.
+
+Chạy từ thư mục backend/:
+    python -m benchmarks.bench_tree_table -o results/tree_table.json
+    python -m benchmarks.bench_tree_table --max-mb 256 --baseline results/tree_table.json
+"""
+
+import argparse
+import warnings
+from typing import Any, Dict
+
+import app
+from app import PatientInput, encode_batch
+from config import ENCODING_MAPS, FEATURE_ORDER, TREE_LOOKUP_TABLE_MAX_MB
+from services.compiled_trees import compile_tree_model
+from services.encoding import align_feature_names
+from services.tree_table import TreeTableBuilder, feature_domains
+
+from .bench_inference import measure
+from .report import BenchmarkReport, add_output_arguments, finish
+from .workload import DEFAULT_SEED, random_patients
+
+DEFAULT_BATCH_SIZES = "1,10,100,1000,10000,100000"
+
+
+def run(args: argparse.Namespace) -> BenchmarkReport:
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    builder = TreeTableBuilder(
+        feature_domains(
+            FEATURE_ORDER,
+            ENCODING_MAPS,
+            app._allowed_values,
+            app._minimums,
+            app._integer_features,
+        ),
+        models=(),
+        max_bytes=int(args.max_mb * 2**20),
+    )
+
+    # Chỉ các models cây (model sklearn gốc, không phải engine của app)
+    engines: Dict[str, Dict[str, Any]] = {}
+    for model_name, model in app.model_service.models.items():
+        model = getattr(model, "_fallback", None) or model
+        try:
+            align_feature_names(model, FEATURE_ORDER)
+            compiled = compile_tree_model(model, keep_fallback=False)
+        except Exception:
+            continue
+        engines[model_name] = {"sklearn": model, "compiled": compiled}
+
+    report = BenchmarkReport(
+        "tree_table",
+        params={
+            "batch_sizes": batch_sizes,
+            "seed": args.seed,
+            "min_time": args.min_time,
+            "max_mb": args.max_mb,
+            "models": list(engines),
+        },
+    )
+
+    for model_name, variants in engines.items():
+        try:
+            table, checked = builder.build(variants["sklearn"])
+        except ValueError as e:
+            print(f"❌ {model_name}: {e}")
+            continue
+        info = table.info()
+        variants["table"] = table
+        report.add(f"build_seconds[{model_name}]", info["build_seconds"], unit="s")
+        report.add(
+            f"table_memory[{model_name}]",
+            info["table_bytes"] / 2**20,
+            unit="MiB",
+            cells=info["cells"],
+            outcomes=info["outcomes"],
+            verified_cells=checked["cells"],
+            verified_rows=checked["rows"],
+            verify_seconds=checked["verify_seconds"],
+        )
+        print(
+            f"{model_name}: {info['cells']:,} cells, {info['outcomes']:,} outcomes, "
+            f"{info['table_bytes'] / 2**20:.1f} MiB, built in {info['build_seconds']:.2f}s"
+        )
+
+    all_patients = random_patients(max(batch_sizes), args.seed)
+    X_all = encode_batch([PatientInput(**record) for record in all_patients])
+    for batch_size in batch_sizes:
+        X = X_all[:batch_size]
+        for model_name, variants in engines.items():
+            for variant, model in variants.items():
+                timing = measure(lambda: model.predict_proba(X), args.min_time)
+                rows_per_second = batch_size / timing["median"]
+                key = f"{variant}[{model_name},batch={batch_size}]"
+                report.add(
+                    f"{key} throughput",
+                    rows_per_second,
+                    unit="rows/s",
+                    higher_is_better=True,
+                    median=timing["median"],
+                    runs=timing["runs"],
+                )
+                print(
+                    f"{key:45s} {timing['median'] * 1e3:10.3f} ms"
+                    f"  {rows_per_second:14,.0f} rows/s"
+                )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--batch-sizes",
+        default=DEFAULT_BATCH_SIZES,
+        help=f"Các kích thước batch, phân cách bởi dấu phẩy (mặc định {DEFAULT_BATCH_SIZES})",
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=float,
+        default=TREE_LOOKUP_TABLE_MAX_MB,
+        help=f"Giới hạn bộ nhớ của bảng (mặc định TREE_LOOKUP_TABLE_MAX_MB = {TREE_LOOKUP_TABLE_MAX_MB:g})",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="Thời gian đo tối thiểu (giây) cho mỗi phép đo",
+    )
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+
+    if app.model_service is None:
+        raise SystemExit("❌ No models loaded")
+
+    finish(run(args), args)
+
+
+if __name__ == "__main__":
+    main()
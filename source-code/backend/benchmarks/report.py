@@ -0,0 +1,219 @@
+"""
+Benchmark results
+=================
+
+Lưu kết quả benchmark ra JSON và so sánh với 1 lần chạy trước (baseline).
+
+Mỗi kết quả là 1 metric có tên cố định, ví dụ
+"predict_with_model[SVM,batch=1000]", kèm đơn vị và chiều tốt hơn. Khi so
+sánh, metric bị coi là regression nếu tệ hơn baseline quá threshold (tỉ lệ,
+ví dụ 0.2 = chậm hơn 20%).
+
+So sánh 2 file có sẵn (chạy từ thư mục backend/):
+    python -m benchmarks.report results/new.json results/baseline.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from importlib import metadata
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import MODEL_PATHS
+
+DEFAULT_THRESHOLD = 0.2
+
+
+class BenchmarkReport:
+    """Tập hợp kết quả của 1 lần chạy benchmark"""
+
+    def __init__(self, suite: str, params: Optional[Dict] = None):
+        self.suite = suite
+        self.params = params or {}
+        self.results: Dict[str, Dict] = {}
+
+    def add(
+        self,
+        name: str,
+        value: float,
+        unit: str = "s",
+        higher_is_better: bool = False,
+        **extra,
+    ) -> None:
+        self.results[name] = {
+            "value": value,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+            **extra,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "suite": self.suite,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "environment": environment_info(),
+            "params": self.params,
+            "results": self.results,
+        }
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"✅ Saved {len(self.results)} results to {path}")
+
+
+def environment_info() -> Dict:
+    """Thông tin môi trường để biết 2 lần chạy có so sánh được hay không"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": _package_version("scikit-learn"),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+        "model_artifacts": {
+            name: _artifact_info(path) for name, path in MODEL_PATHS.items()
+        },
+    }
+
+
+def _package_version(package: str) -> Optional[str]:
+    # scikit-learn là optional (extra "sklearn"), chỉ cần khi serve file .pkl
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _artifact_info(path: str) -> Optional[Dict]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {"path": path, "size_bytes": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_report(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_reports(
+    current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD
+) -> List[Dict]:
+    """
+    So sánh các metric có trong cả 2 lần chạy
+
+    Returns:
+        List dict (name, baseline, current, change, regression) theo thứ tự
+        metric của current; change > 0 nghĩa là tệ hơn baseline
+    """
+    rows = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None or not previous["value"]:
+            continue
+        ratio = result["value"] / previous["value"]
+        change = (1.0 / ratio - 1.0) if result["higher_is_better"] else (ratio - 1.0)
+        rows.append(
+            {
+                "name": name,
+                "unit": result["unit"],
+                "baseline": previous["value"],
+                "current": result["value"],
+                "change": change,
+                "regression": change > threshold,
+            }
+        )
+    return rows
+
+
+def print_comparison(rows: List[Dict], threshold: float) -> bool:
+    """In bảng so sánh, trả về True nếu không có regression"""
+    for row in rows:
+        marker = "❌" if row["regression"] else "  "
+        print(
+            f"{marker} {row['name']:55s} {_format(row['baseline'], row['unit']):>12s}"
+            f" -> {_format(row['current'], row['unit']):>12s}  ({row['change']:+.1%})"
+        )
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"❌ {len(regressions)} metric(s) worse than baseline by > {threshold:.0%}")
+        return False
+    print(f"✅ No regression > {threshold:.0%} ({len(rows)} metrics compared)")
+    return True
+
+
+def check_against_baseline(
+    report: BenchmarkReport, baseline_path: str, threshold: float
+) -> bool:
+    """So sánh report vừa chạy với file baseline, in kết quả"""
+    rows = compare_reports(report.to_dict(), load_report(baseline_path), threshold)
+    return print_comparison(rows, threshold)
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Các tham số chung: file output, baseline và threshold"""
+    parser.add_argument("-o", "--output", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--baseline", help="File JSON của lần chạy trước để so sánh")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Tỉ lệ tệ hơn baseline tối đa trước khi báo regression (mặc định 0.2)",
+    )
+
+
+def finish(report: BenchmarkReport, args: argparse.Namespace) -> None:
+    """Lưu report và thoát với exit code 1 nếu có regression so với baseline"""
+    if args.output:
+        report.save(args.output)
+    if args.baseline and not check_against_baseline(report, args.baseline, args.threshold):
+        sys.exit(1)
+
+
+def _format(value: float, unit: str) -> str:
+    if unit == "s":
+        if value < 1e-3:
+            return f"{value * 1e6:.1f} us"
+        if value < 1:
+            return f"{value * 1e3:.2f} ms"
+        return f"{value:.2f} s"
+    return f"{value:,.1f} {unit}"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="So sánh 2 file kết quả benchmark")
+    parser.add_argument("current", help="File JSON của lần chạy mới")
+    parser.add_argument("baseline", help="File JSON của lần chạy trước")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    rows = compare_reports(load_report(args.current), load_report(args.baseline), args.threshold)
+    if not print_comparison(rows, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
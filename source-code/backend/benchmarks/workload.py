@@ -0,0 +1,38 @@
+"""
+Benchmark workload
+==================
+
+Sinh dữ liệu bệnh nhân ngẫu nhiên (hợp lệ với PatientInput) với seed cố
+định, để các lần chạy benchmark dùng đúng cùng input.
+"""
+
+from typing import Dict, List, get_args
+
+import numpy as np
+
+from app import PatientInput
+
+DEFAULT_SEED = 42
+
+
+def random_patients(n: int, seed: int = DEFAULT_SEED) -> List[Dict]:
+    """
+    n bệnh nhân ngẫu nhiên dạng dict (key theo alias, như JSON request)
+
+    Field categorical lấy đều trong các giá trị Literal của PatientInput; các
+    field số lấy theo phân phối gần với dữ liệu METABRIC.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, field in PatientInput.model_fields.items():
+        key = field.alias or name
+        choices = get_args(field.annotation)
+        if choices:
+            columns[key] = [choices[i] for i in rng.integers(0, len(choices), n)]
+        elif field.annotation is int:
+            columns[key] = rng.poisson(2.0, n).tolist()
+        else:
+            columns[key] = np.round(rng.uniform(1.0, 7.0, n), 2).tolist()
+
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
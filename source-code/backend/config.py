@@ -0,0 +1,180 @@
+"""
+Configuration
+=============
+
+Cấu hình dùng chung cho API (app.py) và các công cụ chạy ngoài server
+(score_cohort.py): đường dẫn models, encoding, thứ tự features và các tuỳ
+chọn inference (ghi đè được bằng biến môi trường).
+"""
+
+import os
+
+# ==================== CONFIGURATION ====================
+MODEL_SVM_PATH = "../model_v2/svm.pkl"
+MODEL_RF_PATH = "../model_v2/best_model_random_forest.pkl"
+MODEL_DT_PATH = "../model_v2/decision_tree_best.pkl"
+MODEL_PATHS = {
+    "SVM": MODEL_SVM_PATH,
+    "Random Forest": MODEL_RF_PATH,
+    "Decision Tree": MODEL_DT_PATH,
+}
+
+# Thư mục models đã export sang định dạng portable (export_models.py): nếu
+# có, MODEL_PATHS trỏ tới các file .npz trong đó và models được serve bằng
+# runtime NumPy (không import scikit-learn/joblib)
+PORTABLE_MODEL_DIR = os.getenv("PORTABLE_MODEL_DIR") or None
+if PORTABLE_MODEL_DIR:
+    MODEL_PATHS = {
+        name: os.path.join(
+            PORTABLE_MODEL_DIR, os.path.splitext(os.path.basename(path))[0] + ".npz"
+        )
+        for name, path in MODEL_PATHS.items()
+    }
+
+# "c" = memory-map (copy-on-write) các mảng NumPy của model, dùng chung giữa
+# các worker qua page cache; rỗng = load copy vào heap như cũ
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE") or None
+# 1 = chỉ load model ở request đầu tiên dùng đến nó
+LAZY_MODEL_LOADING = os.getenv("LAZY_MODEL_LOADING", "0") == "1"
+
+# Model registry: mỗi thư mục con là 1 phiên bản artifacts (cùng tên file như
+# MODEL_PATHS). Nếu không có phiên bản nào thì dùng MODEL_PATHS như cũ
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "../model_registry")
+# Phiên bản load lúc startup, rỗng = phiên bản mới nhất (theo tên thư mục)
+MODEL_VERSION = os.getenv("MODEL_VERSION") or None
+# Số phiên bản cũ giữ trong bộ nhớ để rollback tức thì
+MODEL_ROLLBACK_VERSIONS = int(os.getenv("MODEL_ROLLBACK_VERSIONS", "2"))
+# Token cho các endpoint /admin/* (header "Authorization: Bearer <token>");
+# rỗng = tắt các endpoint admin
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN") or None
+
+# Số bệnh nhân tối đa trong 1 request batch
+MAX_BATCH_SIZE = 50_000
+
+# Inference executor: "thread", "process" hoặc "shared" (process pool, trọng số
+# models trong shared memory, xem services/shared_models.py; chỉ Linux)
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "4"))
+# Số request tối đa được chờ inference; vượt quá -> 503 + Retry-After
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+INFERENCE_RETRY_AFTER = int(os.getenv("INFERENCE_RETRY_AFTER", "1"))
+
+# Chạy các models song song trong /predict-all (fan-out), timeout cho mỗi model:
+# MODEL_TIMEOUT giây + MODEL_TIMEOUT_PER_ROW_MS cho mỗi dòng của batch (SVM
+# sklearn ~0.16 ms/dòng, batch MAX_BATCH_SIZE dòng ~8 giây). Model quá timeout
+# chỉ bị bỏ kết quả: thread của nó vẫn chạy tới hết trong fan-out pool
+PARALLEL_MODELS = os.getenv("PARALLEL_MODELS", "1") == "1"
+MODEL_TIMEOUT = float(os.getenv("MODEL_TIMEOUT", "5"))
+MODEL_TIMEOUT_PER_ROW_MS = float(os.getenv("MODEL_TIMEOUT_PER_ROW_MS", "0.3"))
+
+# Scheduler của /predict-all và các endpoint nhiều models (services/scheduler.py):
+# circuit breaker cho từng model và fallback sang models rẻ khi quá tải
+MODEL_SCHEDULER = os.getenv("MODEL_SCHEDULER", "1") == "1"
+# Circuit breaker: model bị ngắt khi tỉ lệ lỗi (error, timeout) trên
+# CIRCUIT_BREAKER_WINDOW lần gọi gần nhất >= CIRCUIT_BREAKER_ERROR_RATE (cần ít
+# nhất CIRCUIT_BREAKER_MIN_CALLS lần), được chạy thử lại sau COOLDOWN giây
+CIRCUIT_BREAKER_WINDOW = int(os.getenv("CIRCUIT_BREAKER_WINDOW", "20"))
+CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "5"))
+CIRCUIT_BREAKER_ERROR_RATE = float(os.getenv("CIRCUIT_BREAKER_ERROR_RATE", "0.5"))
+CIRCUIT_BREAKER_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", "30"))
+# Fallback khi quá tải (opt-in, vì response khi đó thiếu kết quả của 1 số
+# models): quá tải khi số job inference đang chạy + chờ >= OVERLOAD_PENDING_JOBS
+# (0 = tắt; gợi ý: workers + nửa queue). Khi quá tải chỉ chạy
+# OVERLOAD_FALLBACK_MODELS, hoặc nếu OVERLOAD_LATENCY_BUDGET_MS > 0: fallback
+# models trước rồi các models khác (rẻ trước) miễn latency ước lượng còn trong budget
+OVERLOAD_PENDING_JOBS = int(os.getenv("OVERLOAD_PENDING_JOBS", "0"))
+OVERLOAD_FALLBACK_MODELS = [
+    name.strip()
+    for name in os.getenv("OVERLOAD_FALLBACK_MODELS", "Decision Tree").split(",")
+    if name.strip()
+]
+OVERLOAD_LATENCY_BUDGET_MS = float(os.getenv("OVERLOAD_LATENCY_BUDGET_MS", "0"))
+
+# 1 lần inference cho cả label và probabilities khi label vẫn đúng như predict():
+# cây / rừng lấy argmax của predict_proba, CompiledSVM lấy vote one-vs-one từ
+# cùng decision values. SVC sklearn vẫn gọi thêm predict()
+DERIVE_LABEL_FROM_PROBA = os.getenv("DERIVE_LABEL_FROM_PROBA", "1") == "1"
+
+# Micro-batching (opt-in): gom các request 1 bệnh nhân đến trong cùng cửa sổ
+# thời gian thành 1 batch để mỗi model chỉ predict 1 lần
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "0") == "1"
+MICRO_BATCH_WINDOW_MS = float(os.getenv("MICRO_BATCH_WINDOW_MS", "2"))
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+
+# Gộp các request 1 bệnh nhân giống hệt nhau (cùng vector feature đã encode)
+# đang chạy đồng thời thành 1 lần inference (single-flight)
+REQUEST_DEDUP = os.getenv("REQUEST_DEDUP", "1") == "1"
+
+# Prediction cache theo vector feature đã encode (0 = tắt)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+# Chỉ dùng cache cho batch tối đa bao nhiêu dòng (1 bệnh nhân, micro-batch);
+# batch lớn hơn predict thẳng để không đẩy các kết quả 1 bệnh nhân ra khỏi cache
+PREDICTION_CACHE_MAX_ROWS = int(os.getenv("PREDICTION_CACHE_MAX_ROWS", "64"))
+
+# Các models chạy bằng compiled engine thay vì sklearn, phân cách bởi dấu phẩy
+# (ví dụ "Decision Tree,Random Forest"); engine được kiểm tra khớp với sklearn
+# lúc load
+COMPILED_MODELS = [
+    name.strip() for name in os.getenv("COMPILED_MODELS", "").split(",") if name.strip()
+]
+
+# Các models (Decision Tree / Random Forest) được thay bằng bảng tra cứu dựng
+# sẵn trên miền giá trị của input, phân cách bởi dấu phẩy (ví dụ "Decision
+# Tree"); bảng được kiểm tra khớp tuyệt đối với model lúc load. Model có bảng
+# lớn hơn TREE_LOOKUP_TABLE_MAX_MB (ước lượng lúc dựng) giữ engine cũ
+TREE_LOOKUP_TABLES = [
+    name.strip() for name in os.getenv("TREE_LOOKUP_TABLES", "").split(",") if name.strip()
+]
+TREE_LOOKUP_TABLE_MAX_MB = float(os.getenv("TREE_LOOKUP_TABLE_MAX_MB", "64"))
+
+# Số support vectors làm background khi tính attributions của SVM (/explain):
+# nhiều hơn = base value ổn định hơn, chi phí tăng tuyến tính
+ATTRIBUTION_BACKGROUND_SIZE = int(os.getenv("ATTRIBUTION_BACKGROUND_SIZE", "8"))
+
+# Ghi response của các endpoint predict thẳng thành JSON bytes (orjson nếu có)
+# thay vì dựng Pydantic models và validate lại theo response_model
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "1") == "1"
+
+# Encoding maps
+ENCODING_MAPS = {
+    "type_of_breast_surgery": {"BREAST CONSERVING": 0, "MASTECTOMY": 1},
+    "cancer_type": {"Breast Cancer": 0, "Breast Sarcoma": 1},
+    "cellularity": {"High": 0, "Low": 1, "Moderate": 2},
+    "pam50_+_claudin-low_subtype": {
+        "Basal": 0,
+        "Her2": 1,
+        "LumA": 2,
+        "LumB": 3,
+        "NC": 4,
+        "Normal": 5,
+        "claudin-low": 6,
+    },
+    "her2_status": {"Negative": 0, "Positive": 1},
+    "pr_status": {"Negative": 0, "Positive": 1},
+}
+
+# Output decoding
+CANCER_TYPE_DETAILED = {
+    0: "Breast",
+    1: "Breast Invasive Ductal Carcinoma",
+    2: "Breast Invasive Lobular Carcinoma",
+    3: "Breast Invasive Mixed Mucinous Carcinoma",
+    4: "Breast Mixed Ductal and Lobular Carcinoma",
+}
+
+# Feature order (exclude cancer_type_detailed as it's the target)
+FEATURE_ORDER = [
+    "type_of_breast_surgery",
+    "cancer_type",
+    "cellularity",
+    "chemotherapy",
+    "pam50_+_claudin-low_subtype",
+    "neoplasm_histologic_grade",
+    "her2_status",
+    "hormone_therapy",
+    "lymph_nodes_examined_positive",
+    "nottingham_prognostic_index",
+    "pr_status",
+    "radio_therapy",
+]
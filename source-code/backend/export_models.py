@@ -0,0 +1,94 @@
+"""
+Export Models
+=============
+
+Export các models (joblib pickles trong MODEL_PATHS) sang định dạng portable
+(.npz + manifest.json, xem services/portable.py) để serve chỉ với NumPy.
+
+Mỗi model được compile, lưu, load lại và kiểm tra khớp với model sklearn
+trước khi ghi manifest; lỗi ở 1 model (kể cả khi load artifact) làm cả lần
+export thất bại. Dùng --models để chỉ export 1 số models.
+
+Ví dụ (chạy trong thư mục backend):
+
+    python export_models.py -o ../model_portable
+    PORTABLE_MODEL_DIR=../model_portable uvicorn app:app
+
+Hoặc export thẳng vào 1 phiên bản của model registry:
+
+    python export_models.py -o ../model_registry/2025-12-17
+"""
+
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+from config import CANCER_TYPE_DETAILED, FEATURE_ORDER, MODEL_PATHS
+from services.encoding import align_feature_names
+from services.model_loader import load_model_files
+from services.portable import export_models, portable_filename
+
+DEFAULT_OUTPUT_DIR = "../model_portable"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Export models sang định dạng portable (.npz + manifest.json)"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=DEFAULT_OUTPUT_DIR,
+        help=f"Thư mục output (mặc định {DEFAULT_OUTPUT_DIR})",
+    )
+    parser.add_argument(
+        "--models",
+        help="Chỉ export các models này, phân cách bởi dấu phẩy (mặc định: tất cả)",
+    )
+    args = parser.parse_args(argv)
+
+    model_paths = MODEL_PATHS
+    if args.models:
+        names = [name.strip() for name in args.models.split(",")]
+        unknown = [name for name in names if name not in MODEL_PATHS]
+        if unknown:
+            parser.error(f"Unknown models {unknown}, expected {list(MODEL_PATHS)}")
+        model_paths = {name: MODEL_PATHS[name] for name in names}
+
+    models, infos = load_model_files(model_paths)
+    failed = [name for name, info in infos.items() if info.error is not None]
+    for name in failed:
+        print(f"❌ Error loading {name} model: {infos[name].error}", file=sys.stderr)
+    if failed or not models:
+        # Manifest thiếu model thì server (PORTABLE_MODEL_DIR) lỗi khi load
+        # model đó: dùng --models để export có chủ đích 1 số models
+        raise SystemExit(f"❌ Could not load {failed or list(model_paths)}, nothing exported")
+
+    for model in models.values():
+        # Kiểm tra với ndarray theo FEATURE_ORDER như lúc serve
+        align_feature_names(model, FEATURE_ORDER)
+
+    started = time.perf_counter()
+    manifest = export_models(
+        models,
+        args.output,
+        file_names={name: portable_filename(model_paths[name]) for name in models},
+        feature_order=FEATURE_ORDER,
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+    )
+
+    for name, entry in manifest["models"].items():
+        print(
+            f"✅ {name}: {entry['file']} ({entry['engine']}, "
+            f"{entry['size_bytes'] / 1024:.1f} KiB, verified on "
+            f"{entry['verified_rows']} rows, max diff {entry['max_abs_diff']:.2g})"
+        )
+    print(
+        f"✅ Exported {len(manifest['models'])} model(s) to {args.output} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Schemas
+=======
+
+Schema input bệnh nhân (PatientInput) dùng chung cho API (app.py) và các công
+cụ chạy ngoài server (score_cohort.py), cùng các ràng buộc của feature số
+(Literal, ge, số nguyên) dẫn xuất từ schema để kiểm tra input đã encode
+(Arrow, CSV/Parquet) giống như PatientInput.
+"""
+
+from typing import Literal, get_args, get_origin
+
+from pydantic import BaseModel, Field
+
+from config import ENCODING_MAPS
+
+
+class PatientInput(BaseModel):
+    type_of_breast_surgery: Literal["BREAST CONSERVING", "MASTECTOMY"] = Field(
+        ..., description="Loại phẫu thuật vú"
+    )
+    cancer_type: Literal["Breast Cancer", "Breast Sarcoma"] = Field(
+        ..., description="Loại ung thư"
+    )
+    cellularity: Literal["High", "Low", "Moderate"] = Field(
+        ..., description="Mật độ tế bào"
+    )
+    chemotherapy: Literal[0, 1] = Field(..., description="Hóa trị (0: No, 1: Yes)")
+    pam50_claudin_low_subtype: Literal[
+        "Basal", "Her2", "LumA", "LumB", "NC", "Normal", "claudin-low"
+    ] = Field(..., alias="pam50_+_claudin-low_subtype", description="PAM50 subtype")
+
+    neoplasm_histologic_grade: Literal[1, 2, 3] = Field(
+        ..., description="Độ mô học (1-3)"
+    )
+    her2_status: Literal["Negative", "Positive"] = Field(
+        ..., description="Trạng thái HER2"
+    )
+    hormone_therapy: Literal[0, 1] = Field(
+        ..., description="Liệu pháp hormone (0: No, 1: Yes)"
+    )
+    lymph_nodes_examined_positive: int = Field(
+        ..., ge=0, description="Số hạch bạch huyết dương tính"
+    )
+    nottingham_prognostic_index: float = Field(
+        ..., ge=0, description="Chỉ số tiên lượng Nottingham"
+    )
+    pr_status: Literal["Negative", "Positive"] = Field(..., description="Trạng thái PR")
+    radio_therapy: Literal[0, 1] = Field(..., description="Xạ trị (0: No, 1: Yes)")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "type_of_breast_surgery": "MASTECTOMY",
+                "cancer_type": "Breast Cancer",
+                "cellularity": "High",
+                "chemotherapy": 1,
+                "pam50_+_claudin-low_subtype": "LumA",
+                "neoplasm_histologic_grade": 3,
+                "her2_status": "Positive",
+                "hormone_therapy": 1,
+                "lymph_nodes_examined_positive": 5,
+                "nottingham_prognostic_index": 5.4,
+                "pr_status": "Positive",
+                "radio_therapy": 1,
+            }
+        }
+
+
+def feature_constraints():
+    """
+    Ràng buộc của các feature số theo PatientInput (cho input đã encode)
+
+    Returns:
+        Tuple (allowed_values, minimums, integer_features): giá trị của các
+        field Literal, giá trị ge và các field kiểu int
+    """
+    allowed_values, minimums, integer_features = {}, {}, set()
+    for name, field in PatientInput.model_fields.items():
+        feature = field.alias or name
+        if feature in ENCODING_MAPS:
+            continue
+        if get_origin(field.annotation) is Literal:
+            allowed_values[feature] = get_args(field.annotation)
+            integer_features.add(feature)
+        elif field.annotation is int:
+            integer_features.add(feature)
+        for constraint in field.metadata:
+            if getattr(constraint, "ge", None) is not None:
+                minimums[feature] = constraint.ge
+    return allowed_values, minimums, integer_features
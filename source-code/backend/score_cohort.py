@@ -0,0 +1,404 @@
+"""
+Bulk Scoring CLI
+================
+
+Chấm điểm 1 file CSV / Parquet lớn (dữ liệu lâm sàng gốc, cùng cột như
+PatientInput) với tất cả models, không cần chạy API server.
+
+File được đọc và ghi theo từng chunk nên bộ nhớ không phụ thuộc kích thước
+file. Các chunk có thể được chia cho nhiều worker process (--workers); kết
+quả vẫn được ghi theo đúng thứ tự dòng của input.
+
+Ví dụ (chạy trong thư mục backend):
+
+    python score_cohort.py cohort.csv -o scores.csv
+    python score_cohort.py cohort.parquet -o scores.parquet --workers 4 --id-column patient_id
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    CANCER_TYPE_DETAILED,
+    COMPILED_MODELS,
+    DERIVE_LABEL_FROM_PROBA,
+    ENCODING_MAPS,
+    FEATURE_ORDER,
+    MODEL_MMAP_MODE,
+    MODEL_PATHS,
+)
+from schemas import feature_constraints
+from services.encoding import FeatureEncoder, FeatureValidator
+from services.model_loader import load_model_files
+from services.model_service import BatchPredictionResult, ModelService
+from services.serialization import column_prefix
+
+DEFAULT_CHUNK_SIZE = 20_000
+
+# Mỗi worker process giữ 1 ModelService (khởi tạo 1 lần trong _init_worker)
+_scorer: Optional["CohortScorer"] = None
+
+
+class InvalidRowError(ValueError):
+    """Dòng input không encode được (khi không có skip_invalid)"""
+
+    def __init__(self, row: int, reason: str):
+        # args giữ (row, reason) để exception pickle được từ worker process
+        super().__init__(row, reason)
+        self.row = row
+        self.reason = reason
+
+    def __str__(self) -> str:
+        return f"Invalid row {self.row}: {self.reason}"
+
+
+class CohortScorer:
+    """Encode + predict 1 chunk dữ liệu gốc thành DataFrame kết quả"""
+
+    def __init__(
+        self,
+        model_paths: Dict[str, str],
+        mmap_mode: Optional[str] = MODEL_MMAP_MODE,
+        compiled_models: Optional[List[str]] = None,
+        id_column: Optional[str] = None,
+        skip_invalid: bool = False,
+    ):
+        """
+        Initialize CohortScorer
+
+        Args:
+            model_paths: Mapping model name -> đường dẫn file .pkl
+            mmap_mode: mmap_mode khi load models (xem model_loader)
+            compiled_models: Các models dùng compiled engine
+            id_column: Cột của input được ghi lại vào output để nối kết quả
+            skip_invalid: True = dòng không encode được được ghi với cột
+                "error" thay vì dừng cả lần chạy (InvalidRowError)
+        """
+        models, infos = load_model_files(model_paths, mmap_mode=mmap_mode)
+        for name, info in infos.items():
+            if info.error is not None:
+                print(f"❌ Error loading {name} model: {info.error}", file=sys.stderr)
+        if not models:
+            raise RuntimeError("No models loaded")
+
+        self.service = ModelService(
+            models=models,
+            cancer_type_mapping=CANCER_TYPE_DETAILED,
+            derive_label_from_proba=DERIVE_LABEL_FROM_PROBA,
+            feature_order=FEATURE_ORDER,
+            compiled_models=compiled_models,
+        )
+        self.encoder = FeatureEncoder(ENCODING_MAPS, FEATURE_ORDER)
+        # Cùng ràng buộc như PatientInput của API (Literal, ge, số nguyên)
+        allowed_values, minimums, integer_features = feature_constraints()
+        self.validator = FeatureValidator(
+            FEATURE_ORDER,
+            ENCODING_MAPS,
+            allowed_values=allowed_values,
+            minimums=minimums,
+            integer_features=integer_features,
+        )
+        self.id_column = id_column
+        self.skip_invalid = skip_invalid
+
+    def score(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Predict 1 chunk, trả về DataFrame kết quả cùng số dòng
+
+        Raises:
+            InvalidRowError: Dòng đầu tiên không encode được (khi không có
+                skip_invalid), row = index của dòng trong chunk
+        """
+        valid = np.ones(len(chunk), dtype=bool)
+        errors = None
+        try:
+            X = self._encode(chunk)
+        except ValueError:
+            # Encode lại từng dòng để tìm dòng lỗi
+            errors = np.full(len(chunk), None, dtype=object)
+            rows = []
+            for i in range(len(chunk)):
+                try:
+                    rows.append(self._encode(chunk.iloc[i : i + 1]))
+                except ValueError as e:
+                    if not self.skip_invalid:
+                        raise InvalidRowError(int(chunk.index[i]), str(e)) from None
+                    valid[i] = False
+                    errors[i] = str(e)
+            X = np.vstack(rows) if rows else np.empty((0, len(FEATURE_ORDER)))
+
+        output: Dict[str, Any] = {}
+        if self.id_column is not None:
+            output[self.id_column] = chunk[self.id_column].to_numpy()
+
+        model_names, all_codes, all_confidences = [], [], []
+        for model_name in self.service.models:
+            batch = self._predict(model_name, X)
+            model_names.append(model_name)
+            all_codes.append(batch.codes)
+            all_confidences.append(batch.confidences)
+
+            prefix = column_prefix(model_name)
+            output[f"{prefix}_code"] = _expand(batch.codes, valid, -1)
+            output[f"{prefix}_label"] = _labels(output[f"{prefix}_code"])
+            if batch.probabilities is not None:
+                for col, class_name in enumerate(batch.class_names):
+                    output[f"{prefix}_proba_{column_prefix(class_name)}"] = _expand(
+                        batch.probabilities[:, col], valid, np.nan
+                    )
+
+        consensus = self.service.calculate_consensus_arrays(
+            model_names, all_codes, all_confidences
+        )
+        output["consensus_code"] = _expand(consensus.codes, valid, -1)
+        output["consensus_label"] = _labels(output["consensus_code"])
+        output["consensus_votes"] = _expand(consensus.vote_counts, valid, 0)
+        output["agreement"] = _expand(consensus.agreement, valid, False)
+
+        if errors is not None or self.skip_invalid:
+            # dtype string cả khi chunk không có lỗi: mọi chunk cùng schema Parquet
+            output["error"] = pd.array(
+                errors if errors is not None else np.full(len(chunk), None), dtype="string"
+            )
+        return pd.DataFrame(output)
+
+    def _encode(self, chunk: pd.DataFrame) -> np.ndarray:
+        X = self.encoder.encode_columns(chunk)
+        if np.isnan(X).any():
+            missing = [f for f, bad in zip(FEATURE_ORDER, np.isnan(X).any(axis=0)) if bad]
+            raise ValueError(f"Missing values for features {missing}")
+        self.validator.check(X)
+        return X
+
+    def _predict(self, model_name: str, X: np.ndarray) -> BatchPredictionResult:
+        if len(X):
+            return self.service.predict_batch_columnar(model_name, X)
+        # Cả chunk không hợp lệ: không gọi model (sklearn không nhận 0 dòng),
+        # kết quả rỗng vẫn đủ các cột probabilities để output cùng schema
+        capabilities = self.service.get_capabilities(model_name)
+        class_names = capabilities.class_names if capabilities.has_proba else None
+        return BatchPredictionResult(
+            model_name,
+            np.empty(0, dtype=int),
+            np.empty((0, len(class_names))) if class_names is not None else None,
+            class_names,
+            CANCER_TYPE_DETAILED,
+        )
+
+
+def _expand(values: np.ndarray, valid: np.ndarray, fill: Any) -> np.ndarray:
+    """Đưa kết quả của các dòng hợp lệ về đúng vị trí, dòng lỗi nhận fill"""
+    if valid.all():
+        return values
+    dtype = np.result_type(values, np.asarray(fill))
+    out = np.full(len(valid), fill, dtype=dtype)
+    out[valid] = values
+    return out
+
+
+def _labels(codes: np.ndarray) -> np.ndarray:
+    return np.array([CANCER_TYPE_DETAILED.get(code, "Unknown") for code in codes.tolist()])
+
+
+# ==================== INPUT / OUTPUT ====================
+def read_chunks(
+    path: str, chunk_size: int, columns: List[str]
+) -> Iterator[pd.DataFrame]:
+    """
+    Đọc file CSV hoặc Parquet theo từng chunk (chỉ các cột cần thiết)
+
+    Index của mỗi chunk là vị trí dòng trong file (0 = dòng dữ liệu đầu tiên)
+    """
+    if _is_parquet(path):
+        _, pq = _import_pyarrow()
+        parquet_file = pq.ParquetFile(path)
+        offset = 0
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            frame = batch.to_pandas()
+            frame.index = pd.RangeIndex(offset, offset + len(frame))
+            offset += len(frame)
+            yield frame
+        return
+
+    yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+
+
+class ChunkWriter:
+    """Ghi kết quả từng chunk vào file CSV hoặc Parquet"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._first = True
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.parquet:
+            pa, pq = _import_pyarrow()
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(
+                self.path, mode="w" if self._first else "a", header=self._first, index=False
+            )
+        self._first = False
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _is_parquet(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("❌ Đọc/ghi Parquet cần pyarrow: pip install pyarrow")
+    return pa, pq
+
+
+# ==================== WORKERS ====================
+def _init_worker(scorer_kwargs: Dict[str, Any]) -> None:
+    global _scorer
+    _scorer = CohortScorer(**scorer_kwargs)
+
+
+def _score_in_worker(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _scorer.score(chunk)
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 0,
+    scorer_kwargs: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Chấm điểm file input và ghi kết quả ra output_path
+
+    Args:
+        workers: 0 = chạy trong process hiện tại, N = chia chunks cho N
+            worker process (mỗi worker load models 1 lần)
+
+    Returns:
+        Số dòng đã chấm
+    """
+    scorer_kwargs = scorer_kwargs or {"model_paths": MODEL_PATHS}
+    columns = list(FEATURE_ORDER)
+    if scorer_kwargs.get("id_column"):
+        columns.append(scorer_kwargs["id_column"])
+
+    chunks = read_chunks(input_path, chunk_size, columns)
+    writer = ChunkWriter(output_path)
+    started = time.perf_counter()
+    n_rows = 0
+
+    def report(frame: pd.DataFrame) -> None:
+        nonlocal n_rows
+        writer.write(frame)
+        n_rows += len(frame)
+        elapsed = time.perf_counter() - started
+        print(
+            f"  {n_rows:,} rows ({n_rows / elapsed:,.0f} rows/s)",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    try:
+        if workers <= 0:
+            scorer = CohortScorer(**scorer_kwargs)
+            for chunk in chunks:
+                report(scorer.score(chunk))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(scorer_kwargs,),
+            ) as executor:
+                # Giới hạn số chunk đang xử lý để bộ nhớ không tăng theo file
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(_score_in_worker, chunk))
+                    if len(pending) >= 2 * workers:
+                        report(pending.popleft().result())
+                while pending:
+                    report(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {n_rows:,} rows in {elapsed:.1f}s -> {output_path}", file=sys.stderr)
+    return n_rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Chấm điểm file CSV/Parquet với tất cả models (theo chunk)"
+    )
+    parser.add_argument("input", help="File input .csv hoặc .parquet")
+    parser.add_argument(
+        "-o", "--output", required=True, help="File output .csv hoặc .parquet"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Số dòng mỗi chunk"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Số worker process (0 = không dùng)"
+    )
+    parser.add_argument(
+        "--models",
+        help="Chỉ dùng các models này, phân cách bởi dấu phẩy (mặc định: tất cả)",
+    )
+    parser.add_argument("--id-column", help="Cột định danh được ghi lại vào output")
+    parser.add_argument(
+        "--skip-invalid",
+        action="store_true",
+        help="Ghi lỗi vào cột 'error' thay vì dừng khi gặp dòng không hợp lệ",
+    )
+    args = parser.parse_args(argv)
+
+    model_paths = MODEL_PATHS
+    if args.models:
+        names = [name.strip() for name in args.models.split(",")]
+        unknown = [name for name in names if name not in MODEL_PATHS]
+        if unknown:
+            parser.error(f"Unknown models {unknown}, expected {list(MODEL_PATHS)}")
+        model_paths = {name: MODEL_PATHS[name] for name in names}
+
+    try:
+        score_file(
+            args.input,
+            args.output,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            scorer_kwargs={
+                "model_paths": model_paths,
+                "compiled_models": COMPILED_MODELS,
+                "id_column": args.id_column,
+                "skip_invalid": args.skip_invalid,
+            },
+        )
+    except InvalidRowError as e:
+        raise SystemExit(
+            f"❌ Invalid row {e.row} of {args.input} (0 = first data row): {e.reason}. "
+            "Use --skip-invalid to write errors to the 'error' column instead"
+        )
+
+
+if __name__ == "__main__":
+    main()
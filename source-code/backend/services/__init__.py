@@ -1,6 +1,6 @@
 """Services package for business logic"""
 
-from .model_service import ModelService, ModelPredictionResult
+from .model_service import BatchPredictionResult, ModelService, ModelPredictionResult
 
-__all__ = ["ModelService", "ModelPredictionResult"]
+__all__ = ["ModelService", "ModelPredictionResult", "BatchPredictionResult"]
 
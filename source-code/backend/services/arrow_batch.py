@@ -0,0 +1,203 @@
+"""
+Arrow Batch
+===========
+
+Đọc batch bệnh nhân từ Apache Arrow IPC stream và ghi kết quả predict thành
+Arrow IPC stream (endpoint /predict-all-arrow).
+
+Client nội bộ đã giữ dữ liệu dạng cột (pandas, Parquet, Spark, ...) không cần
+đi qua JSON -> PatientInput -> encode_input từng dòng: mỗi cột của record
+batch được kiểm tra và encode 1 lần cho cả batch.
+
+Mỗi feature của FEATURE_ORDER là 1 cột, có thể là:
+
+- Giá trị gốc dạng string (hoặc dictionary string), ví dụ "MASTECTOMY":
+  được map theo ENCODING_MAPS bằng pyarrow.compute.index_in
+- Giá trị đã encode dạng số, ví dụ 1: lấy view NumPy của buffer Arrow (không
+  copy) rồi kiểm tra theo các giá trị hợp lệ của ENCODING_MAPS hoặc ràng buộc
+  của PatientInput (Literal, ge, số nguyên)
+
+Kết quả có các cột {model}_code, {model}_confidence và
+{model}_proba_{class} cho từng model (tên cột như score_cohort.py);
+failed_models, model_version và cancer_type_mapping nằm trong metadata của
+schema (JSON).
+
+pyarrow là optional (extra "arrow"): nếu chưa cài, endpoint trả 501.
+"""
+
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .encoding import FeatureValidator
+from .serialization import column_prefix, dumps
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class ArrowBatchCodec:
+    """
+    Decode record batch input thành ma trận features, encode kết quả thành stream
+
+    Args:
+        encoding_maps: Mapping feature -> {giá trị gốc: mã số}
+        feature_order: Thứ tự cột mà models được train
+        allowed_values: Mapping feature số -> các giá trị hợp lệ (Literal)
+        minimums: Mapping feature số -> giá trị nhỏ nhất (ge)
+        integer_features: Các feature số phải là số nguyên
+        max_rows: Số dòng tối đa của 1 request
+    """
+
+    def __init__(
+        self,
+        encoding_maps: Mapping[str, Mapping[Any, int]],
+        feature_order: Sequence[str],
+        allowed_values: Optional[Mapping[str, Iterable[float]]] = None,
+        minimums: Optional[Mapping[str, float]] = None,
+        integer_features: Iterable[str] = (),
+        max_rows: Optional[int] = None,
+    ):
+        self.feature_order = list(feature_order)
+        self.max_rows = max_rows
+        # Input đã encode: mã số của mapping hoặc ràng buộc của PatientInput
+        self.validator = FeatureValidator(
+            feature_order,
+            encoding_maps,
+            allowed_values=allowed_values,
+            minimums=minimums,
+            integer_features=integer_features,
+        )
+
+        # Feature categorical: (keys dạng string, mã số theo thứ tự keys)
+        self._categories: Dict[str, Any] = {}
+        for feature, mapping in encoding_maps.items():
+            keys = list(mapping)
+            codes = np.asarray([mapping[key] for key in keys], dtype=np.float64)
+            self._categories[feature] = (keys, codes)
+
+        # pa.array() import pandas (pyarrow pandas shim): tạo ở lần decode đầu
+        # tiên thay vì lúc import app
+        self._value_sets: Dict[str, Any] = {}
+
+    def decode(self, body: bytes) -> np.ndarray:
+        """
+        Đọc Arrow IPC stream thành ma trận (n_rows, n_features) theo feature_order
+
+        Raises:
+            ValueError: Nếu stream không hợp lệ, thiếu cột, có null, có giá trị
+                không hợp lệ, hoặc số dòng ngoài [1, max_rows]
+        """
+        try:
+            table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        except (pa.ArrowInvalid, OSError) as e:
+            raise ValueError(f"Invalid Arrow IPC stream: {e}")
+
+        missing = [f for f in self.feature_order if f not in table.column_names]
+        if missing:
+            raise ValueError(f"Missing columns {missing}")
+        n_rows = table.num_rows
+        if n_rows == 0:
+            raise ValueError("Empty batch")
+        if self.max_rows is not None and n_rows > self.max_rows:
+            raise ValueError(f"Batch has {n_rows} rows, maximum is {self.max_rows}")
+
+        # Fortran order: mỗi cột liên tục trong bộ nhớ khi ghi theo cột
+        X = np.empty((n_rows, len(self.feature_order)), dtype=np.float64, order="F")
+        for col, feature in enumerate(self.feature_order):
+            X[:, col] = self._decode_column(feature, table.column(feature))
+        return np.ascontiguousarray(X)
+
+    def _decode_column(self, feature: str, column) -> np.ndarray:
+        if column.null_count:
+            raise ValueError(f"Null values for feature '{feature}'")
+
+        value_type = column.type
+        if pa.types.is_dictionary(value_type):
+            column = column.cast(value_type.value_type)
+            value_type = column.type
+
+        if pa.types.is_string(value_type) or pa.types.is_large_string(value_type):
+            return self._map_strings(feature, column)
+        if not (
+            pa.types.is_integer(value_type)
+            or pa.types.is_floating(value_type)
+            or pa.types.is_boolean(value_type)
+        ):
+            raise ValueError(f"Unsupported type {value_type} for feature '{feature}'")
+
+        # 1 chunk không null -> view trên buffer Arrow
+        values = column.to_numpy()
+        self.validator.check_column(feature, values)
+        return values
+
+    def _map_strings(self, feature: str, column) -> np.ndarray:
+        if feature not in self._categories:
+            raise ValueError(f"Feature '{feature}' must be numeric")
+        _, codes = self._categories[feature]
+        indices = pc.index_in(column, value_set=self._value_set(feature))
+        if indices.null_count:
+            unknown = pc.filter(column, pc.is_null(indices))[0].as_py()
+            raise ValueError(f"Unknown value {unknown!r} for feature '{feature}'")
+        return codes[indices.to_numpy()]
+
+    def _value_set(self, feature: str):
+        """Keys của feature dạng Arrow array (value_set của index_in)"""
+        value_set = self._value_sets.get(feature)
+        if value_set is None:
+            keys, _ = self._categories[feature]
+            value_set = self._value_sets[feature] = pa.array(keys, type=pa.string())
+        return value_set
+
+    def encode_results(
+        self,
+        batches: Mapping[str, Any],
+        failures: Optional[Mapping[str, str]] = None,
+        version: Optional[str] = None,
+        cancer_type_mapping: Optional[Mapping[int, str]] = None,
+    ) -> bytes:
+        """
+        Ghi kết quả của predict_all_batch_columnar() thành Arrow IPC stream
+
+        Args:
+            batches: Dict model name -> BatchPredictionResult
+            failures: Models lỗi/timeout và lý do
+            version: Phiên bản models đang active
+            cancer_type_mapping: Mapping code -> tên cancer type
+
+        Returns:
+            Bytes của stream gồm 1 record batch
+        """
+        columns: Dict[str, Any] = {}
+        for model_name, batch in batches.items():
+            prefix = column_prefix(model_name)
+            columns[f"{prefix}_code"] = pa.array(batch.codes.astype(np.int32, copy=False))
+            if batch.probabilities is None:
+                continue
+            columns[f"{prefix}_confidence"] = pa.array(batch.confidences)
+            for col, class_name in enumerate(batch.class_names):
+                columns[f"{prefix}_proba_{column_prefix(class_name)}"] = pa.array(
+                    batch.probabilities[:, col]
+                )
+
+        metadata = {
+            "failed_models": dumps(dict(failures or {})),
+            "model_version": dumps(version),
+            "cancer_type_mapping": dumps(
+                {str(code): name for code, name in (cancer_type_mapping or {}).items()}
+            ),
+        }
+        record_batch = pa.RecordBatch.from_pydict(columns).replace_schema_metadata(
+            metadata
+        )
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, record_batch.schema) as writer:
+            writer.write_batch(record_batch)
+        return sink.getvalue().to_pybytes()
@@ -0,0 +1,389 @@
+"""
+Feature Attributions
+====================
+
+Đóng góp của từng feature vào probabilities của mỗi prediction (endpoint
+/explain, /explain-batch), tính cho cả batch:
+
+- Decision Tree / Random Forest (TreePathAttributor): theo đường đi trong
+  cây (Saabas). Mỗi node giữ phân bố class của nó; đi từ node cha sang node
+  con làm probability thay đổi 1 lượng, được cộng cho feature mà node cha
+  split. base_value = phân bố của root, base + tổng đóng góp = probability
+  của lá (Random Forest: trung bình theo cây). Tất cả (dòng x cây) được duyệt
+  cùng lúc, mỗi bước 1 tầng cây như CompiledTreeModel.
+- SVM (KernelAttributor): xấp xỉ Shapley values như KernelSHAP với 1 tập nền
+  (background) cố định. Feature không thuộc coalition nhận giá trị của
+  background; giá trị của coalition = trung bình probability trên background.
+  Chỉ dùng các coalition 1 feature và thiếu 1 feature (2 x n_features
+  coalition, trọng số kernel Shapley lớn nhất), nên kết quả đúng với model
+  cộng tính và model chỉ có tương tác bậc 2. Ma trận hồi quy (có ràng buộc
+  base + tổng đóng góp = probability) chỉ phụ thuộc số feature nên được tính
+  1 lần; probabilities của background cũng được cache.
+
+Tập nền của SVM là ATTRIBUTION_BACKGROUND_SIZE support vectors (bệnh nhân
+train, ở không gian input đã encode) lấy đều theo thứ tự, nên có đủ các
+class. SVM được tính bằng CompiledSVM (compile và kiểm tra lúc tạo nếu model
+là sklearn).
+
+Bộ nhớ tạm giới hạn theo số phần tử mỗi chunk (ATTRIBUTION_CHUNK_ELEMENTS),
+không phụ thuộc kích thước batch.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .compiled_svm import CompiledSVM, compile_svm_model
+from .compiled_trees import CompiledTreeModel, compile_tree_model
+from .tree_table import TreeLookupTable
+
+# Số phần tử tối đa (dòng x cây, hoặc dòng đánh giá x feature) mỗi chunk
+ATTRIBUTION_CHUNK_ELEMENTS = 1 << 20
+# Số support vectors dùng làm background mặc định
+DEFAULT_BACKGROUND_SIZE = 8
+
+
+class TreePathAttributor:
+    """
+    Đóng góp theo đường đi trong cây (Saabas) của Decision Tree / Random Forest
+
+    Args:
+        engine: CompiledTreeModel (phân bố class của mọi node, kể cả node trong)
+    """
+
+    method = "tree_path"
+
+    def __init__(self, engine: CompiledTreeModel):
+        self.engine = engine
+        self.n_features = engine.n_features_in_
+        self.classes_ = engine.classes_
+        self._values = engine._leaf_proba
+        # Phân bố của root, trung bình theo cây
+        self.base_values = self._values[engine._roots].mean(axis=0)
+
+    def attribute(self, X: Any) -> np.ndarray:
+        """
+        Đóng góp của từng feature cho từng class
+
+        Returns:
+            Mảng (n_rows, n_features, n_classes); base_values + tổng theo
+            feature = predict_proba (sai lệch làm tròn số thực)
+        """
+        X = self.engine._prepare(X)
+        chunk = max(1, ATTRIBUTION_CHUNK_ELEMENTS // self.engine.n_trees)
+        return np.concatenate(
+            [self._attribute(X[start : start + chunk]) for start in range(0, len(X), chunk)]
+        )
+
+    def _attribute(self, X: np.ndarray) -> np.ndarray:
+        engine = self.engine
+        n_rows, n_features = X.shape
+        n_classes = self._values.shape[1]
+        values = X.ravel()
+        size = n_rows * n_features
+        contributions = np.zeros((n_classes, size))
+
+        # Như CompiledTreeModel._traverse: offsets = vị trí đầu dòng trong values,
+        # offsets + feature cũng là ô (dòng, feature) của contributions
+        current = np.tile(engine._roots, n_rows)
+        offsets = np.repeat(np.arange(0, size, n_features), engine.n_trees)
+        pending = ~engine._is_leaf[current]
+        current = current[pending]
+        offsets = offsets[pending]
+        while current.size:
+            cells = offsets + engine._feature[current]
+            go_right = values[cells] > engine._threshold[current]
+            child = engine._children[2 * current + go_right]
+            delta = self._values[child] - self._values[current]
+            for c in range(n_classes):
+                contributions[c] += np.bincount(cells, delta[:, c], minlength=size)
+
+            pending = ~engine._is_leaf[child]
+            current = child[pending]
+            offsets = offsets[pending]
+
+        contributions /= engine.n_trees
+        return contributions.T.reshape(n_rows, n_features, n_classes)
+
+
+class KernelAttributor:
+    """
+    Xấp xỉ Shapley values (KernelSHAP) với background cố định
+
+    Args:
+        predict_proba: Hàm probabilities của model, nhận ma trận input
+        background: Các dòng nền, shape (n_background, n_features)
+        classes: classes_ của model (thứ tự cột của predict_proba)
+    """
+
+    method = "kernel"
+
+    def __init__(self, predict_proba, background: np.ndarray, classes: np.ndarray):
+        self.predict_proba = predict_proba
+        self.background = np.asarray(background, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.n_features = self.background.shape[1]
+        # Coalition 1 feature và thiếu 1 feature
+        identity = np.eye(self.n_features, dtype=bool)
+        self._masks = np.concatenate([identity, ~identity])
+        self._projection = _shapley_projection(self._masks)
+        self.base_values = np.asarray(self.predict_proba(self.background)).mean(axis=0)
+
+    def attribute(self, X: Any) -> np.ndarray:
+        """
+        Đóng góp của từng feature cho từng class
+
+        Returns:
+            Mảng (n_rows, n_features, n_classes); base_values + tổng theo
+            feature = predict_proba (sai lệch làm tròn số thực)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"X has shape {X.shape}, expected (n_rows, {self.n_features})")
+
+        chunk = max(1, ATTRIBUTION_CHUNK_ELEMENTS // self._elements_per_row())
+        return np.concatenate(
+            [self._attribute(X[start : start + chunk]) for start in range(0, len(X), chunk)]
+        )
+
+    def _elements_per_row(self) -> int:
+        """Số phần tử tạm mỗi dòng (các dòng đã thay feature bằng background)"""
+        return (len(self._masks) * len(self.background) + 1) * self.n_features
+
+    def _attribute(self, X: np.ndarray) -> np.ndarray:
+        coalitions, proba = self._coalition_proba(X)
+        # Giá trị của coalition (so với base), cột cuối = cả X
+        gains = np.empty((len(X), len(self._masks) + 1, proba.shape[1]))
+        gains[:, :-1] = coalitions.mean(axis=2)
+        gains[:, -1] = proba
+        gains -= self.base_values
+        return np.einsum("fm,nmc->nfc", self._projection, gains)
+
+    def _coalition_proba(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Probabilities của mọi (dòng, coalition, background) và của chính X
+
+        Returns:
+            Tuple ((n_rows, n_masks, n_background, n_classes), (n_rows, n_classes))
+        """
+        n_rows = len(X)
+        # Feature của coalition lấy từ X, phần còn lại từ background
+        masked = np.where(
+            self._masks[None, :, None, :],
+            X[:, None, None, :],
+            self.background[None, None, :, :],
+        ).reshape(-1, self.n_features)
+        proba = np.asarray(self.predict_proba(np.concatenate([masked, X])))
+        coalitions = proba[: len(masked)].reshape(
+            n_rows, len(self._masks), len(self.background), -1
+        )
+        return coalitions, proba[len(masked) :]
+
+
+class RBFKernelAttributor(KernelAttributor):
+    """
+    KernelAttributor cho CompiledSVM kernel RBF, không dựng các dòng đã thay
+
+    Kernel RBF là tích theo feature: exp(-gamma * sum_f d_f) với d_f =
+    w_f (x_f - c_f)^2. Coalition {f} với background b có kernel =
+    exp(-gamma d_f(x)) * exp(-gamma (D(b) - d_f(b))), coalition thiếu f có
+    kernel = exp(-gamma (D(x) - d_f(x))) * exp(-gamma d_f(b)): thừa số của
+    background được cache, mỗi dòng chỉ cần 2 x n_features x n_SV phép exp
+    thay vì 2 x n_features x n_background x n_SV.
+
+    Args:
+        engine: CompiledSVM kernel "rbf"
+        background: Các dòng nền, shape (n_background, n_features)
+    """
+
+    def __init__(self, engine: CompiledSVM, background: np.ndarray):
+        self.engine = engine
+        self._centers = engine._weighted_centers_t.T / engine._feature_weights
+        super().__init__(engine.predict_proba, background, engine.classes_)
+
+        # (n_features, n_background, n_SV): thừa số của background
+        gamma = engine._gamma
+        distances = self._distances(self.background)
+        self._single_factors = np.exp(-gamma * (distances.sum(axis=1)[:, None] - distances))
+        self._single_factors = self._single_factors.transpose(1, 0, 2).copy()
+        self._missing_factors = np.exp(-gamma * distances).transpose(1, 0, 2).copy()
+
+    def _distances(self, X: np.ndarray) -> np.ndarray:
+        """d_f(x) của từng support vector, shape (n_rows, n_features, n_SV)"""
+        diff = X[:, :, None] - self._centers.T[None, :, :]
+        return diff * diff * self.engine._feature_weights[None, :, None]
+
+    def _elements_per_row(self) -> int:
+        return len(self._masks) * len(self.background) * len(self._centers)
+
+    def _coalition_proba(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        engine = self.engine
+        n_rows, n_features = X.shape
+        n_background = len(self.background)
+
+        distances = self._distances(X)
+        total = distances.sum(axis=1, keepdims=True)
+        # Coalition {f}: (dòng, f, background, SV)
+        kernel = np.empty((n_rows, 2 * n_features, n_background, len(self._centers)))
+        np.multiply(
+            np.exp(-engine._gamma * distances)[:, :, None, :],
+            self._single_factors,
+            out=kernel[:, :n_features],
+        )
+        # Coalition thiếu f (khoảng cách không âm dù làm tròn)
+        missing = np.maximum(total - distances, 0.0)
+        np.multiply(
+            np.exp(-engine._gamma * missing)[:, :, None, :],
+            self._missing_factors,
+            out=kernel[:, n_features:],
+        )
+
+        decision = kernel.reshape(-1, len(self._centers)) @ engine._coef + engine._intercept
+        coalitions = engine.decision_proba(decision).reshape(
+            n_rows, 2 * n_features, n_background, -1
+        )
+        return coalitions, engine.predict_proba(X)
+
+
+def _shapley_projection(masks: np.ndarray) -> np.ndarray:
+    """
+    Ma trận (n_features, n_masks + 1) của hồi quy KernelSHAP
+
+    Đóng góp = projection @ [giá trị của từng coalition; giá trị của cả X]
+    (đã trừ base), nghiệm bình phương tối thiểu có trọng số kernel Shapley
+    với ràng buộc tổng đóng góp = giá trị của cả X.
+    """
+    n_masks, n_features = masks.shape
+    sizes = masks.sum(axis=1)
+    comb = np.array([math.comb(n_features, int(size)) for size in sizes])
+    weights = (n_features - 1) / (comb * sizes * (n_features - sizes))
+
+    # Thay đóng góp của feature cuối = total - tổng các feature còn lại
+    Z = masks.astype(np.float64)
+    A = Z[:, :-1] - Z[:, -1:]
+    weighted = A.T * weights
+    solve = np.linalg.solve(weighted @ A, weighted)  # (n_features - 1, n_masks)
+    total = -solve @ Z[:, -1]
+
+    projection = np.zeros((n_features, n_masks + 1))
+    projection[:-1, :n_masks] = solve
+    projection[:-1, n_masks] = total
+    projection[-1, :n_masks] = -solve.sum(axis=0)
+    projection[-1, n_masks] = 1.0 - total.sum()
+    return projection
+
+
+def build_attributor(model: Any, background_size: int = DEFAULT_BACKGROUND_SIZE):
+    """
+    Tạo attributor cho 1 model
+
+    Cây (sklearn, CompiledTreeModel, TreeLookupTable) -> TreePathAttributor;
+    SVC RBF (sklearn, CompiledSVM) -> KernelAttributor với background là
+    support vectors.
+
+    Raises:
+        ValueError: Nếu model không được hỗ trợ
+    """
+    if isinstance(model, TreeLookupTable):
+        return TreePathAttributor(model._fallback)
+    if isinstance(model, CompiledTreeModel):
+        return TreePathAttributor(model)
+
+    engine = model
+    if not isinstance(model, CompiledSVM):
+        estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+        if hasattr(estimator, "tree_") or hasattr(estimator, "estimators_"):
+            return TreePathAttributor(compile_tree_model(model, keep_fallback=False))
+        engine = compile_svm_model(model)
+        engine.verify(model)
+
+    if engine.kernel != "rbf":
+        raise ValueError(f"Attributions are not supported for '{engine.kernel}' SVM")
+    # Support vectors ở không gian input (như CompiledSVM._support_vector_samples)
+    centers = engine._weighted_centers_t.T / engine._feature_weights
+    picks = np.linspace(0, len(centers) - 1, min(background_size, len(centers)))
+    return RBFKernelAttributor(engine, centers[np.round(picks).astype(np.intp)])
+
+
+class BatchAttributions:
+    """
+    Đóng góp của các feature cho class được predict, theo từng dòng của batch
+
+    - prediction: BatchPredictionResult của model
+    - base_values: (n_samples,) base value của class được predict
+    - contributions: (n_samples, n_features) đóng góp của từng feature
+    - error: Lý do không tính được attributions (base_values, contributions
+      là None); prediction vẫn dùng được
+    """
+
+    __slots__ = (
+        "prediction", "method", "feature_names", "base_values", "contributions", "error"
+    )
+
+    def __init__(
+        self,
+        prediction: Any,
+        method: Optional[str],
+        feature_names: Sequence[str],
+        base_values: Optional[np.ndarray],
+        contributions: Optional[np.ndarray],
+        error: Optional[str] = None,
+    ):
+        self.prediction = prediction
+        self.method = method
+        self.feature_names = list(feature_names)
+        self.base_values = base_values
+        self.contributions = contributions
+        self.error = error
+
+    @classmethod
+    def failed(cls, prediction: Any, error: str) -> "BatchAttributions":
+        """Prediction không kèm attributions"""
+        return cls(prediction, None, [], None, None, error)
+
+    def __len__(self) -> int:
+        return len(self.prediction)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Như BatchPredictionResult.to_dicts(), mỗi dòng thêm "attributions"
+        (None nếu không tính được)
+        """
+        rows = self.prediction.to_dicts()
+        if self.contributions is None:
+            for row in rows:
+                row["attributions"] = None
+            return rows
+
+        names = self.feature_names
+        for row, base, contributions in zip(
+            rows, self.base_values.tolist(), self.contributions.tolist()
+        ):
+            row["attributions"] = {
+                "method": self.method,
+                "base_value": round(base, 4),
+                "contributions": {
+                    name: round(value, 4) for name, value in zip(names, contributions)
+                },
+            }
+        return rows
+
+
+def predicted_class_attributions(
+    attributor: Any,
+    X: Any,
+    class_columns: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    base value và đóng góp của class được predict (cột class_columns[i] cho dòng i)
+
+    Returns:
+        Tuple (base_values (n_rows,), contributions (n_rows, n_features))
+    """
+    contributions = attributor.attribute(X)
+    rows = np.arange(len(class_columns))
+    return (
+        attributor.base_values[class_columns],
+        contributions[rows, :, class_columns],
+    )
@@ -0,0 +1,142 @@
+"""
+Micro-batching
+==============
+
+Gom các request 1 bệnh nhân đến gần nhau về thời gian thành 1 batch.
+
+Overhead mỗi lần gọi predict()/predict_proba() của sklearn lớn hơn nhiều so
+với chi phí cho từng dòng, nên khi có nhiều request nhỏ đồng thời, gộp chúng
+lại và chạy 1 lần vectorized cho mỗi model sẽ tăng throughput đáng kể.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+QUEUE_WAIT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+class MicroBatcher:
+    """
+    Gom các input 1 dòng thành batch theo cửa sổ thời gian hoặc kích thước
+
+    Batch được chạy khi:
+    - đủ max_batch_size dòng, hoặc
+    - đã chờ max_wait_ms kể từ dòng đầu tiên của batch
+
+    batch_fn(X) nhận ma trận đã ghép (n_rows, n_features) và phải trả về
+    sequence có đúng n_rows phần tử, phần tử thứ i là kết quả của dòng thứ i.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Any], Sequence[Any]],
+        runner: Callable[..., Awaitable[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        name: str = "micro_batch",
+    ):
+        """
+        Initialize MicroBatcher
+
+        Args:
+            batch_fn: Function sync chạy inference cho cả batch
+            runner: Coroutine function chạy batch_fn, ví dụ InferenceExecutor.run
+            max_batch_size: Số dòng tối đa trong 1 batch
+            max_wait_ms: Thời gian tối đa (ms) 1 request chờ để được gom batch
+            name: Prefix cho tên metrics
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+
+        self.batch_fn = batch_fn
+        self.runner = runner
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.batch_size = Histogram(
+            f"{name}_size", "Số dòng trong mỗi batch", BATCH_SIZE_BUCKETS
+        )
+        self.queue_wait = Histogram(
+            f"{name}_queue_wait_seconds",
+            "Thời gian request chờ trước khi batch được chạy",
+            QUEUE_WAIT_BUCKETS,
+        )
+
+        # (X, future, thời điểm vào queue)
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def submit(self, X: Any) -> Any:
+        """Đưa 1 dòng input vào batch và chờ kết quả của riêng dòng đó"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((X, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        items, self._pending = self._pending, []
+        if not items:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(items))
+        # Giữ reference để task không bị garbage collect khi đang chạy
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, items: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        self.batch_size.observe(len(items))
+        for _, _, enqueued in items:
+            self.queue_wait.observe(started - enqueued)
+
+        try:
+            X = _stack_rows([X for X, _, _ in items])
+            results = await self.runner(self.batch_fn, X)
+        except Exception as e:
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(items, results):
+            # Request có thể đã bị huỷ (client ngắt kết nối)
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """Thống kê batching: histogram kích thước batch và thời gian chờ"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "pending": len(self._pending),
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
+
+
+def _stack_rows(rows: List[Any]) -> Any:
+    """Ghép các input 1 dòng (DataFrame hoặc ndarray) thành 1 ma trận"""
+    values = np.vstack([np.asarray(row) for row in rows])
+    if hasattr(rows[0], "columns"):
+        # Input DataFrame (pandas chỉ được import khi thật sự dùng)
+        import pandas as pd
+
+        return pd.DataFrame(values, columns=rows[0].columns, copy=False)
+    return values
@@ -0,0 +1,410 @@
+"""
+Compiled SVM
+============
+
+Predictor NumPy cho Pipeline(StandardScaler, SVC) với kernel linear hoặc RBF.
+
+Lúc load, StandardScaler được gộp vào tham số của SVC nên khi predict chỉ
+còn vài phép nhân ma trận trên input gốc:
+
+- linear: decision của từng cặp class (one-vs-one) là 1 hàm tuyến tính,
+  w = sum(dual_coef * support vector) / scale, b = intercept - w . mean.
+- RBF: support vectors được đưa về không gian input gốc, khoảng cách có
+  trọng số 1/scale^2 được tính bằng 1 phép nhân ma trận cho cả batch.
+
+Probability được tính lại như libsvm: Platt scaling (probA_, probB_) cho
+từng cặp class, sau đó ghép các cặp bằng vòng lặp của multiclass_probability
+(dừng riêng cho từng dòng khi hội tụ). Khác biệt với sklearn chỉ do thứ tự
+cộng số thực, được kiểm tra trong PROBA_TOLERANCE lúc load.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Sai lệch probability tối đa cho phép so với sklearn khi kiểm tra
+PROBA_TOLERANCE = 1e-6
+# Hằng số của libsvm (svm_predict_probability)
+MIN_PROB = 1e-7
+# Tới số dòng này, multiclass_probability chạy bằng Python cho từng dòng
+# (ít overhead hơn hàng trăm phép NumPy nhỏ khi vectorize)
+SCALAR_ROWS_LIMIT = 8
+# Số dòng mỗi block khi tính kernel RBF, giới hạn ma trận (dòng x support
+# vectors) tạm thời ở ~KERNEL_BLOCK_ROWS * n_SV * 8 bytes
+KERNEL_BLOCK_ROWS = 1024
+# Mảng của từng kernel trong to_arrays() (ngoài classes, prob_a, prob_b)
+KERNEL_ARRAYS = {
+    "linear": ("weights", "bias"),
+    "rbf": ("feature_weights", "weighted_centers_t", "center_norms", "coef", "intercept"),
+}
+
+
+class CompiledSVM:
+    """SVC (có thể sau StandardScaler) đã compile, dùng thay model sklearn"""
+
+    def __init__(self, svc: Any, mean: np.ndarray, scale: np.ndarray):
+        """
+        Initialize CompiledSVM
+
+        Args:
+            svc: SVC đã fit với probability=True
+            mean: mean_ của StandardScaler (0 nếu không có scaler)
+            scale: scale_ của StandardScaler (1 nếu không có scaler)
+        """
+        self.classes_ = np.asarray(svc.classes_)
+        self.n_features_in_ = svc.n_features_in_
+        self.kernel = svc.kernel
+        self.n_support_vectors = svc.support_vectors_.shape[0]
+        self.source = type(svc).__name__
+
+        n_classes = len(self.classes_)
+        # Các cặp (i, j), i < j theo thứ tự của libsvm
+        self._pairs = [(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)]
+        self._prob_a = np.asarray(svc.probA_, dtype=np.float64)
+        self._prob_b = np.asarray(svc.probB_, dtype=np.float64)
+        intercept = np.asarray(svc._intercept_, dtype=np.float64)
+
+        # coef[k, p]: hệ số của support vector k trong decision của cặp p
+        coef = _pairwise_coefficients(
+            np.asarray(svc._dual_coef_), svc.n_support_, self._pairs
+        )
+
+        inv_scale = 1.0 / scale
+        if self.kernel == "linear":
+            # decision = ((x - mean) / scale) . (SV^T coef) + intercept
+            weights = (svc.support_vectors_.T @ coef) * inv_scale[:, None]
+            self._weights = np.ascontiguousarray(weights)
+            self._bias = intercept - mean @ weights
+        elif self.kernel == "rbf":
+            # ||(x - mean) / scale - sv||^2 = sum_f w_f (x_f - c_f)^2 với
+            # c = sv * scale + mean (support vector ở không gian gốc), w = 1/scale^2
+            centers = svc.support_vectors_ * scale + mean
+            self._feature_weights = inv_scale**2
+            self._weighted_centers_t = np.ascontiguousarray(
+                (centers * self._feature_weights).T
+            )
+            self._center_norms = (centers**2) @ self._feature_weights
+            self._gamma = float(svc._gamma)
+            self._coef = np.ascontiguousarray(coef)
+            self._intercept = intercept
+        else:
+            raise ValueError(f"Unsupported SVM kernel '{self.kernel}'")
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Mapping[str, np.ndarray], metadata: Mapping[str, Any]
+    ) -> "CompiledSVM":
+        """Tạo lại engine từ to_arrays() (chỉ cần NumPy, không có model sklearn)"""
+        kernel = metadata["kernel"]
+        if kernel not in KERNEL_ARRAYS:
+            raise ValueError(f"Unsupported SVM kernel '{kernel}'")
+
+        model = cls.__new__(cls)
+        model.classes_ = np.asarray(arrays["classes"])
+        model.n_features_in_ = int(metadata["n_features"])
+        model.kernel = kernel
+        model.n_support_vectors = int(metadata["n_support_vectors"])
+        model.source = metadata.get("source", "")
+
+        n_classes = len(model.classes_)
+        model._pairs = [(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)]
+        model._prob_a = np.asarray(arrays["prob_a"], dtype=np.float64)
+        model._prob_b = np.asarray(arrays["prob_b"], dtype=np.float64)
+        for name in KERNEL_ARRAYS[kernel]:
+            setattr(model, f"_{name}", np.ascontiguousarray(arrays[name], dtype=np.float64))
+        if kernel == "rbf":
+            model._gamma = float(metadata["gamma"])
+        return model
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Các mảng và metadata đủ để tạo lại engine bằng from_arrays()
+
+        Returns:
+            Tuple (arrays, metadata): arrays lưu được bằng np.savez, metadata
+            là dict JSON được
+        """
+        arrays = {
+            "classes": self.classes_,
+            "prob_a": self._prob_a,
+            "prob_b": self._prob_b,
+        }
+        for name in KERNEL_ARRAYS[self.kernel]:
+            arrays[name] = getattr(self, f"_{name}")
+        metadata = {
+            "engine": "compiled_svm",
+            "source": self.source,
+            "n_features": self.n_features_in_,
+            "kernel": self.kernel,
+            "n_support_vectors": self.n_support_vectors,
+        }
+        if self.kernel == "rbf":
+            metadata["gamma"] = self._gamma
+        return arrays, metadata
+
+    def decision_values(self, X: Any) -> np.ndarray:
+        """Decision one-vs-one như libsvm, shape (n_rows, n_pairs)"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, expected (n_rows, {self.n_features_in_})"
+            )
+
+        if self.kernel == "linear":
+            return X @ self._weights + self._bias
+
+        if len(X) > KERNEL_BLOCK_ROWS:
+            return np.concatenate(
+                [
+                    self._rbf_decision(X[start : start + KERNEL_BLOCK_ROWS])
+                    for start in range(0, len(X), KERNEL_BLOCK_ROWS)
+                ]
+            )
+        return self._rbf_decision(X)
+
+    def _rbf_decision(self, X: np.ndarray) -> np.ndarray:
+        distances = X @ self._weighted_centers_t
+        distances *= -2.0
+        distances += ((X**2) @ self._feature_weights)[:, None]
+        distances += self._center_norms
+        # Tránh khoảng cách âm nhỏ do làm tròn
+        np.maximum(distances, 0.0, out=distances)
+        distances *= -self._gamma
+        kernel = np.exp(distances, out=distances)
+        return kernel @ self._coef + self._intercept
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Probability theo thứ tự classes_, shape (n_rows, n_classes)"""
+        return self.decision_proba(self.decision_values(X))
+
+    def decision_proba(self, decision: np.ndarray) -> np.ndarray:
+        """Probability từ decision one-vs-one (n_rows, n_pairs) của decision_values()"""
+        # Platt scaling của libsvm (sigmoid_predict), ổn định số học
+        f = decision * self._prob_a + self._prob_b
+        e = np.exp(-np.abs(f))
+        pairwise = np.where(f >= 0, e / (1.0 + e), 1.0 / (1.0 + e))
+        pairwise = np.clip(pairwise, MIN_PROB, 1 - MIN_PROB)
+
+        # Bản libsvm trong sklearn dùng multiclass_probability cả khi chỉ có
+        # 2 class (không lấy thẳng pairwise probability)
+        n_classes = len(self.classes_)
+        # r[:, i, j] = P(class i | i hoặc j)
+        r = np.zeros((len(pairwise), n_classes, n_classes))
+        for p, (i, j) in enumerate(self._pairs):
+            r[:, i, j] = pairwise[:, p]
+            r[:, j, i] = 1.0 - pairwise[:, p]
+
+        if len(r) <= SCALAR_ROWS_LIMIT:
+            return np.array([_multiclass_probability_row(row) for row in r.tolist()])
+        return _multiclass_probability(r)
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Label theo vote one-vs-one như SVC.predict() (không phải argmax probability)"""
+        return self.decision_labels(self.decision_values(X))
+
+    def predict_with_proba(self, X: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """predict() và predict_proba() từ cùng 1 lần tính decision_values()"""
+        decision = self.decision_values(X)
+        return self.decision_labels(decision), self.decision_proba(decision)
+
+    def decision_labels(self, decision: np.ndarray) -> np.ndarray:
+        """Label theo vote one-vs-one từ decision (n_rows, n_pairs) của decision_values()"""
+        votes = np.zeros((len(decision), len(self.classes_)), dtype=np.int64)
+        for p, (i, j) in enumerate(self._pairs):
+            positive = decision[:, p] > 0
+            votes[:, i] += positive
+            votes[:, j] += ~positive
+        return self.classes_.take(np.argmax(votes, axis=1), axis=0)
+
+    def verify(
+        self,
+        model: Any,
+        X: Optional[np.ndarray] = None,
+        n_samples: int = 256,
+        seed: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        So sánh output với model sklearn gốc
+
+        Dữ liệu kiểm tra gồm X (nếu có) và các dòng sinh quanh support vectors.
+
+        Returns:
+            Dict số dòng đã kiểm tra và sai lệch probability lớn nhất
+
+        Raises:
+            ValueError: Nếu probability lệch quá PROBA_TOLERANCE hoặc label khác
+        """
+        samples = self._support_vector_samples(n_samples, seed)
+        if X is not None:
+            samples = np.vstack([np.asarray(X, dtype=np.float64), samples])
+
+        expected = model.predict_proba(samples)
+        single = np.vstack([self.predict_proba(row[None]) for row in samples[:64]])
+        max_diff = max(
+            float(np.abs(self.predict_proba(samples) - expected).max()),
+            float(np.abs(single - expected[:64]).max()),
+        )
+        if max_diff > PROBA_TOLERANCE or not np.array_equal(
+            self.predict(samples), model.predict(samples)
+        ):
+            raise ValueError(
+                f"Compiled model does not match {self.source} "
+                f"(max probability difference {max_diff:.3g})"
+            )
+
+        return {"rows": len(samples), "max_abs_diff": max_diff}
+
+    def _support_vector_samples(self, n_samples: int, seed: int) -> np.ndarray:
+        """Các dòng nằm giữa 2 support vectors ngẫu nhiên (ở không gian gốc)"""
+        rng = np.random.default_rng(seed)
+        if self.kernel == "linear":
+            return rng.normal(size=(n_samples, self.n_features_in_))
+
+        centers = self._weighted_centers_t.T / self._feature_weights
+        first = centers[rng.integers(len(centers), size=n_samples)]
+        second = centers[rng.integers(len(centers), size=n_samples)]
+        mix = rng.uniform(size=(n_samples, 1))
+        return first * mix + second * (1 - mix)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "engine": "compiled_svm",
+            "source": self.source,
+            "kernel": self.kernel,
+            "n_support_vectors": self.n_support_vectors,
+        }
+
+
+def _pairwise_coefficients(dual_coef, n_support, pairs) -> np.ndarray:
+    """
+    Ma trận hệ số (n_SV, n_pairs) theo svm_predict_values của libsvm
+
+    Với cặp (i, j): support vectors của class i dùng dual_coef[j - 1], của
+    class j dùng dual_coef[i].
+    """
+    starts = np.concatenate([[0], np.cumsum(n_support)])
+    coef = np.zeros((dual_coef.shape[1], len(pairs)))
+    for p, (i, j) in enumerate(pairs):
+        coef[starts[i] : starts[i + 1], p] = dual_coef[j - 1, starts[i] : starts[i + 1]]
+        coef[starts[j] : starts[j + 1], p] = dual_coef[i, starts[j] : starts[j + 1]]
+    return coef
+
+
+def _multiclass_probability(r: np.ndarray) -> np.ndarray:
+    """
+    multiclass_probability của libsvm (Wu, Lin & Weng 2004), vectorize theo dòng
+
+    Mỗi dòng dừng lặp riêng khi hội tụ, như khi libsvm xử lý từng dòng.
+    """
+    n_rows, k = r.shape[:2]
+    max_iter = max(100, k)
+    eps = 0.005 / k
+
+    # Q[t, t] = sum_{j != t} r[j, t]^2, Q[t, j] = -r[j, t] * r[t, j]
+    Q = -r.transpose(0, 2, 1) * r
+    diagonal = (r**2).sum(axis=1) - np.einsum("nii->ni", r) ** 2
+    Q[:, np.arange(k), np.arange(k)] = diagonal
+
+    result = np.empty((n_rows, k))
+    rows = np.arange(n_rows)
+    p = np.full((n_rows, k), 1.0 / k)
+
+    for _ in range(max_iter):
+        Qp = np.einsum("ntj,nj->nt", Q, p)
+        pQp = (p * Qp).sum(axis=1)
+
+        converged = np.abs(Qp - pQp[:, None]).max(axis=1) < eps
+        if converged.any():
+            result[rows[converged]] = p[converged]
+            pending = ~converged
+            rows, Q, p, Qp, pQp = rows[pending], Q[pending], p[pending], Qp[pending], pQp[pending]
+            if not rows.size:
+                return result
+
+        for t in range(k):
+            Q_t = Q[:, t, :]
+            diff = (pQp - Qp[:, t]) / Q_t[:, t]
+            p[:, t] += diff
+            pQp = (pQp + diff * (diff * Q_t[:, t] + 2 * Qp[:, t])) / (1 + diff) / (1 + diff)
+            Qp = (Qp + diff[:, None] * Q_t) / (1 + diff)[:, None]
+            p /= (1 + diff)[:, None]
+
+    # Chưa hội tụ sau max_iter (libsvm cũng trả về kết quả hiện tại)
+    result[rows] = p
+    return result
+
+
+def _multiclass_probability_row(r: List[List[float]]) -> List[float]:
+    """multiclass_probability của libsvm cho 1 dòng (dịch trực tiếp từ C)"""
+    k = len(r)
+    max_iter = max(100, k)
+    eps = 0.005 / k
+
+    Q = [[0.0] * k for _ in range(k)]
+    p = [1.0 / k] * k
+    for t in range(k):
+        for j in range(t):
+            Q[t][t] += r[j][t] * r[j][t]
+            Q[t][j] = Q[j][t]
+        for j in range(t + 1, k):
+            Q[t][t] += r[j][t] * r[j][t]
+            Q[t][j] = -r[j][t] * r[t][j]
+
+    Qp = [0.0] * k
+    for _ in range(max_iter):
+        pQp = 0.0
+        for t in range(k):
+            Qp[t] = 0.0
+            for j in range(k):
+                Qp[t] += Q[t][j] * p[j]
+            pQp += p[t] * Qp[t]
+
+        if max(abs(Qp[t] - pQp) for t in range(k)) < eps:
+            break
+
+        for t in range(k):
+            diff = (-Qp[t] + pQp) / Q[t][t]
+            p[t] += diff
+            pQp = (pQp + diff * (diff * Q[t][t] + 2 * Qp[t])) / (1 + diff) / (1 + diff)
+            for j in range(k):
+                Qp[j] = (Qp[j] + diff * Q[t][j]) / (1 + diff)
+                p[j] /= 1 + diff
+
+    return p
+
+
+def compile_svm_model(model: Any) -> CompiledSVM:
+    """
+    Compile SVC (có thể nằm trong Pipeline sau StandardScaler và các sampler
+    của imblearn)
+
+    Raises:
+        ValueError: Nếu model, kernel hoặc 1 step của Pipeline không hỗ trợ
+    """
+    svc = model
+    mean, scale = None, None
+    has_scaler = False
+
+    if hasattr(model, "steps"):
+        *preprocessors, (_, svc) = model.steps
+        for step_name, step in preprocessors:
+            if step is None or step == "passthrough" or hasattr(step, "fit_resample"):
+                # Sampler (SMOTE, ...) chỉ chạy lúc fit, bỏ qua khi predict
+                continue
+            if type(step).__name__ == "StandardScaler" and not has_scaler:
+                # with_mean=False vẫn fit mean_ nhưng transform không trừ mean
+                mean = step.mean_ if step.with_mean else None
+                scale = step.scale_ if step.with_std else None
+                has_scaler = True
+                continue
+            raise ValueError(f"Unsupported pipeline step '{step_name}'")
+
+    if not hasattr(svc, "support_vectors_") or not hasattr(svc, "probA_"):
+        raise ValueError(f"Cannot compile model of type {type(svc).__name__}")
+    if len(getattr(svc, "probA_", [])) == 0:
+        raise ValueError("SVC must be fitted with probability=True")
+
+    n_features = svc.n_features_in_
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return CompiledSVM(svc, mean, scale)
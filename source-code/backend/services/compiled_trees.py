@@ -0,0 +1,410 @@
+"""
+Compiled Tree Models
+====================
+
+Inference engine cho Decision Tree / Random Forest trên mảng NumPy phẳng.
+
+Lúc load, mỗi cây sklearn được export thành các mảng node (children, feature,
+threshold, probability của lá); các cây của 1 ensemble được nối thành 1 mảng
+chung. Khi predict không còn bước validate input của sklearn:
+
+- 1 bệnh nhân: duyệt cây bằng vòng lặp Python trên list (vài micro giây).
+- Batch: duyệt tất cả dòng x tất cả cây cùng lúc, mỗi bước 1 tầng cây.
+
+Kết quả giống hệt sklearn: input được ép về float32 như sklearn, scaler của
+Pipeline được áp dụng với cùng phép tính, probability của Random Forest
+được cộng lần lượt theo thứ tự cây rồi chia cho số cây.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Duyệt bằng Python khi số (dòng x cây) nhỏ, vectorize khi lớn hơn
+SCALAR_WALK_LIMIT = 128
+# Batch từ số dòng này được chuyển cho model sklearn gốc (nếu có): khi đó
+# overhead validate của sklearn không còn đáng kể và vòng duyệt Cython nhanh
+# hơn duyệt vectorize bằng NumPy
+SKLEARN_BATCH_MIN_ROWS = 1024
+# Giới hạn số phần tử (dòng x cây) mỗi chunk khi duyệt vectorize
+CHUNK_ELEMENTS = 1 << 20
+# Từ số dòng này, cộng probability từng cây 1 thay vì cumsum trên cả khối
+AVERAGE_LOOP_MIN_ROWS = 64
+
+
+class CompiledTreeModel:
+    """Decision Tree / Random Forest đã compile, dùng thay model sklearn"""
+
+    def __init__(
+        self,
+        trees: Sequence[Any],
+        classes: np.ndarray,
+        n_features: int,
+        scaler: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        source: str = "",
+        fallback: Optional[Any] = None,
+    ):
+        """
+        Initialize CompiledTreeModel
+
+        Args:
+            trees: Các sklearn Tree (thuộc tính tree_ của estimator)
+            classes: classes_ của model gốc
+            n_features: Số feature input
+            scaler: (mean, scale) của StandardScaler đứng trước trong Pipeline
+            source: Tên class của model gốc (hiển thị)
+            fallback: Model sklearn gốc, dùng cho batch từ
+                SKLEARN_BATCH_MIN_ROWS dòng trở lên. None = luôn dùng engine này
+        """
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = n_features
+        self.n_trees = len(trees)
+        self.source = source
+        self._scaler = scaler
+        self._fallback = fallback
+
+        left, right, feature, threshold, leaf_proba, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            node_ids = np.arange(tree.node_count, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            # Lá trỏ về chính nó với threshold = +inf (luôn đi "trái" = đứng yên),
+            # nên vòng duyệt vectorize không cần mask
+            left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            leaf_proba.append(_leaf_probabilities(tree, len(self.classes_)))
+            roots.append(offset)
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.max_depth = max_depth
+        self._set_nodes(
+            np.concatenate(left),
+            np.concatenate(right),
+            np.concatenate(feature),
+            np.concatenate(threshold),
+            np.concatenate(leaf_proba),
+            np.asarray(roots),
+        )
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Mapping[str, np.ndarray], metadata: Mapping[str, Any]
+    ) -> "CompiledTreeModel":
+        """Tạo lại engine từ to_arrays() (chỉ cần NumPy, không có model sklearn)"""
+        model = cls.__new__(cls)
+        model.classes_ = np.asarray(arrays["classes"])
+        model.n_features_in_ = int(metadata["n_features"])
+        model.n_trees = len(arrays["roots"])
+        model.source = metadata.get("source", "")
+        model.max_depth = int(metadata["max_depth"])
+        model._fallback = None
+        model._scaler = None
+        if "scaler_mean" in arrays:
+            model._scaler = (arrays["scaler_mean"], arrays["scaler_scale"])
+        model._set_nodes(
+            arrays["left"],
+            arrays["right"],
+            arrays["feature"],
+            arrays["threshold"],
+            arrays["leaf_proba"],
+            arrays["roots"],
+        )
+        return model
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Các mảng và metadata đủ để tạo lại engine bằng from_arrays()
+
+        Returns:
+            Tuple (arrays, metadata): arrays lưu được bằng np.savez, metadata
+            là dict JSON được
+        """
+        arrays = {
+            "classes": self.classes_,
+            "left": self._children[0::2].astype(np.int32),
+            "right": self._children[1::2].astype(np.int32),
+            "feature": self._feature.astype(np.int32),
+            "threshold": self._threshold,
+            "leaf_proba": self._leaf_proba,
+            "roots": self._roots.astype(np.int32),
+        }
+        if self._scaler is not None:
+            arrays["scaler_mean"], arrays["scaler_scale"] = self._scaler
+        metadata = {
+            "engine": "compiled_trees",
+            "source": self.source,
+            "n_features": self.n_features_in_,
+            "max_depth": self.max_depth,
+        }
+        return arrays, metadata
+
+    def _set_nodes(self, left, right, feature, threshold, leaf_proba, roots) -> None:
+        """Gán mảng node (đã nối của tất cả cây) và các bản dẫn xuất"""
+        left = np.asarray(left, dtype=np.intp)
+        right = np.asarray(right, dtype=np.intp)
+        self.n_nodes = len(left)
+        self._feature = np.asarray(feature, dtype=np.intp)
+        self._threshold = np.asarray(threshold, dtype=np.float64)
+        self._leaf_proba = np.asarray(leaf_proba, dtype=np.float64)
+        self._roots = np.asarray(roots, dtype=np.intp)
+        self._is_leaf = left == np.arange(self.n_nodes)
+        # Con trái ở 2*node, con phải ở 2*node + 1
+        self._children = np.stack([left, right], axis=1).ravel()
+
+        # Bản list cho đường duyệt Python (truy cập list nhanh hơn ndarray)
+        self._left_list = left.tolist()
+        self._right_list = right.tolist()
+        self._feature_list = self._feature.tolist()
+        self._threshold_list = self._threshold.tolist()
+        self._roots_list = self._roots.tolist()
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Probability theo thứ tự classes_, shape (n_rows, n_classes)"""
+        if self._fallback is not None and len(X) >= SKLEARN_BATCH_MIN_ROWS:
+            return self._fallback.predict_proba(X)
+        return self._predict_proba(X)
+
+    def _predict_proba(self, X: Any) -> np.ndarray:
+        X = self._prepare(X)
+        n_rows = X.shape[0]
+
+        if n_rows * self.n_trees <= SCALAR_WALK_LIMIT:
+            leaves = np.array([self._walk(row) for row in X.tolist()], dtype=np.int64)
+            return self._average(leaves.reshape(n_rows, self.n_trees))
+
+        chunk = max(1, CHUNK_ELEMENTS // self.n_trees)
+        if n_rows <= chunk:
+            return self._average(self._traverse(X))
+        return np.concatenate(
+            [
+                self._average(self._traverse(X[start : start + chunk]))
+                for start in range(0, n_rows, chunk)
+            ]
+        )
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Label = class có probability cao nhất (như sklearn)"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def _prepare(self, X: Any) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, expected (n_rows, {self.n_features_in_})"
+            )
+        if np.isnan(X).any():
+            raise ValueError("Input X contains NaN")
+
+        if self._scaler is not None:
+            mean, scale = self._scaler
+            X = (X - mean) / scale
+        # sklearn so sánh input float32 với threshold float64
+        return X.astype(np.float32)
+
+    def _walk(self, row: List[float]) -> List[int]:
+        """Lá mà 1 dòng rơi vào ở từng cây (duyệt bằng Python)"""
+        left, right = self._left_list, self._right_list
+        feature, threshold = self._feature_list, self._threshold_list
+
+        leaves = []
+        for node in self._roots_list:
+            while True:
+                if row[feature[node]] <= threshold[node]:
+                    child = left[node]
+                else:
+                    child = right[node]
+                if child == node:
+                    break
+                node = child
+            leaves.append(node)
+        return leaves
+
+    def _traverse(self, X: np.ndarray) -> np.ndarray:
+        """Lá của mọi (dòng, cây), shape (n_rows, n_trees)"""
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        nodes = np.tile(self._roots, n_rows)
+        # Vị trí đầu dòng trong values cho từng phần tử (dòng, cây)
+        offsets = np.repeat(np.arange(0, n_rows * n_features, n_features), self.n_trees)
+
+        # Mỗi bước chỉ xử lý các phần tử chưa tới lá
+        active = np.flatnonzero(~self._is_leaf[nodes])
+        current = nodes[active]
+        offsets = offsets[active]
+        while active.size:
+            go_right = (
+                values[offsets + self._feature[current]] > self._threshold[current]
+            )
+            current = self._children[2 * current + go_right]
+            nodes[active] = current
+
+            pending = ~self._is_leaf[current]
+            active = active[pending]
+            current = current[pending]
+            offsets = offsets[pending]
+
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def _average(self, leaves: np.ndarray) -> np.ndarray:
+        if self.n_trees == 1:
+            return self._leaf_proba[leaves[:, 0]]
+
+        # Cộng tuần tự theo thứ tự cây như sklearn (sum() của NumPy cộng theo
+        # cặp nên có thể lệch ở bit cuối)
+        if leaves.shape[0] < AVERAGE_LOOP_MIN_ROWS:
+            proba = self._leaf_proba[leaves].cumsum(axis=1)[:, -1]
+        else:
+            proba = np.zeros((leaves.shape[0], self._leaf_proba.shape[1]))
+            for tree in range(self.n_trees):
+                proba += self._leaf_proba[leaves[:, tree]]
+        return proba / self.n_trees
+
+    def verify(
+        self,
+        model: Any,
+        X: Optional[np.ndarray] = None,
+        n_samples: int = 256,
+        seed: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        So sánh output với model sklearn gốc
+
+        Dữ liệu kiểm tra gồm X (nếu có) và các dòng sinh ngẫu nhiên quanh
+        threshold của các cây, để mỗi split được thử cả 2 nhánh. Cả đường
+        duyệt 1 dòng và đường vectorize đều được kiểm tra.
+
+        Returns:
+            Dict số dòng đã kiểm tra và sai lệch probability lớn nhất
+
+        Raises:
+            ValueError: Nếu label hoặc probability khác sklearn
+        """
+        samples = self._threshold_samples(n_samples, seed)
+        if X is not None:
+            samples = np.vstack([np.asarray(X, dtype=np.float64), samples])
+
+        expected = model.predict_proba(samples)
+        expected_labels = model.predict(samples)
+
+        batch = self._predict_proba(samples)
+        single = np.vstack([self._predict_proba(row[None]) for row in samples[:64]])
+
+        max_diff = max(
+            float(np.abs(batch - expected).max()),
+            float(np.abs(single - expected[:64]).max()),
+        )
+        labels = self.classes_.take(np.argmax(batch, axis=1), axis=0)
+        if max_diff != 0.0 or not np.array_equal(labels, expected_labels):
+            raise ValueError(
+                f"Compiled model does not match {self.source} "
+                f"(max probability difference {max_diff:.3g})"
+            )
+
+        return {"rows": len(samples), "max_abs_diff": max_diff}
+
+    def _threshold_samples(self, n_samples: int, seed: int) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        is_split = np.isfinite(self._threshold)
+
+        samples = np.zeros((n_samples, self.n_features_in_))
+        for col in range(self.n_features_in_):
+            thresholds = self._threshold[is_split & (self._feature == col)]
+            if thresholds.size == 0:
+                continue
+            # Giá trị float32 sát dưới/trên threshold -> đi trái/phải
+            below = thresholds.astype(np.float32)
+            above = np.nextafter(below, np.float32(np.inf))
+            candidates = np.concatenate([below, above]).astype(np.float64)
+            samples[:, col] = rng.choice(candidates, size=n_samples)
+
+        if self._scaler is not None:
+            # Đưa về không gian input của Pipeline
+            mean, scale = self._scaler
+            samples = samples * scale + mean
+        return samples
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "engine": "compiled_trees",
+            "source": self.source,
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+            "max_depth": self.max_depth,
+            "sklearn_batch_min_rows": (
+                SKLEARN_BATCH_MIN_ROWS if self._fallback is not None else None
+            ),
+        }
+
+
+def _leaf_probabilities(tree: Any, n_classes: int) -> np.ndarray:
+    """Probability của từng node, tính như DecisionTreeClassifier.predict_proba"""
+    if tree.n_outputs != 1:
+        raise ValueError("Multi-output trees are not supported")
+
+    proba = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+    normalizer = proba.sum(axis=1)
+    # sklearn >= 1.4 lưu sẵn tỉ lệ; bản cũ lưu số mẫu và chuẩn hoá lúc predict
+    if not np.allclose(normalizer[tree.children_left == -1], 1.0):
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer[:, None]
+    return proba
+
+
+def compile_tree_model(model: Any, keep_fallback: bool = True) -> CompiledTreeModel:
+    """
+    Compile DecisionTreeClassifier / RandomForestClassifier (có thể nằm trong
+    Pipeline sau StandardScaler và các sampler của imblearn)
+
+    Args:
+        model: Model sklearn đã fit
+        keep_fallback: Giữ model gốc để predict các batch lớn
+
+    Raises:
+        ValueError: Nếu model (hoặc 1 step của Pipeline) không hỗ trợ
+    """
+    scaler = None
+    estimator = model
+
+    if hasattr(model, "steps"):
+        *preprocessors, (_, estimator) = model.steps
+        for step_name, step in preprocessors:
+            if step is None or step == "passthrough" or hasattr(step, "fit_resample"):
+                # Sampler (SMOTE, ...) chỉ chạy lúc fit, bỏ qua khi predict
+                continue
+            if type(step).__name__ == "StandardScaler" and scaler is None:
+                # with_mean=False vẫn fit mean_ nhưng transform không trừ mean
+                mean = step.mean_ if step.with_mean else None
+                scale = step.scale_ if step.with_std else None
+                scaler = (
+                    np.asarray(0.0 if mean is None else mean),
+                    np.asarray(1.0 if scale is None else scale),
+                )
+                continue
+            raise ValueError(f"Unsupported pipeline step '{step_name}'")
+
+    if hasattr(estimator, "tree_"):
+        trees = [estimator.tree_]
+    elif hasattr(estimator, "estimators_") and all(
+        hasattr(tree, "tree_") for tree in estimator.estimators_
+    ):
+        trees = [tree.tree_ for tree in estimator.estimators_]
+    else:
+        raise ValueError(f"Cannot compile model of type {type(estimator).__name__}")
+
+    if not hasattr(estimator, "classes_") or getattr(estimator, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output classifiers can be compiled")
+
+    return CompiledTreeModel(
+        trees,
+        classes=estimator.classes_,
+        n_features=estimator.n_features_in_,
+        scaler=scaler,
+        source=type(estimator).__name__,
+        fallback=model if keep_fallback else None,
+    )
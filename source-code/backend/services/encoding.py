@@ -0,0 +1,262 @@
+"""
+Feature Encoding
+================
+
+Encoder input bệnh nhân -> ma trận float theo FEATURE_ORDER.
+
+Encoder được "compile" 1 lần lúc startup từ ENCODING_MAPS (hoặc
+encoding_maps.json) và FEATURE_ORDER: mỗi cột biết trước vị trí, tên
+attribute cần đọc và bảng mapping (nếu là categorical), nên khi encode chỉ
+cần ghi thẳng vào 1 mảng NumPy, không cần dict trung gian hay pandas.
+"""
+
+import json
+from operator import attrgetter, itemgetter
+from typing import Any, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+class FeatureEncoder:
+    """Encoder được compile sẵn từ encoding maps và thứ tự features"""
+
+    def __init__(
+        self,
+        encoding_maps: Mapping[str, Mapping[Any, int]],
+        feature_order: Sequence[str],
+        attribute_names: Optional[Mapping[str, str]] = None,
+    ):
+        """
+        Initialize FeatureEncoder
+
+        Args:
+            encoding_maps: Mapping feature -> {giá trị gốc: mã số}
+            feature_order: Thứ tự cột mà models được train
+            attribute_names: Mapping feature -> tên attribute trên object input
+                khi tên feature không phải identifier hợp lệ, ví dụ
+                "pam50_+_claudin-low_subtype" -> "pam50_claudin_low_subtype"
+        """
+        attribute_names = attribute_names or {}
+
+        self.feature_order = list(feature_order)
+        self.n_features = len(self.feature_order)
+        self.encoding_maps = {
+            feature: dict(mapping) for feature, mapping in encoding_maps.items()
+        }
+
+        # (vị trí cột, feature, tên attribute, mapping hoặc None nếu là số)
+        self._columns = [
+            (
+                col,
+                feature,
+                attribute_names.get(feature, feature),
+                self.encoding_maps.get(feature),
+            )
+            for col, feature in enumerate(self.feature_order)
+        ]
+
+    @classmethod
+    def from_json(
+        cls,
+        path: str,
+        feature_order: Sequence[str],
+        attribute_names: Optional[Mapping[str, str]] = None,
+    ) -> "FeatureEncoder":
+        """Tạo encoder từ file encoding_maps.json (bỏ qua các cột không phải feature)"""
+        with open(path, encoding="utf-8") as f:
+            encoding_maps = json.load(f)
+
+        encoding_maps = {
+            feature: mapping
+            for feature, mapping in encoding_maps.items()
+            if feature in feature_order
+        }
+        return cls(encoding_maps, feature_order, attribute_names)
+
+    def encode(self, obj: Any, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode 1 object input (ví dụ PatientInput) thành ma trận (1, n_features)
+
+        Args:
+            obj: Object có các attribute theo attribute_names
+            out: Mảng có sẵn shape (1, n_features) để ghi kết quả vào
+
+        Raises:
+            ValueError: Nếu giá trị categorical không có trong encoding maps
+        """
+        if out is None:
+            out = np.empty((1, self.n_features), dtype=np.float64)
+        row = out[0]
+
+        for col, feature, attribute, mapping in self._columns:
+            value = getattr(obj, attribute)
+            if mapping is not None:
+                try:
+                    value = mapping[value]
+                except KeyError:
+                    raise _unknown_value(feature, value)
+            row[col] = value
+
+        return out
+
+    def encode_many(self, objs: Sequence[Any]) -> np.ndarray:
+        """Encode nhiều object input thành ma trận (n_rows, n_features)"""
+        return self._encode_columns(objs, attrgetter, use_attributes=True)
+
+    def encode_records(self, records: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Encode nhiều dict (key là tên feature) thành ma trận (n_rows, n_features)"""
+        return self._encode_columns(records, itemgetter, use_attributes=False)
+
+    def encode_columns(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """
+        Encode dữ liệu dạng cột (ví dụ DataFrame đọc từ CSV) thành ma trận
+
+        Args:
+            columns: Mapping tên feature -> dãy giá trị gốc (Series, list, ...)
+
+        Raises:
+            KeyError: Nếu thiếu cột của 1 feature
+            ValueError: Nếu giá trị categorical không có trong encoding maps
+        """
+        n_rows = len(columns[self.feature_order[0]])
+        X = np.empty((n_rows, self.n_features), dtype=np.float64, order="F")
+
+        for col, feature, _, mapping in self._columns:
+            values = columns[feature]
+            if mapping is None:
+                X[:, col] = np.asarray(values, dtype=np.float64)
+                continue
+            try:
+                X[:, col] = np.fromiter(
+                    map(mapping.__getitem__, values), dtype=np.float64, count=n_rows
+                )
+            except KeyError as e:
+                raise _unknown_value(feature, e.args[0])
+
+        return np.ascontiguousarray(X)
+
+    def _encode_columns(self, rows, getter_factory, use_attributes: bool) -> np.ndarray:
+        n_rows = len(rows)
+        # Fortran order: mỗi cột liên tục trong bộ nhớ khi ghi theo cột
+        X = np.empty((n_rows, self.n_features), dtype=np.float64, order="F")
+
+        for col, feature, attribute, mapping in self._columns:
+            values = map(getter_factory(attribute if use_attributes else feature), rows)
+            if mapping is not None:
+                values = map(mapping.__getitem__, values)
+            try:
+                X[:, col] = np.fromiter(values, dtype=np.float64, count=n_rows)
+            except KeyError as e:
+                raise _unknown_value(feature, e.args[0])
+
+        return np.ascontiguousarray(X)
+
+
+class FeatureValidator:
+    """
+    Kiểm tra ma trận features đã encode theo ràng buộc của input
+
+    Dùng chung cho các input không đi qua PatientInput (Arrow của
+    /predict-all-arrow, CSV/Parquet của score_cohort.py) để chúng được kiểm
+    tra giống như API.
+
+    Args:
+        feature_order: Thứ tự cột của ma trận
+        encoding_maps: Mapping feature categorical -> {giá trị gốc: mã số};
+            giá trị đã encode phải là 1 trong các mã số
+        allowed_values: Mapping feature số -> các giá trị hợp lệ (Literal)
+        minimums: Mapping feature số -> giá trị nhỏ nhất (ge)
+        integer_features: Các feature số phải là số nguyên
+    """
+
+    def __init__(
+        self,
+        feature_order: Sequence[str],
+        encoding_maps: Optional[Mapping[str, Mapping[Any, int]]] = None,
+        allowed_values: Optional[Mapping[str, Iterable[float]]] = None,
+        minimums: Optional[Mapping[str, float]] = None,
+        integer_features: Iterable[str] = (),
+    ):
+        self.feature_order = list(feature_order)
+        self.minimums = dict(minimums or {})
+        self.integer_features = set(integer_features)
+        self.allowed_values = {
+            feature: np.asarray(sorted(values), dtype=np.float64)
+            for feature, values in (allowed_values or {}).items()
+        }
+        for feature, mapping in (encoding_maps or {}).items():
+            self.allowed_values[feature] = np.unique(
+                np.asarray(list(mapping.values()), dtype=np.float64)
+            )
+            self.integer_features.add(feature)
+
+    def check(self, X: np.ndarray) -> None:
+        """
+        Kiểm tra ma trận (n_rows, n_features) theo feature_order
+
+        Raises:
+            ValueError: Nếu có giá trị không hữu hạn, không nguyên, không nằm
+                trong các giá trị hợp lệ hoặc nhỏ hơn giá trị nhỏ nhất
+        """
+        for col, feature in enumerate(self.feature_order):
+            self.check_column(feature, X[:, col])
+
+    def check_column(self, feature: str, values: np.ndarray) -> None:
+        """Kiểm tra các giá trị của 1 feature (xem check())"""
+        if values.dtype.kind == "f":
+            if not np.isfinite(values).all():
+                raise ValueError(f"Non-finite values for feature '{feature}'")
+            if feature in self.integer_features and (values != np.round(values)).any():
+                raise ValueError(f"Non-integer values for feature '{feature}'")
+
+        allowed = self.allowed_values.get(feature)
+        if allowed is not None:
+            invalid = ~np.isin(values, allowed)
+            if invalid.any():
+                value = values[invalid][0].item()
+                raise _unknown_value(feature, value)
+
+        minimum = self.minimums.get(feature)
+        if minimum is not None and (values < minimum).any():
+            raise ValueError(f"Values below {minimum} for feature '{feature}'")
+
+
+def _unknown_value(feature: str, value: Any) -> ValueError:
+    return ValueError(f"Unknown value {value!r} for feature '{feature}'")
+
+
+def align_feature_names(model: Any, feature_order: Sequence[str]) -> bool:
+    """
+    Kiểm tra thứ tự feature của model và bỏ feature_names_in_ để predict trên ndarray
+
+    Models được fit với DataFrame sẽ lưu feature_names_in_; khi predict với
+    ndarray, sklearn phải kiểm tra tên cột và phát warning "X does not have
+    valid feature names". Sau khi xác nhận model được train đúng theo
+    feature_order, bỏ thuộc tính này (ở model và các step của Pipeline) để
+    ndarray đi thẳng vào model.
+
+    Returns:
+        True nếu model có feature_names_in_ và đã được bỏ
+
+    Raises:
+        ValueError: Nếu model được train với thứ tự feature khác feature_order
+    """
+    estimators: List[Any] = [model]
+    if hasattr(model, "steps"):
+        estimators.extend(step for _, step in model.steps)
+
+    stripped = False
+    for estimator in estimators:
+        names = estimator.__dict__.get("feature_names_in_")
+        if names is None:
+            continue
+        if list(names) != list(feature_order):
+            raise ValueError(
+                f"Model features {list(names)} do not match feature order "
+                f"{list(feature_order)}"
+            )
+        del estimator.feature_names_in_
+        stripped = True
+
+    return stripped
+
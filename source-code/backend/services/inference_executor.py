@@ -0,0 +1,163 @@
+"""
+Inference Executor
+==================
+
+Chạy sklearn inference ngoài asyncio event loop.
+
+Các handler của FastAPI là `async def`, nên nếu gọi model.predict() trực tiếp
+thì kernel evaluation của SVM sẽ block cả event loop (kể cả health check `/`).
+InferenceExecutor đẩy công việc sang thread pool hoặc process pool, đồng thời
+giới hạn số job đang chờ để có backpressure khi quá tải.
+
+Kind "shared": process pool mà các worker dùng chung trọng số models qua
+shared memory (xem shared_models.py) thay vì mỗi worker giữ 1 bản riêng.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .model_loader import process_memory
+from .shared_models import SharedModelStore, attach_worker, run_shared_job
+
+
+class InferenceQueueFullError(Exception):
+    """Queue inference đã đầy, client nên thử lại sau `retry_after` giây"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """Executor có giới hạn queue cho các job inference"""
+
+    EXECUTOR_KINDS = ("thread", "process", "shared")
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_queue_size: int = 64,
+        retry_after: int = 1,
+        model_source: Optional[Callable[[], Any]] = None,
+    ):
+        """
+        Initialize InferenceExecutor
+
+        Args:
+            kind: "thread" (mặc định), "process" hoặc "shared"
+            max_workers: Số worker chạy inference song song
+            max_queue_size: Số job tối đa được phép chờ ngoài các job đang chạy
+            retry_after: Giá trị Retry-After (giây) gợi ý cho client khi queue đầy
+            model_source: Chỉ dùng với "shared": trả về ModelService có models
+                cần publish vào shared memory (được gọi mỗi job để phát hiện swap)
+        """
+        if kind not in self.EXECUTOR_KINDS:
+            raise ValueError(
+                f"Unknown executor kind '{kind}', expected one of {self.EXECUTOR_KINDS}"
+            )
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        if max_queue_size < 0:
+            raise ValueError("max_queue_size must be >= 0")
+        if kind == "shared" and model_source is None:
+            raise ValueError("model_source is required for the 'shared' executor")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.retry_after = retry_after
+
+        # Tổng số job được nhận cùng lúc = đang chạy + đang chờ
+        self._capacity = max_workers + max_queue_size
+        self._pending = 0
+        self._rejected = 0
+        self._model_source = model_source
+        self._store = SharedModelStore() if kind == "shared" else None
+        self._executor: Executor = self._create_executor()
+
+    def _create_executor(self) -> Executor:
+        if self.kind == "shared":
+            # fork: worker kế thừa các module đã import (job là function của
+            # app) mà không import lại app / load lại models
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=attach_worker,
+                initargs=(self._store.spec(self._model_source()),),
+            )
+        if self.kind == "process":
+            # Job phải là function cấp module (picklable); worker process dùng
+            # models của chính nó (fork kế thừa, spawn thì load lại khi import)
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="inference"
+        )
+
+    def start(self) -> None:
+        """
+        Tạo các worker process ngay (với "shared"), thay vì ở job đầu tiên
+
+        Gọi sau khi các job function đã được định nghĩa (worker được fork từ
+        trạng thái lúc này) và trước khi process chính có thêm thread.
+        """
+        if self.kind == "shared":
+            self._executor.submit(int).result()
+
+    @property
+    def pending(self) -> int:
+        """Số job đang chạy hoặc đang chờ"""
+        return self._pending
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Chạy fn(*args) trên executor và await kết quả
+
+        Raises:
+            InferenceQueueFullError: Nếu số job đang chờ đã đạt giới hạn
+        """
+        # run() luôn được gọi từ event loop thread nên counter không cần lock
+        if self._pending >= self._capacity:
+            self._rejected += 1
+            raise InferenceQueueFullError(self.retry_after)
+
+        self._pending += 1
+        try:
+            if self._store is not None:
+                # Spec của models đang active (publish lại nếu vừa swap)
+                spec = self._store.spec(self._model_source())
+                job = functools.partial(run_shared_job, spec, fn, *args)
+            else:
+                job = functools.partial(fn, *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, job)
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Thông tin trạng thái executor"""
+        stats = {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "pending": self._pending,
+            "rejected": self._rejected,
+        }
+        if self._store is not None:
+            stats["shared_models"] = self._store.stats()
+        if self.kind != "thread":
+            stats["worker_memory"] = self.worker_memory()
+        return stats
+
+    def worker_memory(self) -> Dict[int, Optional[Dict[str, int]]]:
+        """Bộ nhớ (rss / pss / uss) của từng worker process theo pid"""
+        processes = getattr(self._executor, "_processes", None) or {}
+        return {pid: process_memory(pid) for pid in list(processes)}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        if self._store is not None:
+            self._store.close()
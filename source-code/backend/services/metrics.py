@@ -0,0 +1,343 @@
+"""
+Metrics
+=======
+
+Metrics đơn giản (in-memory) cho backend, ví dụ histogram kích thước batch
+và thời gian chờ của micro-batcher, latency của từng stage khi predict.
+
+MetricsRegistry gom các metrics lại và xuất ra text format của Prometheus
+(endpoint /metrics). Registry không phụ thuộc FastAPI nên ModelService hoặc
+script offline cũng dùng được; chỉ MetricsMiddleware là dành cho ASGI app.
+
+Chi phí mỗi lần ghi là 1 lần lấy lock + vài phép cộng, đủ rẻ để luôn bật.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Bucket latency (giây) mặc định, từ 100µs đến 10s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+ROW_COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+
+class Counter:
+    """Counter chỉ tăng (ví dụ số lần model lỗi)"""
+
+    def __init__(
+        self, name: str, description: str, labels: Optional[Mapping[str, str]] = None
+    ):
+        self.name = name
+        self.description = description
+        self.labels = dict(labels or {})
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        return [(f"{self.name}_total", self.labels, self._value)]
+
+
+class Gauge:
+    """Gauge đọc giá trị từ callback lúc xuất metrics (ví dụ cache hit rate)"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        fn: Callable[[], float],
+        labels: Optional[Mapping[str, str]] = None,
+    ):
+        self.name = name
+        self.description = description
+        self.fn = fn
+        self.labels = dict(labels or {})
+
+    @property
+    def value(self) -> float:
+        return float(self.fn())
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        return [(self.name, self.labels, self.value)]
+
+
+class Histogram:
+    """Histogram với các bucket cố định (cận trên, cộng dồn như Prometheus)"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: Sequence[float],
+        labels: Optional[Mapping[str, str]] = None,
+    ):
+        self.name = name
+        self.description = description
+        self.labels = dict(labels or {})
+        self.buckets = sorted(buckets)
+        # Bucket cuối cùng là +Inf
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def snapshot(self) -> Dict:
+        """Trạng thái hiện tại: count, sum và số lượng cộng dồn theo bucket"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+            count = self._count
+
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+            running += bucket_count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "buckets": cumulative,
+        }
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+            count = self._count
+
+        samples = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+            running += bucket_count
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            samples.append((f"{self.name}_bucket", {**self.labels, "le": le}, running))
+        samples.append((f"{self.name}_sum", self.labels, total))
+        samples.append((f"{self.name}_count", self.labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Tập hợp metrics, lấy theo (tên, labels) và xuất ra Prometheus text format
+
+    counter()/histogram() trả về metric có sẵn nếu đã tạo trước đó với cùng
+    tên và labels, nên có thể gọi trực tiếp ở chỗ cần ghi metrics.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str, **labels: str) -> Counter:
+        return self._get_or_create(Counter, name, labels, description)
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        **labels: str,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, labels, description, buckets)
+
+    def gauge(
+        self, name: str, description: str, fn: Callable[[], float], **labels: str
+    ) -> Gauge:
+        """Đăng ký (hoặc thay callback của) gauge name{labels}"""
+        gauge = Gauge(name, description, fn, labels)
+        with self._lock:
+            self._metrics[(name, tuple(sorted(labels.items())))] = gauge
+        return gauge
+
+    def register(self, metric: Any) -> Any:
+        """Thêm metric được tạo ở nơi khác (ví dụ histogram của MicroBatcher)"""
+        with self._lock:
+            self._metrics[(metric.name, tuple(sorted(metric.labels.items())))] = metric
+        return metric
+
+    def _get_or_create(self, cls, name: str, labels: Dict[str, str], *args):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(name, args[0], *args[1:], labels=labels)
+                    self._metrics[key] = metric
+        return metric
+
+    def render(self) -> str:
+        """Xuất tất cả metrics theo Prometheus text exposition format 0.0.4"""
+        with self._lock:
+            metrics = sorted(self._metrics.items(), key=lambda item: item[0])
+
+        lines = []
+        current = None
+        for (name, _), metric in metrics:
+            if name != current:
+                current = name
+                lines.append(f"# HELP {name} {_escape(metric.description)}")
+                lines.append(f"# TYPE {name} {_METRIC_TYPES[type(metric)]}")
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                # Callback của gauge lỗi không được làm hỏng cả /metrics
+                print(f"❌ Error collecting metric {name}: {e}")
+                continue
+            for sample_name, labels, value in samples:
+                lines.append(
+                    f"{sample_name}{_format_labels(labels)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+_METRIC_TYPES = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label_value(value: Any) -> str:
+    return _escape(str(value)).replace('"', '\\"')
+
+
+def _format_labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{key}="{_escape_label_value(value)}"'
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# ==================== REQUEST STAGES ====================
+class RequestStages:
+    """Mốc thời gian của request hiện tại, để đo latency theo từng stage"""
+
+    __slots__ = ("started", "last", "stages")
+
+    def __init__(self, started: float):
+        self.started = started
+        self.last = started
+        # (stage, số giây), ghi vào histogram khi request kết thúc
+        self.stages: List[Tuple[str, float]] = []
+
+
+_current_request: ContextVar[Optional[RequestStages]] = ContextVar(
+    "current_request", default=None
+)
+
+
+def mark_stage(stage: str) -> None:
+    """
+    Kết thúc stage hiện tại của request: thời gian từ mốc trước đến bây giờ
+
+    Không làm gì khi không có request (ví dụ gọi từ script offline).
+    """
+    request = _current_request.get()
+    if request is None:
+        return
+    now = time.perf_counter()
+    request.stages.append((stage, now - request.last))
+    request.last = now
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware đo latency của mỗi HTTP request
+
+    - http_request_duration_seconds{path}: tổng thời gian đến khi gửi header
+    - http_requests_total{path, status}
+    - request_stage_seconds{path, stage}: các stage được đánh dấu bằng
+      mark_stage() trong endpoint (ví dụ "validation", "encode", "inference");
+      thời gian từ mốc cuối cùng đến khi gửi response được tính là
+      "serialization"
+
+    path là route template; request không khớp route nào được gộp vào "other"
+    để số lượng label không tăng theo URL tùy ý.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestStages(time.perf_counter())
+        token = _current_request.set(request)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                self._observe(scope, request, message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current_request.reset(token)
+
+    def _observe(self, scope, request: RequestStages, status: int) -> None:
+        now = time.perf_counter()
+        route = scope.get("route")
+        path = getattr(route, "path", None) or "other"
+
+        self.registry.histogram(
+            "http_request_duration_seconds",
+            "Thời gian xử lý HTTP request",
+            path=path,
+        ).observe(now - request.started)
+        self.registry.counter(
+            "http_requests", "Số HTTP request", path=path, status=str(status)
+        ).inc()
+
+        if not request.stages:
+            return
+        for stage, seconds in request.stages + [("serialization", now - request.last)]:
+            self.registry.histogram(
+                "request_stage_seconds",
+                "Latency theo từng stage của request",
+                path=path,
+                stage=stage,
+            ).observe(seconds)
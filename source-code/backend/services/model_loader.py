@@ -0,0 +1,258 @@
+"""
+Model Loader
+============
+
+Load model artifacts (joblib pickles hoặc file .npz portable) song song, có
+thể memory-map và lazy.
+
+- mmap_mode="c": các mảng NumPy lớn (support vectors của SVM, ...) được map
+  thẳng từ file (copy-on-write) thay vì copy vào heap, nên nhiều uvicorn
+  worker trên cùng máy dùng chung 1 bản qua page cache của OS. Dùng "c" thay
+  vì "r" vì libsvm yêu cầu buffer writable (dù không ghi vào). Mảng của
+  sklearn Tree luôn được copy vào heap khi unpickle nên không chia sẻ được.
+- Load song song: các file được load cùng lúc trên thread pool.
+- Lazy: model chỉ được load ở request đầu tiên dùng đến nó.
+- File .npz (xem portable.py) được load bằng NumPy thành compiled engine;
+  joblib (và scikit-learn) chỉ được import khi có artifact .pkl.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .portable import PORTABLE_EXTENSION, load_portable_model
+
+# Các thread load (eager hoặc LazyModel) import joblib / scikit-learn lần lượt
+_import_lock = threading.Lock()
+
+
+class ModelLoadInfo:
+    """Thông tin load của 1 model: thời gian và bộ nhớ các mảng NumPy"""
+
+    def __init__(self, name: str, path: str, mmap_mode: Optional[str] = None):
+        self.name = name
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self.loaded = False
+        self.load_seconds: Optional[float] = None
+        self.array_bytes: Optional[int] = None
+        self.mmapped_bytes: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        result = {
+            "path": self.path,
+            "mmap_mode": self.mmap_mode,
+            "loaded": self.loaded,
+            "load_seconds": (
+                round(self.load_seconds, 4) if self.load_seconds is not None else None
+            ),
+            "array_bytes": self.array_bytes,
+            "mmapped_bytes": self.mmapped_bytes,
+            # Phần mảng nằm trong heap riêng của process (không chia sẻ được)
+            "private_bytes": (
+                self.array_bytes - self.mmapped_bytes
+                if self.array_bytes is not None
+                else None
+            ),
+        }
+        if self.error is not None:
+            result["error"] = self.error
+        return result
+
+
+class LazyModel:
+    """Placeholder cho model chưa load; load() được gọi ở lần dùng đầu tiên"""
+
+    def __init__(self, info: ModelLoadInfo):
+        self.info = info
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Any:
+        """Load model (chỉ 1 lần, thread-safe) và trả về model object"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = _load_one(self.info)
+        return self._model
+
+
+def load_model_files(
+    paths: Dict[str, str],
+    mmap_mode: Optional[str] = None,
+    lazy: bool = False,
+    max_workers: Optional[int] = None,
+) -> Tuple[Dict[str, Any], Dict[str, ModelLoadInfo]]:
+    """
+    Load nhiều model artifacts
+
+    Args:
+        paths: Mapping model name -> đường dẫn file .pkl hoặc .npz
+        mmap_mode: mmap_mode của joblib.load ("c" = copy-on-write), None = copy.
+            Không áp dụng cho file .npz
+        lazy: True = trả về LazyModel, model được load ở lần dùng đầu tiên
+        max_workers: Số thread load song song (mặc định = số model)
+
+    Returns:
+        Tuple (models, infos):
+        - models: Mapping name -> model (hoặc LazyModel), chỉ gồm model load được
+        - infos: Mapping name -> ModelLoadInfo cho mọi model, kể cả model lỗi
+    """
+    infos = {name: ModelLoadInfo(name, path, mmap_mode) for name, path in paths.items()}
+    models: Dict[str, Any] = {}
+
+    if lazy:
+        for name, info in infos.items():
+            # Kiểm tra file ngay để lỗi thiếu artifact vẫn lộ ra lúc startup
+            if os.path.exists(info.path):
+                models[name] = LazyModel(info)
+            else:
+                info.error = f"No such file: {info.path}"
+        return models, infos
+
+    if not infos:
+        return models, infos
+
+    if any(not info.path.endswith(PORTABLE_EXTENSION) for info in infos.values()):
+        _import_pickle_modules()
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(infos)) as executor:
+        futures = {name: executor.submit(_load_one, info) for name, info in infos.items()}
+
+    # Giữ thứ tự của paths
+    for name, future in futures.items():
+        try:
+            models[name] = future.result()
+        except Exception:
+            # Lỗi đã được ghi vào ModelLoadInfo.error
+            continue
+
+    return models, infos
+
+
+def _import_pickle_modules() -> None:
+    # Import hết trước khi unpickle, dưới 1 lock: nếu các thread load cùng
+    # import scikit-learn lần đầu khi unpickle, 1 thread có thể thấy module
+    # đang import dở ("partially initialized module"). Sau lần đầu chỉ còn
+    # chi phí lấy lock
+    with _import_lock:
+        import joblib  # noqa: F401
+
+        try:
+            import sklearn.base  # noqa: F401
+        except ImportError:
+            pass
+
+
+def _load_one(info: ModelLoadInfo) -> Any:
+    started = time.perf_counter()
+    try:
+        if info.path.endswith(PORTABLE_EXTENSION):
+            model = load_portable_model(info.path)
+        else:
+            # Cả đường lazy (LazyModel.load ở nhiều request thread cùng lúc)
+            _import_pickle_modules()
+            import joblib
+
+            model = joblib.load(info.path, mmap_mode=info.mmap_mode)
+    except Exception as e:
+        info.error = str(e)
+        raise
+
+    info.load_seconds = time.perf_counter() - started
+    info.array_bytes, info.mmapped_bytes = measure_array_memory(model)
+    info.loaded = True
+    return model
+
+
+def measure_array_memory(obj: Any) -> Tuple[int, int]:
+    """
+    Tổng dung lượng các mảng NumPy trong 1 model object
+
+    Returns:
+        Tuple (array_bytes, mmapped_bytes): tổng bytes các mảng và phần được
+        memory-map từ file
+    """
+    total = 0
+    mmapped = 0
+    seen = set()
+    stack = [obj]
+
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        if isinstance(current, np.ndarray):
+            if current.dtype == object:
+                stack.extend(current.ravel().tolist())
+                continue
+            total += current.nbytes
+            if _is_memory_mapped(current):
+                mmapped += current.nbytes
+            continue
+
+        if isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__"):
+            stack.extend(vars(current).values())
+        elif type(current).__name__ == "Tree" and hasattr(current, "__getstate__"):
+            # sklearn Tree (Cython) không có __dict__, mảng nằm trong state
+            stack.extend(current.__getstate__().values())
+
+    return total, mmapped
+
+
+def _is_memory_mapped(array: np.ndarray) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base if isinstance(array.base, np.ndarray) else None
+    return False
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident memory hiện tại của process (Linux), None nếu không đọc được"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Bộ nhớ của 1 process (Linux, /proc/<pid>/smaps_rollup)
+
+    Returns:
+        Dict rss / pss / uss (bytes): uss = phần riêng của process, pss chia
+        đều các trang dùng chung (shared memory, thư viện) giữa các process.
+        None nếu không đọc được
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":"):
+                    fields[parts[0][:-1]] = int(parts[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
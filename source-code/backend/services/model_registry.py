@@ -0,0 +1,322 @@
+"""
+Model Registry
+==============
+
+Quản lý các phiên bản model artifacts và hot reload không downtime.
+
+Cấu trúc thư mục registry, mỗi thư mục con là 1 phiên bản:
+
+    model_registry/
+    ├── 2025-12-01/
+    │   ├── svm.pkl
+    │   ├── best_model_random_forest.pkl
+    │   └── decision_tree_best.pkl
+    └── 2025-12-17/
+        └── ...
+
+Thư mục phiên bản cũng có thể chứa models đã export sang định dạng portable
+(svm.npz, ... cùng tên gốc, xem portable.py); file .npz được ưu tiên nếu có
+cả 2.
+
+Khi kích hoạt 1 phiên bản, registry load (luôn load ngay, không lazy) và
+warm up models ở background thread, sau đó swap vào ModelService bằng 1 phép gán (xem
+ModelService.swap_model_set), nên request đang chạy không bị gián đoạn.
+Các ModelSet trước đó được giữ lại trong bộ nhớ để rollback tức thì.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .model_loader import load_model_files
+from .model_service import ModelService, ModelSet
+from .portable import portable_filename
+
+
+class ModelRegistryError(Exception):
+    """Lỗi khi kích hoạt hoặc rollback phiên bản model"""
+
+
+class UnknownModelVersionError(ModelRegistryError):
+    """Phiên bản không có trong registry"""
+
+
+class ModelRegistry:
+    """Registry các phiên bản model trong 1 thư mục"""
+
+    def __init__(
+        self,
+        root_dir: str,
+        artifact_files: Dict[str, str],
+        model_service: Optional[ModelService] = None,
+        warmup_X: Optional[np.ndarray] = None,
+        mmap_mode: Optional[str] = None,
+        keep_previous: int = 2,
+    ):
+        """
+        Initialize ModelRegistry
+
+        Args:
+            root_dir: Thư mục chứa các phiên bản (mỗi thư mục con 1 phiên bản)
+            artifact_files: Mapping model name -> tên file trong thư mục phiên bản
+            model_service: ModelService nhận models khi swap (có thể gán sau,
+                trước lần kích hoạt đầu tiên)
+            warmup_X: Input mẫu (đã encode) để warm up models trước khi swap
+            mmap_mode: mmap_mode khi load artifacts (xem model_loader)
+            keep_previous: Số ModelSet cũ giữ lại trong bộ nhớ để rollback
+        """
+        self.root_dir = root_dir
+        self.artifact_files = dict(artifact_files)
+        self.model_service = model_service
+        self.warmup_X = warmup_X
+        self.mmap_mode = mmap_mode
+        self.keep_previous = keep_previous
+
+        # Các ModelSet đã từng active, mới nhất ở cuối
+        self._previous: List[ModelSet] = []
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+        self.state = "idle"
+        self.pending_version: Optional[str] = None
+        self.last_swap: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    # ---------- Phiên bản ----------
+    def list_versions(self) -> List[str]:
+        """
+        Các phiên bản có đủ artifact của mọi model, sắp xếp theo tên
+
+        Thư mục thiếu artifact bị bỏ qua: kích hoạt nó sẽ làm các models còn
+        thiếu biến mất khỏi /predict-all
+        """
+        if not os.path.isdir(self.root_dir):
+            return []
+
+        versions = []
+        for entry in sorted(os.listdir(self.root_dir)):
+            version_dir = os.path.join(self.root_dir, entry)
+            if os.path.isdir(version_dir) and all(
+                self._artifact_path(version_dir, filename) is not None
+                for filename in self.artifact_files.values()
+            ):
+                versions.append(entry)
+        return versions
+
+    def latest_version(self) -> Optional[str]:
+        versions = self.list_versions()
+        return versions[-1] if versions else None
+
+    def version_paths(self, version: str) -> Dict[str, str]:
+        """
+        Đường dẫn artifacts của mọi model trong 1 phiên bản
+
+        Raises:
+            UnknownModelVersionError: Nếu version không phải 1 thư mục con của
+                root_dir có trong list_versions() (ví dụ "../x", đường dẫn
+                tuyệt đối, thư mục thiếu artifact)
+        """
+        # Chỉ nhận tên thư mục đã liệt kê: version đến từ request, không được
+        # dùng để load pickle ngoài registry
+        if version not in self.list_versions():
+            raise UnknownModelVersionError(f"Unknown model version '{version}'")
+        version_dir = os.path.join(self.root_dir, version)
+
+        paths = {
+            name: self._artifact_path(version_dir, filename)
+            for name, filename in self.artifact_files.items()
+        }
+        missing = [name for name, path in paths.items() if path is None]
+        if missing:
+            # Artifact bị xoá sau list_versions()
+            raise UnknownModelVersionError(
+                f"Model version '{version}' is missing artifacts for {missing}"
+            )
+        return paths
+
+    @staticmethod
+    def _artifact_path(version_dir: str, filename: str) -> Optional[str]:
+        """File .npz portable nếu có, ngược lại file gốc (None nếu không có cả 2)"""
+        for candidate in (portable_filename(filename), filename):
+            path = os.path.join(version_dir, candidate)
+            if os.path.exists(path):
+                return path
+        return None
+
+    # ---------- Kích hoạt ----------
+    def activate(
+        self, version: str, paths: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Load, warm up và swap phiên bản vào ModelService (chạy đồng bộ)
+
+        Args:
+            version: Tên phiên bản
+            paths: Artifacts thay cho thư mục phiên bản trong registry (ví dụ
+                MODEL_PATHS khi registry trống). Chỉ dùng với đường dẫn do
+                server xác định, không lấy từ request
+
+        Raises:
+            UnknownModelVersionError: Nếu phiên bản không có trong registry
+            ModelRegistryError: Nếu đang có swap khác hoặc load/warm up lỗi
+        """
+        if paths is None:
+            # Kiểm tra phiên bản trước khi giữ state
+            paths = self.version_paths(version)
+
+        with self._lock:
+            if self.state != "idle":
+                raise ModelRegistryError(
+                    f"Another activation is in progress ({self.pending_version})"
+                )
+            self.state = "loading"
+            self.pending_version = version
+
+        try:
+            return self._activate(version, paths)
+        finally:
+            with self._lock:
+                self.state = "idle"
+                self.pending_version = None
+
+    def activate_in_background(self, version: str) -> None:
+        """
+        Kích hoạt phiên bản ở background thread
+
+        Raises:
+            UnknownModelVersionError: Nếu phiên bản không có trong registry
+            ModelRegistryError: Nếu đang có swap khác
+        """
+        # Kiểm tra phiên bản ngay để lỗi được trả về cho caller
+        paths = self.version_paths(version)
+
+        with self._lock:
+            if self.state != "idle":
+                raise ModelRegistryError(
+                    f"Another activation is in progress ({self.pending_version})"
+                )
+            self.state = "loading"
+            self.pending_version = version
+
+        def run():
+            try:
+                self._activate(version, paths)
+            except Exception as e:
+                # Lỗi đã được ghi vào last_error
+                print(f"❌ Error activating model version {version}: {e}")
+            finally:
+                with self._lock:
+                    self.state = "idle"
+                    self.pending_version = None
+
+        self._worker = threading.Thread(
+            target=run, name=f"model-registry-{version}", daemon=True
+        )
+        self._worker.start()
+
+    def _activate(self, version: str, paths: Dict[str, str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            if self.model_service is None:
+                raise ModelRegistryError("ModelService is not initialized")
+            if not paths:
+                raise ModelRegistryError(f"Model version '{version}' has no artifacts")
+
+            models, infos = load_model_files(paths, mmap_mode=self.mmap_mode)
+            errors = {name: info.error for name, info in infos.items() if info.error}
+            if errors:
+                raise ModelRegistryError(f"Could not load artifacts: {errors}")
+            load_seconds = time.perf_counter() - started
+
+            model_set = self.model_service.build_model_set(models, version)
+
+            self.state = "warming"
+            warm_started = time.perf_counter()
+            if self.warmup_X is not None:
+                failures = self.model_service.warm_up(model_set, self.warmup_X)
+                if failures:
+                    raise ModelRegistryError(f"Warm-up failed: {failures}")
+            warmup_seconds = time.perf_counter() - warm_started
+
+            self.state = "swapping"
+            swap_started = time.perf_counter()
+            previous = self.model_service.swap_model_set(model_set)
+            swap_seconds = time.perf_counter() - swap_started
+        except Exception as e:
+            self.last_error = f"{version}: {e}"
+            raise
+
+        self._remember(previous)
+        self.last_error = None
+        self.last_swap = {
+            "version": version,
+            "previous_version": previous.version,
+            "rollback": False,
+            "load_seconds": round(load_seconds, 4),
+            "warmup_seconds": round(warmup_seconds, 4),
+            "swap_seconds": swap_seconds,
+            "completed_at": time.time(),
+            "artifacts": {name: info.to_dict() for name, info in infos.items()},
+        }
+        print(f"✅ Model version {version} activated (swap {swap_seconds * 1e6:.1f}us)")
+        return self.last_swap
+
+    def rollback(self) -> Dict[str, Any]:
+        """
+        Swap lại ModelSet active trước đó (đã có sẵn trong bộ nhớ)
+
+        Raises:
+            ModelRegistryError: Nếu không có phiên bản trước hoặc đang swap
+        """
+        with self._lock:
+            if self.state != "idle":
+                raise ModelRegistryError(
+                    f"Another activation is in progress ({self.pending_version})"
+                )
+            if self.model_service is None or not self._previous:
+                raise ModelRegistryError("No previous model version to roll back to")
+            target = self._previous.pop()
+
+            swap_started = time.perf_counter()
+            current = self.model_service.swap_model_set(target)
+            swap_seconds = time.perf_counter() - swap_started
+
+        self.last_swap = {
+            "version": target.version,
+            "previous_version": current.version,
+            "rollback": True,
+            "swap_seconds": swap_seconds,
+            "completed_at": time.time(),
+        }
+        print(f"✅ Rolled back to model version {target.version}")
+        return self.last_swap
+
+    def _remember(self, model_set: ModelSet) -> None:
+        with self._lock:
+            self._previous.append(model_set)
+            # Giải phóng các phiên bản quá cũ
+            del self._previous[: max(0, len(self._previous) - self.keep_previous)]
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Chờ background activation hiện tại (nếu có) hoàn tất"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """Trạng thái registry: phiên bản active, các phiên bản có sẵn, lần swap gần nhất"""
+        return {
+            "root_dir": self.root_dir,
+            "active_version": (
+                self.model_service.version if self.model_service is not None else None
+            ),
+            "available_versions": self.list_versions(),
+            "rollback_versions": [model_set.version for model_set in self._previous],
+            "state": self.state,
+            "pending_version": self.pending_version,
+            "last_swap": self.last_swap,
+            "last_error": self.last_error,
+        }
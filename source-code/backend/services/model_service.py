@@ -6,15 +6,48 @@ Service layer để xử lý predictions từ nhiều models.
 Tách biệt business logic khỏi API endpoints.
 """
 
-from typing import Dict, List, Optional, Tuple
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Executor, wait
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
 import numpy as np
-import pandas as pd
 from pathlib import Path
 
+from .attributions import (
+    DEFAULT_BACKGROUND_SIZE,
+    BatchAttributions,
+    build_attributor,
+    predicted_class_attributions,
+)
+from .compiled_svm import CompiledSVM
+from .compiled_trees import CompiledTreeModel
+from .encoding import align_feature_names
+from .metrics import ROW_COUNT_BUCKETS, MetricsRegistry
+from .model_loader import LazyModel
+from .portable import compile_model, is_compiled
+from .prediction_cache import PredictionCache
+from .scheduler import ModelScheduler, ModelsUnavailableError
+from .tree_table import TreeLookupTable, TreeTableBuilder
+
+if TYPE_CHECKING:
+    # Chỉ dùng cho type hints: serve với models portable không cần pandas
+    import pandas as pd
+
 
 class ModelPredictionResult:
     """Kết quả prediction từ 1 model"""
     
+    # Không có __dict__ cho mỗi object: cache và batch lớn giữ rất nhiều kết quả
+    __slots__ = (
+        "model_name",
+        "cancer_type_code",
+        "cancer_type_detailed",
+        "confidence",
+        "probabilities",
+    )
+    
     def __init__(
         self,
         model_name: str,
@@ -48,6 +81,288 @@ class ModelPredictionResult:
         return result
 
 
+class BatchPredictionResult:
+    """
+    Kết quả của 1 model cho cả batch, lưu theo cột (mảng NumPy)
+    
+    Thay cho list ModelPredictionResult (mỗi dòng 1 object và 1 dict
+    probabilities): codes, confidences và ma trận probabilities được giữ
+    nguyên dạng mảng, ModelPredictionResult của 1 dòng chỉ được tạo khi truy
+    cập (result[i], vòng for). Dùng được như 1 list ModelPredictionResult
+    (len, index, iterate).
+    
+    - codes: (n_samples,) mã cancer type
+    - confidences: (n_samples,) probability cao nhất, None nếu model không
+      có predict_proba()
+    - probabilities: (n_samples, n_classes) theo thứ tự class_names
+    """
+    
+    __slots__ = (
+        "model_name",
+        "codes",
+        "confidences",
+        "probabilities",
+        "class_names",
+        "cancer_type_mapping",
+    )
+    
+    def __init__(
+        self,
+        model_name: str,
+        codes: np.ndarray,
+        probabilities: Optional[np.ndarray],
+        class_names: Optional[List[str]],
+        cancer_type_mapping: Dict[int, str],
+    ):
+        self.model_name = model_name
+        self.codes = codes
+        self.probabilities = probabilities
+        self.class_names = class_names
+        self.cancer_type_mapping = cancer_type_mapping
+        # Confidence = probability cao nhất (của class được predict)
+        self.confidences = (
+            probabilities.max(axis=1) if probabilities is not None else None
+        )
+    
+    def __len__(self) -> int:
+        return len(self.codes)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("BatchPredictionResult index out of range")
+        return self.row(index)
+    
+    def __iter__(self):
+        # tolist() 1 lần cho cả batch thay vì index NumPy từng dòng
+        codes = self.codes.tolist()
+        if self.probabilities is None:
+            for code in codes:
+                yield self._result(code, None, None)
+            return
+        confidences = self.confidences.tolist()
+        for code, confidence, proba in zip(
+            codes, confidences, self.probabilities.tolist()
+        ):
+            yield self._result(code, confidence, proba)
+    
+    def row(self, index: int) -> ModelPredictionResult:
+        """ModelPredictionResult của dòng index (tạo mới mỗi lần gọi)"""
+        code = int(self.codes[index])
+        if self.probabilities is None:
+            return self._result(code, None, None)
+        return self._result(
+            code,
+            float(self.confidences[index]),
+            self.probabilities[index].tolist(),
+        )
+    
+    def _result(
+        self,
+        code: int,
+        confidence: Optional[float],
+        proba: Optional[List[float]],
+    ) -> ModelPredictionResult:
+        return ModelPredictionResult(
+            model_name=self.model_name,
+            cancer_type_code=code,
+            cancer_type_detailed=self.cancer_type_mapping.get(code, "Unknown"),
+            confidence=confidence,
+            # Probabilities = dict chứa probability của TẤT CẢ classes
+            probabilities=dict(zip(self.class_names, proba)) if proba else None,
+        )
+    
+    @property
+    def nbytes(self) -> int:
+        """Tổng bytes các mảng kết quả"""
+        return sum(
+            array.nbytes
+            for array in (self.codes, self.confidences, self.probabilities)
+            if array is not None
+        )
+    
+    def to_dicts(self) -> List[Dict]:
+        """
+        List dict theo từng dòng, giống ModelPredictionResult.to_dict()
+        
+        Không tạo ModelPredictionResult trung gian cho từng dòng.
+        """
+        codes = self.codes.tolist()
+        names = {
+            code: self.cancer_type_mapping.get(code, "Unknown") for code in set(codes)
+        }
+        if self.probabilities is None:
+            return [
+                {
+                    "model_name": self.model_name,
+                    "cancer_type_detailed": names[code],
+                    "cancer_type_code": code,
+                }
+                for code in codes
+            ]
+        
+        class_names = self.class_names
+        return [
+            {
+                "model_name": self.model_name,
+                "cancer_type_detailed": names[code],
+                "cancer_type_code": code,
+                "confidence": round(confidence, 4),
+                "probabilities": {
+                    name: round(value, 4) for name, value in zip(class_names, proba)
+                },
+            }
+            for code, confidence, proba in zip(
+                codes, self.confidences.tolist(), self.probabilities.tolist()
+            )
+        ]
+
+
+class ModelCapabilities:
+    """Khả năng của 1 model, được xác định 1 lần khi model được load"""
+    
+    def __init__(
+        self,
+        has_proba: bool,
+        class_codes: Optional[np.ndarray] = None,
+        class_names: Optional[List[str]] = None,
+        proba_argmax_is_label: bool = False,
+    ):
+        # has_proba: model có predict_proba() dùng được
+        # class_codes: model.classes_ (cột i của predict_proba <-> class_codes[i])
+        # class_names: tên cancer type tương ứng với từng cột của predict_proba
+        # proba_argmax_is_label: predict() luôn bằng class_codes[argmax(proba)]
+        self.has_proba = has_proba
+        self.class_codes = class_codes
+        self.class_names = class_names
+        self.proba_argmax_is_label = proba_argmax_is_label
+
+
+def _predict_is_proba_argmax(estimator) -> bool:
+    """
+    True nếu predict() của estimator là class có predict_proba() cao nhất
+
+    Đúng với cây và rừng (sklearn, CompiledTreeModel, TreeLookupTable). SVC thì
+    không: predict() theo vote one-vs-one, predict_proba() theo Platt scaling.
+    """
+    if isinstance(estimator, (CompiledTreeModel, TreeLookupTable)):
+        return True
+    if hasattr(estimator, "tree_"):
+        return True
+    trees = getattr(estimator, "estimators_", None)
+    return (
+        trees is not None
+        and len(trees) > 0
+        and all(hasattr(tree, "tree_") for tree in trees)
+    )
+
+
+class ModelSet:
+    """
+    Snapshot các models đang phục vụ cùng capabilities của chúng
+    
+    ModelService giữ 1 ModelSet duy nhất và thay nó bằng 1 phép gán, nên mỗi
+    request đọc snapshot 1 lần và dùng nhất quán đến hết, kể cả khi models
+    được swap giữa chừng.
+    """
+    
+    def __init__(
+        self,
+        models: Dict[str, any],
+        capabilities: Dict[str, ModelCapabilities],
+        version: Optional[str] = None,
+    ):
+        self.models = models
+        self.capabilities = capabilities
+        self.version = version
+        # Được gán khi ModelSet được kích hoạt trong ModelService
+        self.generation = 0
+        # Attributor của từng model, tạo ở lần explain đầu tiên
+        self.attributors: Dict[str, Any] = {}
+
+
+CONSENSUS_MODES = ("hard", "soft")
+
+
+class ConsensusBatch:
+    """
+    Kết quả consensus của cả batch, dạng mảng (mỗi mảng có n_samples dòng)
+    
+    - model_codes: (n_samples, n_models) mã cancer type của từng model
+    - codes, vote_counts, agreement: kết quả consensus của từng dòng
+    - confidence: hard = confidence trung bình của các vote cho class thắng
+      (NaN nếu không có), soft = probability trung bình của class thắng
+    - probabilities: (n_samples, n_classes) probability trung bình theo
+      class_codes, chỉ có với mode "soft"
+    """
+    
+    def __init__(
+        self,
+        mode: str,
+        model_names: List[str],
+        model_codes: np.ndarray,
+        codes: np.ndarray,
+        vote_counts: np.ndarray,
+        agreement: np.ndarray,
+        confidence: np.ndarray,
+        class_codes: np.ndarray,
+        probabilities: Optional[np.ndarray] = None,
+    ):
+        self.mode = mode
+        self.model_names = model_names
+        self.model_codes = model_codes
+        self.codes = codes
+        self.vote_counts = vote_counts
+        self.agreement = agreement
+        self.confidence = confidence
+        self.class_codes = class_codes
+        self.probabilities = probabilities
+    
+    def __len__(self) -> int:
+        return len(self.codes)
+    
+    def to_dicts(self, cancer_type_mapping: Dict[int, str]) -> List[Dict]:
+        """Convert sang list dict (theo từng dòng) cho API response"""
+        total_models = len(self.model_names)
+        confidences = np.round(self.confidence, 4).tolist()
+        votes = [
+            dict(zip(self.model_names, row)) for row in self.model_codes.tolist()
+        ]
+        
+        probabilities = None
+        if self.probabilities is not None:
+            class_names = [
+                cancer_type_mapping.get(code, f"Class {code}")
+                for code in self.class_codes.tolist()
+            ]
+            probabilities = [
+                dict(zip(class_names, row))
+                for row in np.round(self.probabilities, 4).tolist()
+            ]
+        
+        results = []
+        for row, (code, vote_count, agreement) in enumerate(
+            zip(self.codes.tolist(), self.vote_counts.tolist(), self.agreement.tolist())
+        ):
+            confidence = confidences[row]
+            results.append(
+                {
+                    "cancer_type_detailed": cancer_type_mapping.get(code, "Unknown"),
+                    "cancer_type_code": code,
+                    "confidence": None if confidence != confidence else confidence,
+                    "vote_count": vote_count,
+                    "total_models": total_models,
+                    "agreement": agreement,
+                    "votes": votes[row],
+                    "probabilities": probabilities[row] if probabilities else None,
+                }
+            )
+        return results
+
+
 class ModelService:
     """Service để quản lý và predict với nhiều models"""
     
@@ -55,6 +370,19 @@ class ModelService:
         self,
         models: Dict[str, any],
         cancer_type_mapping: Dict[int, str],
+        executor: Optional[Executor] = None,
+        model_timeout: Optional[float] = None,
+        model_timeout_per_row: float = 0.0,
+        derive_label_from_proba: bool = True,
+        feature_order: Optional[List[str]] = None,
+        cache: Optional[PredictionCache] = None,
+        cache_max_rows: int = 64,
+        version: Optional[str] = None,
+        compiled_models: Optional[List[str]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        table_builder: Optional[TreeTableBuilder] = None,
+        attribution_background: int = DEFAULT_BACKGROUND_SIZE,
+        scheduler: Optional[ModelScheduler] = None,
     ):
         """
         Initialize ModelService
@@ -62,9 +390,312 @@ class ModelService:
         Args:
             models: Dictionary với key là model name, value là model object
             cancer_type_mapping: Mapping từ code sang tên cancer type
+            executor: Executor dùng chung để chạy các models song song (fan-out).
+                None = chạy lần lượt từng model như cũ
+            model_timeout: Thời gian tối đa (giây) chờ mỗi model khi chạy fan-out.
+                Model quá thời gian được báo là "timeout" nhưng thread của nó
+                vẫn chạy tới hết trong executor (không dừng được). Không áp
+                dụng khi chạy tuần tự
+            model_timeout_per_row: Số giây cộng thêm vào model_timeout cho mỗi
+                dòng của batch, để batch lớn không luôn bị timeout
+            derive_label_from_proba: True = chỉ 1 lần inference cho cả label
+                và probabilities với các models mà label vẫn đúng như predict():
+                cây / rừng lấy label = class có probability cao nhất,
+                CompiledSVM lấy vote one-vs-one từ cùng decision values của
+                probability. SVC sklearn vẫn gọi predict() (argmax probability
+                khác vote của predict() ở ~1.6% input)
+            feature_order: Thứ tự cột của X. Nếu có, models được fit với
+                feature names sẽ được kiểm tra và nhận thẳng ndarray (không cần
+                DataFrame, không qua bước kiểm tra tên cột của sklearn)
+            cache: Cache kết quả theo (model name, vector feature). Được xoá
+                tự động khi models được swap
+            cache_max_rows: Batch nhiều dòng hơn không đi qua cache: 1 batch
+                lớn sẽ đẩy hết kết quả của các request 1 bệnh nhân ra khỏi
+                cache và tốn thêm 1 lần tra/ghi cache cho mỗi dòng
+            version: Phiên bản của models (ví dụ tên thư mục trong registry)
+            compiled_models: Tên các models được thay bằng compiled engine
+                (CompiledTreeModel, CompiledSVM) lúc build ModelSet. Engine được kiểm
+                tra khớp với model sklearn trước khi dùng; nếu không compile
+                được thì giữ model sklearn
+            metrics: Registry để ghi latency predict/predict_proba/consensus,
+                số dòng mỗi batch và số lần lỗi của từng model. None = không
+                ghi metrics
+            table_builder: Dựng bảng tra cứu (TreeLookupTable) cho các models
+                của table_builder.models lúc build ModelSet, sau compiled_models.
+                Bảng được kiểm tra khớp tuyệt đối với model; nếu không dựng
+                được (không phải cây, quá lớn) thì giữ model cũ
+            attribution_background: Số support vectors làm background khi
+                tính attributions của SVM (xem services/attributions.py)
+            scheduler: Chọn models chạy cho mỗi request nhiều models (circuit
+                breaker, fallback khi quá tải). Models bị bỏ qua được báo trong
+                failures với lý do "skipped: ...". None = luôn chạy tất cả
         """
-        self.models = models
         self.cancer_type_mapping = cancer_type_mapping
+        self.executor = executor
+        self.model_timeout = model_timeout
+        self.model_timeout_per_row = model_timeout_per_row
+        self.derive_label_from_proba = derive_label_from_proba
+        self.feature_order = feature_order
+        self.cache = cache
+        self.cache_max_rows = cache_max_rows
+        self.compiled_models = set(compiled_models or [])
+        self.table_builder = table_builder
+        self.attribution_background = attribution_background
+        self.scheduler = scheduler
+        self.metrics = metrics
+        if metrics is not None and cache is not None:
+            metrics.gauge(
+                "prediction_cache_hit_ratio",
+                "Tỉ lệ cache hit của prediction cache",
+                lambda: cache.stats()["hit_rate"],
+            )
+            metrics.gauge(
+                "prediction_cache_size", "Số entries trong prediction cache", cache.__len__
+            )
+        
+        # Tăng mỗi lần swap để kết quả của models cũ (đang chạy dở) không
+        # được dùng lại với models mới
+        self._generation = 0
+        self._swap_lock = threading.Lock()
+        self._active = self.build_model_set(models, version)
+    
+    @property
+    def models(self) -> Dict[str, any]:
+        """Models của ModelSet đang active"""
+        return self._active.models
+    
+    @property
+    def version(self) -> Optional[str]:
+        """Phiên bản của ModelSet đang active"""
+        return self._active.version
+    
+    @property
+    def model_set(self) -> ModelSet:
+        """Snapshot ModelSet đang active"""
+        return self._active
+    
+    def build_model_set(
+        self, models: Dict[str, any], version: Optional[str] = None
+    ) -> ModelSet:
+        """
+        Chuẩn bị ModelSet (tính capabilities) mà chưa kích hoạt
+        
+        Xác định capability của từng model 1 lần lúc load, không scan
+        Pipeline steps mỗi lần predict. LazyModel được xác định khi load ở
+        lần dùng đầu tiên (và không được compile).
+        """
+        models = {
+            model_name: (
+                self._compile_model(model_name, model)
+                if model_name in self.compiled_models
+                and not isinstance(model, LazyModel)
+                and not is_compiled(model)
+                else model
+            )
+            for model_name, model in models.items()
+        }
+        if self.table_builder is not None:
+            models = {
+                model_name: (
+                    self._build_lookup_table(model_name, model)
+                    if model_name in self.table_builder.models
+                    and not isinstance(model, (LazyModel, TreeLookupTable))
+                    else model
+                )
+                for model_name, model in models.items()
+            }
+        capabilities = {
+            model_name: self._inspect_model(model)
+            for model_name, model in models.items()
+            if not isinstance(model, LazyModel)
+        }
+        return ModelSet(models, capabilities, version)
+    
+    def swap_model_set(self, model_set: ModelSet) -> ModelSet:
+        """
+        Kích hoạt ModelSet mới bằng 1 phép gán (atomic)
+        
+        Request đang chạy tiếp tục với snapshot cũ; request mới dùng snapshot
+        mới. Prediction cache và trạng thái của scheduler bị xoá.
+        
+        Returns:
+            ModelSet trước đó (dùng để rollback)
+        """
+        with self._swap_lock:
+            self._generation += 1
+            model_set.generation = self._generation
+            previous, self._active = self._active, model_set
+        if self.cache is not None:
+            self.cache.clear()
+        if self.scheduler is not None:
+            # Tình trạng của models cũ không áp dụng cho models mới
+            self.scheduler.reset()
+        return previous
+    
+    def reload_models(
+        self, models: Dict[str, any], version: Optional[str] = None
+    ) -> ModelSet:
+        """
+        Thay toàn bộ models (ví dụ sau khi load lại artifacts từ disk)
+        
+        Capabilities được tính lại và prediction cache bị xoá.
+        
+        Returns:
+            ModelSet trước đó
+        """
+        return self.swap_model_set(self.build_model_set(models, version))
+
+    def warm_up(
+        self, model_set: ModelSet, X: Union[pd.DataFrame, np.ndarray]
+    ) -> Dict[str, str]:
+        """
+        Chạy thử mọi model của 1 ModelSet (chưa kích hoạt) trên input mẫu
+
+        Không đi qua prediction cache. Dùng trước swap_model_set() để model
+        mới đã sẵn sàng (và không lỗi) trước khi nhận request thật.
+
+        Returns:
+            Mapping model name -> lỗi, rỗng nếu mọi model chạy được
+        """
+        failures = {}
+        for model_name in model_set.models:
+            try:
+                self._predict_batch_uncached(model_set, model_name, X)
+            except Exception as e:
+                failures[model_name] = f"error: {e}"
+        return failures
+
+    def cache_stats(self) -> Optional[Dict]:
+        """Số liệu prediction cache, None nếu không bật cache"""
+        return self.cache.stats() if self.cache is not None else None
+    
+    def scheduler_stats(self) -> Optional[Dict]:
+        """Trạng thái circuit breakers và fallback, None nếu không có scheduler"""
+        return self.scheduler.stats() if self.scheduler is not None else None
+    
+    def _compile_model(self, model_name: str, model):
+        """
+        Thay model sklearn bằng compiled engine đã được kiểm tra
+
+        Returns:
+            Compiled model, hoặc chính model nếu không compile được
+        """
+        if self.feature_order is not None:
+            # Model gốc vẫn được dùng để kiểm tra (và cho batch lớn) với ndarray
+            align_feature_names(model, self.feature_order)
+        
+        try:
+            # SVC (linear/RBF) -> CompiledSVM, DecisionTree/RandomForest -> CompiledTreeModel
+            compiled = compile_model(model)
+            checked = compiled.verify(model)
+        except Exception as e:
+            print(f"❌ Could not compile {model_name}, using sklearn model: {e}")
+            return model
+        
+        print(
+            f"✅ {model_name} compiled ({compiled.info()['engine']}, verified on "
+            f"{checked['rows']} rows, max diff {checked['max_abs_diff']:.2g})"
+        )
+        return compiled
+    
+    def _build_lookup_table(self, model_name: str, model):
+        """
+        Thay model cây bằng bảng tra cứu đã được kiểm tra
+
+        Returns:
+            TreeLookupTable, hoặc chính model nếu không dựng được bảng
+        """
+        if self.feature_order is not None and not is_compiled(model):
+            align_feature_names(model, self.feature_order)
+        
+        try:
+            table, checked = self.table_builder.build(model)
+        except Exception as e:
+            print(f"❌ Could not build lookup table for {model_name}, keeping model: {e}")
+            return model
+        
+        info = table.info()
+        print(
+            f"✅ {model_name} lookup table built ({info['cells']:,} cells, "
+            f"{info['table_bytes'] / 2**20:.1f} MiB, {info['build_seconds']:.2f}s, "
+            f"verified on all cells + {checked['rows']} rows in "
+            f"{checked['verify_seconds']:.2f}s, max diff {checked['max_abs_diff']:.2g})"
+        )
+        return table
+    
+    def _inspect_model(self, model) -> ModelCapabilities:
+        """
+        Xác định model có predict_proba() không và thứ tự classes_ của nó
+        
+        Nếu có feature_order, model cũng được chuẩn bị để predict trực tiếp
+        trên ndarray (xem align_feature_names()).
+        
+        Với Pipeline (SVM = scaler + svc), predict_proba() phụ thuộc vào final
+        estimator, ví dụ SVC chỉ có predict_proba() khi probability=True.
+        """
+        if self.feature_order is not None:
+            align_feature_names(model, self.feature_order)
+        
+        estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+        has_proba = hasattr(model, "predict_proba") and hasattr(
+            estimator, "predict_proba"
+        )
+        
+        proba_argmax_is_label = has_proba and _predict_is_proba_argmax(estimator)
+        
+        classes = getattr(model, "classes_", None)
+        if classes is None:
+            classes = getattr(estimator, "classes_", None)
+        if classes is None:
+            return ModelCapabilities(has_proba=has_proba)
+        
+        try:
+            class_codes = np.asarray(classes).astype(int)
+        except (TypeError, ValueError):
+            # classes_ không phải mã số -> không derive được cancer type code
+            return ModelCapabilities(has_proba=has_proba)
+        
+        return ModelCapabilities(
+            has_proba=has_proba,
+            class_codes=class_codes,
+            class_names=[
+                self.cancer_type_mapping.get(code, f"Class {code}")
+                for code in class_codes.tolist()
+            ],
+            proba_argmax_is_label=proba_argmax_is_label,
+        )
+    
+    def get_capabilities(
+        self, model_name: str, model_set: Optional[ModelSet] = None
+    ) -> ModelCapabilities:
+        """Capability của model (đã tính lúc build ModelSet)"""
+        model_set = model_set or self._active
+        capabilities = model_set.capabilities.get(model_name)
+        if capabilities is None:
+            # LazyModel vừa được load, hoặc model được thêm vào sau
+            capabilities = self._inspect_model(self.get_model(model_name, model_set))
+            model_set.capabilities[model_name] = capabilities
+        return capabilities
+    
+    def get_model(self, model_name: str, model_set: Optional[ModelSet] = None):
+        """
+        Model object theo tên, load LazyModel nếu chưa được load
+        
+        Raises:
+            KeyError: Nếu model_name không tồn tại
+        """
+        models = (model_set or self._active).models
+        model = models[model_name]
+        if isinstance(model, LazyModel):
+            model = model.load()
+            # Thay placeholder bằng model thật trong đúng snapshot đang dùng
+            models[model_name] = model
+        return model
+    
+    def is_loaded(self, model_name: str) -> bool:
+        """False nếu model là LazyModel chưa được load"""
+        model = self.models[model_name]
+        return not isinstance(model, LazyModel) or model.loaded
     
     def predict_with_model(
         self,
@@ -85,80 +716,350 @@ class ModelService:
             ValueError: Nếu model_name không tồn tại
             RuntimeError: Nếu prediction fail
         """
-        if model_name not in self.models:
+        return self.predict_batch_with_model(model_name, X)[0]
+    
+    def predict_batch_with_model(
+        self,
+        model_name: str,
+        X: Union[pd.DataFrame, np.ndarray],
+    ) -> Sequence[ModelPredictionResult]:
+        """
+        Predict cả batch với 1 model cụ thể
+        
+        Chỉ gọi model.predict() và model.predict_proba() đúng 1 lần cho
+        toàn bộ batch thay vì 1 lần cho mỗi dòng.
+        
+        Args:
+            model_name: Tên model (key trong self.models)
+            X: Input data đã được encode, shape (n_samples, n_features)
+        
+        Returns:
+            Các ModelPredictionResult theo từng dòng của X (list, hoặc
+            BatchPredictionResult khi không có cache hoặc batch lớn hơn
+            cache_max_rows)
+        
+        Raises:
+            ValueError: Nếu model_name không tồn tại
+            RuntimeError: Nếu prediction fail
+        """
+        return self._predict_batch(self._active, model_name, X)
+    
+    def _predict_batch(
+        self,
+        model_set: ModelSet,
+        model_name: str,
+        X: Union[pd.DataFrame, np.ndarray],
+    ) -> Sequence[ModelPredictionResult]:
+        """predict_batch_with_model() trên 1 snapshot ModelSet cố định"""
+        if model_name not in model_set.models:
             raise ValueError(f"Model '{model_name}' not found")
         
-        model = self.models[model_name]
+        if self.cache is None or len(X) > self.cache_max_rows:
+            return self._predict_batch_uncached(model_set, model_name, X)
+        
+        # Key = (generation, model name, bytes của vector feature)
+        generation = model_set.generation
+        rows = np.ascontiguousarray(X, dtype=np.float64)
+        keys = [(generation, model_name, row.tobytes()) for row in rows]
+        
+        results: List[Optional[ModelPredictionResult]] = [
+            self.cache.get(key) for key in keys
+        ]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+        
+        # Chỉ predict các dòng chưa có trong cache (vẫn 1 lần gọi model)
+        X_miss = X.iloc[misses] if hasattr(X, "iloc") else X[misses]
+        for i, result in zip(
+            misses, self._predict_batch_uncached(model_set, model_name, X_miss)
+        ):
+            results[i] = result
+            self.cache.put(keys[i], result)
+        
+        return results
+    
+    def _predict_batch_uncached(
+        self,
+        model_set: ModelSet,
+        model_name: str,
+        X: Union[pd.DataFrame, np.ndarray],
+    ) -> BatchPredictionResult:
+        """predict_batch_with_model() không qua cache"""
+        codes, proba, class_names = self.predict_arrays(model_name, X, model_set)
+        return BatchPredictionResult(
+            model_name, codes, proba, class_names, self.cancer_type_mapping
+        )
+    
+    def predict_batch_columnar(
+        self,
+        model_name: str,
+        X: Union[pd.DataFrame, np.ndarray],
+    ) -> BatchPredictionResult:
+        """
+        Predict cả batch với 1 model, kết quả dạng cột (không qua cache)
+        
+        Dùng cho batch lớn / scoring hàng loạt: không tạo object cho từng
+        dòng trừ khi được truy cập.
+        
+        Raises:
+            ValueError: Nếu model_name không tồn tại
+            RuntimeError: Nếu prediction fail
+        """
+        model_set = self._active
+        if model_name not in model_set.models:
+            raise ValueError(f"Model '{model_name}' not found")
+        return self._predict_batch_uncached(model_set, model_name, X)
+    
+    def predict_arrays(
+        self,
+        model_name: str,
+        X: Union[pd.DataFrame, np.ndarray],
+        model_set: Optional[ModelSet] = None,
+    ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[List[str]]]:
+        """
+        Predict 1 model dưới dạng mảng (không tạo object cho từng dòng)
+        
+        Dùng cho scoring số lượng lớn; không đi qua prediction cache.
         
+        Returns:
+            Tuple (codes, proba, class_names):
+            - codes: Mã cancer type, shape (n_samples,)
+            - proba: Probabilities (n_samples, n_classes), None nếu model
+              không có predict_proba()
+            - class_names: Tên cancer type của từng cột proba
+        
+        Raises:
+            RuntimeError: Nếu model predict lỗi
+        """
+        model_set = model_set or self._active
         try:
-            # Predict
-            prediction = model.predict(X)[0]
-            prediction_code = int(prediction)
-            
-            # Get cancer type name
-            cancer_type_detailed = self.cancer_type_mapping.get(
-                prediction_code, "Unknown"
-            )
+            model = self.get_model(model_name, model_set)
+            capabilities = self.get_capabilities(model_name, model_set)
             
             # Get probabilities if available
             # Confidence và Probabilities dựa vào predict_proba() của model
-            confidence = None
-            probabilities = None
+            self._observe_rows(model_name, len(X))
             
-            # Xử lý Pipeline (SVM model thường là Pipeline với scaler + svc)
-            if hasattr(model, "named_steps"):
-                # Đây là Pipeline, kiểm tra final estimator
-                final_estimator = None
-                # Tìm SVC trong pipeline
-                for step_name, step_obj in model.named_steps.items():
-                    if hasattr(step_obj, "predict_proba"):
-                        final_estimator = step_obj
-                        break
-                
-                if final_estimator is not None:
-                    try:
-                        proba = model.predict_proba(X)[0]
-                        confidence = float(np.max(proba))
-                        probabilities = {
-                            self.cancer_type_mapping.get(i, f"Class {i}"): float(prob)
-                            for i, prob in enumerate(proba)
-                        }
-                    except Exception as e:
-                        print(f"Warning: Could not get probability for {model_name} (Pipeline): {e}")
-            elif hasattr(model, "predict_proba"):
-                # Model thuần (không phải Pipeline), ví dụ Random Forest
-                try:
-                    # predict_proba() trả về array probabilities cho tất cả classes
-                    # Ví dụ: [0.1, 0.85, 0.03, 0.01, 0.01] cho 5 classes
-                    proba = model.predict_proba(X)[0]
-                    
-                    # Confidence = probability cao nhất (của class được predict)
-                    # Đây là độ tin cậy của model về prediction của nó
-                    # Ví dụ: nếu predict class 1 với proba = 0.85 -> confidence = 0.85 (85%)
-                    confidence = float(np.max(proba))
-                    
-                    # Probabilities = dict chứa probability của TẤT CẢ classes
-                    # Giúp user thấy model nghĩ gì về từng loại ung thư
-                    probabilities = {
-                        self.cancer_type_mapping.get(i, f"Class {i}"): float(prob)
-                        for i, prob in enumerate(proba)
-                    }
-                except Exception as e:
-                    print(f"Warning: Could not get probability for {model_name}: {e}")
+            proba = None
+            codes = None
+            if capabilities.has_proba:
+                started = time.perf_counter()
+                if self.derive_label_from_proba and isinstance(model, CompiledSVM):
+                    # Vote one-vs-one của predict() và probability từ cùng 1 lần
+                    # tính decision values
+                    codes, proba = self._predict_with_proba(model_name, model, X)
+                else:
+                    proba = self._predict_proba(model_name, model, X)
+                self._observe_stage(model_name, "predict_proba", started)
             
-            return ModelPredictionResult(
-                model_name=model_name,
-                cancer_type_code=prediction_code,
-                cancer_type_detailed=cancer_type_detailed,
-                confidence=confidence,
-                probabilities=probabilities,
-            )
+            if codes is not None:
+                codes = np.asarray(codes).astype(int)
+            elif (
+                proba is not None
+                and self.derive_label_from_proba
+                and capabilities.proba_argmax_is_label
+                and capabilities.class_codes is not None
+            ):
+                # Fast path: cột i của predict_proba ứng với classes_[i],
+                # label = class có probability cao nhất -> không cần predict()
+                codes = capabilities.class_codes[proba.argmax(axis=1)]
+            else:
+                started = time.perf_counter()
+                codes = np.asarray(model.predict(X)).astype(int)
+                self._observe_stage(model_name, "predict", started)
+            
+            class_names = None
+            if proba is not None:
+                class_names = capabilities.class_names or [
+                    self.cancer_type_mapping.get(i, f"Class {i}")
+                    for i in range(proba.shape[1])
+                ]
+            
+            return codes, proba, class_names
         
         except Exception as e:
+            self._count_error(model_name, "error")
             raise RuntimeError(
                 f"Prediction failed for model '{model_name}': {str(e)}"
             )
     
+    def explain_batch(
+        self, X: Union[pd.DataFrame, np.ndarray]
+    ) -> Tuple[Dict[str, BatchAttributions], Dict[str, str]]:
+        """
+        Predict cả batch với tất cả models, kèm đóng góp của từng feature vào
+        probability của class được predict (không qua cache)
+        
+        Returns:
+            Tuple (explanations, failures):
+            - explanations: Dict model name -> BatchAttributions. Model
+              không tính được attributions vẫn có prediction, lý do nằm
+              trong BatchAttributions.error
+            - failures: Dict model name -> lý do (lỗi predict hoặc timeout)
+        """
+        return self._run_all_models(X, self._explain_batch, prediction=False)
+    
+    def get_attributor(self, model_name: str, model_set: Optional[ModelSet] = None):
+        """
+        Attributor của model (tạo 1 lần cho mỗi ModelSet)
+        
+        Raises:
+            ValueError: Nếu model không hỗ trợ attributions
+        """
+        model_set = model_set or self._active
+        attributor = model_set.attributors.get(model_name)
+        if attributor is None:
+            attributor = build_attributor(
+                self.get_model(model_name, model_set), self.attribution_background
+            )
+            model_set.attributors[model_name] = attributor
+        return attributor
+    
+    def _explain_batch(
+        self,
+        model_set: ModelSet,
+        model_name: str,
+        X: Union[pd.DataFrame, np.ndarray],
+    ) -> BatchAttributions:
+        """Prediction và attributions của 1 model (predict_fn của _run_all_models)"""
+        # Kết quả predict được ghi cho scheduler như /predict-all; lỗi của
+        # attributions (sau đó) không phản ánh tình trạng model
+        started = time.perf_counter()
+        try:
+            prediction = self._predict_batch_uncached(model_set, model_name, X)
+        except Exception:
+            self._record_outcome(model_name, False)
+            raise
+        self._record_outcome(model_name, True, len(prediction), time.perf_counter() - started)
+        
+        if prediction.probabilities is None:
+            return BatchAttributions.failed(
+                prediction, f"Model '{model_name}' has no predict_proba()"
+            )
+        
+        # Lỗi của attributions không làm mất prediction của model
+        try:
+            attributor = self.get_attributor(model_name, model_set)
+            # Cột của class được predict trong predict_proba
+            class_codes = self.get_capabilities(model_name, model_set).class_codes
+            if class_codes is None:
+                columns = prediction.codes
+            else:
+                columns = np.argmax(class_codes[None, :] == prediction.codes[:, None], axis=1)
+            
+            started = time.perf_counter()
+            base_values, contributions = predicted_class_attributions(
+                attributor, np.asarray(X, dtype=np.float64), columns
+            )
+            self._observe_stage(model_name, "attributions", started)
+        except Exception as e:
+            print(f"Error computing attributions with {model_name}: {e}")
+            self._count_error(model_name, "attributions")
+            return BatchAttributions.failed(prediction, f"error: {e}")
+        
+        feature_names = self.feature_order or [
+            f"feature_{i}" for i in range(contributions.shape[1])
+        ]
+        return BatchAttributions(
+            prediction, attributor.method, feature_names, base_values, contributions
+        )
+    
+    def _predict_consensus_inputs(
+        self,
+        model_set: ModelSet,
+        model_name: str,
+        X: Union[pd.DataFrame, np.ndarray],
+    ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        predict_arrays() cho consensus (thứ tự tham số của _run_all_models())
+        
+        Returns:
+            Tuple (codes, proba, class_codes): class_codes là mã class của
+            từng cột trong proba (None nếu model không có predict_proba)
+        """
+        codes, proba, _ = self.predict_arrays(model_name, X, model_set)
+        class_codes = None
+        if proba is not None:
+            class_codes = self.get_capabilities(model_name, model_set).class_codes
+            if class_codes is None:
+                class_codes = np.arange(proba.shape[1])
+        return codes, proba, class_codes
+    
+    def _observe_stage(self, model_name: str, stage: str, started: float) -> None:
+        """Ghi latency 1 stage (predict / predict_proba) của model"""
+        if self.metrics is not None:
+            self.metrics.histogram(
+                "model_stage_seconds",
+                "Latency mỗi lần gọi model theo stage",
+                model=model_name,
+                stage=stage,
+            ).observe(time.perf_counter() - started)
+    
+    def _observe_rows(self, model_name: str, n_rows: int) -> None:
+        if self.metrics is not None:
+            self.metrics.histogram(
+                "model_batch_rows",
+                "Số dòng mỗi lần gọi model",
+                ROW_COUNT_BUCKETS,
+                model=model_name,
+            ).observe(n_rows)
+    
+    def _count_error(self, model_name: str, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.counter(
+                "model_errors",
+                "Số lần model lỗi (error, timeout, predict_proba, attributions)",
+                model=model_name,
+                reason=reason,
+            ).inc()
+    
+    def _predict_with_proba(
+        self,
+        model_name: str,
+        model: CompiledSVM,
+        X: Union[pd.DataFrame, np.ndarray],
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Label (vote one-vs-one) và probabilities của CompiledSVM trong 1 lần tính
+
+        Returns:
+            Tuple (labels, proba), (None, None) nếu bị lỗi (label được lấy
+            lại bằng predict())
+        """
+        try:
+            labels, proba = model.predict_with_proba(X)
+            return labels, np.asarray(proba, dtype=float)
+        except Exception as e:
+            print(f"Warning: Could not get probability for {model_name}: {e}")
+            self._count_error(model_name, "predict_proba")
+        
+        return None, None
+    
+    def _predict_proba(
+        self,
+        model_name: str,
+        model,
+        X: Union[pd.DataFrame, np.ndarray],
+    ) -> Optional[np.ndarray]:
+        """
+        Lấy ma trận probabilities (n_samples, n_classes)
+        
+        Chỉ được gọi với model có capability has_proba.
+        
+        Returns:
+            np.ndarray hoặc None nếu predict_proba() bị lỗi
+        """
+        try:
+            # predict_proba() trả về array probabilities cho tất cả classes
+            # Ví dụ: [0.1, 0.85, 0.03, 0.01, 0.01] cho 5 classes
+            return np.asarray(model.predict_proba(X), dtype=float)
+        except Exception as e:
+            print(f"Warning: Could not get probability for {model_name}: {e}")
+            self._count_error(model_name, "predict_proba")
+        
+        return None
+    
     def predict_all(self, X: pd.DataFrame) -> List[ModelPredictionResult]:
         """
         Predict với tất cả models
@@ -169,30 +1070,216 @@ class ModelService:
         Returns:
             List of ModelPredictionResult
         """
-        results = []
+        return self.predict_all_with_status(X)[0]
+    
+    def predict_all_with_status(
+        self, X: pd.DataFrame
+    ) -> Tuple[List[ModelPredictionResult], Dict[str, str]]:
+        """
+        Predict với tất cả models, kèm danh sách models bị lỗi
         
-        for model_name in self.models.keys():
+        Args:
+            X: Input data đã được encode
+        
+        Returns:
+            Tuple (results, failures):
+            - results: List of ModelPredictionResult của các model thành công
+            - failures: Dict model name -> lý do ("timeout", "error: ..." hoặc
+              "skipped: ..." nếu scheduler bỏ qua model)
+        """
+        outputs, failures = self._run_all_models(X)
+        return [batch_results[0] for batch_results in outputs.values()], failures
+    
+    def predict_all_batch(
+        self, X: Union[pd.DataFrame, np.ndarray]
+    ) -> List[List[ModelPredictionResult]]:
+        """
+        Predict cả batch với tất cả models
+        
+        Mỗi model chỉ được gọi 1 lần cho toàn bộ batch.
+        
+        Args:
+            X: Input data đã được encode, shape (n_samples, n_features)
+        
+        Returns:
+            List (theo từng dòng) các list ModelPredictionResult
+        """
+        return self.predict_all_batch_with_status(X)[0]
+    
+    def predict_all_batch_with_status(
+        self, X: Union[pd.DataFrame, np.ndarray]
+    ) -> Tuple[List[List[ModelPredictionResult]], Dict[str, str]]:
+        """
+        Predict cả batch với tất cả models, kèm danh sách models bị lỗi
+        
+        Returns:
+            Tuple (rows, failures), xem predict_all_batch() và
+            predict_all_with_status()
+        """
+        outputs, failures = self._run_all_models(X)
+        
+        rows: List[List[ModelPredictionResult]] = [[] for _ in range(len(X))]
+        for batch_results in outputs.values():
+            for row_results, result in zip(rows, batch_results):
+                row_results.append(result)
+        
+        return rows, failures
+    
+    def predict_all_batch_columnar(
+        self, X: Union[pd.DataFrame, np.ndarray]
+    ) -> Tuple[Dict[str, BatchPredictionResult], Dict[str, str]]:
+        """
+        Predict cả batch với tất cả models, kết quả dạng cột (không qua cache)
+        
+        Returns:
+            Tuple (batches, failures):
+            - batches: Dict model name -> BatchPredictionResult
+            - failures: Dict model name -> lý do ("timeout" hoặc "error: ...")
+        """
+        return self._run_all_models(X, self._predict_batch_uncached)
+    
+    def _run_all_models(
+        self,
+        X: Union[pd.DataFrame, np.ndarray],
+        predict_fn=None,
+        prediction: bool = True,
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Predict cả batch X với tất cả models của snapshot đang active
+        
+        Nếu có executor thì các models chạy song song, mỗi model có tối đa
+        _model_timeout(len(X)) giây; ngược lại chạy lần lượt. Model lỗi hoặc timeout
+        không làm hỏng kết quả của các model khác. Nếu có scheduler, models
+        bị ngắt (circuit breaker) hoặc bị bỏ khi quá tải không được chạy và
+        được báo trong failures ("skipped: ..."); nếu tất cả models đều bị
+        ngắt thì raise ModelsUnavailableError.
+        
+        Args:
+            X: Input data đã được encode
+            predict_fn: predict_fn(model_set, model_name, X) cho từng model,
+                mặc định _predict_batch (list ModelPredictionResult, có cache)
+            prediction: False = predict_fn làm thêm việc ngoài predict (ví dụ
+                attributions): kết quả và latency của cả lần gọi không được
+                tính vào tình trạng model của scheduler, predict_fn tự ghi
+                kết quả của phần predict
+        
+        Returns:
+            Tuple (outputs, failures), outputs giữ thứ tự của self.models
+        """
+        predict_fn = predict_fn or self._predict_batch
+        model_set = self._active
+        outputs: Dict[str, Any] = {}
+        failures: Dict[str, str] = {}
+        model_names = list(model_set.models.keys())
+        n_rows = len(X)
+        if self.scheduler is not None:
+            model_names, failures, retry_after = self.scheduler.select(
+                model_names, n_rows, parallel=self.executor is not None
+            )
+            if retry_after is not None:
+                raise ModelsUnavailableError(retry_after, failures)
+        
+        if self.executor is None:
+            for model_name in model_names:
+                started = time.perf_counter()
+                try:
+                    outputs[model_name] = predict_fn(model_set, model_name, X)
+                except Exception as e:
+                    print(f"Error predicting with {model_name}: {e}")
+                    # Continue with other models even if one fails
+                    failures[model_name] = f"error: {e}"
+                    self._record_outcome(model_name, False if prediction else None)
+                    continue
+                self._record_outcome(
+                    model_name,
+                    True if prediction else None,
+                    n_rows,
+                    time.perf_counter() - started,
+                    prediction,
+                )
+            return outputs, failures
+        
+        # Fan-out: submit tất cả models cùng lúc, tổng latency ~ model chậm nhất
+        futures = {
+            model_name: self.executor.submit(
+                self._timed_call, predict_fn, model_set, model_name, X
+            )
+            for model_name in model_names
+        }
+        timeout = self._model_timeout(n_rows)
+        _, not_done = wait(futures.values(), timeout=timeout)
+        
+        for model_name, future in futures.items():
+            if future in not_done:
+                # Không thể dừng thread đang chạy, chỉ bỏ qua kết quả của nó
+                # (thread vẫn giữ 1 worker của executor tới khi chạy xong)
+                future.cancel()
+                print(f"Timeout predicting with {model_name} after {timeout:g}s")
+                self._count_error(model_name, "timeout")
+                failures[model_name] = "timeout"
+                self._record_outcome(
+                    model_name,
+                    False if prediction else None,
+                    n_rows,
+                    timeout,
+                    prediction,
+                    timeout=timeout,
+                )
+                continue
             try:
-                result = self.predict_with_model(model_name, X)
-                results.append(result)
+                outputs[model_name], seconds = future.result()
             except Exception as e:
                 print(f"Error predicting with {model_name}: {e}")
                 # Continue with other models even if one fails
+                failures[model_name] = f"error: {e}"
+                self._record_outcome(model_name, False if prediction else None)
                 continue
+            self._record_outcome(
+                model_name, True if prediction else None, n_rows, seconds, prediction
+            )
         
-        return results
+        return outputs, failures
+    
+    def _model_timeout(self, n_rows: int) -> Optional[float]:
+        """Thời gian tối đa (giây) chờ mỗi model cho batch n_rows dòng"""
+        if self.model_timeout is None:
+            return None
+        return self.model_timeout + self.model_timeout_per_row * n_rows
+    
+    @staticmethod
+    def _timed_call(predict_fn, model_set: ModelSet, model_name: str, X) -> Tuple[Any, float]:
+        """predict_fn kèm latency (giây), đo trong thread chạy model"""
+        started = time.perf_counter()
+        output = predict_fn(model_set, model_name, X)
+        return output, time.perf_counter() - started
+    
+    def _record_outcome(
+        self,
+        model_name: str,
+        ok: Optional[bool],
+        n_rows: int = 0,
+        seconds: Optional[float] = None,
+        prediction: bool = True,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Ghi kết quả 1 lần gọi model cho scheduler (nếu có)"""
+        if self.scheduler is not None:
+            self.scheduler.record(
+                model_name, ok, n_rows, seconds if prediction else None, timeout
+            )
     
     def calculate_consensus(
         self,
         predictions: List[ModelPredictionResult],
     ) -> Dict:
         """
-        Tính consensus từ nhiều predictions
+        Tính consensus từ nhiều predictions của 1 bệnh nhân
         
-        Logic:
+        Logic (như calculate_consensus_arrays() với mode "hard", nhưng lặp
+        trên dict: với vài models nhanh hơn nhiều so với dựng các mảng NumPy):
         1. Mỗi model "vote" cho 1 cancer type (dựa vào prediction của nó)
         2. Consensus = cancer type được vote nhiều nhất
-        3. Nếu có tie (cùng số vote), chọn model có confidence cao hơn
+        3. Nếu có tie (cùng số vote), chọn class có confidence trung bình cao hơn
         4. Agreement = True nếu TẤT CẢ models đều vote cùng 1 type
         
         Ví dụ:
@@ -277,4 +1364,153 @@ class ModelService:
             "vote_count": vote_count,
             "total_models": total_models,
         }
-
+    
+    def calculate_consensus_arrays(
+        self,
+        model_names: List[str],
+        codes: List[np.ndarray],
+        confidences: List[Optional[np.ndarray]],
+        probas: Optional[List[Optional[np.ndarray]]] = None,
+        class_codes: Optional[List[Optional[np.ndarray]]] = None,
+        mode: str = "hard",
+    ) -> "ConsensusBatch":
+        """
+        Consensus cho cả batch trên các mảng kết quả của từng model
+        
+        Chỉ lặp theo models (không lặp theo từng dòng).
+        
+        - hard: class được vote nhiều nhất; tie -> class có confidence trung
+          bình cao hơn (0.5 nếu các vote không có confidence); vẫn bằng nhau
+          -> class được model đứng trước vote
+        - soft: class có probability trung bình (qua các models) cao nhất;
+          model không có probabilities đóng góp 1.0 cho class nó predict
+        
+        Args:
+            model_names: Tên models, theo thứ tự các mảng bên dưới
+            codes: Mã cancer type của từng model, mỗi phần tử shape (n_samples,)
+            confidences: Confidence của từng model (None nếu model không có)
+            probas: Probabilities của từng model (n_samples, n_classes_m), cần
+                cho mode "soft"
+            class_codes: Mã class của từng cột trong probas
+            mode: "hard" hoặc "soft"
+        
+        Returns:
+            ConsensusBatch
+        """
+        if mode not in CONSENSUS_MODES:
+            raise ValueError(
+                f"Unknown consensus mode '{mode}', expected one of {CONSENSUS_MODES}"
+            )
+        started = time.perf_counter()
+        n_models = len(codes)
+        probas = probas or [None] * n_models
+        class_codes = class_codes or [None] * n_models
+        
+        model_codes = np.column_stack(codes).astype(int)
+        n_samples = len(model_codes)
+        rows = np.arange(n_samples)
+        
+        # Tất cả class xuất hiện (cột k <-> all_codes[k])
+        all_codes = np.unique(
+            np.concatenate(
+                [model_codes.ravel()]
+                + [np.asarray(cc, dtype=int) for cc in class_codes if cc is not None]
+            )
+        )
+        if len(all_codes) == 0:
+            # Batch rỗng: 1 class giả để các phép max/argmax theo class hợp lệ
+            all_codes = np.array([-1])
+        n_classes = len(all_codes)
+        model_cols = np.searchsorted(all_codes, model_codes)
+        
+        votes = np.zeros((n_samples, n_classes), dtype=int)
+        conf_sum = np.zeros((n_samples, n_classes))
+        conf_count = np.zeros((n_samples, n_classes), dtype=int)
+        # Model đầu tiên vote cho từng class (n_models = không có)
+        first_vote = np.full((n_samples, n_classes), n_models)
+        for m in reversed(range(n_models)):
+            cols = model_cols[:, m]
+            votes[rows, cols] += 1
+            first_vote[rows, cols] = m
+            if confidences[m] is not None:
+                conf = np.asarray(confidences[m], dtype=float)
+                conf_sum[rows, cols] += conf
+                conf_count[rows, cols] += 1
+        
+        probabilities = None
+        if mode == "soft":
+            probabilities = np.zeros((n_samples, n_classes))
+            for m in range(n_models):
+                if probas[m] is not None and class_codes[m] is not None:
+                    cols = np.searchsorted(all_codes, np.asarray(class_codes[m], dtype=int))
+                    probabilities[:, cols] += probas[m]
+                else:
+                    probabilities[rows, model_cols[:, m]] += 1.0
+            probabilities /= n_models
+            
+            winner = probabilities.argmax(axis=1)
+            confidence = probabilities[rows, winner]
+        else:
+            mean_conf = np.divide(
+                conf_sum,
+                conf_count,
+                out=np.full((n_samples, n_classes), 0.5),
+                where=conf_count > 0,
+            )
+            # Chỉ xét các class có nhiều vote nhất, rồi confidence cao nhất
+            score = np.where(
+                votes == votes.max(axis=1, keepdims=True), mean_conf, -np.inf
+            )
+            best = score == score.max(axis=1, keepdims=True)
+            winner = np.where(best, first_vote, n_models + 1).argmin(axis=1)
+            confidence = np.where(
+                conf_count[rows, winner] > 0, mean_conf[rows, winner], np.nan
+            )
+        
+        vote_counts = votes[rows, winner]
+        if self.metrics is not None:
+            self.metrics.histogram(
+                "consensus_seconds", "Thời gian tính consensus cho 1 batch", mode=mode
+            ).observe(time.perf_counter() - started)
+        return ConsensusBatch(
+            mode=mode,
+            model_names=list(model_names),
+            model_codes=model_codes,
+            codes=all_codes[winner],
+            vote_counts=vote_counts,
+            agreement=vote_counts == n_models,
+            confidence=confidence,
+            class_codes=all_codes,
+            probabilities=probabilities,
+        )
+    
+    def predict_consensus_batch(
+        self, X: Union[pd.DataFrame, np.ndarray], mode: str = "hard"
+    ) -> Tuple[Optional["ConsensusBatch"], Dict[str, str]]:
+        """
+        Predict cả batch với tất cả models và tính consensus (vectorize)
+        
+        Không đi qua prediction cache: kết quả của từng model được giữ ở dạng
+        mảng từ predict_arrays() đến consensus.
+        
+        Returns:
+            Tuple (consensus, failures): consensus là None nếu không model nào
+            predict thành công; failures như predict_all_with_status()
+        """
+        outputs, failures = self._run_all_models(X, self._predict_consensus_inputs)
+        if not outputs:
+            return None, failures
+        
+        model_names = list(outputs)
+        codes, confidences, probas, class_codes = [], [], [], []
+        for model_name in model_names:
+            model_codes, proba, model_class_codes = outputs[model_name]
+            codes.append(model_codes)
+            probas.append(proba)
+            confidences.append(proba.max(axis=1) if proba is not None else None)
+            class_codes.append(model_class_codes)
+        
+        consensus = self.calculate_consensus_arrays(
+            model_names, codes, confidences, probas, class_codes, mode
+        )
+        return consensus, failures
@@ -0,0 +1,185 @@
+"""
+Portable Models
+===============
+
+Định dạng models gọn, chỉ cần NumPy để load và predict (không cần
+scikit-learn, joblib hay pandas lúc serve), để worker khởi động nhanh và
+image nhỏ hơn.
+
+Mỗi model được compile thành CompiledTreeModel / CompiledSVM, kiểm tra khớp
+với model sklearn gốc rồi lưu thành 1 file .npz gồm các mảng của engine và
+metadata JSON (key "__metadata__"). Thư mục export có thêm manifest.json:
+phiên bản định dạng, thứ tự features, mapping class và danh sách file.
+
+    model_portable/
+    ├── manifest.json
+    ├── svm.npz
+    ├── best_model_random_forest.npz
+    └── decision_tree_best.npz
+
+File .npz được đọc với allow_pickle=False, nên load không chạy code tùy ý
+như unpickle.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .compiled_svm import CompiledSVM, compile_svm_model
+from .compiled_trees import CompiledTreeModel, compile_tree_model
+from .tree_table import TreeLookupTable
+
+PORTABLE_FORMAT_VERSION = 1
+PORTABLE_EXTENSION = ".npz"
+MANIFEST_FILE = "manifest.json"
+METADATA_KEY = "__metadata__"
+ENGINES = {
+    "compiled_trees": CompiledTreeModel,
+    "compiled_svm": CompiledSVM,
+    "tree_table": TreeLookupTable,
+}
+
+
+def is_compiled(model: Any) -> bool:
+    """True nếu model đã là compiled engine (không cần compile lại)"""
+    return isinstance(model, (CompiledTreeModel, CompiledSVM, TreeLookupTable))
+
+
+def compile_model(model: Any, keep_fallback: bool = True) -> Any:
+    """
+    Compile model sklearn thành engine NumPy tương ứng
+
+    SVC (linear/RBF) -> CompiledSVM, DecisionTree/RandomForest -> CompiledTreeModel
+
+    Args:
+        keep_fallback: Giữ model sklearn gốc cho batch lớn (chỉ với cây)
+
+    Raises:
+        ValueError: Nếu model không compile được
+    """
+    estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+    if hasattr(estimator, "support_vectors_"):
+        return compile_svm_model(model)
+    return compile_tree_model(model, keep_fallback=keep_fallback)
+
+
+def portable_filename(path: str) -> str:
+    """Tên file portable ứng với 1 artifact, ví dụ ../model_v2/svm.pkl -> svm.npz"""
+    return os.path.splitext(os.path.basename(path))[0] + PORTABLE_EXTENSION
+
+
+def save_portable_model(engine: Any, path: str) -> None:
+    """Lưu compiled engine thành 1 file .npz (mảng + metadata)"""
+    arrays, metadata = engine.to_arrays()
+    metadata = {"format_version": PORTABLE_FORMAT_VERSION, **metadata}
+    np.savez_compressed(path, **arrays, **{METADATA_KEY: np.array(json.dumps(metadata))})
+
+
+def load_portable_model(path: str) -> Any:
+    """
+    Load 1 file .npz thành compiled engine
+
+    Raises:
+        ValueError: Nếu file không phải định dạng portable được hỗ trợ
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if METADATA_KEY not in data.files:
+            raise ValueError(f"{path} is not a portable model file")
+        metadata = json.loads(str(data[METADATA_KEY]))
+        arrays = {key: data[key] for key in data.files if key != METADATA_KEY}
+
+    if metadata.get("format_version") != PORTABLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported portable format version {metadata.get('format_version')} "
+            f"(expected {PORTABLE_FORMAT_VERSION})"
+        )
+    engine = ENGINES.get(metadata.get("engine"))
+    if engine is None:
+        raise ValueError(f"Unknown engine '{metadata.get('engine')}' in {path}")
+    return engine.from_arrays(arrays, metadata)
+
+
+def export_models(
+    models: Mapping[str, Any],
+    directory: str,
+    file_names: Optional[Mapping[str, str]] = None,
+    feature_order: Optional[Sequence[str]] = None,
+    cancer_type_mapping: Optional[Mapping[int, str]] = None,
+    verify_X: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Compile, lưu và kiểm tra các models, ghi manifest.json
+
+    Mỗi file được load lại sau khi ghi và so sánh với model sklearn gốc
+    (verify()), nên file trong thư mục export đã được kiểm tra.
+
+    Args:
+        models: Mapping model name -> model sklearn đã fit
+        directory: Thư mục output (tạo nếu chưa có)
+        file_names: Mapping model name -> tên file .npz (mặc định theo tên model)
+        feature_order: Thứ tự features mà models nhận (ghi vào manifest)
+        cancer_type_mapping: Mapping code -> tên class (ghi vào manifest)
+        verify_X: Dữ liệu thật dùng thêm khi kiểm tra
+
+    Returns:
+        Manifest đã ghi
+
+    Raises:
+        ValueError: Nếu 1 model không compile được hoặc không khớp sklearn
+    """
+    os.makedirs(directory, exist_ok=True)
+    file_names = file_names or {}
+
+    manifest: Dict[str, Any] = {
+        "format_version": PORTABLE_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "feature_order": list(feature_order) if feature_order is not None else None,
+        "cancer_type_mapping": (
+            {str(code): name for code, name in cancer_type_mapping.items()}
+            if cancer_type_mapping is not None
+            else None
+        ),
+        "models": {},
+    }
+
+    for model_name, model in models.items():
+        file_name = file_names.get(model_name) or (
+            model_name.lower().replace(" ", "_") + PORTABLE_EXTENSION
+        )
+        path = os.path.join(directory, file_name)
+
+        save_portable_model(compile_model(model, keep_fallback=False), path)
+        reloaded = load_portable_model(path)
+        checked = reloaded.verify(model, verify_X)
+
+        info = reloaded.info()
+        manifest["models"][model_name] = {
+            "file": file_name,
+            "engine": info["engine"],
+            "source": info["source"],
+            "size_bytes": os.path.getsize(path),
+            "verified_rows": checked["rows"],
+            "max_abs_diff": checked["max_abs_diff"],
+        }
+
+    with open(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    """Đọc manifest.json của 1 thư mục export"""
+    with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def portable_model_paths(directory: str) -> Dict[str, str]:
+    """Mapping model name -> đường dẫn file .npz theo manifest"""
+    manifest = read_manifest(directory)
+    return {
+        model_name: os.path.join(directory, entry["file"])
+        for model_name, entry in manifest["models"].items()
+    }
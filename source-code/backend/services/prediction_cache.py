@@ -0,0 +1,97 @@
+"""
+Prediction Cache
+================
+
+LRU cache (có TTL) cho kết quả prediction, key là model name + vector feature
+đã encode. Input của PatientInput chủ yếu là các enum nhỏ nên cùng 1 bệnh
+nhân được query lại rất thường xuyên; cache hit bỏ qua hoàn toàn inference.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class PredictionCache:
+    """LRU cache thread-safe, giới hạn theo số entry và thời gian sống (TTL)"""
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: Optional[float] = 300.0):
+        """
+        Initialize PredictionCache
+
+        Args:
+            max_size: Số entry tối đa, vượt quá thì bỏ entry ít dùng nhất
+            ttl_seconds: Thời gian sống của 1 entry (giây), None = không hết hạn
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (thời điểm hết hạn, value)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Lấy value theo key, None nếu không có hoặc đã hết hạn"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        expires_at = None
+        if self.ttl_seconds is not None:
+            expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Xoá toàn bộ cache (ví dụ khi models được reload)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Số liệu cache: size, hit/miss, eviction"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
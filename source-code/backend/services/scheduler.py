@@ -0,0 +1,367 @@
+"""
+Model Scheduler
+===============
+
+Chọn các models được chạy cho mỗi request nhiều models (predict_all,
+predict_consensus, explain, ...) của ModelService theo tình trạng gần đây của
+từng model:
+
+- Circuit breaker: theo dõi tỉ lệ lỗi (error, timeout) trên cửa sổ các lần gọi
+  gần nhất. Timeout của batch mà latency ước lượng đã vượt timeout (batch quá
+  lớn, không phải model hỏng) không được tính là lỗi. Model lỗi liên tục bị
+  ngắt (open) và bỏ qua trong cooldown giây thay vì tốn latency (tới
+  MODEL_TIMEOUT) ở mọi request. Hết cooldown, đúng 1 request được chạy thử
+  model (half-open): thành công -> đóng lại, lỗi -> ngắt tiếp 1 cooldown
+- Quá tải (overload() trả True, ví dụ queue của inference executor gần đầy):
+  chỉ chạy các fallback models (models rẻ, ví dụ Decision Tree), hoặc nếu có
+  latency budget thì fallback models trước rồi các models khác (rẻ trước) miễn
+  latency ước lượng còn trong budget
+
+Latency của 1 model cho n dòng được ước lượng từ cửa sổ các lần gọi gần nhất
+(p90, lần gọi với ít dòng hơn được nhân tuyến tính theo số dòng). Models bị
+bỏ qua được trả về cùng lý do dạng "skipped: ...", luôn có ít nhất 1 model
+được chạy nếu còn model chưa bị ngắt. Nếu tất cả models đều bị ngắt thì không
+model nào được chạy trước khi hết cooldown: select() trả thêm số giây cần chờ
+(ModelsUnavailableError ở ModelService).
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .metrics import MetricsRegistry
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Giá trị của gauge model_circuit_state
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+# Percentile của latency dùng để ước lượng (bảo thủ hơn trung bình)
+LATENCY_PERCENTILE = 0.9
+
+
+class ModelsUnavailableError(Exception):
+    """Tất cả models đều bị ngắt, client nên thử lại sau `retry_after` giây"""
+
+    def __init__(self, retry_after: float, skipped: Dict[str, str]):
+        # args giữ (retry_after, skipped) để exception pickle được từ worker process
+        super().__init__(retry_after, skipped)
+        self.retry_after = retry_after
+        self.skipped = skipped
+
+    def __str__(self) -> str:
+        return f"All models unavailable, retry in {self.retry_after:.0f}s"
+
+
+class _ModelHealth:
+    """Trạng thái circuit breaker và cửa sổ các lần gọi gần nhất của 1 model"""
+
+    __slots__ = ("outcomes", "latencies", "state", "opened_at", "probing", "trips")
+
+    def __init__(self, window: int):
+        # True = thành công
+        self.outcomes: deque = deque(maxlen=window)
+        # (số dòng, giây, chạy xong: False = timeout, giây là timeout)
+        self.latencies: deque = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    def estimate(self, n_rows: int, completed_only: bool = False) -> float:
+        """
+        Latency ước lượng (giây) cho n_rows dòng, 0 nếu chưa có lần gọi nào
+
+        completed_only: chỉ dùng các lần gọi chạy xong (bỏ các lần timeout)
+        """
+        scaled = sorted(
+            seconds * max(1.0, n_rows / rows)
+            for rows, seconds, completed in self.latencies
+            if completed or not completed_only
+        )
+        if not scaled:
+            return 0.0
+        return scaled[int(LATENCY_PERCENTILE * (len(scaled) - 1))]
+
+
+class ModelScheduler:
+    """
+    Circuit breaker cho từng model và fallback khi quá tải
+
+    Thread-safe: select() và record() được gọi từ các inference thread.
+
+    Args:
+        window: Số lần gọi gần nhất được giữ cho mỗi model
+        min_calls: Số lần gọi tối thiểu trong cửa sổ trước khi xét ngắt
+        error_rate: Tỉ lệ lỗi trên cửa sổ làm model bị ngắt
+        cooldown: Số giây model bị bỏ qua trước khi được chạy thử lại
+        overload: Callback trả True khi hệ thống quá tải. None = không fallback
+        fallback_models: Models được giữ khi quá tải (theo thứ tự ưu tiên)
+        latency_budget: Latency tối đa (giây) của các models được giữ khi quá
+            tải. None = chỉ giữ fallback_models (hoặc model rẻ nhất nếu không
+            có fallback model nào chạy được)
+        metrics: Registry để ghi trạng thái breaker và số lần model bị bỏ qua
+        clock: Nguồn thời gian (giây), thay được khi test
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        overload: Optional[Callable[[], bool]] = None,
+        fallback_models: Sequence[str] = (),
+        latency_budget: Optional[float] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self.min_calls = max(1, min(min_calls, window))
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.overload = overload
+        self.fallback_models = list(fallback_models)
+        self.latency_budget = latency_budget
+        self.metrics = metrics
+        self.clock = clock
+        self._models: Dict[str, _ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def select(
+        self, model_names: Iterable[str], n_rows: int, parallel: bool = True
+    ) -> Tuple[List[str], Dict[str, str], Optional[float]]:
+        """
+        Chọn các models chạy cho 1 request
+
+        Args:
+            model_names: Các models của snapshot đang active (theo thứ tự)
+            n_rows: Số dòng của request
+            parallel: True = các models chạy song song (latency = model chậm
+                nhất), False = lần lượt (latency = tổng)
+
+        Returns:
+            Tuple (selected, skipped, retry_after): selected giữ thứ tự của
+            model_names, skipped là Dict model name -> lý do ("skipped: ...").
+            retry_after là số giây tới khi có model được chạy thử lại nếu tất
+            cả models đều bị ngắt (selected rỗng), ngược lại None
+        """
+        model_names = list(model_names)
+        selected: List[str] = []
+        skipped: Dict[str, str] = {}
+        retry_after: Optional[float] = None
+
+        with self._lock:
+            now = self.clock()
+            for model_name in model_names:
+                health = self._health(model_name)
+                if health.state == OPEN and now - health.opened_at >= self.cooldown:
+                    health.state = HALF_OPEN
+                    health.probing = False
+                if health.state == OPEN:
+                    retry_in = self.cooldown - (now - health.opened_at)
+                    skipped[model_name] = f"skipped: circuit open (retry in {retry_in:.0f}s)"
+                elif health.probing:
+                    skipped[model_name] = "skipped: circuit half-open (probe in flight)"
+                else:
+                    selected.append(model_name)
+
+            if model_names and not selected:
+                # Tất cả đều bị ngắt: chờ model hết cooldown sớm nhất (0 nếu chỉ
+                # còn các lần chạy thử đang chạy)
+                retry_after = min(
+                    (
+                        self.cooldown - (now - self._models[name].opened_at)
+                        for name in model_names
+                        if self._models[name].state == OPEN
+                    ),
+                    default=0.0,
+                )
+
+            if len(selected) > 1 and self.overload is not None and self.overload():
+                kept = self._fallback(selected, n_rows, parallel, skipped)
+                selected = [name for name in selected if name in kept]
+
+            for model_name in selected:
+                health = self._models[model_name]
+                if health.state == HALF_OPEN:
+                    health.probing = True
+
+        for model_name, reason in skipped.items():
+            self._count_skip(model_name, reason)
+        return selected, skipped, retry_after
+
+    def _fallback(
+        self,
+        model_names: List[str],
+        n_rows: int,
+        parallel: bool,
+        skipped: Dict[str, str],
+    ) -> List[str]:
+        """Các models giữ lại khi quá tải, ghi lý do của models bị bỏ vào skipped"""
+        estimates = {name: self._models[name].estimate(n_rows) for name in model_names}
+        preferred = [name for name in self.fallback_models if name in estimates]
+
+        if self.latency_budget is None:
+            kept = preferred or [min(model_names, key=estimates.__getitem__)]
+            for model_name in model_names:
+                if model_name not in kept:
+                    skipped[model_name] = f"skipped: overload (fallback to {', '.join(kept)})"
+            return kept
+
+        others = sorted(
+            (name for name in model_names if name not in preferred),
+            key=estimates.__getitem__,
+        )
+        kept: List[str] = []
+        total = 0.0
+        for model_name in preferred + others:
+            estimate = estimates[model_name]
+            cost = max(total, estimate) if parallel else total + estimate
+            if kept and cost > self.latency_budget:
+                skipped[model_name] = (
+                    f"skipped: overload (estimated {estimate * 1e3:.0f} ms, "
+                    f"budget {self.latency_budget * 1e3:.0f} ms)"
+                )
+                continue
+            kept.append(model_name)
+            total = cost
+        return kept
+
+    def record(
+        self,
+        model_name: str,
+        ok: Optional[bool],
+        n_rows: int = 0,
+        seconds: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Ghi kết quả 1 lần gọi model
+
+        Args:
+            model_name: Tên model
+            ok: False nếu model lỗi hoặc timeout. None = kết quả không phản
+                ánh tình trạng model (ví dụ lỗi của attributions): chỉ kết thúc
+                lần chạy thử nếu có
+            n_rows: Số dòng của lần gọi
+            seconds: Latency của lần gọi, None = không dùng để ước lượng
+                (ví dụ lỗi ngay lập tức, hoặc stage đắt hơn predict)
+            timeout: Timeout (giây) nếu lần gọi bị timeout. Nếu latency ước
+                lượng từ các lần gọi chạy xong cho n_rows dòng đã vượt timeout
+                thì lần gọi được ghi như ok=None: batch lớn không làm model bị
+                ngắt cho các request nhỏ
+        """
+        with self._lock:
+            health = self._health(model_name)
+            if (
+                ok is False
+                and timeout is not None
+                and health.estimate(n_rows, completed_only=True) > timeout
+            ):
+                ok = None
+            if seconds is not None:
+                health.latencies.append((max(n_rows, 1), seconds, timeout is None))
+
+            if ok is None:
+                # Request sau chạy thử lại
+                health.probing = False
+                return
+
+            if health.state == HALF_OPEN:
+                # Kết quả của lần chạy thử
+                health.probing = False
+                if ok:
+                    health.state = CLOSED
+                    health.outcomes.clear()
+                    print(f"✅ Circuit breaker closed for {model_name}")
+                else:
+                    self._trip(model_name, health, "probe failed")
+                return
+
+            health.outcomes.append(ok)
+            if (
+                health.state == CLOSED
+                and not ok
+                and len(health.outcomes) >= self.min_calls
+                and health.error_rate() >= self.error_rate
+            ):
+                failed = len(health.outcomes) - sum(health.outcomes)
+                self._trip(
+                    model_name, health, f"{failed}/{len(health.outcomes)} calls failed"
+                )
+
+    def _trip(self, model_name: str, health: _ModelHealth, reason: str) -> None:
+        health.state = OPEN
+        health.opened_at = self.clock()
+        health.trips += 1
+        health.outcomes.clear()
+        print(
+            f"❌ Circuit breaker opened for {model_name} ({reason}), "
+            f"retry in {self.cooldown:g}s"
+        )
+
+    def reset(self) -> None:
+        """Xoá trạng thái của tất cả models (ví dụ sau khi swap models)"""
+        with self._lock:
+            for model_name in list(self._models):
+                self._models[model_name] = _ModelHealth(self.window)
+                self._register_gauge(model_name)
+
+    def stats(self) -> Dict:
+        """Trạng thái breaker, tỉ lệ lỗi và latency ước lượng của từng model"""
+        with self._lock:
+            models = {
+                model_name: {
+                    "state": health.state,
+                    "calls": len(health.outcomes),
+                    "error_rate": round(health.error_rate(), 4),
+                    "trips": health.trips,
+                    "latency_p90_ms_per_call": round(health.estimate(1) * 1e3, 3),
+                }
+                for model_name, health in self._models.items()
+            }
+        return {
+            "overloaded": bool(self.overload()) if self.overload is not None else False,
+            "fallback_models": self.fallback_models,
+            "latency_budget_ms": (
+                self.latency_budget * 1e3 if self.latency_budget is not None else None
+            ),
+            "models": models,
+        }
+
+    def _health(self, model_name: str) -> _ModelHealth:
+        health = self._models.get(model_name)
+        if health is None:
+            health = self._models[model_name] = _ModelHealth(self.window)
+            self._register_gauge(model_name)
+        return health
+
+    def _register_gauge(self, model_name: str) -> None:
+        if self.metrics is not None:
+            health = self._models[model_name]
+            self.metrics.gauge(
+                "model_circuit_state",
+                "Trạng thái circuit breaker (0 = closed, 1 = open, 2 = half-open)",
+                lambda: _STATE_VALUES[health.state],
+                model=model_name,
+            )
+
+    def _count_skip(self, model_name: str, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.counter(
+                "model_skipped",
+                "Số lần model bị scheduler bỏ qua (circuit_open, overload)",
+                model=model_name,
+                reason="overload" if "overload" in reason else "circuit_open",
+            ).inc()
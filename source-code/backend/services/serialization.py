@@ -0,0 +1,209 @@
+"""
+Response Serialization
+======================
+
+Ghi response của các endpoint predict thẳng thành JSON bytes, thay vì dựng
+lại Pydantic models (ModelPredictionResponse, MultiModelPredictionOutput, ...)
+rồi để FastAPI validate lần nữa theo response_model.
+
+Với mỗi model, PredictionLayout giữ sẵn các phần cố định của kết quả (tên
+model, tên cancer type theo từng code, tên class của probabilities); mỗi
+request chỉ còn làm tròn các số và encode. JSON output giống đường Pydantic
+(cùng key, thứ tự và làm tròn 4 chữ số).
+
+Probabilities có thể ghi dạng gọn (PROBABILITIES_ARRAY): list số theo thứ tự
+class, tên class chỉ ghi 1 lần trong "probability_classes" của response.
+
+Encode bằng orjson nếu được cài (optional), nếu không thì bằng
+pydantic_core.to_json (cùng encoder Rust mà FastAPI dùng với response_model).
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PROBABILITIES_DICT = "dict"
+PROBABILITIES_ARRAY = "array"
+JSON_MEDIA_TYPE = "application/json"
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode obj thành JSON bytes (UTF-8, không khoảng trắng, NaN -> null)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return to_json(obj)
+
+
+def column_prefix(name: str) -> str:
+    """Tên model/class -> tên cột, ví dụ "Random Forest" -> "random_forest"."""
+    return "".join(c if c.isalnum() else "_" for c in name.strip().lower())
+
+
+class PredictionLayout:
+    """
+    Các phần cố định của kết quả 1 model, tính 1 lần cho mỗi model
+
+    Args:
+        model_name: Tên model
+        cancer_type_mapping: Mapping code -> tên cancer type
+        class_names: Tên class theo thứ tự của probabilities
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cancer_type_mapping: Mapping[int, str],
+        class_names: Sequence[str],
+    ):
+        self.model_name = model_name
+        self.cancer_type_mapping = cancer_type_mapping
+        self.class_names = list(class_names)
+
+    def encode(
+        self,
+        code: int,
+        confidence: Optional[float],
+        probabilities: Optional[Sequence[float]],
+        probabilities_format: str = PROBABILITIES_DICT,
+    ) -> Dict[str, Any]:
+        """
+        Kết quả 1 model dạng dict sẵn để encode (các field như ModelPredictionResponse)
+
+        Args:
+            code: Cancer type code được predict
+            confidence: Độ tin cậy (None nếu model không có probabilities)
+            probabilities: Probability theo thứ tự class_names
+            probabilities_format: PROBABILITIES_DICT hoặc PROBABILITIES_ARRAY
+        """
+        rounded = None
+        if probabilities:
+            rounded = [round(value, 4) for value in probabilities]
+            if probabilities_format != PROBABILITIES_ARRAY:
+                rounded = dict(zip(self.class_names, rounded))
+        return {
+            "model_name": self.model_name,
+            "cancer_type_detailed": self.cancer_type_mapping.get(code, "Unknown"),
+            "cancer_type_code": code,
+            "confidence": None if confidence is None else round(confidence, 4),
+            "probabilities": rounded,
+        }
+
+
+class ResponseSerializer:
+    """
+    Serialize kết quả của ModelService thành response JSON bytes
+
+    Layout được giữ theo (model name, thứ tự class), nên models mới sau khi
+    swap phiên bản tự có layout riêng.
+    """
+
+    def __init__(self, cancer_type_mapping: Mapping[int, str]):
+        self.cancer_type_mapping = cancer_type_mapping
+        self._layouts: Dict[Tuple[str, Tuple[str, ...]], PredictionLayout] = {}
+
+    def layout(self, model_name: str, class_names: Sequence[str]) -> PredictionLayout:
+        key = (model_name, tuple(class_names))
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = PredictionLayout(model_name, self.cancer_type_mapping, key[1])
+            self._layouts[key] = layout
+        return layout
+
+    def _predictions(
+        self,
+        results: Sequence[Any],
+        probabilities_format: str,
+        classes: Dict[str, List[str]],
+    ) -> List[Dict[str, Any]]:
+        predictions = []
+        for result in results:
+            probabilities = result.probabilities
+            layout = self.layout(result.model_name, probabilities.keys())
+            if layout.class_names:
+                classes[result.model_name] = layout.class_names
+            predictions.append(
+                layout.encode(
+                    result.cancer_type_code,
+                    result.confidence,
+                    list(probabilities.values()),
+                    probabilities_format,
+                )
+            )
+        return predictions
+
+    def multi_model(
+        self,
+        results: Sequence[Any],
+        failures: Optional[Dict[str, str]] = None,
+        probabilities_format: str = PROBABILITIES_DICT,
+    ) -> bytes:
+        """
+        Response của /predict-all (như MultiModelPredictionOutput)
+
+        Args:
+            results: List ModelPredictionResult của 1 bệnh nhân
+            failures: Models lỗi/timeout và lý do
+            probabilities_format: PROBABILITIES_DICT hoặc PROBABILITIES_ARRAY
+        """
+        classes: Dict[str, List[str]] = {}
+        response = {
+            "predictions": self._predictions(results, probabilities_format, classes),
+            "failed_models": failures or None,
+        }
+        if probabilities_format == PROBABILITIES_ARRAY:
+            response["probability_classes"] = classes
+        return dumps(response)
+
+    def batch_multi_model_columnar(
+        self,
+        batches: Mapping[str, Any],
+        failures: Optional[Dict[str, str]] = None,
+        probabilities_format: str = PROBABILITIES_DICT,
+    ) -> bytes:
+        """
+        Response của /predict-all-batch từ kết quả dạng cột
+
+        Đọc thẳng các mảng của BatchPredictionResult, không tạo
+        ModelPredictionResult hay dict probabilities trung gian cho từng dòng.
+
+        Args:
+            batches: Dict model name -> BatchPredictionResult
+            failures: Models lỗi/timeout và lý do
+            probabilities_format: PROBABILITIES_DICT hoặc PROBABILITIES_ARRAY
+        """
+        classes: Dict[str, List[str]] = {}
+        columns = []
+        for model_name, batch in batches.items():
+            layout = self.layout(model_name, batch.class_names or ())
+            if layout.class_names:
+                classes[model_name] = layout.class_names
+            codes = batch.codes.tolist()
+            if batch.probabilities is None:
+                columns.append(
+                    [layout.encode(code, None, None, probabilities_format) for code in codes]
+                )
+                continue
+            columns.append(
+                [
+                    layout.encode(code, confidence, proba, probabilities_format)
+                    for code, confidence, proba in zip(
+                        codes, batch.confidences.tolist(), batch.probabilities.tolist()
+                    )
+                ]
+            )
+
+        response = {
+            "results": [
+                {"predictions": list(predictions), "failed_models": None}
+                for predictions in zip(*columns)
+            ],
+            "failed_models": failures or None,
+        }
+        if probabilities_format == PROBABILITIES_ARRAY:
+            response["probability_classes"] = classes
+        return dumps(response)
@@ -0,0 +1,237 @@
+"""
+Shared Models
+=============
+
+Serving nhiều process với trọng số models nằm trong shared memory
+(INFERENCE_EXECUTOR=shared).
+
+Process chính load models 1 lần, compile thành engine NumPy (CompiledSVM,
+CompiledTreeModel, xem portable.py) và chép các mảng của engine vào
+multiprocessing.shared_memory. Các worker process gắn vào cùng các block đó
+và tạo lại engine bằng from_arrays() trên view (read-only) của shared memory,
+nên các mảng lớn (support vectors của SVM, leaf probabilities của cây) chỉ có
+1 bản vật lý dù có bao nhiêu worker. Process FastAPI chỉ làm I/O; inference
+chạy trên các worker nên không bị GIL giới hạn.
+
+Mỗi job mang theo spec của lần publish hiện tại. Khi models được swap, process
+chính publish lại ở job kế tiếp và worker gắn vào spec mới khi nhận job đó.
+"""
+
+import os
+import threading
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .model_service import ModelService
+from .portable import ENGINES, compile_model, is_compiled
+
+# Offset của mỗi mảng trong block được căn theo 64 bytes (cache line)
+ARRAY_ALIGNMENT = 64
+
+
+def _aligned(n_bytes: int) -> int:
+    return -(-n_bytes // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+class SharedModelStore:
+    """
+    Publish ModelSet đang active của 1 ModelService vào shared memory
+
+    Dùng trong process chính. Mỗi model là 1 block shared memory chứa các mảng
+    của engine; spec (dict picklable) mô tả block và vị trí từng mảng.
+
+    Args:
+        keep_previous: Số lần publish cũ được giữ lại (chưa unlink) cho các job
+            đã nhận spec cũ nhưng chưa chạy
+    """
+
+    def __init__(self, keep_previous: int = 1):
+        self.keep_previous = keep_previous
+        self._lock = threading.Lock()
+        self._spec: Optional[Dict[str, Any]] = None
+        self._model_set = None
+        self._blocks: List[SharedMemory] = []
+        self._retired: Deque[List[SharedMemory]] = deque()
+
+    def spec(self, service: Optional[ModelService]) -> Optional[Dict[str, Any]]:
+        """
+        Spec của ModelSet đang active, publish lại nếu models đã được swap
+
+        Returns:
+            Spec, hoặc None nếu chưa có ModelService
+        """
+        if service is None:
+            return None
+        model_set = service.model_set
+        if model_set is self._model_set:
+            return self._spec
+        with self._lock:
+            if model_set is not self._model_set:
+                self._publish(service, model_set)
+            return self._spec
+
+    def _publish(self, service: ModelService, model_set) -> None:
+        blocks: List[SharedMemory] = []
+        models: Dict[str, Any] = {}
+        try:
+            for model_name in model_set.models:
+                model = service.get_model(model_name, model_set)
+                engine = model
+                if not is_compiled(model):
+                    # Raises ValueError nếu model không compile được
+                    engine = compile_model(model, keep_fallback=False)
+                    engine.verify(model)
+                block, entry = _copy_to_shared_memory(engine)
+                blocks.append(block)
+                models[model_name] = entry
+        except Exception:
+            for block in blocks:
+                block.close()
+                block.unlink()
+            raise
+
+        if self._blocks:
+            self._retired.append(self._blocks)
+        while len(self._retired) > self.keep_previous:
+            _release(self._retired.popleft())
+
+        self._blocks = blocks
+        self._model_set = model_set
+        self._spec = {
+            "id": f"{os.getpid()}-{model_set.generation}",
+            "version": model_set.version,
+            "models": models,
+            "service": {
+                "cancer_type_mapping": service.cancer_type_mapping,
+                "derive_label_from_proba": service.derive_label_from_proba,
+                "feature_order": service.feature_order,
+            },
+        }
+        print(
+            f"✅ Published {len(models)} model(s) to shared memory "
+            f"({self.shared_bytes / 2**20:.1f} MiB, {model_set.version})"
+        )
+
+    @property
+    def shared_bytes(self) -> int:
+        """Tổng dung lượng các block của lần publish hiện tại"""
+        return sum(block.size for block in self._blocks)
+
+    def stats(self) -> Dict[str, Any]:
+        spec = self._spec or {}
+        return {
+            "version": spec.get("version"),
+            "models": list(spec.get("models", {})),
+            "shared_bytes": self.shared_bytes,
+        }
+
+    def close(self) -> None:
+        """Unlink tất cả block (gọi khi shutdown)"""
+        with self._lock:
+            while self._retired:
+                _release(self._retired.popleft())
+            _release(self._blocks)
+            self._blocks = []
+            self._spec = None
+            self._model_set = None
+
+
+def _copy_to_shared_memory(engine: Any) -> Tuple[SharedMemory, Dict[str, Any]]:
+    """Chép các mảng của engine vào 1 block mới, trả về (block, entry của spec)"""
+    arrays, metadata = engine.to_arrays()
+    arrays = {key: np.ascontiguousarray(array) for key, array in arrays.items()}
+    size = sum(_aligned(array.nbytes) for array in arrays.values())
+
+    block = SharedMemory(create=True, size=max(size, 1))
+    layout = {}
+    offset = 0
+    for key, array in arrays.items():
+        view = np.ndarray(array.shape, array.dtype, buffer=block.buf, offset=offset)
+        view[...] = array
+        layout[key] = (offset, array.shape, array.dtype.str)
+        offset += _aligned(array.nbytes)
+    return block, {"block": block.name, "arrays": layout, "metadata": metadata}
+
+
+def _release(blocks: List[SharedMemory]) -> None:
+    for block in blocks:
+        try:
+            block.close()
+            block.unlink()
+        except (BufferError, FileNotFoundError):
+            pass
+
+
+# ==================== WORKER ====================
+class _WorkerState:
+    __slots__ = ("spec_id", "service", "blocks")
+
+    def __init__(self, spec_id: str, service: ModelService, blocks: List[SharedMemory]):
+        self.spec_id = spec_id
+        self.service = service
+        self.blocks = blocks
+
+
+_worker: Optional[_WorkerState] = None
+
+
+def attach_models(spec: Dict[str, Any]) -> Tuple[Dict[str, Any], List[SharedMemory]]:
+    """
+    Tạo lại các engine trên view của shared memory (không copy mảng)
+
+    Returns:
+        Tuple (models, blocks): blocks phải được giữ mở khi models còn dùng
+    """
+    models: Dict[str, Any] = {}
+    blocks: List[SharedMemory] = []
+    for model_name, entry in spec["models"].items():
+        block = SharedMemory(name=entry["block"])
+        blocks.append(block)
+        arrays = {}
+        for key, (offset, shape, dtype) in entry["arrays"].items():
+            view = np.ndarray(tuple(shape), np.dtype(dtype), buffer=block.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[key] = view
+        metadata = entry["metadata"]
+        models[model_name] = ENGINES[metadata["engine"]].from_arrays(arrays, metadata)
+    return models, blocks
+
+
+def attach_worker(spec: Optional[Dict[str, Any]]) -> None:
+    """
+    Gắn worker process vào spec (initializer của process pool)
+
+    Tạo ModelService của worker: không cache, không fan-out, không metrics
+    (các models chạy lần lượt trong worker, song song giữa các worker).
+    """
+    global _worker
+    if spec is None:
+        return
+    previous = _worker
+    models, blocks = attach_models(spec)
+    service = ModelService(models=models, version=spec["version"], **spec["service"])
+    _worker = _WorkerState(spec["id"], service, blocks)
+
+    if previous is not None:
+        # Engines cũ không còn được tham chiếu -> đóng được mapping cũ
+        previous.service = None
+        for block in previous.blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass
+
+
+def worker_service() -> Optional[ModelService]:
+    """ModelService trên shared memory nếu đang ở trong worker, ngược lại None"""
+    return _worker.service if _worker is not None else None
+
+
+def run_shared_job(spec: Dict[str, Any], fn: Callable[..., Any], *args: Any) -> Any:
+    """Chạy fn(*args) trong worker, gắn lại shared memory nếu spec đã đổi"""
+    if _worker is None or _worker.spec_id != spec["id"]:
+        attach_worker(spec)
+    return fn(*args)
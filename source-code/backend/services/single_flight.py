@@ -0,0 +1,87 @@
+"""
+Single-flight
+=============
+
+Gộp các request giống hệt nhau đang chạy đồng thời thành 1 lần inference.
+
+Client upstream (retry, fan-out) thường gửi cùng 1 payload nhiều lần trong vài
+ms. Prediction cache không giúp được các request này vì kết quả chỉ được ghi
+vào cache sau khi lần inference đầu tiên xong. SingleFlight giữ 1 task cho mỗi
+key đang chạy (ví dụ vector feature đã encode): request đến sau với cùng key
+chờ chung task đó thay vì chạy lại.
+
+Key được bỏ ngay khi task xong nên đây không phải cache: request đến sau đó
+chạy inference (hoặc hit prediction cache) như bình thường.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional
+
+from .metrics import Counter
+
+
+class SingleFlight:
+    """
+    Chia sẻ 1 task đang chạy giữa các lời gọi run() cùng key
+
+    Chỉ dùng từ 1 event loop (không cần lock).
+
+    Args:
+        name: Prefix cho tên metrics
+        labels: Labels của metrics, ví dụ {"endpoint": "/predict-all"}
+    """
+
+    def __init__(
+        self, name: str = "request_dedup", labels: Optional[Mapping[str, str]] = None
+    ):
+        self.executions = Counter(
+            f"{name}_executions", "Số lần inference thật sự được chạy", labels
+        )
+        self.collapsed = Counter(
+            f"{name}_collapsed",
+            "Số request dùng chung kết quả của 1 inference đang chạy",
+            labels,
+        )
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await kết quả của fn() cho key, dùng chung task nếu key đang chạy
+
+        Lỗi của fn() được trả cho tất cả request đang chờ key đó.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.executions.inc()
+        else:
+            self.collapsed.inc()
+        # shield: request bị huỷ (client ngắt kết nối) không huỷ inference mà
+        # các request khác cùng key đang chờ
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Đánh dấu lỗi đã được xử lý nếu mọi request chờ đều đã bị huỷ
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """Số key đang chạy"""
+        return len(self._in_flight)
+
+    def stats(self) -> dict:
+        """Số lần inference thật sự, số request được gộp và số key đang chạy"""
+        executions = int(self.executions.value)
+        collapsed = int(self.collapsed.value)
+        total = executions + collapsed
+        return {
+            "in_flight": self.in_flight,
+            "executions": executions,
+            "collapsed": collapsed,
+            "collapsed_ratio": collapsed / total if total else 0.0,
+        }
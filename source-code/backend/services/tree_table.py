@@ -0,0 +1,837 @@
+"""
+Tree Lookup Table
+=================
+
+Bảng tra cứu dựng sẵn cho Decision Tree / Random Forest trên miền giá trị
+rời rạc của input (TREE_LOOKUP_TABLES).
+
+Với mỗi feature, các threshold mà cây dùng để split chia trục số thành các
+khoảng (bucket): 2 giá trị cùng bucket của mọi feature đi cùng 1 đường trong
+mọi cây, nên có cùng kết quả. Bảng là 1 mảng dày với 1 trục cho mỗi feature:
+
+- Feature rời rạc (categorical, Literal của PatientInput): chỉ giữ các bucket
+  chứa giá trị hợp lệ, ví dụ cellularity có 3 vị trí
+- Feature số nguyên có giá trị nhỏ nhất (lymph_nodes_examined_positive): các
+  bucket chứa ít nhất 1 số nguyên
+- Feature số thực (nottingham_prognostic_index): mọi bucket
+
+Mỗi ô giữ id của 1 kết quả; probabilities của các kết quả khác nhau nằm trong
+1 ma trận nhỏ. Predict chỉ còn tìm bucket của từng feature (mảng tra cho số
+nguyên, lưới đều + searchsorted cho số thực), tính vị trí ô và gather, không
+phụ thuộc số cây và độ sâu.
+
+Bảng được dựng bằng cách duyệt cây trên các khoảng vị trí của từng trục (mỗi
+lá ghi vào 1 khối con của bảng), rồi gộp các vị trí cho cùng kết quả trên
+từng trục. Sau khi dựng, mọi ô của bảng được kiểm tra khớp tuyệt đối với
+model gốc; nếu bảng vượt giới hạn bộ nhớ thì không dựng và model giữ engine
+cũ. Dòng có giá trị nằm ngoài bảng (ví dụ giá trị không hợp lệ) được predict
+bằng CompiledTreeModel.
+"""
+
+import bisect
+import time
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .compiled_trees import CompiledTreeModel, compile_tree_model
+
+# Số dòng tối đa tra bằng vòng lặp Python (bisect trên list) thay vì NumPy
+SCALAR_LOOKUP_LIMIT = 8
+# Giá trị của 1 trục ngoài bảng khi cộng vị trí ô (tổng âm = ngoài bảng)
+OUTSIDE = -(1 << 48)
+# Trục số thực có từ GRID_MIN_THRESHOLDS threshold: bucket ứng viên tra theo
+# lưới đều (GRID_CELLS_PER_THRESHOLD ô mỗi threshold) thay vì searchsorted
+GRID_MIN_THRESHOLDS = 16
+GRID_CELLS_PER_THRESHOLD = 8
+# Số nguyên tối đa của 1 trục được tra bằng mảng thay vì searchsorted
+LUT_LIMIT = 4096
+# Feature số nguyên có nhiều giá trị hơn (trong khoảng các threshold) được
+# xem như số thực
+INTEGER_ENUMERATION_LIMIT = 1 << 16
+# Bộ nhớ ước lượng mỗi ô khi dựng bảng cho ensemble (id int64, key, sort)
+ENSEMBLE_BUILD_BYTES_PER_CELL = 40
+# Key tổ hợp lá của ensemble được đánh số lại trước khi vượt giá trị này
+KEY_LIMIT = 1 << 62
+# Số ô đại diện mỗi lần tính probabilities của các kết quả ensemble
+PROBA_CHUNK_ROWS = 1 << 16
+# Số ô mỗi lần so với model gốc khi kiểm tra toàn bộ bảng
+VERIFY_CHUNK_ROWS = 1 << 16
+
+
+class FeatureDomain(NamedTuple):
+    """
+    Miền giá trị hợp lệ của 1 feature (đã encode)
+
+    - values: Các giá trị hợp lệ (categorical, Literal), None = feature số
+    - integer: Feature số chỉ nhận số nguyên
+    - minimum: Giá trị nhỏ nhất (ge)
+    """
+
+    values: Optional[Tuple[float, ...]] = None
+    integer: bool = False
+    minimum: Optional[float] = None
+
+
+def feature_domains(
+    feature_order: Sequence[str],
+    encoding_maps: Mapping[str, Mapping[Any, int]],
+    allowed_values: Optional[Mapping[str, Iterable[float]]] = None,
+    minimums: Optional[Mapping[str, float]] = None,
+    integer_features: Iterable[str] = (),
+) -> List[FeatureDomain]:
+    """
+    Miền giá trị của từng feature theo feature_order
+
+    Args:
+        feature_order: Thứ tự cột mà models được train
+        encoding_maps: Mapping feature -> {giá trị gốc: mã số}
+        allowed_values: Mapping feature số -> các giá trị hợp lệ (Literal)
+        minimums: Mapping feature số -> giá trị nhỏ nhất (ge)
+        integer_features: Các feature số phải là số nguyên
+    """
+    allowed_values = allowed_values or {}
+    minimums = minimums or {}
+    integer_features = set(integer_features)
+
+    domains = []
+    for feature in feature_order:
+        values = None
+        if feature in encoding_maps:
+            values = encoding_maps[feature].values()
+        elif feature in allowed_values:
+            values = allowed_values[feature]
+        domains.append(
+            FeatureDomain(
+                values=(
+                    tuple(sorted({float(v) for v in values}))
+                    if values is not None
+                    else None
+                ),
+                integer=feature in integer_features,
+                minimum=minimums.get(feature),
+            )
+        )
+    return domains
+
+
+class _Axis:
+    """
+    1 trục của bảng lúc dựng: threshold của feature và vị trí của từng bucket
+
+    - thresholds: Threshold (đã sort, không gian sau scaler)
+    - remap: Bucket -> vị trí trên trục, -1 nếu bucket không có trong bảng
+    - points: Giá trị (sau scaler, float32) đại diện cho từng vị trí, dùng để
+      duyệt cây lúc dựng bảng
+    - inputs: Giá trị input gốc cho từng vị trí, dùng để kiểm tra
+    - int_range: (lo, hi, clip) nếu feature nhận số nguyên (xem _LookupAxis)
+    """
+
+    __slots__ = ("thresholds", "remap", "points", "inputs", "int_range")
+
+    def __init__(self, thresholds, remap, points, inputs, int_range=None):
+        self.thresholds = thresholds
+        self.remap = remap
+        self.points = points
+        self.inputs = inputs
+        self.int_range = int_range
+
+
+class _LookupAxis:
+    """
+    1 trục của bảng lúc predict: giá trị input -> vị trí trên trục
+
+    Giá trị được đưa về bucket bằng searchsorted trên thresholds (sau scaler
+    và ép float32 như sklearn). Với feature nhận số nguyên, các số nguyên
+    trong int_range được tra thẳng bằng 1 mảng (lut) tính sẵn theo cùng cách;
+    clip = số nguyên lớn hơn int_range cùng vị trí với số lớn nhất.
+    """
+
+    __slots__ = (
+        "feature", "thresholds", "remap", "stride", "int_range",
+        "mean", "scale", "scaler_used", "grid", "grid_start", "grid_scale", "lower", "upper",
+        "lo", "lut", "clip", "lut_list", "thresholds_list", "remap_list",
+    )
+
+    def __init__(self, feature, thresholds, remap, stride, int_range, scaler):
+        self.feature = int(feature)
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.remap = np.asarray(remap, dtype=np.intp)
+        self.stride = int(stride)
+        self.int_range = tuple(int(v) for v in int_range) if int_range else None
+        self.mean, self.scale = 0.0, 1.0
+        if scaler is not None:
+            self.mean = float(scaler[0][self.feature])
+            self.scale = float(scaler[1][self.feature])
+
+        self.scaler_used = scaler is not None
+
+        # Lưới đều giữa threshold đầu và cuối: ô i -> bucket của mép trái ô
+        self.grid = None
+        n_thresholds = len(self.thresholds)
+        span = self.thresholds[-1] - self.thresholds[0] if n_thresholds else 0.0
+        if n_thresholds >= GRID_MIN_THRESHOLDS and span > 0:
+            n_cells = GRID_CELLS_PER_THRESHOLD * n_thresholds
+            self.grid_start = float(self.thresholds[0])
+            self.grid_scale = n_cells / span
+            edges = self.grid_start + np.arange(n_cells) / self.grid_scale
+            self.grid = np.concatenate(
+                [[0], np.searchsorted(self.thresholds, edges, side="left"), [n_thresholds]]
+            ).astype(np.intp)
+            # Bucket b = (lower[b], upper[b]]
+            self.lower = np.concatenate([[-np.inf], self.thresholds])
+            self.upper = np.concatenate([self.thresholds, [np.inf]])
+
+        self.lut = self.lut_list = None
+        self.lo, self.clip = 0, False
+        if self.int_range is not None:
+            lo, hi, clip = self.int_range
+            if 0 <= hi - lo < LUT_LIMIT:
+                self.lo, self.clip = lo, bool(clip)
+                self.lut = self._search(np.arange(lo, hi + 1, dtype=np.float64))
+                self.lut_list = self.lut.tolist()
+        # Bản list cho đường tra bằng Python
+        self.thresholds_list = self.thresholds.tolist()
+        self.remap_list = self.remap.tolist()
+
+    def _search(self, values: np.ndarray) -> np.ndarray:
+        if self.scaler_used:
+            values = (values - self.mean) / self.scale
+        # Cây so sánh input float32 với threshold float64 (như sklearn)
+        values = values.astype(np.float32).astype(np.float64)
+        if self.grid is None:
+            return self.remap[np.searchsorted(self.thresholds, values, side="left")]
+
+        # Bucket ứng viên theo lưới đều, đúng nếu nằm giữa 2 threshold kề
+        # (ngược lại tìm bằng searchsorted)
+        cells = np.clip((values - self.grid_start) * self.grid_scale + 1, 0, len(self.grid) - 1)
+        buckets = self.grid.take(cells.astype(np.intp))
+        wrong = (values <= self.lower.take(buckets)) | (values > self.upper.take(buckets))
+        if wrong.any():
+            buckets[wrong] = np.searchsorted(self.thresholds, values[wrong], side="left")
+        return self.remap.take(buckets)
+
+    def positions(self, values: np.ndarray) -> np.ndarray:
+        """Vị trí của từng giá trị, -1 nếu bucket không có trong bảng"""
+        if self.lut is None:
+            return self._search(values)
+        with np.errstate(invalid="ignore"):
+            ints = values.astype(np.intp)
+        offsets = ints - self.lo
+        if self.clip:
+            offsets = np.minimum(offsets, len(self.lut) - 1)
+        exact = (ints == values) & (offsets >= 0) & (offsets < len(self.lut))
+        if exact.all():
+            return self.lut[offsets]
+        positions = np.empty(len(values), dtype=np.intp)
+        positions[exact] = self.lut[offsets[exact]]
+        positions[~exact] = self._search(values[~exact])
+        return positions
+
+    def position(self, value: float) -> int:
+        """Như positions() cho 1 giá trị (Python float)"""
+        if self.lut_list is not None and value.is_integer():
+            offset = int(value) - self.lo
+            if self.clip and offset >= len(self.lut_list):
+                offset = len(self.lut_list) - 1
+            if 0 <= offset < len(self.lut_list):
+                return self.lut_list[offset]
+        value = float(np.float32((value - self.mean) / self.scale))
+        return self.remap_list[bisect.bisect_left(self.thresholds_list, value)]
+
+
+class TreeLookupTable:
+    """Decision Tree / Random Forest dạng bảng tra cứu, dùng thay model sklearn"""
+
+    def __init__(
+        self,
+        table: np.ndarray,
+        proba: np.ndarray,
+        classes: np.ndarray,
+        axes: Sequence[Tuple[int, np.ndarray, np.ndarray, int, Optional[Tuple[int, int, bool]]]],
+        fallback: CompiledTreeModel,
+        scaler: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        source: str = "",
+        build_info: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize TreeLookupTable
+
+        Args:
+            table: Id kết quả của từng ô (mảng phẳng)
+            proba: Probabilities của từng id, shape (n_ids, n_classes)
+            classes: classes_ của model gốc
+            axes: Các trục cần tra (feature, thresholds, remap, stride,
+                int_range); trục chỉ có 1 vị trí và không thiếu bucket nào
+                được bỏ. int_range = (lo, hi, clip) nếu feature nhận số nguyên
+            fallback: Engine cho các dòng nằm ngoài bảng
+            scaler: (mean, scale) của StandardScaler đứng trước trong Pipeline
+            source: Tên class của model gốc (hiển thị)
+            build_info: Số liệu lúc dựng bảng (hiển thị ở info())
+        """
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = fallback.n_features_in_
+        self.source = source
+        self._table = np.ascontiguousarray(table).ravel()
+        self._proba = np.asarray(proba, dtype=np.float64)
+        self._fallback = fallback
+        self._scaler = None
+        if scaler is not None:
+            self._scaler = tuple(
+                np.broadcast_to(np.asarray(a, dtype=np.float64), self.n_features_in_).copy()
+                for a in scaler
+            )
+        self._build_info = dict(build_info or {})
+
+        self._axes = [_LookupAxis(*axis, self._scaler) for axis in axes]
+        self._proba_rows = self._proba.tolist()
+
+        # Các trục có lut được tra cùng lúc: 1 gather trên các lut nối liền
+        # (đã nhân stride, -1 = ngoài bảng) cho cả ma trận (dòng x trục)
+        lut_axes = [axis for axis in self._axes if axis.lut is not None]
+        self._search_axes = [axis for axis in self._axes if axis.lut is None]
+        sizes = np.array([len(axis.lut) for axis in lut_axes], dtype=np.intp)
+        self._lut_features = np.array([axis.feature for axis in lut_axes], dtype=np.intp)
+        self._lut_lo = np.array([axis.lo for axis in lut_axes], dtype=np.intp)
+        self._lut_sizes = sizes
+        # Offset lớn nhất của mỗi trục sau khi clip (không clip -> giữ nguyên)
+        self._lut_max = np.where(
+            [axis.clip for axis in lut_axes], sizes - 1, np.iinfo(np.intp).max
+        ).astype(np.intp)
+        self._lut_base = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        # Vị trí ngoài bảng = OUTSIDE: tổng của dòng âm nếu có 1 trục ngoài bảng
+        self._lut_cells = (
+            np.concatenate(
+                [np.where(axis.lut >= 0, axis.lut * axis.stride, OUTSIDE) for axis in lut_axes]
+            ).astype(np.int64)
+            if lut_axes
+            else np.empty(0, dtype=np.int64)
+        )
+        # Dạng cột (trục x 1) để tính trên ma trận (trục x dòng)
+        self._lut_lo = self._lut_lo[:, None]
+        self._lut_max = self._lut_max[:, None]
+        self._lut_sizes = self._lut_sizes[:, None]
+        self._lut_base = self._lut_base[:, None]
+        self._lut_axes = lut_axes
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Mapping[str, np.ndarray], metadata: Mapping[str, Any]
+    ) -> "TreeLookupTable":
+        """Tạo lại bảng từ to_arrays() (chỉ cần NumPy, không có model sklearn)"""
+        fallback = CompiledTreeModel.from_arrays(
+            {
+                key[len("fallback_") :]: array
+                for key, array in arrays.items()
+                if key.startswith("fallback_")
+            },
+            metadata["fallback"],
+        )
+        axes = [
+            (
+                feature,
+                arrays[f"thresholds_{i}"],
+                arrays[f"remap_{i}"],
+                stride,
+                # hi < lo: feature không nhận số nguyên
+                int_range if int_range[1] >= int_range[0] else None,
+            )
+            for i, (feature, stride, int_range) in enumerate(
+                zip(
+                    arrays["axis_features"].tolist(),
+                    arrays["axis_strides"].tolist(),
+                    arrays["axis_int_ranges"].tolist(),
+                )
+            )
+        ]
+        scaler = None
+        if "scaler_mean" in arrays:
+            scaler = (arrays["scaler_mean"], arrays["scaler_scale"])
+        return cls(
+            arrays["table"],
+            arrays["proba"],
+            arrays["classes"],
+            axes,
+            fallback,
+            scaler=scaler,
+            source=metadata.get("source", ""),
+            build_info=metadata.get("build_info"),
+        )
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Các mảng và metadata đủ để tạo lại bảng bằng from_arrays()
+
+        Returns:
+            Tuple (arrays, metadata): arrays lưu được bằng np.savez, metadata
+            là dict JSON được
+        """
+        fallback_arrays, fallback_metadata = self._fallback.to_arrays()
+        arrays = {
+            "table": self._table,
+            "proba": self._proba,
+            "classes": self.classes_,
+            "axis_features": np.array([a.feature for a in self._axes], dtype=np.int32),
+            "axis_strides": np.array([a.stride for a in self._axes], dtype=np.int64),
+            "axis_int_ranges": np.array(
+                [a.int_range or (0, -1, 0) for a in self._axes], dtype=np.int64
+            ).reshape(-1, 3),
+        }
+        for i, axis in enumerate(self._axes):
+            arrays[f"thresholds_{i}"] = axis.thresholds
+            arrays[f"remap_{i}"] = axis.remap.astype(np.int32)
+        if self._scaler is not None:
+            arrays["scaler_mean"], arrays["scaler_scale"] = self._scaler
+        for key, array in fallback_arrays.items():
+            arrays[f"fallback_{key}"] = array
+        metadata = {
+            "engine": "tree_table",
+            "source": self.source,
+            "fallback": fallback_metadata,
+            "build_info": self._build_info,
+        }
+        return arrays, metadata
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Probability theo thứ tự classes_, shape (n_rows, n_classes)"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, expected (n_rows, {self.n_features_in_})"
+            )
+        if np.isnan(X).any():
+            raise ValueError("Input X contains NaN")
+
+        if X.shape[0] <= SCALAR_LOOKUP_LIMIT:
+            return self._lookup_rows(X)
+
+        cells, inside = self._cells(X)
+        if inside.all():
+            return self._proba.take(self._table.take(cells), axis=0)
+        proba = np.empty((X.shape[0], self._proba.shape[1]))
+        proba[inside] = self._proba.take(self._table.take(cells[inside]), axis=0)
+        proba[~inside] = self._fallback.predict_proba(X[~inside])
+        return proba
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Label = class có probability cao nhất (như sklearn)"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def _cells(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vị trí ô của từng dòng và mask các dòng nằm trong bảng"""
+        n_rows = X.shape[0]
+        cells = np.zeros(n_rows, dtype=np.int64)
+        # Ma trận (trục x dòng): các phép tính theo trục cộng các hàng liên tục
+        X = X.T
+
+        if self._lut_axes:
+            values = X[self._lut_features]
+            with np.errstate(invalid="ignore"):
+                ints = values.astype(np.intp)
+            offsets = np.minimum(ints - self._lut_lo, self._lut_max)
+            exact = (
+                (ints == values) & (offsets >= 0) & (offsets < self._lut_sizes)
+            ).all(axis=0)
+            if exact.all():
+                cells += self._lut_cells.take(offsets + self._lut_base).sum(axis=0)
+            else:
+                # Dòng có giá trị không nguyên / ngoài khoảng: tra từng trục
+                cells[exact] = self._lut_cells.take(
+                    offsets[:, exact] + self._lut_base
+                ).sum(axis=0)
+                for axis in self._lut_axes:
+                    position = axis.positions(X[axis.feature, ~exact])
+                    cells[~exact] += np.where(
+                        position >= 0, position * axis.stride, OUTSIDE
+                    )
+
+        for axis in self._search_axes:
+            position = axis.positions(X[axis.feature])
+            cells += np.where(position >= 0, position * axis.stride, OUTSIDE)
+        inside = cells >= 0
+        return cells.astype(np.intp), inside
+
+    def _lookup_rows(self, X: np.ndarray) -> np.ndarray:
+        rows = []
+        outside = []
+        for i, row in enumerate(X.tolist()):
+            cell = 0
+            for axis in self._axes:
+                position = axis.position(row[axis.feature])
+                if position < 0:
+                    break
+                cell += position * axis.stride
+            else:
+                rows.append(self._proba_rows[self._table[cell]])
+                continue
+            rows.append(None)
+            outside.append(i)
+
+        if not outside:
+            return np.array(rows, dtype=np.float64)
+        fallback = self._fallback.predict_proba(X[outside]).tolist()
+        for i, proba in zip(outside, fallback):
+            rows[i] = proba
+        return np.array(rows, dtype=np.float64)
+
+    def verify(self, model: Any, points: Sequence[np.ndarray], seed: int = 0) -> Dict[str, Any]:
+        """
+        So sánh output với model gốc
+
+        Mọi ô của bảng được kiểm tra (theo chunk VERIFY_CHUNK_ROWS ô): input
+        dựng lại từ giá trị gốc của từng vị trí phải tra ra đúng ô đó, và
+        probabilities của ô phải bằng predict_proba() của model gốc. Sau đó
+        các dòng sinh quanh threshold của các cây (kể cả ngoài bảng) và 1 ô
+        cho mỗi kết quả khác nhau được kiểm tra qua predict_proba() (batch và
+        từng dòng) và label của predict().
+
+        Args:
+            model: Model gốc (sklearn hoặc CompiledTreeModel)
+            points: Giá trị input gốc cho từng vị trí của từng trục (theo feature)
+
+        Returns:
+            Dict số ô, số dòng đã kiểm tra và sai lệch probability lớn nhất
+
+        Raises:
+            ValueError: Nếu vị trí ô, label hoặc probability khác model gốc
+        """
+        shape = tuple(len(p) for p in points)
+        points = [np.asarray(p, dtype=np.float64) for p in points]
+
+        def inputs(cells: np.ndarray) -> np.ndarray:
+            positions = np.unravel_index(cells, shape)
+            return np.column_stack([p[pos] for p, pos in zip(points, positions)])
+
+        for start in range(0, self._table.size, VERIFY_CHUNK_ROWS):
+            cells = np.arange(start, min(start + VERIFY_CHUNK_ROWS, self._table.size))
+            X = inputs(cells)
+            found, inside = self._cells(X)
+            if not inside.all() or not np.array_equal(found, cells):
+                raise ValueError(f"Lookup table of {self.source} maps cells inconsistently")
+            diff = float(
+                np.abs(
+                    self._proba.take(self._table[cells], axis=0) - model.predict_proba(X)
+                ).max()
+            )
+            if diff != 0.0:
+                raise ValueError(
+                    f"Lookup table does not match {self.source} "
+                    f"(max probability difference {diff:.3g})"
+                )
+
+        _, first = np.unique(self._table, return_index=True)
+        X = np.vstack([inputs(first), self._fallback._threshold_samples(256, seed)])
+        expected = model.predict_proba(X)
+        expected_labels = model.predict(X)
+
+        batch = self.predict_proba(X)
+        single = np.vstack([self.predict_proba(row[None]) for row in X[:64]])
+        max_diff = max(
+            float(np.abs(batch - expected).max()),
+            float(np.abs(single - expected[:64]).max()),
+        )
+        labels = self.classes_.take(np.argmax(batch, axis=1), axis=0)
+        if max_diff != 0.0 or not np.array_equal(labels, expected_labels):
+            raise ValueError(
+                f"Lookup table does not match {self.source} "
+                f"(max probability difference {max_diff:.3g})"
+            )
+        return {"cells": int(self._table.size), "rows": len(X), "max_abs_diff": max_diff}
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes của bảng và ma trận probabilities"""
+        return self._table.nbytes + self._proba.nbytes
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "engine": "tree_table",
+            "source": self.source,
+            "cells": int(self._table.size),
+            "outcomes": int(self._proba.shape[0]),
+            "table_bytes": int(self.nbytes),
+            "lookup_features": [axis.feature for axis in self._axes],
+            **self._build_info,
+        }
+
+
+class TreeTableBuilder:
+    """
+    Dựng TreeLookupTable cho các models được chọn lúc build ModelSet
+
+    Args:
+        domains: Miền giá trị của từng feature (xem feature_domains())
+        models: Tên các models được dựng bảng
+        max_bytes: Giới hạn bộ nhớ (ước lượng) của bảng lúc dựng; vượt quá
+            thì không dựng
+    """
+
+    def __init__(
+        self,
+        domains: Sequence[FeatureDomain],
+        models: Iterable[str],
+        max_bytes: int,
+    ):
+        self.domains = list(domains)
+        self.models = set(models)
+        self.max_bytes = max_bytes
+
+    def build(self, model: Any) -> Tuple[TreeLookupTable, Dict[str, Any]]:
+        """
+        Dựng bảng cho model (sklearn hoặc CompiledTreeModel) và kiểm tra khớp
+
+        Returns:
+            Tuple (bảng, kết quả kiểm tra của verify() kèm verify_seconds)
+
+        Raises:
+            ValueError: Nếu model không phải cây, bảng quá lớn hoặc không khớp
+        """
+        started = time.perf_counter()
+        if isinstance(model, CompiledTreeModel):
+            engine = model
+            # Kiểm tra với model sklearn gốc nếu engine còn giữ
+            reference = model._fallback if model._fallback is not None else model
+        else:
+            engine = compile_tree_model(model, keep_fallback=False)
+            reference = model
+        if len(self.domains) != engine.n_features_in_:
+            raise ValueError(
+                f"Model has {engine.n_features_in_} features, "
+                f"expected {len(self.domains)}"
+            )
+
+        axes = [
+            _build_axis(engine, feature, domain)
+            for feature, domain in enumerate(self.domains)
+        ]
+        shape = tuple(len(axis.points) for axis in axes)
+        n_cells = int(np.prod(shape, dtype=np.int64))
+        leaves = _tree_leaves(engine)
+        if engine.n_trees == 1:
+            build_bytes = n_cells * _id_dtype(len(leaves[0])).itemsize
+        else:
+            build_bytes = n_cells * ENSEMBLE_BUILD_BYTES_PER_CELL
+        if build_bytes > self.max_bytes:
+            raise ValueError(
+                f"Lookup table too large: {n_cells:,} cells "
+                f"(~{build_bytes / 2**20:.0f} MiB > {self.max_bytes / 2**20:.0f} MiB)"
+            )
+
+        # Bảng id (tối đa 4 bytes/ô) + probabilities float64 của từng kết quả
+        max_outcomes = max(
+            (self.max_bytes - n_cells * 4) // (8 * len(engine.classes_)), 1
+        )
+        table, proba = _fill_table(engine, axes, shape, leaves, max_outcomes)
+        table, axes = _merge_positions(table, axes)
+
+        strides = np.cumprod((1,) + table.shape[:0:-1])[::-1]
+        lookup_axes = [
+            (feature, axis.thresholds, axis.remap, stride, axis.int_range)
+            for feature, (axis, stride) in enumerate(zip(axes, strides.tolist()))
+            if len(axis.points) > 1 or (axis.remap < 0).any()
+        ]
+        lookup = TreeLookupTable(
+            table.astype(_id_dtype(len(proba))),
+            proba,
+            engine.classes_,
+            lookup_axes,
+            fallback=engine,
+            scaler=engine._scaler,
+            source=engine.source,
+            build_info={
+                "build_seconds": round(time.perf_counter() - started, 3),
+                "build_cells": n_cells,
+                "axis_sizes": list(table.shape),
+            },
+        )
+        started = time.perf_counter()
+        checked = lookup.verify(reference, [axis.inputs for axis in axes])
+        checked["verify_seconds"] = round(time.perf_counter() - started, 3)
+        return lookup, checked
+
+
+def _id_dtype(n_ids: int) -> np.dtype:
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n_ids <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _build_axis(engine: CompiledTreeModel, feature: int, domain: FeatureDomain) -> _Axis:
+    """Các vị trí của 1 feature: bucket chứa giá trị hợp lệ của domain"""
+    is_split = np.isfinite(engine._threshold) & (engine._feature == feature)
+    thresholds = np.unique(engine._threshold[is_split])
+    mean, scale = 0.0, 1.0
+    if engine._scaler is not None:
+        mean = float(np.broadcast_to(engine._scaler[0], engine.n_features_in_)[feature])
+        scale = float(np.broadcast_to(engine._scaler[1], engine.n_features_in_)[feature])
+
+    def transform(values: np.ndarray) -> np.ndarray:
+        # Như CompiledTreeModel._prepare: scaler rồi ép về float32
+        return ((values - mean) / scale).astype(np.float32).astype(np.float64)
+
+    inputs, int_range = None, None
+    if domain.values is not None:
+        inputs = np.asarray(domain.values, dtype=np.float64)
+        if (inputs == np.round(inputs)).all():
+            int_range = (int(inputs[0]), int(inputs[-1]), False)
+    elif domain.integer and domain.minimum is not None and thresholds.size:
+        upper = np.ceil(thresholds[-1] * scale + mean) + 2
+        if upper - domain.minimum <= INTEGER_ENUMERATION_LIMIT:
+            inputs = np.arange(domain.minimum, max(upper, domain.minimum) + 1)
+            int_range = (int(inputs[0]), int(inputs[-1]), True)
+            if np.searchsorted(thresholds, transform(inputs[-1:]))[0] != thresholds.size:
+                # Số nguyên lớn nhất chưa vượt threshold cuối -> xem như số thực
+                inputs, int_range = None, None
+
+    if inputs is not None:
+        points = transform(inputs)
+        buckets = np.searchsorted(thresholds, points, side="left")
+        reachable, first = np.unique(buckets, return_index=True)
+        remap = np.full(thresholds.size + 1, -1, dtype=np.intp)
+        remap[reachable] = np.arange(reachable.size)
+        return _Axis(thresholds, remap, points[first], inputs[first], int_range)
+
+    # Số thực: mỗi bucket đại diện bởi 1 giá trị float32 nằm trong bucket
+    if thresholds.size == 0:
+        points = np.zeros(1)
+    else:
+        below = thresholds.astype(np.float32)
+        below = np.where(
+            below.astype(np.float64) > thresholds, np.nextafter(below, np.float32(-np.inf)), below
+        )
+        above = np.nextafter(below[-1:], np.float32(np.inf))
+        points = np.concatenate([below, above]).astype(np.float64)
+    buckets = np.searchsorted(thresholds, points, side="left")
+    # Bucket không chứa giá trị float32 nào thì input cũng không rơi vào được
+    reachable = buckets == np.arange(points.size)
+    remap = np.full(points.size, -1, dtype=np.intp)
+    remap[reachable] = np.arange(reachable.sum())
+    points = points[reachable]
+    # Với scaler, input dựng lại có thể rơi sang bucket bên cạnh: verify() báo
+    # lỗi và model giữ engine cũ
+    return _Axis(thresholds, remap, points, points * scale + mean)
+
+
+def _tree_leaves(engine: CompiledTreeModel) -> List[Dict[int, int]]:
+    """Mapping node lá -> số thứ tự lá trong cây, cho từng cây"""
+    leaves = []
+    roots = engine._roots_list + [engine.n_nodes]
+    for start, end in zip(roots, roots[1:]):
+        nodes = np.flatnonzero(engine._is_leaf[start:end]) + start
+        leaves.append({node: i for i, node in enumerate(nodes.tolist())})
+    return leaves
+
+
+def _leaf_table(
+    engine: CompiledTreeModel,
+    root: int,
+    axes: Sequence[_Axis],
+    shape: Tuple[int, ...],
+    leaves: Mapping[int, int],
+) -> np.ndarray:
+    """Số thứ tự lá của 1 cây cho mọi ô, duyệt cây trên khoảng vị trí của từng trục"""
+    table = np.empty(shape, dtype=_id_dtype(len(leaves)))
+    left, right = engine._left_list, engine._right_list
+    feature, threshold = engine._feature_list, engine._threshold_list
+
+    stack = [(root, tuple((0, n) for n in shape))]
+    while stack:
+        node, bounds = stack.pop()
+        if left[node] == node:
+            table[tuple(slice(lo, hi) for lo, hi in bounds)] = leaves[node]
+            continue
+        col = feature[node]
+        lo, hi = bounds[col]
+        # Vị trí có giá trị <= threshold đi trái
+        split = int(np.searchsorted(axes[col].points, threshold[node], side="right"))
+        split = min(max(split, lo), hi)
+        if split > lo:
+            stack.append((left[node], bounds[:col] + ((lo, split),) + bounds[col + 1 :]))
+        if split < hi:
+            stack.append((right[node], bounds[:col] + ((split, hi),) + bounds[col + 1 :]))
+    return table
+
+
+def _fill_table(
+    engine: CompiledTreeModel,
+    axes: Sequence[_Axis],
+    shape: Tuple[int, ...],
+    leaves: Sequence[Mapping[int, int]],
+    max_outcomes: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Id kết quả của mọi ô và probabilities của từng id
+
+    1 cây: id = số thứ tự lá. Ensemble: id = tổ hợp lá của các cây, đánh số
+    lại sau mỗi cây; probabilities tính bằng engine trên 1 ô đại diện mỗi id
+    (cùng thứ tự cộng như sklearn), từng đoạn PROBA_CHUNK_ROWS dòng.
+
+    Raises:
+        ValueError: Nếu số kết quả khác nhau vượt max_outcomes
+    """
+    if engine.n_trees == 1:
+        table = _leaf_table(engine, engine._roots_list[0], axes, shape, leaves[0])
+        nodes = np.fromiter(leaves[0], dtype=np.intp, count=len(leaves[0]))
+        return table, engine._leaf_proba[nodes]
+
+    ids = np.zeros(int(np.prod(shape, dtype=np.int64)), dtype=np.int64)
+    n_ids = 1  # Cận trên của số id, key = id * số lá + lá
+    for root, tree_leaves in zip(engine._roots_list, leaves):
+        if n_ids * len(tree_leaves) > KEY_LIMIT:
+            # Đánh số lại (sort) chỉ khi key sắp tràn int64
+            combined, ids = np.unique(ids, return_inverse=True)
+            n_ids = combined.size
+            # Dừng sớm: số tổ hợp chỉ tăng theo số cây
+            if n_ids > max_outcomes:
+                raise ValueError(
+                    f"Lookup table too large: more than {max_outcomes:,} distinct outcomes"
+                )
+        leaf = _leaf_table(engine, root, axes, shape, tree_leaves).ravel()
+        ids *= len(tree_leaves)
+        ids += leaf
+        n_ids *= len(tree_leaves)
+    _, first, ids = np.unique(ids, return_index=True, return_inverse=True)
+    if first.size > max_outcomes:
+        raise ValueError(
+            f"Lookup table too large: {first.size:,} distinct outcomes > {max_outcomes:,}"
+        )
+
+    proba = np.empty((first.size, len(engine.classes_)), dtype=np.float64)
+    for start in range(0, first.size, PROBA_CHUNK_ROWS):
+        chunk = first[start : start + PROBA_CHUNK_ROWS]
+        positions = np.unravel_index(chunk, shape)
+        points = np.column_stack(
+            [axis.points[pos] for axis, pos in zip(axes, positions)]
+        ).astype(np.float32)
+        proba[start : start + chunk.size] = engine._average(engine._traverse(points))
+    return ids.reshape(shape), proba
+
+
+def _merge_positions(
+    table: np.ndarray, axes: Sequence[_Axis]
+) -> Tuple[np.ndarray, List[_Axis]]:
+    """Gộp các vị trí của 1 trục cho cùng kết quả ở mọi ô (không đổi kết quả tra)"""
+    axes = list(axes)
+    for col, axis in enumerate(axes):
+        size = table.shape[col]
+        if size == 1:
+            continue
+        rows = np.moveaxis(table, col, 0).reshape(size, -1)
+        # Gom các vị trí có cùng nội dung (so sánh bytes, không hash số học)
+        groups: Dict[bytes, int] = {}
+        position = np.array(
+            [groups.setdefault(row.tobytes(), len(groups)) for row in rows],
+            dtype=np.intp,
+        )
+        if len(groups) == size:
+            continue
+        # Vị trí đầu tiên của mỗi nhóm, giữ thứ tự theo bucket
+        keep = np.unique(position, return_index=True)[1]
+
+        table = np.take(table, keep, axis=col)
+        remap = np.where(axis.remap >= 0, position[np.maximum(axis.remap, 0)], -1)
+        axes[col] = _Axis(
+            axis.thresholds, remap, axis.points[keep], axis.inputs[keep], axis.int_range
+        )
+    return np.ascontiguousarray(table), axes
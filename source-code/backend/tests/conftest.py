@@ -0,0 +1,50 @@
+"""
+Fixtures dùng chung cho tests
+
+Dữ liệu là bệnh nhân ngẫu nhiên đã encode theo FEATURE_ORDER (cùng miền
+giá trị như PatientInput) với seed cố định; models được fit trên dữ liệu này
+nên tests không cần các file trong model_v2/.
+"""
+
+import numpy as np
+import pytest
+
+from config import ENCODING_MAPS, FEATURE_ORDER
+from schemas import feature_constraints
+
+N_CLASSES = 5
+
+
+def encoded_patients(n: int, seed: int) -> np.ndarray:
+    """Ma trận (n, n_features) các bệnh nhân ngẫu nhiên đã encode"""
+    allowed_values, _, integer_features = feature_constraints()
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, len(FEATURE_ORDER)))
+    for col, feature in enumerate(FEATURE_ORDER):
+        if feature in ENCODING_MAPS:
+            X[:, col] = rng.choice(list(ENCODING_MAPS[feature].values()), n)
+        elif feature in allowed_values:
+            X[:, col] = rng.choice(allowed_values[feature], n)
+        elif feature in integer_features:
+            X[:, col] = rng.poisson(2.0, n)
+        else:
+            X[:, col] = np.round(rng.uniform(1.0, 7.0, n), 2)
+    return X
+
+
+def noisy_labels(X: np.ndarray, seed: int) -> np.ndarray:
+    """Label 0..N_CLASSES-1 phụ thuộc vào vài feature, có nhiễu"""
+    rng = np.random.default_rng(seed)
+    score = X[:, 4] + 0.7 * X[:, 9] + 0.5 * X[:, 8] + rng.normal(0, 1.5, len(X))
+    return np.digitize(score, np.quantile(score, [0.2, 0.4, 0.6, 0.8]))
+
+
+@pytest.fixture(scope="session")
+def training_data():
+    X = encoded_patients(600, seed=0)
+    return X, noisy_labels(X, seed=1)
+
+
+@pytest.fixture(scope="session")
+def test_inputs():
+    return encoded_patients(3000, seed=2)
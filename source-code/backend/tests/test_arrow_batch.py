@@ -0,0 +1,233 @@
+"""ArrowBatchCodec: decode input Arrow, encode kết quả, endpoint /predict-all-arrow"""
+
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import encoded_patients
+from services.serialization import column_prefix
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_app_does_not_import_pandas(tmp_path):
+    # Serve models portable: import app (kể cả Arrow codec) không cần pandas
+    code = (
+        "import json, sys\n"
+        "import app\n"
+        "print(json.dumps(sorted({'pandas', 'sklearn'} & set(sys.modules))))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=BACKEND_DIR,
+        env={
+            **os.environ,
+            "PORTABLE_MODEL_DIR": str(tmp_path),
+            "MODEL_REGISTRY_DIR": str(tmp_path / "registry"),
+        },
+    )
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+# ---------- Codec ----------
+@pytest.fixture(scope="module")
+def arrow():
+    return pytest.importorskip("pyarrow")
+
+
+@pytest.fixture(scope="module")
+def codec(arrow):
+    from config import ENCODING_MAPS, FEATURE_ORDER
+    from schemas import feature_constraints
+    from services.arrow_batch import ArrowBatchCodec
+
+    allowed_values, minimums, integer_features = feature_constraints()
+    return ArrowBatchCodec(
+        ENCODING_MAPS,
+        FEATURE_ORDER,
+        allowed_values=allowed_values,
+        minimums=minimums,
+        integer_features=integer_features,
+        max_rows=100,
+    )
+
+
+def _stream(arrow, table) -> bytes:
+    sink = arrow.BufferOutputStream()
+    with arrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _mixed_table(arrow, X):
+    """Cột categorical lần lượt dạng string, dictionary string và mã số"""
+    from config import ENCODING_MAPS, FEATURE_ORDER
+
+    columns = {}
+    for col, feature in enumerate(FEATURE_ORDER):
+        values = X[:, col]
+        if feature not in ENCODING_MAPS:
+            columns[feature] = arrow.array(values)
+            continue
+        names = {code: key for key, code in ENCODING_MAPS[feature].items()}
+        strings = [str(names[value]) for value in values.tolist()]
+        kind = col % 3
+        if kind == 0:
+            columns[feature] = arrow.array(strings)
+        elif kind == 1:
+            columns[feature] = arrow.array(strings).dictionary_encode()
+        else:
+            columns[feature] = arrow.array(values.astype(np.int64))
+    return arrow.table(columns)
+
+
+def test_decode_mixed_columns(arrow, codec):
+    X = encoded_patients(40, seed=3)
+    decoded = codec.decode(_stream(arrow, _mixed_table(arrow, X)))
+    assert decoded.flags.c_contiguous
+    np.testing.assert_array_equal(decoded, X)
+
+
+def test_decode_multiple_chunks(arrow, codec):
+    X = encoded_patients(30, seed=4)
+    table = arrow.concat_tables(
+        [_mixed_table(arrow, X[start : start + 10]) for start in range(0, 30, 10)]
+    ).unify_dictionaries()
+    assert table.column(0).num_chunks == 3
+    np.testing.assert_array_equal(codec.decode(_stream(arrow, table)), X)
+
+
+def _replace(table, feature, values):
+    return table.set_column(table.column_names.index(feature), feature, values)
+
+
+def _null_strings(arrow, table):
+    return _replace(table, "cellularity", arrow.array([None] * len(table), arrow.string()))
+
+
+def _unknown_string(arrow, table):
+    return _replace(table, "cellularity", arrow.array(["Huge"] * len(table)))
+
+
+def _below_minimum(arrow, table):
+    return _replace(table, "lymph_nodes_examined_positive", arrow.array([-1.0] * len(table)))
+
+
+def _missing_column(arrow, table):
+    return table.drop_columns(["her2_status"])
+
+
+def _empty(arrow, table):
+    return table.slice(0, 0)
+
+
+@pytest.mark.parametrize(
+    "change, message",
+    [
+        (_null_strings, "Null values for feature 'cellularity'"),
+        (_unknown_string, "Unknown value 'Huge' for feature 'cellularity'"),
+        (_below_minimum, "for feature 'lymph_nodes_examined_positive'"),
+        (_missing_column, "Missing columns ['her2_status']"),
+        (_empty, "Empty batch"),
+    ],
+)
+def test_decode_rejects_invalid_input(arrow, codec, change, message):
+    table = change(arrow, _mixed_table(arrow, encoded_patients(5, seed=5)))
+    with pytest.raises(ValueError, match=re.escape(message)):
+        codec.decode(_stream(arrow, table))
+
+
+def test_decode_rejects_too_many_rows(arrow, codec):
+    table = _mixed_table(arrow, encoded_patients(101, seed=6))
+    with pytest.raises(ValueError, match="maximum is 100"):
+        codec.decode(_stream(arrow, table))
+
+
+# ---------- Endpoint ----------
+@pytest.fixture
+def api(arrow, monkeypatch, training_data):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    import app as api
+    from config import CANCER_TYPE_DETAILED, FEATURE_ORDER
+    from services.model_service import ModelService
+
+    X, y = training_data
+    service = ModelService(
+        models={
+            "Random Forest": RandomForestClassifier(
+                n_estimators=10, max_depth=5, random_state=0
+            ).fit(X, y),
+            "Decision Tree": DecisionTreeClassifier(max_depth=6, random_state=0).fit(X, y),
+        },
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        feature_order=FEATURE_ORDER,
+    )
+    monkeypatch.setattr(api, "model_service", service)
+    return api
+
+
+def _arrow_request(body: bytes):
+    from starlette.requests import Request
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(
+        {"type": "http", "method": "POST", "path": "/predict-all-arrow", "headers": []},
+        receive,
+    )
+
+
+def test_arrow_endpoint_matches_batch_endpoint(arrow, api):
+    from benchmarks.workload import random_patients
+    from config import FEATURE_ORDER
+
+    patients = random_patients(50, seed=7)
+    table = arrow.table({f: [p[f] for p in patients] for f in FEATURE_ORDER})
+
+    response = asyncio.run(api.predict_all_arrow(_arrow_request(_stream(arrow, table))))
+    result = arrow.ipc.open_stream(response.body).read_all()
+    assert json.loads(result.schema.metadata[b"failed_models"]) == {}
+
+    batch = api.PatientBatchInput(patients=[api.PatientInput(**p) for p in patients])
+    expected = json.loads(
+        asyncio.run(api.predict_all_batch(batch, probabilities="array")).body
+    )
+    for model_name, classes in expected["probability_classes"].items():
+        prefix = column_prefix(model_name)
+        predictions = [
+            next(p for p in row["predictions"] if p["model_name"] == model_name)
+            for row in expected["results"]
+        ]
+        assert result.column(f"{prefix}_code").to_pylist() == [
+            p["cancer_type_code"] for p in predictions
+        ]
+        for col, class_name in enumerate(classes):
+            np.testing.assert_allclose(
+                result.column(f"{prefix}_proba_{column_prefix(class_name)}").to_numpy(),
+                [p["probabilities"][col] for p in predictions],
+                atol=5e-5,
+            )
+
+
+@pytest.mark.parametrize("body", [b"not arrow", None])
+def test_arrow_endpoint_invalid_input_is_422(arrow, api, body):
+    from fastapi import HTTPException
+
+    if body is None:
+        table = _missing_column(arrow, _mixed_table(arrow, encoded_patients(3, seed=8)))
+        body = _stream(arrow, table)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(api.predict_all_arrow(_arrow_request(body)))
+    assert excinfo.value.status_code == 422
@@ -0,0 +1,91 @@
+"""Attributions: tính cộng tính, chia chunk và RBFKernelAttributor so với KernelAttributor"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from services import attributions
+from services.attributions import (
+    KernelAttributor,
+    RBFKernelAttributor,
+    TreePathAttributor,
+    build_attributor,
+)
+from services.compiled_svm import PROBA_TOLERANCE
+
+
+def _models():
+    return {
+        "decision_tree": DecisionTreeClassifier(max_depth=8, random_state=0),
+        "random_forest": RandomForestClassifier(
+            n_estimators=25, max_depth=6, random_state=0
+        ),
+        "svm": Pipeline(
+            [
+                ("scaler", StandardScaler()),
+                ("svc", SVC(kernel="rbf", probability=True, random_state=0)),
+            ]
+        ),
+    }
+
+
+@pytest.fixture(scope="module", params=list(_models()))
+def model(request, training_data):
+    X, y = training_data
+    return _models()[request.param].fit(X, y)
+
+
+def test_contributions_sum_to_proba(model, test_inputs):
+    attributor = build_attributor(model)
+    X = test_inputs[:200]
+
+    contributions = attributor.attribute(X)
+    assert contributions.shape == (len(X), X.shape[1], len(model.classes_))
+    total = attributor.base_values + contributions.sum(axis=1)
+    if isinstance(attributor, TreePathAttributor):
+        np.testing.assert_allclose(total, model.predict_proba(X), rtol=0, atol=1e-12)
+    else:
+        np.testing.assert_allclose(
+            total, attributor.engine.predict_proba(X), rtol=0, atol=1e-10
+        )
+        np.testing.assert_allclose(
+            total, model.predict_proba(X), rtol=0, atol=PROBA_TOLERANCE + 1e-10
+        )
+
+
+def test_chunked_matches_unchunked(model, test_inputs, monkeypatch):
+    attributor = build_attributor(model)
+    X = test_inputs[:50]
+    expected = attributor.attribute(X)
+
+    # Vài dòng mỗi chunk, chunk cuối không đủ dòng
+    if isinstance(attributor, TreePathAttributor):
+        per_row = attributor.engine.n_trees
+    else:
+        per_row = attributor._elements_per_row()
+    monkeypatch.setattr(attributions, "ATTRIBUTION_CHUNK_ELEMENTS", 7 * per_row)
+
+    np.testing.assert_allclose(attributor.attribute(X), expected, rtol=0, atol=1e-12)
+
+
+def test_rbf_attributor_matches_generic(training_data, test_inputs):
+    X, y = training_data
+    svm = _models()["svm"].fit(X[:200], y[:200])
+    rbf = build_attributor(svm, background_size=5)
+    assert isinstance(rbf, RBFKernelAttributor)
+
+    generic = KernelAttributor(rbf.engine.predict_proba, rbf.background, rbf.classes_)
+    np.testing.assert_allclose(generic.base_values, rbf.base_values, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(
+        rbf.attribute(test_inputs[:20]),
+        generic.attribute(test_inputs[:20]),
+        rtol=0,
+        atol=1e-10,
+    )
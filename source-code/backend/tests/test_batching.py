@@ -0,0 +1,92 @@
+"""MicroBatcher: gom request đồng thời thành batch, mỗi caller nhận đúng dòng của mình"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.batching import MicroBatcher
+
+
+def _recording_batcher(**kwargs):
+    """batch_fn trả lại tổng mỗi dòng, ghi lại các batch đã chạy"""
+    batches = []
+
+    def batch_fn(X):
+        batches.append(X.copy())
+        return [float(row.sum()) for row in X]
+
+    async def runner(fn, X):
+        return fn(X)
+
+    return MicroBatcher(batch_fn, runner, **kwargs), batches
+
+
+def _rows(n):
+    return [np.full((1, 3), float(i)) for i in range(n)]
+
+
+def test_concurrent_requests_are_coalesced():
+    async def scenario():
+        batcher, batches = _recording_batcher(max_batch_size=64, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(row) for row in _rows(10)))
+        return batcher, batches, results
+
+    batcher, batches, results = asyncio.run(scenario())
+
+    assert len(batches) == 1 and batches[0].shape == (10, 3)
+    # Dòng i có tổng 3*i: mỗi caller nhận đúng kết quả của dòng mình
+    assert results == [3.0 * i for i in range(10)]
+    assert batcher.stats()["pending"] == 0
+    assert batcher.batch_size.snapshot()["count"] == 1
+
+
+def test_full_batch_runs_without_waiting():
+    async def scenario():
+        # max_wait rất lớn: batch chỉ có thể chạy vì đủ max_batch_size
+        batcher, batches = _recording_batcher(max_batch_size=4, max_wait_ms=60_000)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(row) for row in _rows(8))), timeout=5
+        )
+        return batches, results
+
+    batches, results = asyncio.run(scenario())
+
+    assert [len(batch) for batch in batches] == [4, 4]
+    assert results == [3.0 * i for i in range(8)]
+
+
+def test_batch_error_reaches_every_caller():
+    async def runner(fn, X):
+        raise RuntimeError("model failed")
+
+    async def scenario():
+        batcher = MicroBatcher(lambda X: X, runner, max_batch_size=8, max_wait_ms=1)
+        return await asyncio.gather(
+            *(batcher.submit(row) for row in _rows(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_caller_does_not_affect_others():
+    async def scenario():
+        batcher, batches = _recording_batcher(max_batch_size=64, max_wait_ms=20)
+        tasks = [asyncio.create_task(batcher.submit(row)) for row in _rows(3)]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        return batches, await asyncio.gather(*tasks, return_exceptions=True)
+
+    batches, results = asyncio.run(scenario())
+
+    assert len(batches) == 1 and len(batches[0]) == 3
+    assert results[0] == 0.0 and results[2] == 6.0
+    assert isinstance(results[1], asyncio.CancelledError)
+
+
+def test_rejects_invalid_batch_size():
+    with pytest.raises(ValueError):
+        MicroBatcher(lambda X: X, None, max_batch_size=0)
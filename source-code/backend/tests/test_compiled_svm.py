@@ -0,0 +1,109 @@
+"""CompiledSVM so với Pipeline(StandardScaler, SVC) của sklearn"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from services.compiled_svm import PROBA_TOLERANCE, compile_svm_model
+
+
+@pytest.fixture(scope="module", params=["rbf", "linear"])
+def svm_model(request, training_data):
+    X, y = training_data
+    model = Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            ("svc", SVC(kernel=request.param, probability=True, random_state=0)),
+        ]
+    )
+    return model.fit(X, y)
+
+
+@pytest.mark.parametrize("batch_size", [1, 8, 9, 3000])
+def test_svm_proba_matches_sklearn(svm_model, test_inputs, batch_size):
+    compiled = compile_svm_model(svm_model)
+    X = test_inputs[:batch_size]
+
+    diff = np.abs(compiled.predict_proba(X) - svm_model.predict_proba(X)).max()
+    assert diff <= PROBA_TOLERANCE
+    assert np.array_equal(compiled.predict(X), svm_model.predict(X))
+
+
+@pytest.mark.parametrize(
+    "scaler_kwargs", [{"with_mean": False}, {"with_std": False}], ids=str
+)
+def test_svm_partial_scaler_matches_sklearn(training_data, test_inputs, scaler_kwargs):
+    # mean_ vẫn được fit khi with_mean=False nhưng không được dùng
+    X, y = training_data
+    model = Pipeline(
+        [
+            ("scaler", StandardScaler(**scaler_kwargs)),
+            ("svc", SVC(kernel="rbf", probability=True, random_state=0)),
+        ]
+    ).fit(X, y)
+    compiled = compile_svm_model(model)
+
+    diff = np.abs(compiled.predict_proba(test_inputs) - model.predict_proba(test_inputs))
+    assert diff.max() <= PROBA_TOLERANCE
+    assert np.array_equal(compiled.predict(test_inputs), model.predict(test_inputs))
+
+
+def test_svm_edge_inputs_match_sklearn(svm_model, training_data):
+    compiled = compile_svm_model(svm_model)
+    svc = svm_model.steps[-1][1]
+    scaler = svm_model.steps[0][1]
+    n_features = training_data[0].shape[1]
+    X = np.vstack(
+        [
+            # Đúng tại các support vectors (kernel RBF = 1)
+            scaler.inverse_transform(svc.support_vectors_[:50]),
+            np.zeros((1, n_features)),
+            np.full((1, n_features), 1e3),
+            np.full((1, n_features), -1e3),
+        ]
+    )
+
+    diff = np.abs(compiled.predict_proba(X) - svm_model.predict_proba(X)).max()
+    assert diff <= PROBA_TOLERANCE
+    assert np.array_equal(compiled.predict(X), svm_model.predict(X))
+
+
+def test_svm_verify_and_roundtrip(svm_model, test_inputs):
+    compiled = compile_svm_model(svm_model)
+    assert compiled.verify(svm_model, test_inputs[:100])["max_abs_diff"] <= PROBA_TOLERANCE
+
+    arrays, metadata = compiled.to_arrays()
+    restored = type(compiled).from_arrays(arrays, metadata)
+    assert np.array_equal(
+        restored.predict_proba(test_inputs), compiled.predict_proba(test_inputs)
+    )
+
+
+def test_svm_requires_probability(training_data):
+    X, y = training_data
+    with pytest.raises(ValueError):
+        compile_svm_model(SVC().fit(X, y))
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_service_svm_labels_match_predict(svm_model, test_inputs, compiled):
+    from config import CANCER_TYPE_DETAILED
+    from services.model_service import ModelService
+
+    service = ModelService(
+        models={"SVM": svm_model},
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        derive_label_from_proba=True,
+        compiled_models=["SVM"] if compiled else None,
+    )
+    assert not service.get_capabilities("SVM").proba_argmax_is_label
+
+    codes, proba, _ = service.predict_arrays("SVM", test_inputs)
+    # Label theo vote one-vs-one như predict(), không theo argmax probability
+    assert np.array_equal(codes, svm_model.predict(test_inputs))
+    assert np.abs(proba - svm_model.predict_proba(test_inputs)).max() <= PROBA_TOLERANCE
@@ -0,0 +1,147 @@
+"""CompiledTreeModel so với Decision Tree / Random Forest của sklearn"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from services import compiled_trees
+from services.compiled_trees import compile_tree_model
+
+
+def _tree_models():
+    return {
+        "decision_tree": DecisionTreeClassifier(max_depth=8, random_state=0),
+        "random_forest": RandomForestClassifier(
+            n_estimators=25, max_depth=6, random_state=0
+        ),
+        "scaled_tree": Pipeline(
+            [
+                ("scaler", StandardScaler()),
+                ("tree", DecisionTreeClassifier(max_depth=8, random_state=0)),
+            ]
+        ),
+        # mean_ vẫn được fit khi with_mean=False nhưng không được dùng
+        "scaled_tree_no_mean": Pipeline(
+            [
+                ("scaler", StandardScaler(with_mean=False)),
+                ("tree", DecisionTreeClassifier(max_depth=8, random_state=0)),
+            ]
+        ),
+        "scaled_tree_no_std": Pipeline(
+            [
+                ("scaler", StandardScaler(with_std=False)),
+                ("tree", DecisionTreeClassifier(max_depth=8, random_state=0)),
+            ]
+        ),
+    }
+
+
+def _threshold_inputs(model, X: np.ndarray) -> np.ndarray:
+    """Các dòng có 1 feature nằm đúng trên threshold của 1 node (ở không gian gốc)"""
+    estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+    trees = getattr(estimator, "estimators_", [estimator])
+    rows = []
+    for i, tree in enumerate(trees[:5]):
+        nodes = np.flatnonzero(tree.tree_.children_left >= 0)
+        for node in nodes[:20]:
+            feature = tree.tree_.feature[node]
+            threshold = tree.tree_.threshold[node]
+            if hasattr(model, "steps"):
+                scaler = model.steps[0][1]
+                if scaler.with_std:
+                    threshold = threshold * scaler.scale_[feature]
+                if scaler.with_mean:
+                    threshold = threshold + scaler.mean_[feature]
+            row = X[(i + node) % len(X)].copy()
+            row[feature] = threshold
+            rows.append(row)
+    return np.array(rows)
+
+
+@pytest.fixture(scope="module", params=list(_tree_models()))
+def tree_model(request, training_data):
+    X, y = training_data
+    return _tree_models()[request.param].fit(X, y)
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 64, 3000])
+def test_tree_proba_matches_sklearn(tree_model, test_inputs, batch_size):
+    compiled = compile_tree_model(tree_model, keep_fallback=False)
+    X = test_inputs[:batch_size]
+
+    assert np.array_equal(compiled.predict_proba(X), tree_model.predict_proba(X))
+    assert np.array_equal(compiled.predict(X), tree_model.predict(X))
+
+
+def test_tree_single_rows_match_sklearn(tree_model, test_inputs):
+    compiled = compile_tree_model(tree_model, keep_fallback=False)
+    expected = tree_model.predict_proba(test_inputs[:50])
+    for row, proba in zip(test_inputs[:50], expected):
+        assert np.array_equal(compiled.predict_proba(row[None]), proba[None])
+
+
+def test_tree_edge_inputs_match_sklearn(tree_model, training_data):
+    compiled = compile_tree_model(tree_model, keep_fallback=False)
+    X = np.vstack(
+        [
+            _threshold_inputs(tree_model, training_data[0]),
+            np.zeros((1, training_data[0].shape[1])),
+            np.full((1, training_data[0].shape[1]), 1e6),
+            np.full((1, training_data[0].shape[1]), -1e6),
+        ]
+    )
+
+    assert np.array_equal(compiled.predict_proba(X), tree_model.predict_proba(X))
+    assert np.array_equal(compiled.predict(X), tree_model.predict(X))
+
+
+def test_tree_chunked_traversal_matches_sklearn(tree_model, test_inputs, monkeypatch):
+    monkeypatch.setattr(compiled_trees, "CHUNK_ELEMENTS", 1000)
+    compiled = compile_tree_model(tree_model, keep_fallback=False)
+
+    assert np.array_equal(
+        compiled.predict_proba(test_inputs), tree_model.predict_proba(test_inputs)
+    )
+
+
+def test_tree_roundtrip_arrays(tree_model, test_inputs):
+    compiled = compile_tree_model(tree_model, keep_fallback=False)
+    arrays, metadata = compiled.to_arrays()
+    restored = compiled_trees.CompiledTreeModel.from_arrays(arrays, metadata)
+
+    assert np.array_equal(
+        restored.predict_proba(test_inputs), tree_model.predict_proba(test_inputs)
+    )
+
+
+def test_tree_rejects_bad_input(tree_model):
+    compiled = compile_tree_model(tree_model, keep_fallback=False)
+    with pytest.raises(ValueError):
+        compiled.predict_proba(np.zeros((2, 3)))
+    X = np.zeros((1, compiled.n_features_in_))
+    X[0, 0] = np.nan
+    with pytest.raises(ValueError):
+        compiled.predict_proba(X)
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_service_tree_labels_from_proba(tree_model, test_inputs, compiled):
+    from config import CANCER_TYPE_DETAILED
+    from services.model_service import ModelService
+
+    service = ModelService(
+        models={"Tree": tree_model},
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        derive_label_from_proba=True,
+        compiled_models=["Tree"] if compiled else None,
+    )
+    assert service.get_capabilities("Tree").proba_argmax_is_label
+
+    codes, _, _ = service.predict_arrays("Tree", test_inputs)
+    assert np.array_equal(codes, tree_model.predict(test_inputs))
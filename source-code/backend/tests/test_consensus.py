@@ -0,0 +1,168 @@
+"""Consensus vectorize (calculate_consensus_arrays) so với cách tính theo từng dòng"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+
+from config import CANCER_TYPE_DETAILED
+from services.model_service import ModelPredictionResult, ModelService
+
+CLASS_CODES = np.arange(5)
+
+
+def _baseline_hard(codes, confidences):
+    """
+    Consensus của 1 dòng như ModelService.calculate_consensus ban đầu: vote
+    nhiều nhất, tie -> confidence trung bình cao nhất (0.5 nếu không có), vẫn
+    bằng nhau -> class được vote trước
+    """
+    votes, vote_confidences = {}, {}
+    for code, confidence in zip(codes, confidences):
+        votes[code] = votes.get(code, 0) + 1
+        if confidence is not None:
+            vote_confidences.setdefault(code, []).append(confidence)
+
+    max_votes = max(votes.values())
+    candidates = [code for code, count in votes.items() if count == max_votes]
+    scores = {
+        code: np.mean(vote_confidences[code]) if code in vote_confidences else 0.5
+        for code in candidates
+    }
+    winner = max(scores.items(), key=lambda item: item[1])[0]
+    return winner, votes[winner], len(votes) == 1
+
+
+def _baseline_soft(codes, probas):
+    """Probability trung bình theo class, model không có proba góp 1.0 cho class nó predict"""
+    total = np.zeros(len(CLASS_CODES))
+    for code, proba in zip(codes, probas):
+        if proba is None:
+            total[code] += 1.0
+        else:
+            total += proba
+    total /= len(codes)
+    winner = int(np.argmax(total))
+    return winner, total
+
+
+@pytest.fixture(scope="module")
+def service():
+    return ModelService(models={}, cancer_type_mapping=CANCER_TYPE_DETAILED)
+
+
+def _random_outputs(n_rows, n_models, seed, with_proba):
+    """Kết quả ngẫu nhiên của n_models models; model cuối không có probabilities"""
+    rng = np.random.default_rng(seed)
+    codes, confidences, probas = [], [], []
+    for m in range(n_models):
+        if with_proba[m]:
+            # Probabilities là bội của 1/8 (biểu diễn chính xác) để tie thật sự xảy ra
+            uniform = np.full(len(CLASS_CODES), 1 / len(CLASS_CODES))
+            proba = rng.multinomial(8, uniform, n_rows) / 8.0
+            codes.append(proba.argmax(axis=1))
+            confidences.append(proba.max(axis=1))
+            probas.append(proba)
+        else:
+            codes.append(rng.integers(0, 3, n_rows))
+            confidences.append(None)
+            probas.append(None)
+    return codes, confidences, probas
+
+
+@pytest.mark.parametrize("n_models", [1, 2, 3, 4])
+def test_hard_consensus_matches_baseline(service, n_models):
+    with_proba = [m < n_models - 1 or n_models == 1 for m in range(n_models)]
+    codes, confidences, _ = _random_outputs(2000, n_models, n_models, with_proba)
+
+    batch = service.calculate_consensus_arrays(
+        [f"m{m}" for m in range(n_models)], codes, confidences
+    )
+
+    for row in range(2000):
+        row_codes = [int(c[row]) for c in codes]
+        row_confidences = [None if c is None else float(c[row]) for c in confidences]
+        winner, vote_count, agreement = _baseline_hard(row_codes, row_confidences)
+        assert batch.codes[row] == winner
+        assert batch.vote_counts[row] == vote_count
+        assert batch.agreement[row] == agreement
+
+
+@pytest.mark.parametrize("n_models", [1, 2, 3])
+def test_soft_consensus_matches_baseline(service, n_models):
+    with_proba = [m < n_models - 1 or n_models == 1 for m in range(n_models)]
+    codes, confidences, probas = _random_outputs(2000, n_models, 10 + n_models, with_proba)
+
+    batch = service.calculate_consensus_arrays(
+        [f"m{m}" for m in range(n_models)],
+        codes,
+        confidences,
+        probas,
+        [CLASS_CODES if p is not None else None for p in probas],
+        mode="soft",
+    )
+
+    for row in range(2000):
+        winner, total = _baseline_soft(
+            [int(c[row]) for c in codes], [None if p is None else p[row] for p in probas]
+        )
+        assert batch.codes[row] == CLASS_CODES[winner]
+        assert np.allclose(
+            batch.probabilities[row], total[np.searchsorted(CLASS_CODES, batch.class_codes)]
+        )
+        assert batch.confidence[row] == pytest.approx(total[winner])
+
+
+def test_hard_tie_breaks(service):
+    batch = service.calculate_consensus_arrays(
+        ["a", "b", "c", "d"],
+        [np.array([1, 1]), np.array([2, 2]), np.array([2, 3]), np.array([1, 3])],
+        [np.array([0.9, 0.5]), np.array([0.6, 0.5]), np.array([0.6, 0.5]), None],
+    )
+    # Dòng 0: 1 và 2 cùng 2 vote, mean confidence 0.9 (chỉ a có) > 0.6
+    # Dòng 1: 3 classes, 3 có 2 vote
+    assert batch.codes.tolist() == [1, 3]
+    assert batch.vote_counts.tolist() == [2, 2]
+    assert batch.agreement.tolist() == [False, False]
+
+
+def test_single_row_consensus_matches_baseline(service):
+    predictions = [
+        ModelPredictionResult("SVM", 1, "x", confidence=0.85),
+        ModelPredictionResult("Random Forest", 2, "y", confidence=0.65),
+        ModelPredictionResult("Decision Tree", 3, "z"),
+    ]
+    result = service.calculate_consensus(predictions)
+    winner, vote_count, agreement = _baseline_hard([1, 2, 3], [0.85, 0.65, None])
+
+    assert result["cancer_type_code"] == winner == 1
+    assert result["vote_count"] == vote_count
+    assert result["agreement"] == agreement
+    assert result["total_models"] == 3
+    assert service.calculate_consensus([])["cancer_type_code"] == -1
+
+
+def test_single_row_consensus_matches_batch(service):
+    # calculate_consensus (dict, 1 dòng) và calculate_consensus_arrays giữ cùng logic
+    codes, confidences, _ = _random_outputs(500, 3, 20, [True, True, False])
+    batch = service.calculate_consensus_arrays(["m0", "m1", "m2"], codes, confidences)
+
+    for row in range(500):
+        predictions = [
+            ModelPredictionResult(
+                f"m{m}",
+                int(codes[m][row]),
+                "",
+                confidence=None if confidences[m] is None else float(confidences[m][row]),
+            )
+            for m in range(3)
+        ]
+        result = service.calculate_consensus(predictions)
+        assert result["cancer_type_code"] == batch.codes[row]
+        assert result["vote_count"] == batch.vote_counts[row]
+        assert result["agreement"] == batch.agreement[row]
+
+
+def test_unknown_mode(service):
+    with pytest.raises(ValueError):
+        service.calculate_consensus_arrays(["a"], [np.array([1])], [None], mode="median")
@@ -0,0 +1,168 @@
+"""ModelRegistry và các endpoint /admin/models*: phiên bản, activate/rollback, token"""
+
+import asyncio
+
+import joblib
+import pytest
+from fastapi import HTTPException
+from sklearn.tree import DecisionTreeClassifier
+
+from config import CANCER_TYPE_DETAILED
+from services.model_registry import (
+    ModelRegistry,
+    ModelRegistryError,
+    UnknownModelVersionError,
+)
+from services.model_service import ModelService
+
+ARTIFACTS = {"Decision Tree": "decision_tree_best.pkl"}
+
+
+def _tree(training_data, depth):
+    X, y = training_data
+    return DecisionTreeClassifier(max_depth=depth, random_state=0).fit(X, y)
+
+
+@pytest.fixture
+def registry_dir(tmp_path, training_data):
+    """Registry với 2 phiên bản và 1 thư mục có artifacts nằm ngoài registry"""
+    root = tmp_path / "registry"
+    for version, depth in (("v1", 3), ("v2", 5)):
+        (root / version).mkdir(parents=True)
+        joblib.dump(_tree(training_data, depth), root / version / ARTIFACTS["Decision Tree"])
+    (tmp_path / "outside").mkdir()
+    joblib.dump(_tree(training_data, 2), tmp_path / "outside" / ARTIFACTS["Decision Tree"])
+    return root
+
+
+@pytest.fixture
+def service(training_data):
+    return ModelService(
+        models={"Decision Tree": _tree(training_data, 4)},
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        version="baseline",
+    )
+
+
+def _registry(registry_dir, service, training_data, keep_previous=2):
+    return ModelRegistry(
+        str(registry_dir),
+        ARTIFACTS,
+        model_service=service,
+        warmup_X=training_data[0][:5],
+        keep_previous=keep_previous,
+    )
+
+
+@pytest.mark.parametrize(
+    "version", ["../outside", "..", "v1/..", "/etc", "v1/../../outside", ""]
+)
+def test_rejects_traversal_versions(registry_dir, service, training_data, version):
+    registry = _registry(registry_dir, service, training_data)
+    assert registry.list_versions() == ["v1", "v2"]
+
+    with pytest.raises(UnknownModelVersionError):
+        registry.version_paths(version)
+    with pytest.raises(UnknownModelVersionError):
+        registry.activate(version)
+    with pytest.raises(UnknownModelVersionError):
+        registry.activate_in_background(version)
+
+    assert registry.state == "idle"
+    assert service.version == "baseline"
+
+
+def test_rejects_absolute_version_path(registry_dir, service, training_data):
+    registry = _registry(registry_dir, service, training_data)
+    with pytest.raises(UnknownModelVersionError):
+        registry.activate(str(registry_dir / "v1"))
+
+
+def test_rejects_versions_missing_artifacts(registry_dir, service, training_data):
+    artifacts = {**ARTIFACTS, "Random Forest": "best_model_random_forest.pkl"}
+    (registry_dir / "v3").mkdir()
+    for name, filename in artifacts.items():
+        joblib.dump(_tree(training_data, 3), registry_dir / "v3" / filename)
+    registry = ModelRegistry(str(registry_dir), artifacts, model_service=service)
+
+    # v1, v2 chỉ có Decision Tree: kích hoạt sẽ làm Random Forest biến mất
+    assert registry.list_versions() == ["v3"]
+    with pytest.raises(UnknownModelVersionError):
+        registry.activate("v1")
+    assert set(registry.version_paths("v3")) == set(artifacts)
+
+
+def test_activate_then_rollback_restores_previous(registry_dir, service, training_data):
+    registry = _registry(registry_dir, service, training_data)
+    baseline = service.model_set
+
+    swap = registry.activate("v1")
+    assert swap["version"] == "v1" and swap["previous_version"] == "baseline"
+    v1 = service.model_set
+    assert service.version == "v1" and v1 is not baseline
+
+    registry.activate("v2")
+    assert service.version == "v2"
+    assert registry.status()["rollback_versions"] == ["baseline", "v1"]
+
+    swap = registry.rollback()
+    assert (swap["version"], swap["previous_version"], swap["rollback"]) == ("v1", "v2", True)
+    # Đúng ModelSet cũ trong bộ nhớ, với generation mới (key cache mới)
+    assert service.model_set is v1
+    assert v1.generation == 3
+
+    registry.rollback()
+    assert service.model_set is baseline
+    with pytest.raises(ModelRegistryError):
+        registry.rollback()
+
+
+def test_keep_previous_evicts_oldest(registry_dir, service, training_data):
+    registry = _registry(registry_dir, service, training_data, keep_previous=1)
+    registry.activate("v1")
+    registry.activate("v2")
+    assert registry.status()["rollback_versions"] == ["v1"]
+
+    registry.rollback()
+    assert service.version == "v1"
+    # baseline đã bị giải phóng
+    with pytest.raises(ModelRegistryError):
+        registry.rollback()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    import app as api
+
+    monkeypatch.setattr(api, "ADMIN_API_TOKEN", "secret-token")
+    return api
+
+
+@pytest.mark.parametrize(
+    "authorization",
+    [None, "", "secret-token", "Bearer", "Bearer wrong-token", "Basic secret-token"],
+)
+def test_admin_rejects_invalid_token(api, authorization):
+    with pytest.raises(HTTPException) as excinfo:
+        api.require_admin(authorization)
+    assert excinfo.value.status_code == 401
+    assert excinfo.value.headers == {"WWW-Authenticate": "Bearer"}
+
+
+def test_admin_accepts_bearer_token(api):
+    assert api.require_admin("Bearer secret-token") is None
+    assert api.require_admin("bearer secret-token") is None
+
+
+def test_admin_disabled_without_token(api, monkeypatch):
+    monkeypatch.setattr(api, "ADMIN_API_TOKEN", None)
+    with pytest.raises(HTTPException) as excinfo:
+        api.require_admin("Bearer secret-token")
+    assert excinfo.value.status_code == 403
+
+
+def test_admin_swaps_rejected_with_process_executor(api, monkeypatch):
+    monkeypatch.setattr(api, "INFERENCE_EXECUTOR", "process")
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(api.rollback_model_version())
+    assert excinfo.value.status_code == 409
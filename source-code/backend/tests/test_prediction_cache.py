@@ -0,0 +1,90 @@
+"""PredictionCache (LRU, TTL) và cache của ModelService khi swap models"""
+
+import numpy as np
+import pytest
+
+from services import prediction_cache
+from services.prediction_cache import PredictionCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_size=2, ttl_seconds=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" ít dùng nhất
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(max_size=10, ttl_seconds=60)
+    cache.put("a", 1)
+
+    now[0] += 59
+    assert cache.get("a") == 1
+    now[0] += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.fixture
+def cached_service(training_data):
+    from sklearn.tree import DecisionTreeClassifier
+
+    from config import CANCER_TYPE_DETAILED
+    from services.model_service import ModelService
+
+    X, y = training_data
+    return ModelService(
+        models={"Decision Tree": DecisionTreeClassifier(max_depth=2, random_state=0).fit(X, y)},
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        cache=PredictionCache(max_size=1000, ttl_seconds=None),
+        cache_max_rows=4,
+    )
+
+
+def _codes(results):
+    return [result.cancer_type_code for result in results]
+
+
+def test_swap_never_serves_stale_predictions(cached_service, training_data, test_inputs):
+    from sklearn.tree import DecisionTreeClassifier
+
+    X, y = training_data
+    rows = test_inputs[:3]
+    old_set = cached_service.model_set
+    old_codes = _codes(cached_service.predict_batch_with_model("Decision Tree", rows))
+    # Model mới luôn predict 1 class mà model cũ không predict cho các dòng này
+    new_code = next(code for code in range(5) if code not in old_codes)
+    new_tree = DecisionTreeClassifier().fit(X, np.full_like(y, new_code))
+
+    cached_service.reload_models({"Decision Tree": new_tree}, version="new")
+    # Request chạy dở với snapshot cũ ghi kết quả vào cache sau khi swap
+    cached_service._predict_batch(old_set, "Decision Tree", rows)
+
+    new_codes = _codes(cached_service.predict_batch_with_model("Decision Tree", rows))
+    assert new_codes == [new_code] * len(rows)
+    assert cached_service.cache.stats()["invalidations"] == 1
+
+
+def test_large_batches_bypass_cache(cached_service, test_inputs):
+    cache = cached_service.cache
+
+    cached_service.predict_batch_with_model("Decision Tree", test_inputs[:5])
+    assert len(cache) == 0 and cache.stats()["misses"] == 0
+
+    cached_service.predict_batch_with_model("Decision Tree", test_inputs[:4])
+    assert len(cache) == 4
+
+    # Dòng đã có trong cache: chỉ predict các dòng còn thiếu
+    results = cached_service.predict_batch_with_model("Decision Tree", test_inputs[2:6])
+    assert cache.stats()["hits"] == 2 and len(cache) == 6
+    expected = cached_service.models["Decision Tree"].predict(test_inputs[2:6])
+    assert _codes(results) == expected.tolist()
@@ -0,0 +1,300 @@
+"""ModelScheduler: chuyển trạng thái circuit breaker và fallback khi quá tải"""
+
+import numpy as np
+import pytest
+
+from services.metrics import MetricsRegistry
+from services.scheduler import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    ModelScheduler,
+    ModelsUnavailableError,
+)
+
+MODELS = ["SVM", "Random Forest", "Decision Tree"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    return ModelScheduler(
+        window=10, min_calls=4, error_rate=0.5, cooldown=30, clock=clock
+    )
+
+
+def _state(scheduler, model_name):
+    return scheduler.stats()["models"][model_name]["state"]
+
+
+def _fail(scheduler, model_name, times):
+    for _ in range(times):
+        scheduler.record(model_name, False)
+
+
+def test_breaker_opens_at_error_rate(scheduler):
+    scheduler.record("SVM", True, 1, 0.01)
+    scheduler.record("SVM", True, 1, 0.01)
+    _fail(scheduler, "SVM", 1)
+    # 1/3 lỗi và chưa đủ min_calls
+    assert _state(scheduler, "SVM") == CLOSED
+
+    _fail(scheduler, "SVM", 1)
+    # 2/4 lỗi >= 0.5
+    assert _state(scheduler, "SVM") == OPEN
+
+    selected, skipped, _ = scheduler.select(MODELS, n_rows=1)
+    assert selected == ["Random Forest", "Decision Tree"]
+    assert skipped["SVM"].startswith("skipped: circuit open")
+
+
+def test_breaker_stays_closed_below_min_calls(scheduler):
+    _fail(scheduler, "SVM", 3)
+    assert _state(scheduler, "SVM") == CLOSED
+    assert scheduler.select(MODELS, n_rows=1)[0] == MODELS
+
+
+def test_half_open_probe_success_closes(scheduler, clock):
+    _fail(scheduler, "SVM", 4)
+    clock.now += 29
+    assert "SVM" not in scheduler.select(MODELS, n_rows=1)[0]
+
+    clock.now += 1
+    selected, _, _ = scheduler.select(MODELS, n_rows=1)
+    assert "SVM" in selected
+    assert _state(scheduler, "SVM") == HALF_OPEN
+
+    # Chỉ 1 request chạy thử cùng lúc
+    selected, skipped, _ = scheduler.select(MODELS, n_rows=1)
+    assert "SVM" not in selected
+    assert skipped["SVM"] == "skipped: circuit half-open (probe in flight)"
+
+    scheduler.record("SVM", True, 1, 0.01)
+    assert _state(scheduler, "SVM") == CLOSED
+    assert scheduler.select(MODELS, n_rows=1) == (MODELS, {}, None)
+    assert scheduler.stats()["models"]["SVM"]["calls"] == 0
+
+
+def test_half_open_probe_failure_reopens(scheduler, clock):
+    _fail(scheduler, "SVM", 4)
+    clock.now += 30
+    scheduler.select(MODELS, n_rows=1)
+
+    scheduler.record("SVM", False)
+    stats = scheduler.stats()["models"]["SVM"]
+    assert stats["state"] == OPEN
+    assert stats["trips"] == 2
+
+    # Cooldown tính lại từ lần chạy thử lỗi
+    clock.now += 29
+    assert "SVM" not in scheduler.select(MODELS, n_rows=1)[0]
+    clock.now += 1
+    assert "SVM" in scheduler.select(MODELS, n_rows=1)[0]
+
+
+def test_neutral_outcome_releases_probe(scheduler, clock):
+    _fail(scheduler, "SVM", 4)
+    clock.now += 30
+    scheduler.select(MODELS, n_rows=1)
+
+    scheduler.record("SVM", None)
+    assert _state(scheduler, "SVM") == HALF_OPEN
+    assert "SVM" in scheduler.select(MODELS, n_rows=1)[0]
+
+
+def test_all_open_waits_for_cooldown(scheduler, clock):
+    for model_name in MODELS:
+        _fail(scheduler, model_name, 4)
+        clock.now += 1
+
+    # Không chạy thử model nào trước khi hết cooldown
+    selected, skipped, retry_after = scheduler.select(MODELS, n_rows=1)
+    assert selected == []
+    assert set(skipped) == set(MODELS)
+    assert retry_after == 27
+
+    # Model bị ngắt sớm nhất được chạy thử khi hết cooldown của nó
+    clock.now += 27
+    selected, skipped, retry_after = scheduler.select(MODELS, n_rows=1)
+    assert selected == ["SVM"]
+    assert retry_after is None
+
+    # Lần chạy thử lỗi: chờ tiếp model hết cooldown sớm nhất
+    scheduler.record("SVM", False)
+    selected, _, retry_after = scheduler.select(MODELS, n_rows=1)
+    assert selected == []
+    assert retry_after == 1
+
+
+def test_single_model_waits_for_cooldown(scheduler, clock):
+    _fail(scheduler, "SVM", 4)
+    clock.now += 10
+    selected, skipped, retry_after = scheduler.select(["SVM"], n_rows=1)
+    assert selected == []
+    assert skipped == {"SVM": "skipped: circuit open (retry in 20s)"}
+    assert retry_after == 20
+
+    clock.now += 20
+    assert scheduler.select(["SVM"], n_rows=1)[0] == ["SVM"]
+    # Lần chạy thử đang chạy: thử lại ngay khi nó xong
+    assert scheduler.select(["SVM"], n_rows=1)[2] == 0
+
+
+def test_large_batch_timeouts_do_not_trip(scheduler):
+    for _ in range(5):
+        scheduler.record("SVM", True, 1, 0.002)
+    # Ước lượng cho 50.000 dòng (~100 giây) đã vượt timeout: không phải lỗi
+    for _ in range(5):
+        scheduler.record("SVM", False, 50_000, 20.0, timeout=20.0)
+
+    assert _state(scheduler, "SVM") == CLOSED
+    assert scheduler.stats()["models"]["SVM"]["error_rate"] == 0
+    assert scheduler.select(MODELS, n_rows=1)[0] == MODELS
+
+
+def test_small_batch_timeouts_trip(scheduler):
+    for _ in range(5):
+        scheduler.record("SVM", True, 1, 0.002)
+    for _ in range(5):
+        scheduler.record("SVM", False, 1, 5.0, timeout=5.0)
+
+    assert _state(scheduler, "SVM") == OPEN
+
+
+def test_overload_falls_back(clock):
+    overloaded = [False]
+    metrics = MetricsRegistry()
+    scheduler = ModelScheduler(
+        overload=lambda: overloaded[0],
+        fallback_models=["Decision Tree"],
+        metrics=metrics,
+        clock=clock,
+    )
+    assert scheduler.select(MODELS, n_rows=10)[0] == MODELS
+
+    overloaded[0] = True
+    selected, skipped, _ = scheduler.select(MODELS, n_rows=10)
+    assert selected == ["Decision Tree"]
+    assert skipped == {
+        "SVM": "skipped: overload (fallback to Decision Tree)",
+        "Random Forest": "skipped: overload (fallback to Decision Tree)",
+    }
+    assert "model_skipped" in metrics.render()
+
+
+def test_overload_latency_budget(clock):
+    scheduler = ModelScheduler(
+        overload=lambda: True,
+        fallback_models=["Decision Tree"],
+        latency_budget=0.05,
+        clock=clock,
+    )
+    scheduler.record("SVM", True, 100, 0.2)
+    scheduler.record("Random Forest", True, 100, 0.03)
+    scheduler.record("Decision Tree", True, 100, 0.001)
+
+    selected, skipped, _ = scheduler.select(MODELS, n_rows=100)
+    assert selected == ["Random Forest", "Decision Tree"]
+    assert skipped["SVM"].startswith("skipped: overload (estimated 200 ms")
+
+    # Models chạy lần lượt: tổng latency vượt budget
+    selected, _, _ = scheduler.select(MODELS, n_rows=200, parallel=False)
+    assert selected == ["Decision Tree"]
+
+
+def test_reset_closes_all(scheduler):
+    _fail(scheduler, "SVM", 4)
+    scheduler.reset()
+    assert _state(scheduler, "SVM") == CLOSED
+    assert scheduler.select(MODELS, n_rows=1) == (MODELS, {}, None)
+
+
+class _BrokenModel:
+    """Model có predict_proba() nhưng luôn lỗi"""
+
+    classes_ = np.arange(5)
+
+    def predict(self, X):
+        raise RuntimeError("broken")
+
+    def predict_proba(self, X):
+        raise RuntimeError("broken")
+
+
+def _explain_service(training_data, scheduler):
+    from sklearn.tree import DecisionTreeClassifier
+
+    from config import CANCER_TYPE_DETAILED
+    from services.model_service import ModelService
+
+    X, y = training_data
+    tree = DecisionTreeClassifier(max_depth=4, random_state=0).fit(X, y)
+    return ModelService(
+        models={"Decision Tree": tree, "SVM": _BrokenModel()},
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        scheduler=scheduler,
+    )
+
+
+def test_explain_predict_failures_trip_breaker(scheduler, training_data):
+    service = _explain_service(training_data, scheduler)
+    for _ in range(4):
+        explanations, failures = service.explain_batch(training_data[0][:3])
+        assert "SVM" in failures and "Decision Tree" in explanations
+
+    assert _state(scheduler, "SVM") == OPEN
+    assert _state(scheduler, "Decision Tree") == CLOSED
+    # Predict thành công của /explain được tính như /predict-all
+    assert scheduler.stats()["models"]["Decision Tree"]["calls"] == 4
+
+
+def test_explain_attribution_failures_do_not_trip(scheduler, training_data, monkeypatch):
+    service = _explain_service(training_data, scheduler)
+
+    def broken_attributor(model_name, model_set=None):
+        raise RuntimeError("no attributor")
+
+    monkeypatch.setattr(service, "get_attributor", broken_attributor)
+    for _ in range(4):
+        explanations, failures = service.explain_batch(training_data[0][:3])
+
+    # Prediction vẫn được trả, chỉ thiếu attributions
+    tree = explanations["Decision Tree"]
+    assert "Decision Tree" not in failures
+    assert tree.error == "error: no attributor"
+    assert [row["attributions"] for row in tree.to_dicts()] == [None] * 3
+
+    stats = scheduler.stats()["models"]["Decision Tree"]
+    assert stats["state"] == CLOSED
+    assert stats["calls"] == 4 and stats["error_rate"] == 0
+
+
+def test_all_open_raises_unavailable(scheduler, training_data):
+    from config import CANCER_TYPE_DETAILED
+    from services.model_service import ModelService
+
+    service = ModelService(
+        models={"SVM": _BrokenModel()},
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+        scheduler=scheduler,
+    )
+    for _ in range(4):
+        results, failures = service.predict_all_with_status(training_data[0][:1])
+        assert results == [] and "SVM" in failures
+
+    with pytest.raises(ModelsUnavailableError) as excinfo:
+        service.predict_all_with_status(training_data[0][:1])
+    assert excinfo.value.retry_after == 30
+    assert excinfo.value.skipped["SVM"].startswith("skipped: circuit open")
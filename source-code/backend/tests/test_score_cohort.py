@@ -0,0 +1,173 @@
+"""score_cohort: round trip CSV/Parquet theo chunk, --skip-invalid và --workers"""
+
+import joblib
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+
+import score_cohort
+from score_cohort import CohortScorer, InvalidRowError, _expand, score_file
+
+# Dòng lỗi: giá trị categorical lạ, thiếu giá trị, số âm
+INVALID_ROWS = {
+    3: ("cellularity", "Huge"),
+    10: ("nottingham_prognostic_index", np.nan),
+    12: ("lymph_nodes_examined_positive", -1),
+}
+
+
+@pytest.fixture(scope="module")
+def scorer_kwargs(tmp_path_factory, training_data):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    X, y = training_data
+    model_dir = tmp_path_factory.mktemp("models")
+    models = {
+        "Random Forest": RandomForestClassifier(
+            n_estimators=10, max_depth=5, random_state=0
+        ).fit(X, y),
+        "Decision Tree": DecisionTreeClassifier(max_depth=6, random_state=0).fit(X, y),
+    }
+    model_paths = {}
+    for name, model in models.items():
+        model_paths[name] = str(model_dir / f"{score_cohort.column_prefix(name)}.pkl")
+        joblib.dump(model, model_paths[name])
+    return {"model_paths": model_paths, "id_column": "patient_id"}
+
+
+@pytest.fixture(scope="module")
+def cohort():
+    from benchmarks.workload import random_patients
+
+    frame = pd.DataFrame(random_patients(40, seed=12))
+    frame.insert(0, "patient_id", [f"P{i:03d}" for i in range(len(frame))])
+    return frame
+
+
+def _with_invalid_rows(frame):
+    frame = frame.copy()
+    frame["nottingham_prognostic_index"] = frame["nottingham_prognostic_index"].astype(float)
+    for row, (column, value) in INVALID_ROWS.items():
+        frame.loc[row, column] = value
+    return frame
+
+
+def _assert_same_scores(actual, expected):
+    # Cột "error" so sánh riêng: CSV đọc lại ô rỗng thành NaN
+    pd.testing.assert_frame_equal(
+        actual.drop(columns="error", errors="ignore").reset_index(drop=True),
+        expected.drop(columns="error", errors="ignore").reset_index(drop=True),
+        check_dtype=False,
+        rtol=1e-12,
+    )
+
+
+def test_score_matches_models(scorer_kwargs, cohort):
+    scorer = CohortScorer(**scorer_kwargs)
+    scores = scorer.score(cohort)
+    X = scorer.encoder.encode_columns(cohort)
+
+    assert scores["patient_id"].tolist() == cohort["patient_id"].tolist()
+    for name, model in scorer.service.models.items():
+        prefix = score_cohort.column_prefix(name)
+        np.testing.assert_array_equal(scores[f"{prefix}_code"], model.predict(X))
+        proba_columns = [c for c in scores.columns if c.startswith(f"{prefix}_proba_")]
+        np.testing.assert_allclose(
+            scores[proba_columns].to_numpy(), model.predict_proba(X), rtol=0, atol=1e-12
+        )
+
+
+@pytest.mark.parametrize("extension", ["csv", "parquet"])
+def test_round_trip_in_chunks(scorer_kwargs, cohort, tmp_path, extension):
+    if extension == "parquet":
+        pytest.importorskip("pyarrow")
+    input_path = str(tmp_path / f"cohort.{extension}")
+    output_path = str(tmp_path / f"scores.{extension}")
+    if extension == "parquet":
+        cohort.to_parquet(input_path, index=False)
+    else:
+        cohort.to_csv(input_path, index=False)
+
+    # Chunk cuối không đủ dòng
+    n_rows = score_file(input_path, output_path, chunk_size=7, scorer_kwargs=scorer_kwargs)
+
+    assert n_rows == len(cohort)
+    if extension == "parquet":
+        actual = pd.read_parquet(output_path)
+    else:
+        actual = pd.read_csv(output_path)
+    _assert_same_scores(actual, CohortScorer(**scorer_kwargs).score(cohort))
+
+
+def test_skip_invalid_keeps_rows_aligned(scorer_kwargs, cohort):
+    frame = _with_invalid_rows(cohort)
+    scores = CohortScorer(**scorer_kwargs, skip_invalid=True).score(frame)
+
+    invalid = np.isin(np.arange(len(frame)), list(INVALID_ROWS))
+    assert len(scores) == len(frame)
+    assert scores["patient_id"].tolist() == frame["patient_id"].tolist()
+    assert scores["error"].notna().to_numpy().tolist() == invalid.tolist()
+    assert (scores.loc[invalid, "consensus_code"] == -1).all()
+    assert (scores.loc[invalid, "consensus_votes"] == 0).all()
+    assert scores.loc[invalid, "random_forest_proba_breast"].isna().all()
+
+    # Các dòng hợp lệ có đúng kết quả như khi chấm riêng
+    expected = CohortScorer(**scorer_kwargs).score(cohort[~invalid])
+    _assert_same_scores(scores[~invalid], expected)
+
+
+def test_invalid_row_reports_file_position(scorer_kwargs, cohort, tmp_path):
+    input_path = str(tmp_path / "cohort.csv")
+    _with_invalid_rows(cohort).to_csv(input_path, index=False)
+
+    # Dòng 3 nằm trong chunk đầu; với chunk 2 dòng, index vẫn theo vị trí trong file
+    with pytest.raises(InvalidRowError) as excinfo:
+        score_file(
+            input_path, str(tmp_path / "scores.csv"), chunk_size=2, scorer_kwargs=scorer_kwargs
+        )
+    assert excinfo.value.row == 3
+    assert "cellularity" in excinfo.value.reason
+
+
+def test_invalid_chunk_is_fully_skipped(scorer_kwargs, cohort):
+    frame = _with_invalid_rows(cohort).loc[[3, 10, 12]]
+    scores = CohortScorer(**scorer_kwargs, skip_invalid=True).score(frame)
+
+    assert len(scores) == 3 and scores["error"].notna().all()
+    assert (scores["random_forest_code"] == -1).all()
+    assert scores["random_forest_proba_breast"].isna().all()
+
+
+def test_expand_places_values_at_valid_rows():
+    valid = np.array([True, False, True, True, False])
+    np.testing.assert_array_equal(
+        _expand(np.array([4, 2, 0]), valid, -1), [4, -1, 2, 0, -1]
+    )
+    expanded = _expand(np.array([0.5, 0.25, 1.0]), valid, np.nan)
+    np.testing.assert_array_equal(expanded, [0.5, np.nan, 0.25, 1.0, np.nan])
+    # Không có dòng lỗi: trả lại đúng mảng, không copy
+    values = np.arange(3)
+    assert _expand(values, np.ones(3, dtype=bool), -1) is values
+
+
+def test_workers_keep_input_order(scorer_kwargs, cohort, tmp_path):
+    input_path = str(tmp_path / "cohort.csv")
+    _with_invalid_rows(cohort).to_csv(input_path, index=False)
+    kwargs = {**scorer_kwargs, "skip_invalid": True}
+
+    score_file(input_path, str(tmp_path / "serial.csv"), chunk_size=3, scorer_kwargs=kwargs)
+    score_file(
+        input_path,
+        str(tmp_path / "parallel.csv"),
+        chunk_size=3,
+        workers=2,
+        scorer_kwargs=kwargs,
+    )
+
+    serial = pd.read_csv(tmp_path / "serial.csv")
+    parallel = pd.read_csv(tmp_path / "parallel.csv")
+    assert parallel["patient_id"].tolist() == cohort["patient_id"].tolist()
+    pd.testing.assert_frame_equal(parallel, serial)
@@ -0,0 +1,148 @@
+"""Response JSON ghi thẳng (FAST_RESPONSES) so với đường Pydantic + response_model"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.serialization import dumps
+
+
+@pytest.fixture(scope="module")
+def service(training_data):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.svm import SVC
+    from sklearn.tree import DecisionTreeClassifier
+
+    from config import CANCER_TYPE_DETAILED
+    from services.model_service import ModelService
+
+    X, y = training_data
+    return ModelService(
+        models={
+            "SVM": Pipeline(
+                [
+                    ("scaler", StandardScaler()),
+                    ("svc", SVC(kernel="rbf", probability=True, random_state=0)),
+                ]
+            ).fit(X[:300], y[:300]),
+            "Random Forest": RandomForestClassifier(
+                n_estimators=10, max_depth=5, random_state=0
+            ).fit(X, y),
+            "Decision Tree": DecisionTreeClassifier(max_depth=6, random_state=0).fit(X, y),
+        },
+        cancer_type_mapping=CANCER_TYPE_DETAILED,
+    )
+
+
+@pytest.fixture
+def api(monkeypatch, service):
+    import app as api
+
+    monkeypatch.setattr(api, "model_service", service)
+    return api
+
+
+@pytest.fixture(scope="module")
+def patients():
+    from benchmarks.workload import random_patients
+
+    return random_patients(20, seed=11)
+
+
+def _call(api, monkeypatch, fast, endpoint, *args, **kwargs):
+    """Response body như client nhận được, với FAST_RESPONSES bật hoặc tắt"""
+    monkeypatch.setattr(api, "FAST_RESPONSES", fast)
+    response = asyncio.run(endpoint(*args, **kwargs))
+    if not fast:
+        # FastAPI serialize model theo response_model rồi render JSONResponse
+        response = JSONResponse(jsonable_encoder(response))
+    return response.body
+
+
+def _normalized(body: bytes) -> bytes:
+    """Encode lại cùng 1 encoder: so sánh key, thứ tự và giá trị, bỏ qua cách ghi số"""
+    return dumps(json.loads(body))
+
+
+def test_predict_matches_pydantic(api, monkeypatch, patients):
+    for patient in patients:
+        patient = api.PatientInput(**patient)
+        fast = _call(api, monkeypatch, True, api.predict, patient)
+        legacy = _call(api, monkeypatch, False, api.predict, patient)
+        assert fast == _normalized(legacy)
+
+
+def test_predict_all_matches_pydantic(api, monkeypatch, patients):
+    for patient in patients:
+        patient = api.PatientInput(**patient)
+        fast = _call(api, monkeypatch, True, api.predict_all, patient, "dict")
+        legacy = _call(api, monkeypatch, False, api.predict_all, patient, "dict")
+        assert fast == _normalized(legacy)
+        assert api.MultiModelPredictionOutput.model_validate_json(fast)
+
+
+def _as_array(response: dict) -> dict:
+    """Response dạng dict -> dạng ?probabilities=array tương ứng"""
+    classes = {}
+    predictions = []
+    for prediction in response["predictions"]:
+        prediction = dict(prediction)
+        if prediction["probabilities"] is not None:
+            classes[prediction["model_name"]] = list(prediction["probabilities"])
+            prediction["probabilities"] = list(prediction["probabilities"].values())
+        predictions.append(prediction)
+    return {
+        "predictions": predictions,
+        "failed_models": response["failed_models"],
+        "probability_classes": classes,
+    }
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_predict_all_array_matches_dict(api, monkeypatch, patients, fast):
+    for patient in patients:
+        patient = api.PatientInput(**patient)
+        as_dict = _call(api, monkeypatch, fast, api.predict_all, patient, "dict")
+        # ?probabilities=array luôn được ghi thẳng, kể cả khi FAST_RESPONSES tắt
+        as_array = _call(api, monkeypatch, fast, api.predict_all, patient, "array")
+
+        assert as_array == dumps(_as_array(json.loads(as_dict)))
+        assert api.MultiModelPredictionArrayOutput.model_validate_json(as_array)
+
+
+@pytest.mark.parametrize("probabilities", ["dict", "array"])
+def test_predict_all_batch_matches_single(api, monkeypatch, patients, probabilities):
+    batch = api.PatientBatchInput(patients=[api.PatientInput(**p) for p in patients])
+    response = json.loads(
+        _call(api, monkeypatch, True, api.predict_all_batch, batch, probabilities)
+    )
+
+    for patient, result in zip(patients, response["results"]):
+        single = json.loads(
+            _call(
+                api,
+                monkeypatch,
+                True,
+                api.predict_all,
+                api.PatientInput(**patient),
+                probabilities,
+            )
+        )
+        assert result["predictions"] == single["predictions"]
+        if probabilities == "array":
+            assert response["probability_classes"] == single["probability_classes"]
+
+
+def test_predict_all_batch_dict_matches_pydantic(api, monkeypatch, patients):
+    batch = api.PatientBatchInput(patients=[api.PatientInput(**p) for p in patients])
+    fast = _call(api, monkeypatch, True, api.predict_all_batch, batch, "dict")
+    legacy = _call(api, monkeypatch, False, api.predict_all_batch, batch, "dict")
+    assert fast == _normalized(legacy)
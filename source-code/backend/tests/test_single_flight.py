@@ -0,0 +1,124 @@
+"""SingleFlight: gộp các lời gọi cùng key đang chạy, lỗi và huỷ"""
+
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def _counted(result=None, error=None):
+    """fn() chờ release rồi trả result (hoặc raise error), đếm số lần chạy"""
+    release = asyncio.Event()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await release.wait()
+        if error is not None:
+            raise error
+        return result
+
+    return fn, release, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        fn, release, calls = _counted(result={"code": 1})
+
+        waiters = [asyncio.create_task(flight.run(b"patient", fn)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.in_flight == 1
+
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight == 0
+    assert flight.stats() == {
+        "in_flight": 0,
+        "executions": 1,
+        "collapsed": 4,
+        "collapsed_ratio": 0.8,
+    }
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+        fn, release, calls = _counted(result=1)
+        waiters = [asyncio.create_task(flight.run(key, fn)) for key in (b"a", b"b")]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*waiters)
+        return flight, calls
+
+    flight, calls = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert flight.stats()["collapsed"] == 0
+
+
+def test_key_is_forgotten_after_completion():
+    async def scenario():
+        flight = SingleFlight()
+        fn, release, calls = _counted(result=1)
+        release.set()
+        await flight.run(b"patient", fn)
+        await flight.run(b"patient", fn)
+        return calls
+
+    assert len(asyncio.run(scenario())) == 2
+
+
+def test_error_is_raised_to_all_waiters_and_key_released():
+    async def scenario():
+        flight = SingleFlight()
+        fn, release, calls = _counted(error=RuntimeError("model failed"))
+
+        waiters = [asyncio.create_task(flight.run(b"patient", fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        in_flight = flight.in_flight
+
+        # Lần gọi sau lỗi chạy lại fn thay vì nhận lại lỗi cũ
+        retry, retry_release, retry_calls = _counted(result="ok")
+        retry_release.set()
+        return results, calls, in_flight, await flight.run(b"patient", retry), retry_calls
+
+    results, calls, in_flight, retried, retry_calls = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert all(str(result) == "model failed" for result in results)
+    assert in_flight == 0
+    assert retried == "ok"
+    assert len(retry_calls) == 1
+
+
+def test_cancelled_waiter_does_not_cancel_shared_execution():
+    async def scenario():
+        flight = SingleFlight()
+        fn, release, calls = _counted(result=42)
+
+        first = asyncio.create_task(flight.run(b"patient", fn))
+        second = asyncio.create_task(flight.run(b"patient", fn))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, calls
+
+    result, calls = asyncio.run(scenario())
+
+    assert result == 42
+    assert len(calls) == 1
@@ -0,0 +1,77 @@
+"""TreeLookupTable so với Decision Tree / Random Forest của sklearn"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from config import ENCODING_MAPS, FEATURE_ORDER
+from schemas import feature_constraints
+from services import tree_table
+from services.tree_table import TreeLookupTable, TreeTableBuilder, feature_domains
+
+
+@pytest.fixture(scope="module")
+def builder():
+    allowed_values, minimums, integer_features = feature_constraints()
+    domains = feature_domains(
+        FEATURE_ORDER, ENCODING_MAPS, allowed_values, minimums, integer_features
+    )
+    return TreeTableBuilder(domains, ["Decision Tree"], max_bytes=64 * 2**20)
+
+
+@pytest.fixture(
+    scope="module",
+    params=[
+        DecisionTreeClassifier(max_depth=6, random_state=0),
+        RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0),
+    ],
+    ids=["decision_tree", "random_forest"],
+)
+def table(request, builder, training_data):
+    """(model, bảng, kết quả kiểm tra, giá trị input của từng vị trí)"""
+    model = request.param.fit(*training_data)
+    captured = []
+    verify = TreeLookupTable.verify
+
+    def capture(self, reference, points, seed=0):
+        captured.append(points)
+        return verify(self, reference, points, seed)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(TreeLookupTable, "verify", capture)
+        lookup, checked = builder.build(model)
+    return model, lookup, checked, captured[0]
+
+
+def test_table_matches_sklearn(table, test_inputs):
+    model, lookup, checked, _ = table
+    # Mọi ô của bảng đã được so với model lúc dựng
+    assert checked["cells"] == lookup.info()["cells"]
+    assert checked["max_abs_diff"] == 0.0
+
+    assert np.array_equal(lookup.predict_proba(test_inputs), model.predict_proba(test_inputs))
+    assert np.array_equal(lookup.predict(test_inputs), model.predict(test_inputs))
+    for row in test_inputs[:20]:
+        assert np.array_equal(lookup.predict_proba(row[None]), model.predict_proba(row[None]))
+
+
+def test_verify_checks_every_cell(table, monkeypatch):
+    model, lookup, _, points = table
+    arrays, metadata = lookup.to_arrays()
+    table_ids = arrays["table"].copy()
+    proba = np.vstack([arrays["proba"], arrays["proba"][:1] + 0.5])
+    # Sai lệch ở 1 ô không phải ô đầu tiên của kết quả nào
+    _, first = np.unique(table_ids, return_index=True)
+    cell = np.setdiff1d(np.arange(table_ids.size), first)[-1]
+    table_ids[cell] = len(proba) - 1
+    corrupted = TreeLookupTable.from_arrays(
+        {**arrays, "table": table_ids.astype(np.uint32), "proba": proba}, metadata
+    )
+
+    monkeypatch.setattr(tree_table, "VERIFY_CHUNK_ROWS", 1000)
+    with pytest.raises(ValueError, match="does not match"):
+        corrupted.verify(model, points)
@@ -0,0 +1,745 @@
+"""
+Training Pipeline
+=================
+
+Train lại các models mà backend load (model_v2/) theo đúng quy trình của
+main.ipynb (xem QUY_TRINH_TRAINING.md), không cần chạy notebook:
+
+1. Preprocess: giữ FEATURE_ORDER + cancer_type_detailed, bỏ dòng thiếu,
+   LabelEncoder các cột chữ, cân bằng class bằng SMOTE, chia train/test 70/30
+2. Search: grid của notebook cho từng model, StratifiedKFold 5-fold, f1_macro
+   (hoặc successive halving với --search halving)
+3. Refit best candidate trên toàn bộ tập train, đánh giá trên tập test và lưu
+   bằng joblib với cùng tên file như MODEL_PATHS
+
+Dữ liệu đã preprocess và các fold được cache trong --cache-dir theo hash của
+file CSV và các tham số, nên lần chạy sau bỏ qua bước 1. Các cặp (candidate,
+fold) được fit song song trên tất cả CPU và ghi vào checkpoint ngay khi xong;
+chạy lại cùng lệnh sau khi bị ngắt chỉ fit các cặp còn thiếu.
+
+Cuối mỗi lần chạy in thời gian (wall-clock) của từng stage và ghi
+training_report.json vào thư mục output.
+
+Ví dụ (chạy trong thư mục backend, cần extra sklearn):
+
+    python train_models.py --data ../dataset/METABRIC_RNA_Mutation.csv
+    python train_models.py --search halving -o ../model_registry/2025-12-20
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline as ImbPipeline
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import (
+    accuracy_score,
+    classification_report,
+    f1_score,
+    get_scorer,
+    precision_score,
+    recall_score,
+)
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils import resample
+
+from config import CANCER_TYPE_DETAILED, ENCODING_MAPS, FEATURE_ORDER, MODEL_PATHS
+
+DEFAULT_DATA_PATH = "../dataset/METABRIC_RNA_Mutation.csv"
+DEFAULT_OUTPUT_DIR = "../model_v2"
+DEFAULT_CACHE_DIR = "../.training_cache"
+
+TARGET_COLUMN = "cancer_type_detailed"
+RANDOM_STATE = 42
+TEST_SIZE = 0.3
+CV_FOLDS = 5
+SCORING = "f1_macro"
+# Tăng khi đổi cách preprocess để cache cũ không được dùng lại
+PREPROCESS_VERSION = 1
+
+SEARCH_GRID = "grid"
+SEARCH_HALVING = "halving"
+
+
+class SearchSpace:
+    """
+    Estimator và grid hyperparameters của 1 model (như trong main.ipynb)
+
+    Args:
+        estimator: Hàm tạo estimator chưa fit
+        param_grid: Grid cho ParameterGrid
+    """
+
+    def __init__(self, estimator: Callable[[], Any], param_grid: Dict[str, List[Any]]):
+        self.estimator = estimator
+        self.param_grid = param_grid
+
+    @property
+    def candidates(self) -> List[Dict[str, Any]]:
+        return list(ParameterGrid(self.param_grid))
+
+
+SEARCH_SPACES = {
+    "SVM": SearchSpace(
+        lambda: ImbPipeline(
+            [
+                ("scaler", StandardScaler()),
+                (
+                    "svc",
+                    SVC(class_weight="balanced", probability=True, random_state=RANDOM_STATE),
+                ),
+            ]
+        ),
+        {
+            "svc__C": [0.1, 1, 10],
+            "svc__kernel": ["linear", "rbf"],
+            "svc__gamma": ["scale", "auto"],
+        },
+    ),
+    "Random Forest": SearchSpace(
+        lambda: ImbPipeline(
+            [
+                ("scaler", StandardScaler()),
+                (
+                    "rf",
+                    RandomForestClassifier(
+                        random_state=RANDOM_STATE, class_weight="balanced"
+                    ),
+                ),
+            ]
+        ),
+        {
+            "rf__n_estimators": [100, 200],
+            "rf__max_depth": [None, 10, 20],
+            "rf__min_samples_leaf": [1, 2],
+        },
+    ),
+    "Decision Tree": SearchSpace(
+        lambda: DecisionTreeClassifier(random_state=RANDOM_STATE),
+        {
+            "criterion": ["gini", "entropy"],
+            "max_depth": [5, 8, 10, 15, None],
+            "min_samples_split": [2, 5, 10, 20],
+            "min_samples_leaf": [1, 2, 5, 10],
+        },
+    ),
+}
+
+
+class StageTimer:
+    """Ghi thời gian wall-clock của từng stage"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = time.perf_counter() - started
+            print(f"⏱️  {name}: {self.stages[name]:.2f}s")
+
+    def summary(self) -> str:
+        total = sum(self.stages.values())
+        width = max((len(name) for name in self.stages), default=0)
+        lines = [f"{name:{width}s} {seconds:10.2f}s" for name, seconds in self.stages.items()]
+        lines.append(f"{'total':{width}s} {total:10.2f}s")
+        return "\n".join(lines)
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+# ==================== PREPROCESS ====================
+class TrainingData:
+    """Tập train/test đã preprocess (X theo FEATURE_ORDER, y là code đã encode)"""
+
+    def __init__(
+        self,
+        X_train: np.ndarray,
+        X_test: np.ndarray,
+        y_train: np.ndarray,
+        y_test: np.ndarray,
+        encoding_maps: Dict[str, Dict[str, int]],
+    ):
+        self.X_train = pd.DataFrame(X_train, columns=FEATURE_ORDER)
+        self.X_test = pd.DataFrame(X_test, columns=FEATURE_ORDER)
+        self.y_train = y_train
+        self.y_test = y_test
+        self.encoding_maps = encoding_maps
+
+    def save(self, cache_dir: str) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        _atomic_write(
+            os.path.join(cache_dir, "data.npz"),
+            lambda f: np.savez(
+                f,
+                X_train=self.X_train.to_numpy(),
+                X_test=self.X_test.to_numpy(),
+                y_train=self.y_train,
+                y_test=self.y_test,
+            ),
+        )
+        _atomic_write(
+            os.path.join(cache_dir, "encoding_maps.json"),
+            lambda f: f.write(json.dumps(self.encoding_maps, ensure_ascii=False).encode()),
+        )
+
+    @classmethod
+    def load(cls, cache_dir: str) -> Optional["TrainingData"]:
+        """Load từ cache, None nếu chưa có"""
+        try:
+            with np.load(os.path.join(cache_dir, "data.npz")) as arrays:
+                arrays = dict(arrays)
+            with open(os.path.join(cache_dir, "encoding_maps.json"), encoding="utf-8") as f:
+                encoding_maps = json.load(f)
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(
+            arrays["X_train"],
+            arrays["X_test"],
+            arrays["y_train"],
+            arrays["y_test"],
+            encoding_maps,
+        )
+
+
+def preprocess(df: pd.DataFrame) -> TrainingData:
+    """Preprocess như các bước 4 -> 9 của main.ipynb"""
+    df = df[FEATURE_ORDER + [TARGET_COLUMN]].dropna().copy()
+
+    encoding_maps = {}
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        le = LabelEncoder()
+        df[col] = le.fit_transform(df[col])
+        encoding_maps[col] = {
+            str(cls): int(code) for cls, code in zip(le.classes_, le.transform(le.classes_))
+        }
+
+    X = df[FEATURE_ORDER]
+    y = df[TARGET_COLUMN].to_numpy()
+
+    # Sau LabelEncoder mọi cột đều là số nên notebook dùng SMOTE (không phải SMOTENC)
+    counts = Counter(y.tolist())
+    k_neighbors = min(5, max(1, min(counts.values()) - 1))
+    sampler = SMOTE(k_neighbors=k_neighbors, random_state=RANDOM_STATE)
+    X_res, y_res = sampler.fit_resample(X.values, y)
+
+    resampled = pd.concat(
+        [
+            pd.DataFrame(X_res, columns=FEATURE_ORDER),
+            pd.Series(y_res, name=TARGET_COLUMN),
+        ],
+        axis=1,
+    )
+    resampled = resampled.sample(frac=1, random_state=RANDOM_STATE).reset_index(drop=True)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        resampled[FEATURE_ORDER],
+        resampled[TARGET_COLUMN],
+        test_size=TEST_SIZE,
+        random_state=RANDOM_STATE,
+        stratify=resampled[TARGET_COLUMN],
+    )
+    return TrainingData(
+        X_train.to_numpy(),
+        X_test.to_numpy(),
+        y_train.to_numpy(),
+        y_test.to_numpy(),
+        encoding_maps,
+    )
+
+
+def check_encoding(encoding_maps: Dict[str, Dict[str, int]]) -> List[str]:
+    """So encoding của dữ liệu train với ENCODING_MAPS / CANCER_TYPE_DETAILED của backend"""
+    expected = dict(ENCODING_MAPS)
+    expected[TARGET_COLUMN] = {name: code for code, name in CANCER_TYPE_DETAILED.items()}
+    return [
+        col
+        for col, mapping in encoding_maps.items()
+        if col in expected and mapping != expected[col]
+    ]
+
+
+def load_folds(cache_dir: str, data: TrainingData, n_splits: int) -> List[np.ndarray]:
+    """Test indices của từng fold (StratifiedKFold), cache trong cache_dir"""
+    path = os.path.join(cache_dir, f"folds_{n_splits}.npz")
+    try:
+        with np.load(path) as arrays:
+            return [arrays[f"fold_{i}"] for i in range(n_splits)]
+    except (OSError, KeyError):
+        pass
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=RANDOM_STATE)
+    folds = [test for _, test in cv.split(data.X_train, data.y_train)]
+    _atomic_write(
+        path, lambda f: np.savez(f, **{f"fold_{i}": fold for i, fold in enumerate(folds)})
+    )
+    return folds
+
+
+def _atomic_write(path: str, write: Callable[[Any], Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+# ==================== SEARCH ====================
+def _fit_and_score(
+    key: str,
+    estimator: Any,
+    params: Dict[str, Any],
+    X: pd.DataFrame,
+    y: np.ndarray,
+    train_idx: np.ndarray,
+    test_idx: np.ndarray,
+) -> Tuple[str, float, float]:
+    """Fit 1 candidate trên 1 fold (chạy trong worker), trả về (key, score, giây)"""
+    started = time.perf_counter()
+    try:
+        model = clone(estimator).set_params(**params)
+        model.fit(X.iloc[train_idx], y[train_idx])
+        score = float(get_scorer(SCORING)(model, X.iloc[test_idx], y[test_idx]))
+    except Exception as e:
+        # Như GridSearchCV(error_score=nan): candidate lỗi không làm dừng search
+        print(f"❌ Fit failed for {params}: {e}", file=sys.stderr)
+        score = float("nan")
+    return key, score, time.perf_counter() - started
+
+
+class CandidateSearch:
+    """
+    Search hyperparameters của 1 model với checkpoint theo (candidate, fold)
+
+    Args:
+        name: Tên model (key của SEARCH_SPACES)
+        data: Dữ liệu train
+        folds: Test indices của từng fold
+        checkpoint_path: File JSONL ghi kết quả từng lần fit
+        n_jobs: Số process fit song song (-1 = tất cả CPU)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        data: TrainingData,
+        folds: List[np.ndarray],
+        checkpoint_path: str,
+        n_jobs: int = -1,
+    ):
+        self.name = name
+        self.space = SEARCH_SPACES[name]
+        self.estimator = self.space.estimator()
+        self.data = data
+        self.folds = folds
+        self.checkpoint_path = checkpoint_path
+        self.n_jobs = n_jobs
+        self.scores = self._read_checkpoint()
+        self.fits = 0
+        self.resumed = 0
+
+    def _read_checkpoint(self) -> Dict[str, float]:
+        scores = {}
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Dòng cuối bị ghi dở khi process bị ngắt
+                        continue
+                    scores[entry["key"]] = entry["score"]
+        except OSError:
+            pass
+        return scores
+
+    def _train_indices(self, fold: int, n_resources: Optional[int]) -> np.ndarray:
+        test_idx = self.folds[fold]
+        mask = np.ones(len(self.data.y_train), dtype=bool)
+        mask[test_idx] = False
+        train_idx = np.flatnonzero(mask)
+        if n_resources is None:
+            return train_idx
+        # Như HalvingGridSearchCV: lấy mẫu (stratified) 1 phần tập train của fold
+        fraction = n_resources / len(self.data.y_train)
+        return resample(
+            train_idx,
+            replace=False,
+            n_samples=int(fraction * len(train_idx)),
+            random_state=RANDOM_STATE,
+            stratify=self.data.y_train[train_idx],
+        )
+
+    def evaluate(
+        self, candidates: List[Dict[str, Any]], n_resources: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Mean score qua các fold của từng candidate (fit các cặp chưa có trong checkpoint)
+
+        Args:
+            candidates: Các bộ hyperparameters
+            n_resources: Số mẫu train (None = toàn bộ tập train)
+
+        Returns:
+            Mảng mean score theo thứ tự candidates (NaN nếu có fold lỗi)
+        """
+        if n_resources is not None and n_resources >= len(self.data.y_train):
+            # Cùng key với grid để 2 cách search dùng chung checkpoint
+            n_resources = None
+        keys = [
+            [
+                _digest(params, n_resources, fold)
+                for fold in range(len(self.folds))
+            ]
+            for params in candidates
+        ]
+        pending = [
+            (key, params, fold)
+            for params, fold_keys in zip(candidates, keys)
+            for fold, key in enumerate(fold_keys)
+            if key not in self.scores
+        ]
+        self.resumed += sum(len(fold_keys) for fold_keys in keys) - len(pending)
+
+        if pending:
+            X, y = self.data.X_train, self.data.y_train
+            tasks = (
+                delayed(_fit_and_score)(
+                    key,
+                    self.estimator,
+                    params,
+                    X,
+                    y,
+                    self._train_indices(fold, n_resources),
+                    self.folds[fold],
+                )
+                for key, params, fold in pending
+            )
+            os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+            with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint:
+                parallel = Parallel(n_jobs=self.n_jobs, return_as="generator_unordered")
+                for key, score, seconds in parallel(tasks):
+                    # Ghi ngay để lần chạy sau bỏ qua cặp này
+                    checkpoint.write(
+                        json.dumps({"key": key, "score": score, "fit_seconds": seconds})
+                        + "\n"
+                    )
+                    checkpoint.flush()
+                    self.scores[key] = score
+                    self.fits += 1
+
+        return np.array(
+            [np.mean([self.scores[key] for key in fold_keys]) for fold_keys in keys]
+        )
+
+    def grid(self) -> Tuple[Dict[str, Any], float]:
+        """Đánh giá tất cả candidates trên toàn bộ tập train (như GridSearchCV)"""
+        candidates = self.space.candidates
+        means = self.evaluate(candidates)
+        best = _best_index(means)
+        return candidates[best], float(means[best])
+
+    def halving(self, factor: int = 3) -> Tuple[Dict[str, Any], float]:
+        """
+        Successive halving (như HalvingGridSearchCV, min_resources="exhaust"):
+        mỗi vòng giữ 1/factor candidates tốt nhất và tăng số mẫu train lên
+        factor lần, vòng cuối dùng toàn bộ tập train
+        """
+        candidates = self.space.candidates
+        max_resources = len(self.data.y_train)
+        n_classes = len(np.unique(self.data.y_train))
+        n_required = 1 + int(math.floor(math.log(len(candidates), factor)))
+        min_resources = max(
+            max_resources // factor ** (n_required - 1),
+            2 * len(self.folds) * n_classes,
+        )
+        n_possible = 1 + int(
+            math.floor(math.log(max(1, max_resources // min_resources), factor))
+        )
+        n_iterations = min(n_required, n_possible)
+
+        for iteration in range(n_iterations):
+            n_resources = min(min_resources * factor**iteration, max_resources)
+            if iteration == n_iterations - 1:
+                n_resources = max_resources
+            means = self.evaluate(candidates, n_resources)
+            print(
+                f"   {self.name} iteration {iteration}: {len(candidates)} candidate(s), "
+                f"{n_resources} samples, best {np.nanmax(means):.4f}"
+            )
+            if iteration == n_iterations - 1:
+                break
+            n_keep = max(1, math.ceil(len(candidates) / factor))
+            order = np.argsort(-np.nan_to_num(means, nan=-np.inf), kind="stable")
+            candidates = [candidates[i] for i in order[:n_keep]]
+
+        best = _best_index(means)
+        return candidates[best], float(means[best])
+
+
+def _best_index(means: np.ndarray) -> int:
+    # Candidate đầu tiên có score cao nhất (NaN = lỗi, xếp cuối)
+    return int(np.argmax(np.nan_to_num(means, nan=-np.inf)))
+
+
+def evaluate_model(model: Any, data: TrainingData) -> Dict[str, Any]:
+    """Metrics trên tập test (như phần so sánh 3 models của notebook)"""
+    y_pred = model.predict(data.X_test)
+    return {
+        "accuracy": accuracy_score(data.y_test, y_pred),
+        "f1_macro": f1_score(data.y_test, y_pred, average="macro"),
+        "precision": precision_score(data.y_test, y_pred, average="macro", zero_division=0),
+        "recall": recall_score(data.y_test, y_pred, average="macro", zero_division=0),
+        "classification_report": classification_report(
+            data.y_test, y_pred, digits=4, zero_division=0
+        ),
+    }
+
+
+# ==================== PIPELINE ====================
+def train(
+    data_path: str,
+    output_dir: str,
+    cache_dir: str,
+    model_names: List[str],
+    search: str = SEARCH_GRID,
+    halving_factor: int = 3,
+    n_jobs: int = -1,
+    n_splits: int = CV_FOLDS,
+    allow_encoding_mismatch: bool = False,
+) -> Dict[str, Any]:
+    """
+    Chạy cả pipeline và lưu models vào output_dir
+
+    Args:
+        allow_encoding_mismatch: Vẫn train khi encoding của dữ liệu khác
+            config.py (models sẽ không dùng được với backend hiện tại)
+
+    Returns:
+        Report (cũng được ghi vào output_dir/training_report.json)
+
+    Raises:
+        SystemExit: Nếu encoding khác config.py và không có
+            allow_encoding_mismatch (trước khi search / ghi vào output_dir)
+    """
+    timer = StageTimer()
+
+    with timer.stage("hash data"):
+        data_sha256 = file_sha256(data_path)
+    data_key = _digest(data_sha256, PREPROCESS_VERSION, RANDOM_STATE, TEST_SIZE, FEATURE_ORDER)
+    data_cache_dir = os.path.join(cache_dir, data_key)
+
+    data = TrainingData.load(data_cache_dir)
+    if data is None:
+        with timer.stage("preprocess"):
+            data = preprocess(pd.read_csv(data_path, low_memory=False))
+            data.save(data_cache_dir)
+    else:
+        print(f"✅ Preprocessed data loaded from cache {data_cache_dir}")
+
+    mismatched = check_encoding(data.encoding_maps)
+    if mismatched:
+        message = (
+            f"❌ Encoding of {mismatched} differs from config.py; the backend will "
+            "encode inputs / decode outputs differently from training"
+        )
+        if not allow_encoding_mismatch:
+            raise SystemExit(
+                f"{message}. Update ENCODING_MAPS / CANCER_TYPE_DETAILED or rerun "
+                "with --allow-encoding-mismatch"
+            )
+        print(message, file=sys.stderr)
+
+    with timer.stage("folds"):
+        folds = load_folds(data_cache_dir, data, n_splits)
+
+    report: Dict[str, Any] = {
+        "data": {
+            "path": data_path,
+            "sha256": data_sha256,
+            "cache_key": data_key,
+            "train_rows": len(data.y_train),
+            "test_rows": len(data.y_test),
+            "class_counts": {
+                str(code): count for code, count in sorted(Counter(data.y_train.tolist()).items())
+            },
+            "encoding_maps": data.encoding_maps,
+            "encoding_mismatch": mismatched,
+        },
+        "search": search,
+        "cv_folds": n_splits,
+        "scoring": SCORING,
+        "models": {},
+        "versions": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scikit-learn": sklearn.__version__,
+            "joblib": joblib.__version__,
+        },
+    }
+    os.makedirs(output_dir, exist_ok=True)
+
+    for name in model_names:
+        space = SEARCH_SPACES[name]
+        checkpoint_path = os.path.join(
+            data_cache_dir,
+            "search",
+            f"{_digest(name, repr(space.estimator()), n_splits)}.jsonl",
+        )
+        searcher = CandidateSearch(name, data, folds, checkpoint_path, n_jobs=n_jobs)
+        print(f"⏳ {name}: {len(space.candidates)} candidate(s) x {n_splits} folds ({search})")
+
+        with timer.stage(f"search {name}"):
+            if search == SEARCH_HALVING:
+                best_params, cv_score = searcher.halving(halving_factor)
+            else:
+                best_params, cv_score = searcher.grid()
+        print(
+            f"✅ {name} best params: {best_params} ({SCORING} {cv_score:.4f}, "
+            f"{searcher.fits} fit(s), {searcher.resumed} from checkpoint)"
+        )
+
+        with timer.stage(f"refit {name}"):
+            model = clone(searcher.estimator).set_params(**best_params)
+            model.fit(data.X_train, data.y_train)
+
+        with timer.stage(f"evaluate {name}"):
+            metrics = evaluate_model(model, data)
+        print(
+            f"   test accuracy {metrics['accuracy']:.4f}  f1_macro {metrics['f1_macro']:.4f}"
+        )
+
+        file_name = os.path.basename(MODEL_PATHS[name])
+        with timer.stage(f"save {name}"):
+            _atomic_write(
+                os.path.join(output_dir, file_name), lambda f: joblib.dump(model, f)
+            )
+
+        report["models"][name] = {
+            "file": file_name,
+            "best_params": best_params,
+            "cv_score": cv_score,
+            "candidates": len(space.candidates),
+            "fits": searcher.fits,
+            "fits_from_checkpoint": searcher.resumed,
+            "test": metrics,
+        }
+
+    report["stages"] = timer.stages
+    report_path = os.path.join(output_dir, "training_report.json")
+    _atomic_write(
+        report_path,
+        lambda f: f.write(json.dumps(report, ensure_ascii=False, indent=2).encode()),
+    )
+
+    print("\n" + timer.summary())
+    print(f"✅ Trained {len(model_names)} model(s) -> {output_dir} (report: {report_path})")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Train các models của backend (quy trình của main.ipynb)"
+    )
+    parser.add_argument(
+        "--data",
+        default=DEFAULT_DATA_PATH,
+        help=f"File CSV METABRIC (mặc định {DEFAULT_DATA_PATH})",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=DEFAULT_OUTPUT_DIR,
+        help=f"Thư mục lưu models (mặc định {DEFAULT_OUTPUT_DIR})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Thư mục cache preprocess / folds / checkpoint (mặc định {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--models",
+        help="Chỉ train các models này, phân cách bởi dấu phẩy (mặc định: tất cả)",
+    )
+    parser.add_argument(
+        "--search",
+        choices=[SEARCH_GRID, SEARCH_HALVING],
+        default=SEARCH_GRID,
+        help="grid = tất cả candidates trên toàn bộ tập train (như notebook), "
+        "halving = successive halving",
+    )
+    parser.add_argument(
+        "--halving-factor",
+        type=int,
+        default=3,
+        help="Với --search halving: tỉ lệ loại candidates / tăng số mẫu mỗi vòng",
+    )
+    parser.add_argument(
+        "--n-jobs", type=int, default=-1, help="Số process fit song song (-1 = tất cả CPU)"
+    )
+    parser.add_argument(
+        "--cv", type=int, default=CV_FOLDS, help=f"Số fold (mặc định {CV_FOLDS})"
+    )
+    parser.add_argument(
+        "--allow-encoding-mismatch",
+        action="store_true",
+        help="Vẫn train và lưu models khi encoding của dữ liệu khác config.py "
+        "(mặc định: dừng với exit code khác 0)",
+    )
+    args = parser.parse_args(argv)
+
+    model_names = list(SEARCH_SPACES)
+    if args.models:
+        model_names = [name.strip() for name in args.models.split(",")]
+        unknown = [name for name in model_names if name not in SEARCH_SPACES]
+        if unknown:
+            parser.error(f"Unknown models {unknown}, expected {list(SEARCH_SPACES)}")
+    if args.halving_factor < 2:
+        parser.error("--halving-factor must be >= 2")
+    if not os.path.exists(args.data):
+        raise SystemExit(f"❌ Data file not found: {args.data}")
+
+    train(
+        args.data,
+        args.output,
+        args.cache_dir,
+        model_names,
+        search=args.search,
+        halving_factor=args.halving_factor,
+        n_jobs=args.n_jobs,
+        n_splits=args.cv,
+        allow_encoding_mismatch=args.allow_encoding_mismatch,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -49,7 +49,7 @@ function App() {
     setPrediction(null);
 
     try {
-      const response = await fetch("http://localhost:8000/predict-all", {
+      const response = await fetch("http://localhost:8000/explain", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -10,6 +10,7 @@ const PredictionDetails: React.FC<PredictionDetailsProps> = ({
   prediction,
 }) => {
   const [expandedProbs, setExpandedProbs] = useState<Record<string, boolean>>({});
+  const [expandedAttrs, setExpandedAttrs] = useState<Record<string, boolean>>({});
 
   const getColorByType = (code: number): string => {
     const colors = {
@@ -36,6 +37,17 @@ const PredictionDetails: React.FC<PredictionDetailsProps> = ({
     }));
   };
 
+  const toggleAttributions = (modelName: string) => {
+    setExpandedAttrs((prev) => ({
+      ...prev,
+      [modelName]: !prev[modelName],
+    }));
+  };
+
+  const formatContribution = (value: number): string => {
+    return `${value >= 0 ? "+" : ""}${(value * 100).toFixed(2)}%`;
+  };
+
   const formatPercentage = (value: number): string => {
     return `${(value * 100).toFixed(2)}%`;
   };
@@ -119,6 +131,59 @@ const PredictionDetails: React.FC<PredictionDetailsProps> = ({
                   )}
                 </div>
               )}
+
+            {/* Attributions */}
+            {modelPred.attributions && (
+              <div className="attributions-section">
+                <button
+                  className="toggle-probabilities-btn"
+                  onClick={() => toggleAttributions(modelPred.model_name)}
+                >
+                  {expandedAttrs[modelPred.model_name]
+                    ? "▼ Ẩn giải thích"
+                    : "▶ Hiển thị giải thích"}
+                </button>
+                {expandedAttrs[modelPred.model_name] && (
+                  <div className="attributions-list">
+                    <p className="attribution-base">
+                      Xác suất nền:{" "}
+                      {formatPercentage(modelPred.attributions.base_value)}
+                    </p>
+                    {(() => {
+                      const entries = Object.entries(
+                        modelPred.attributions.contributions
+                      ).sort(([, a], [, b]) => Math.abs(b) - Math.abs(a));
+                      const maxAbs = Math.max(
+                        ...entries.map(([, value]) => Math.abs(value)),
+                        1e-9
+                      );
+                      return entries.map(([feature, value]) => (
+                        <div key={feature} className="attribution-item">
+                          <span className="attribution-feature">{feature}</span>
+                          <span
+                            className={`attribution-value ${
+                              value >= 0 ? "positive" : "negative"
+                            }`}
+                          >
+                            {formatContribution(value)}
+                          </span>
+                          <div className="prob-bar-container">
+                            <div
+                              className={`attribution-bar ${
+                                value >= 0 ? "positive" : "negative"
+                              }`}
+                              style={{
+                                width: `${(Math.abs(value) / maxAbs) * 100}%`,
+                              }}
+                            />
+                          </div>
+                        </div>
+                      ));
+                    })()}
+                  </div>
+                )}
+              </div>
+            )}
           </div>
         ))}
       </div>
@@ -34,10 +34,22 @@ export interface ModelPrediction {
   cancer_type_code: number;
   confidence?: number;
   probabilities?: Record<string, number>;
+  // null nếu model không tính được attributions (xem attribution_errors)
+  attributions?: Attribution | null;
+}
+
+// Đóng góp của từng feature vào xác suất của class được dự đoán
+// (base_value + tổng contributions = xác suất đó)
+export interface Attribution {
+  method: "tree_path" | "kernel";
+  base_value: number;
+  contributions: Record<string, number>;
 }
 
 export interface MultiModelPredictionResult {
   predictions: ModelPrediction[];
+  failed_models?: Record<string, string> | null;
+  attribution_errors?: Record<string, string> | null;
 }
 
 export interface APIError {